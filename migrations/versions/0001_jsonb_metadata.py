@@ -0,0 +1,63 @@
+"""Store ai_metadata and criteria as JSONB with indexes used by metadata filters
+
+Revision ID: 0001_jsonb_metadata
+Revises:
+Create Date: 2026-10-16 21:00:00
+
+Tables are created by ``init_db``; this revision converts databases created
+before ``messages.ai_metadata`` and ``alert_configs.criteria`` became JSONB.
+Every statement is idempotent, so it can also run against a database that
+``init_db`` already created with the current models.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_jsonb_metadata'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    if _has_table("messages"):
+        # The old GIN index was declared on a json column and cannot survive the type change
+        op.execute("DROP INDEX IF EXISTS idx_messages_ai_metadata")
+        op.execute("ALTER TABLE messages ALTER COLUMN ai_metadata TYPE JSONB USING ai_metadata::jsonb")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_ai_metadata "
+            "ON messages USING gin (ai_metadata jsonb_path_ops)"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_ai_keywords "
+            "ON messages USING gin ((ai_metadata -> 'keywords'))"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_ai_sentiment_timestamp "
+            "ON messages ((ai_metadata ->> 'sentiment'), message_timestamp)"
+        )
+
+    if _has_table("alert_configs"):
+        op.execute("ALTER TABLE alert_configs ALTER COLUMN criteria TYPE JSONB USING criteria::jsonb")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    if _has_table("messages"):
+        op.execute("DROP INDEX IF EXISTS idx_messages_ai_sentiment_timestamp")
+        op.execute("DROP INDEX IF EXISTS idx_messages_ai_keywords")
+        op.execute("DROP INDEX IF EXISTS idx_messages_ai_metadata")
+        op.execute("ALTER TABLE messages ALTER COLUMN ai_metadata TYPE JSON USING ai_metadata::json")
+
+    if _has_table("alert_configs"):
+        op.execute("ALTER TABLE alert_configs ALTER COLUMN criteria TYPE JSON USING criteria::json")
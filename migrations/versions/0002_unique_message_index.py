@@ -0,0 +1,68 @@
+"""Make the telegram_message_id/channel_id index of messages unique
+
+Revision ID: 0002_unique_message_index
+Revises: 0001_jsonb_metadata
+Create Date: 2026-10-16 21:15:00
+
+The batched ingest writer inserts messages with ON CONFLICT
+(telegram_message_id, channel_id, message_timestamp) DO NOTHING, which needs
+a unique index on exactly these columns; databases created before it only
+have a plain index on (telegram_message_id, channel_id), and every ingest
+batch fails until this revision has run. Duplicate messages are deleted,
+keeping the first one stored, and the index is recreated as unique.
+message_timestamp is part of it because unique indexes of the partitioned
+table must contain the partition key. Independent of partitioning; skipped
+if the index is already unique.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_unique_message_index'
+down_revision = '0001_jsonb_metadata'
+branch_labels = None
+depends_on = None
+
+_INDEX = "idx_messages_telegram_id_channel"
+
+
+def _index_is_unique(bind) -> bool:
+    if bind.dialect.name == "postgresql":
+        return bool(bind.execute(
+            sa.text("SELECT indisunique FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": _INDEX}
+        ).scalar())
+    return any(index["name"] == _INDEX and index["unique"] for index in sa.inspect(bind).get_indexes("messages"))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("messages") or _index_is_unique(bind):
+        return
+
+    if bind.dialect.name == "postgresql":
+        # Joins through the existing (telegram_message_id, channel_id) index
+        op.execute(
+            "DELETE FROM messages AS duplicate USING messages AS kept "
+            "WHERE duplicate.telegram_message_id = kept.telegram_message_id "
+            "AND duplicate.channel_id = kept.channel_id "
+            "AND duplicate.message_timestamp = kept.message_timestamp "
+            "AND duplicate.id > kept.id"
+        )
+    else:
+        op.execute(
+            "DELETE FROM messages WHERE id NOT IN ("
+            "SELECT min(id) FROM messages GROUP BY telegram_message_id, channel_id, message_timestamp)"
+        )
+    op.execute(f"DROP INDEX IF EXISTS {_INDEX}")
+    op.execute(f"CREATE UNIQUE INDEX {_INDEX} ON messages (telegram_message_id, channel_id, message_timestamp)")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("messages") or not _index_is_unique(bind):
+        return
+
+    op.execute(f"DROP INDEX IF EXISTS {_INDEX}")
+    op.execute(f"CREATE INDEX {_INDEX} ON messages (telegram_message_id, channel_id)")
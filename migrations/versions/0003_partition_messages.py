@@ -0,0 +1,145 @@
+"""Range-partition messages by message_timestamp
+
+Revision ID: 0003_partition_messages
+Revises: 0002_unique_message_index
+Create Date: 2026-10-16 21:30:00
+
+Rebuilds the plain messages table as a table partitioned by
+message_timestamp (PARTITION_INTERVAL), copying its rows into one partition
+per period plus a default partition. The primary key becomes
+(id, message_timestamp) and the telegram_message_id/channel_id unique index
+keeps message_timestamp, as PostgreSQL requires the partition key in unique
+indexes. The table is locked while rows are copied; run it during a
+maintenance window on large databases. Afterwards the smart analysis service
+keeps future partitions created and retires old ones.
+
+Nothing is converted when PARTITION_ENABLED is false. To partition such a
+database later, set PARTITION_ENABLED=true, downgrade to
+0002_unique_message_index (a no-op on a plain table) and upgrade again.
+
+The column list, keys and indexes below are the messages schema as of this
+revision, so later model changes do not alter what this revision builds.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from alembic import op
+import sqlalchemy as sa
+
+from shared.config import get_settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_partition_messages'
+down_revision = '0002_unique_message_index'
+branch_labels = None
+depends_on = None
+
+TABLE = "messages"
+DEFAULT_PARTITION = "messages_default"
+
+COLUMNS = (
+    "id", "telegram_message_id", "channel_id", "message_text", "media_id",
+    "message_timestamp", "created_at", "ai_metadata",
+)
+
+FOREIGN_KEYS = (
+    "ALTER TABLE messages ADD FOREIGN KEY (media_id) REFERENCES media (id) ON DELETE SET NULL",
+    "ALTER TABLE messages ADD FOREIGN KEY (channel_id) REFERENCES channels (id) ON DELETE CASCADE",
+)
+
+INDEXES = (
+    "CREATE INDEX idx_messages_message_timestamp ON messages (message_timestamp)",
+    "CREATE INDEX idx_messages_ai_sentiment_timestamp ON messages ((ai_metadata ->> 'sentiment'), message_timestamp)",
+    "CREATE INDEX idx_messages_ai_metadata ON messages USING gin (ai_metadata jsonb_path_ops)",
+    "CREATE INDEX idx_messages_ai_keywords ON messages USING gin ((ai_metadata -> 'keywords'))",
+    "CREATE INDEX idx_messages_channel_id ON messages (channel_id)",
+    "CREATE UNIQUE INDEX idx_messages_telegram_id_channel "
+    "ON messages (telegram_message_id, channel_id, message_timestamp)",
+)
+
+INTERVALS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+
+def _relkind() -> Optional[str]:
+    """'r' for a plain messages table, 'p' for a partitioned one, None if it does not exist."""
+    return op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": TABLE}
+    ).scalar()
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _period_start(value: datetime, interval: str) -> datetime:
+    start = _utc(value).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _periods(first: datetime, now: datetime, interval: str, premake: int) -> List[Tuple[datetime, datetime]]:
+    """Periods from the one containing ``first`` to ``premake`` periods after ``now``."""
+    size = INTERVALS[interval]
+    last = _period_start(now, interval) + size * premake
+    periods = []
+    start = _period_start(min(_utc(first), now), interval)
+    while start <= last:
+        periods.append((start, start + size))
+        start += size
+    return periods
+
+
+def _rebuild(partition_clause: str, primary_key: List[str], periods: List[Tuple[datetime, datetime]]) -> None:
+    """Recreate the messages table from the current one with this revision's keys and indexes."""
+    previous = f"{TABLE}_previous"
+    columns = ", ".join(COLUMNS)
+    sequence = op.get_bind().execute(sa.text(f"SELECT pg_get_serial_sequence('{TABLE}', 'id')")).scalar()
+
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {previous}")
+    op.execute(f"CREATE TABLE {TABLE} (LIKE {previous} INCLUDING DEFAULTS INCLUDING COMMENTS) {partition_clause}")
+    if partition_clause:
+        op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+        for start, end in periods:
+            # Partition bounds are DDL and cannot be bound parameters
+            op.execute(
+                f"CREATE TABLE {TABLE}_p{start:%Y%m%d} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+    op.execute(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {previous}")
+
+    # Keep the id sequence alive when the previous table (and its indexes) are dropped
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute(f"DROP TABLE {previous}")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id")
+
+    # Unique keys of a partitioned table must include the partition key
+    op.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY ({', '.join(primary_key)})")
+    for statement in FOREIGN_KEYS + INDEXES:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    partitions = get_settings().partitions
+    if op.get_bind().dialect.name != "postgresql" or not partitions.enabled or _relkind() != "r":
+        return
+    if partitions.interval not in INTERVALS:
+        raise ValueError(f"Unsupported PARTITION_INTERVAL '{partitions.interval}', expected one of {sorted(INTERVALS)}")
+
+    op.execute("SET LOCAL TimeZone = 'UTC'")
+    now = datetime.now(timezone.utc)
+    first = op.get_bind().execute(sa.text(f"SELECT min(message_timestamp) FROM {TABLE}")).scalar()
+    periods = _periods(first or now, now, partitions.interval, partitions.premake)
+    _rebuild("PARTITION BY RANGE (message_timestamp)", ["id", "message_timestamp"], periods)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql" or _relkind() != "p":
+        return
+    _rebuild("", ["id"], [])
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tel-Insights Metadata Query Benchmark
+
+Seeds a scratch PostgreSQL schema with synthetic analyzed messages and runs
+EXPLAIN ANALYZE on the topic, keyword and sentiment filters used by alerts
+and summaries, reporting which indexes the planner picked and how long each
+query took. Requires the PostgreSQL database configured in DATABASE_URL.
+
+Usage:
+    python scripts/benchmark_metadata_queries.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sqlalchemy import func, select, text  # noqa: E402
+
+from shared.database import sync_engine  # noqa: E402
+from shared.models import (  # noqa: E402
+    Base,
+    Message,
+    metadata_keywords_filter,
+    metadata_sentiment_filter,
+    metadata_topics_filter,
+)
+
+SCHEMA = "metadata_benchmark"
+
+SEED_SQL = text("""
+    INSERT INTO messages (telegram_message_id, channel_id, message_text, message_timestamp, ai_metadata)
+    SELECT g, :channel_id, 'benchmark message ' || g,
+           now() - (g % 10080) * interval '1 minute',
+           jsonb_build_object(
+               'topics', jsonb_build_array('topic' || (g % 50), 'topic' || (g % 7)),
+               'keywords', jsonb_build_array('kw' || (g % 500), 'kw' || (g % 37)),
+               'sentiment', (ARRAY['positive', 'negative', 'neutral'])[1 + g % 3],
+               'analysis_status', 'final'
+           )
+    FROM generate_series(1, :rows) AS g
+""")
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Walk an EXPLAIN (FORMAT JSON) plan tree."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(connection, statement) -> Dict[str, Any]:
+    """Run EXPLAIN ANALYZE on a statement and summarize the plan."""
+    dialect = connection.dialect
+    compiled = statement.compile(connection)
+    params = {}
+    for key, value in compiled.params.items():
+        # exec_driver_sql skips type processing, so serialize JSONB parameters here
+        processor = compiled.binds[key].type.dialect_impl(dialect).bind_processor(dialect)
+        params[key] = processor(value) if processor else value
+    plan = connection.exec_driver_sql(
+        "EXPLAIN (ANALYZE, FORMAT JSON) " + str(compiled), params
+    ).scalar()[0]
+    nodes = list(plan_nodes(plan["Plan"]))
+    return {
+        "indexes": sorted({node["Index Name"] for node in nodes if "Index Name" in node}),
+        "seq_scans": sum(1 for node in nodes if node["Node Type"] == "Seq Scan"),
+        "rows": plan["Plan"].get("Actual Rows"),
+        "execution_ms": plan["Execution Time"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Messages to seed")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the '{SCHEMA}' schema afterwards")
+    args = parser.parse_args()
+
+    if sync_engine.dialect.name != "postgresql":
+        print(f"❌ PostgreSQL is required, DATABASE_URL uses '{sync_engine.dialect.name}'")
+        return 1
+
+    queries: Dict[str, Any] = {
+        "topics @>": select(Message.id).where(metadata_topics_filter(["topic42"])),
+        "keywords ?|": select(Message.id).where(metadata_keywords_filter(["kw123", "kw321"])),
+        "sentiment + window": select(func.count(Message.id)).where(
+            metadata_sentiment_filter("negative"),
+            Message.message_timestamp >= datetime.now(timezone.utc) - timedelta(hours=1)
+        ),
+    }
+
+    with sync_engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        try:
+            Base.metadata.create_all(bind=connection)
+            connection.execute(text("INSERT INTO channels (id, name) VALUES (-1, 'benchmark')"))
+            print(f"🌱 Seeding {args.rows} messages...")
+            connection.execute(SEED_SQL, {"channel_id": -1, "rows": args.rows})
+            connection.execute(text("ANALYZE messages"))
+            connection.commit()
+
+            results: List[str] = []
+            for name, statement in queries.items():
+                summary = explain(connection, statement)
+                used = ", ".join(summary["indexes"]) or "none"
+                results.append(
+                    f"{name:<20} {summary['execution_ms']:>9.2f} ms  "
+                    f"seq scans: {summary['seq_scans']}  indexes: {used}"
+                )
+            print("\n".join(results))
+        finally:
+            connection.rollback()
+            connection.execute(text("SET search_path TO DEFAULT"))
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
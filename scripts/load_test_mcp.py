@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tel-Insights MCP Load Test
+
+Fires concurrent summarize_news and topic_trends requests at a running
+Smart Analysis service while probing /health, and reports whether the tool
+requests overlapped (wall time well below the sum of request latencies) and
+how long /health took while they were in flight.
+
+Usage:
+    python scripts/load_test_mcp.py --url http://localhost:8003 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+import httpx
+
+
+async def timed(client: httpx.AsyncClient, method: str, path: str, **kwargs) -> Tuple[float, int]:
+    """Send a request and return its latency in seconds and its status code."""
+    started = time.perf_counter()
+    response = await client.request(method, path, **kwargs)
+    return time.perf_counter() - started, response.status_code
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]) -> None:
+    """Call /health every 50 ms until stopped."""
+    while not stop.is_set():
+        latency, _ = await timed(client, "GET", "/health")
+        latencies.append(latency)
+        await asyncio.sleep(0.05)
+
+
+async def run(url: str, concurrency: int, hours: int) -> int:
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        stop = asyncio.Event()
+        health_latencies: List[float] = []
+        prober = asyncio.create_task(probe_health(client, stop, health_latencies))
+
+        requests = [
+            timed(client, "POST", "/tools/summarize_news", json={"time_range_hours": hours})
+            if i % 2 == 0 else
+            timed(client, "POST", "/tools/topic_trends", json={"time_range_hours": hours})
+            for i in range(concurrency)
+        ]
+        started = time.perf_counter()
+        results = await asyncio.gather(*requests)
+        wall = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    latencies = [latency for latency, _ in results]
+    statuses = sorted({status for _, status in results})
+    overlap = sum(latencies) / wall if wall else 0.0
+    print(f"🔁 {concurrency} tool requests in {wall:.2f}s (statuses: {statuses})")
+    print(f"   latency p50 {statistics.median(latencies):.3f}s, max {max(latencies):.3f}s")
+    print(f"   overlap factor {overlap:.1f}x (1.0x means the requests were served one after another)")
+    if health_latencies:
+        print(
+            f"💓 /health during load: p50 {statistics.median(health_latencies) * 1000:.1f} ms, "
+            f"max {max(health_latencies) * 1000:.1f} ms over {len(health_latencies)} probes"
+        )
+    return 0 if statuses == [200] else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8003", help="Smart Analysis service URL")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent tool requests")
+    parser.add_argument("--hours", type=int, default=24, help="Time range of each request")
+    args = parser.parse_args()
+    return asyncio.run(run(args.url, args.concurrency, args.hours))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
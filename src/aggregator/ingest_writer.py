@@ -0,0 +1,396 @@
+"""
+Tel-Insights Ingest Writer
+
+Asynchronous, batched database writer for the aggregator ingest path.
+Messages and their media are queued by the Telethon handlers and flushed in
+micro-batches using multi-row INSERT ... ON CONFLICT on the async engine.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import get_settings
+from shared.database import get_async_db
+from shared.extraction import LocalExtractor, get_local_extractor
+from shared.logging import LoggingMixin, get_logger, log_database_operation
+from shared.messaging import AsyncMessageProducer, create_message_analyzed_event
+from shared.models import Media, MediaFileIdentity, Message as MessageModel
+
+from .media_dedup import MediaIdentityIndex, TelegramFileKey
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+@dataclass
+class IngestMedia:
+    """Media attached to an ingested message."""
+
+    media_hash: str
+    storage_url: Optional[str] = None  # None when the Media row is already known to exist
+    media_type: Optional[str] = None
+    file_size_bytes: Optional[int] = None
+    file_key: Optional[TelegramFileKey] = None
+
+
+@dataclass
+class _PendingMessage:
+    """Queued message waiting for its batch to be flushed."""
+
+    row: Dict[str, Any]  # Message columns, validated at submit; media_id is resolved at flush
+    media: Optional[IngestMedia]
+    future: "asyncio.Future[bool]"
+
+
+class IngestWriter(LoggingMixin):
+    """
+    Collects messages from the event handlers and writes them in micro-batches.
+
+    A batch is flushed when it reaches ``batch_size`` messages or when its oldest
+    message has waited ``flush_interval_ms``. Each batch is a single transaction:
+    one multi-row insert for new media, one lookup of media IDs, one insert for
+    file identities and one multi-row insert for messages. Messages are stored
+    with provisional ``ai_metadata`` from the local extractor. Once committed,
+    a provisional analyzed event is published for each new message, so the
+    streaming alert evaluator can match it before the LLM analysis.
+
+    Messages are validated when submitted, so a malformed one fails on its own.
+    If a batch insert still fails (e.g. a foreign key violation), its messages
+    are retried one per transaction and only the offending ones fail.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_async_db,
+        media_index: Optional[MediaIdentityIndex] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        extractor: Optional[LocalExtractor] = None,
+        event_producer: Optional[AsyncMessageProducer] = None
+    ) -> None:
+        """
+        Initialize the ingest writer.
+
+        Args:
+            session_factory: Async context manager factory yielding an AsyncSession
+            media_index: Identity index to update once media rows are persisted
+            batch_size: Maximum messages per batch (defaults to settings)
+            flush_interval_ms: Maximum batching delay in milliseconds (defaults to settings)
+            queue_size: Ingest queue capacity (defaults to settings)
+            extractor: Local extractor for provisional metadata (defaults to the shared one if EXTRACTION_ENABLED)
+            event_producer: Producer of provisional analyzed events (none are published without it)
+        """
+        self.session_factory = session_factory
+        self.media_index = media_index
+        self.extractor = extractor or (get_local_extractor() if settings.extraction.enabled else None)
+        self.event_producer = event_producer
+        self.batch_size = max(1, batch_size or settings.ingest.batch_size)
+        self.flush_interval = (flush_interval_ms or settings.ingest.flush_interval_ms) / 1000.0
+        self._queue: "asyncio.Queue[_PendingMessage]" = asyncio.Queue(maxsize=queue_size or settings.ingest.queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self.logger.info(
+            "IngestWriter initialized.",
+            batch_size=self.batch_size,
+            flush_interval_ms=round(self.flush_interval * 1000),
+            queue_size=self._queue.maxsize
+        )
+
+    async def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            self.logger.info("IngestWriter flush task started.")
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the background task."""
+        if self._task is None:
+            return
+        self.logger.info("Stopping IngestWriter, draining queue...", queued=self._queue.qsize())
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.logger.info("IngestWriter stopped.")
+
+    async def submit(self, message_data: Dict[str, Any], media: Optional[IngestMedia] = None) -> bool:
+        """
+        Queue a message for storage and wait until its batch is committed.
+
+        Only the calling handler waits; the event loop stays free while the batch fills.
+
+        Args:
+            message_data: Message information (message_id, channel_id, message_text, message_timestamp)
+            media: Attached media, if any
+
+        Returns:
+            bool: True if the message was inserted, False if it already existed
+
+        Raises:
+            KeyError, TypeError, ValueError: If the message data is malformed
+            Exception: The database error if the message could not be written
+        """
+        row = self._message_row(message_data)
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingMessage(row, media, future))
+        return await future
+
+    def _message_row(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert submitted message data to message columns.
+
+        Args:
+            data: Message information as submitted
+
+        Returns:
+            Dict[str, Any]: Column values, without media_id
+
+        Raises:
+            KeyError, TypeError, ValueError: If a required field is missing or invalid
+        """
+        return {
+            "telegram_message_id": int(data['message_id']),
+            "channel_id": int(data['channel_id']),
+            "message_text": data.get('message_text'),
+            "message_timestamp": datetime.fromtimestamp(float(data['message_timestamp']), tz=timezone.utc),
+            "ai_metadata": (
+                self.extractor.provisional_metadata(data.get('message_text')) if self.extractor else None
+            ),
+        }
+
+    async def _run(self) -> None:
+        """Collect queued messages into batches and flush them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        pass
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                await self._flush(batch)
+            except Exception as e:
+                # Keep the task alive: a dead task would leave submitters and stop() waiting forever
+                self.logger.error("IngestWriter flush failed.", batch_size=len(batch), error=str(e), exc_info=True)
+                self._fail(batch, e)
+            finally:
+                self._fail(batch, RuntimeError("IngestWriter stopped before the message was written"))
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _fail(batch: List[_PendingMessage], error: BaseException) -> None:
+        """Fail every message of a batch that has no outcome yet."""
+        for pending in batch:
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    @staticmethod
+    def _insert(session: AsyncSession, model: Any):
+        """Get a dialect-specific INSERT supporting ON CONFLICT for the session's engine."""
+        dialect_name = session.bind.dialect.name
+        try:
+            return _DIALECT_INSERTS[dialect_name](model)
+        except KeyError:
+            raise NotImplementedError(f"Batched ingest is not supported on dialect '{dialect_name}'")
+
+    async def _flush(self, batch: List[_PendingMessage]) -> None:
+        """
+        Write one batch, falling back to one transaction per message if it fails.
+
+        Args:
+            batch: Queued messages to write
+        """
+        self.logger.debug(log_database_operation("batch_insert", MessageModel.__tablename__, batch_size=len(batch)))
+        try:
+            await self._write(batch)
+            return
+        except Exception as e:
+            self.logger.error(
+                log_database_operation(
+                    "batch_insert_failed",
+                    MessageModel.__tablename__,
+                    batch_size=len(batch),
+                    error=str(e)
+                ),
+                exc_info=True
+            )
+            if len(batch) == 1:
+                self._fail(batch, e)
+                return
+
+        for pending in batch:
+            try:
+                await self._write([pending])
+            except Exception as e:
+                self.logger.error(
+                    log_database_operation(
+                        "insert_failed",
+                        MessageModel.__tablename__,
+                        message_id=pending.row["telegram_message_id"],
+                        channel_id=pending.row["channel_id"],
+                        error=str(e)
+                    )
+                )
+                self._fail([pending], e)
+
+    async def _write(self, batch: List[_PendingMessage]) -> None:
+        """
+        Write messages and their media in a single transaction and resolve their futures.
+
+        Args:
+            batch: Queued messages to write
+
+        Raises:
+            Exception: The database error; the transaction is rolled back and no future is resolved
+        """
+        async with self.session_factory() as session:
+            try:
+                # New media rows; duplicates of existing hashes are ignored by the database
+                new_media = {}
+                for pending in batch:
+                    media = pending.media
+                    if media and media.storage_url and media.media_hash not in new_media:
+                        new_media[media.media_hash] = {
+                            "media_hash": media.media_hash,
+                            "storage_url": media.storage_url,
+                            "media_type": media.media_type or "unknown",
+                            "file_size_bytes": media.file_size_bytes,
+                        }
+                if new_media:
+                    await session.execute(
+                        self._insert(session, Media).values(list(new_media.values()))
+                        .on_conflict_do_nothing(index_elements=["media_hash"])
+                    )
+
+                # Resolve media IDs for every hash referenced in the batch
+                media_ids: Dict[str, int] = {}
+                media_hashes = {pending.media.media_hash for pending in batch if pending.media}
+                if media_hashes:
+                    result = await session.execute(
+                        select(Media.media_hash, Media.id).where(Media.media_hash.in_(media_hashes))
+                    )
+                    media_ids = {media_hash: media_id for media_hash, media_id in result.all()}
+
+                identities = {}
+                for pending in batch:
+                    media = pending.media
+                    if media and media.file_key and media.media_hash in media_ids:
+                        identities[media.file_key] = (media_ids[media.media_hash], media.media_hash)
+                if identities:
+                    await session.execute(
+                        self._insert(session, MediaFileIdentity).values([
+                            {
+                                "file_kind": key.file_kind,
+                                "telegram_file_id": key.telegram_file_id,
+                                "access_hash": key.access_hash,
+                                "file_size_bytes": key.file_size_bytes,
+                                "media_id": media_id,
+                            }
+                            for key, (media_id, _) in identities.items()
+                        ]).on_conflict_do_nothing(
+                            index_elements=["file_kind", "telegram_file_id", "access_hash", "file_size_bytes"]
+                        )
+                    )
+
+                message_rows = []
+                for pending in batch:
+                    media_hash = pending.media.media_hash if pending.media else None
+                    if media_hash and media_hash not in media_ids:
+                        self.logger.warning(
+                            "Media hash provided, but media record not found in DB.",
+                            media_hash=media_hash,
+                            message_id=pending.row["telegram_message_id"]
+                        )
+                    message_rows.append({**pending.row, "media_id": media_ids.get(media_hash) if media_hash else None})
+                result = await session.execute(
+                    self._insert(session, MessageModel).values(message_rows)
+                    .on_conflict_do_nothing(index_elements=["telegram_message_id", "channel_id", "message_timestamp"])
+                    .returning(MessageModel.telegram_message_id, MessageModel.channel_id)
+                )
+                inserted = {(row[0], row[1]) for row in result.all()}
+
+                await session.commit()
+
+            except Exception:
+                await session.rollback()
+                raise
+
+        if self.media_index:
+            for key, (media_id, media_hash) in identities.items():
+                self.media_index.remember(key, media_id, media_hash)
+
+        await self._publish_provisional([
+            row for row in message_rows
+            if row["ai_metadata"] and (row["telegram_message_id"], row["channel_id"]) in inserted
+        ])
+
+        for pending, row in zip(batch, message_rows):
+            if not pending.future.done():
+                pending.future.set_result((row["telegram_message_id"], row["channel_id"]) in inserted)
+
+        self.logger.info(
+            log_database_operation(
+                "batch_insert",
+                MessageModel.__tablename__,
+                batch_size=len(batch),
+                inserted=len(inserted),
+                duplicates=len(batch) - len(inserted),
+                new_media=len(new_media)
+            )
+        )
+
+    async def _publish_provisional(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Publish provisional analyzed events for newly stored messages.
+
+        The LLM analysis publishes its own event later; alert windows count
+        each message once. Publish failures are logged, never raised: the
+        messages are already stored.
+
+        Args:
+            rows: Stored message rows with provisional metadata
+        """
+        if not self.event_producer:
+            return
+        for row in rows:
+            try:
+                await self.event_producer.publish_message_analyzed_event(create_message_analyzed_event(
+                    str(row["telegram_message_id"]),
+                    str(row["channel_id"]),
+                    row["message_text"],
+                    row["message_timestamp"].timestamp(),
+                    row["ai_metadata"]
+                ))
+            except Exception as e:
+                self.logger.error(
+                    "Failed to publish provisional analyzed event.",
+                    message_id=row["telegram_message_id"],
+                    channel_id=row["channel_id"],
+                    error=str(e)
+                )
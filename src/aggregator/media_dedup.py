@@ -0,0 +1,155 @@
+"""
+Tel-Insights Media Pre-Deduplication
+
+Recognizes already-stored media from Telegram's photo/document identity
+(id, access hash and size) so reposted files can skip the download entirely.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.cache import LRUCache
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger, log_database_operation
+from shared.models import Media, MediaFileIdentity
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class TelegramFileKey:
+    """Identity of a Telegram photo or document."""
+
+    file_kind: str
+    telegram_file_id: int
+    access_hash: int
+    file_size_bytes: int
+
+
+@dataclass(frozen=True)
+class KnownMedia:
+    """Stored media record matched by a Telegram file identity."""
+
+    media_id: int
+    media_hash: str
+
+
+def _photo_size_bytes(photo: Any) -> Optional[int]:
+    """Get the byte size of the largest photo size, as downloaded by Telethon."""
+    sizes = getattr(photo, 'sizes', None)
+    if not sizes:
+        return None
+    largest = sizes[-1]
+    if getattr(largest, 'size', None) is not None:
+        return largest.size
+    progressive_sizes = getattr(largest, 'sizes', None)  # PhotoSizeProgressive
+    if progressive_sizes:
+        return max(progressive_sizes)
+    return None
+
+
+def get_file_key(media: Any) -> Optional[TelegramFileKey]:
+    """
+    Build the Telegram file identity for message media.
+
+    Args:
+        media: Telethon message media (MessageMediaPhoto / MessageMediaDocument)
+
+    Returns:
+        Optional[TelegramFileKey]: File identity, or None for unsupported media
+    """
+    document = getattr(media, 'document', None)
+    if document is not None and getattr(document, 'id', None) is not None:
+        kind, obj, size = "document", document, getattr(document, 'size', None)
+    else:
+        photo = getattr(media, 'photo', None)
+        if photo is None or getattr(photo, 'id', None) is None:
+            return None
+        kind, obj, size = "photo", photo, _photo_size_bytes(photo)
+
+    access_hash = getattr(obj, 'access_hash', None)
+    if access_hash is None or size is None:
+        return None
+    return TelegramFileKey(kind, obj.id, access_hash, size)
+
+
+class MediaIdentityIndex(LoggingMixin):
+    """
+    Maps Telegram file identities to existing Media rows.
+
+    Lookups go through an in-process LRU first and fall back to the
+    ``media_file_identities`` table.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        """
+        Initialize the identity index.
+
+        Args:
+            max_entries: LRU capacity (defaults to MEDIA_DEDUP_CACHE_SIZE)
+        """
+        self._cache: LRUCache[KnownMedia] = LRUCache(max_entries or settings.media.dedup_cache_size)
+        self.logger.info("MediaIdentityIndex initialized.", cache_size=self._cache.max_entries)
+
+    async def lookup(self, session: AsyncSession, key: TelegramFileKey) -> Optional[KnownMedia]:
+        """
+        Find stored media for a Telegram file identity.
+
+        Args:
+            session: Async database session
+            key: Telegram file identity
+
+        Returns:
+            Optional[KnownMedia]: Matching media record, or None if unseen
+        """
+        known = self._cache.get(key)
+        if known:
+            return known
+
+        self.logger.debug(
+            log_database_operation(
+                "query",
+                MediaFileIdentity.__tablename__,
+                file_kind=key.file_kind,
+                telegram_file_id=key.telegram_file_id
+            )
+        )
+        result = await session.execute(
+            select(Media.id, Media.media_hash).join(
+                MediaFileIdentity, MediaFileIdentity.media_id == Media.id
+            ).where(
+                MediaFileIdentity.file_kind == key.file_kind,
+                MediaFileIdentity.telegram_file_id == key.telegram_file_id,
+                MediaFileIdentity.access_hash == key.access_hash,
+                MediaFileIdentity.file_size_bytes == key.file_size_bytes
+            ).limit(1)
+        )
+        row = result.first()
+
+        if row is None:
+            return None
+        known = KnownMedia(media_id=row[0], media_hash=row[1])
+        self._cache.set(key, known)
+        return known
+
+    def remember(self, key: TelegramFileKey, media_id: int, media_hash: str) -> None:
+        """
+        Cache that a Telegram file identity resolves to a stored media record.
+        
+        The ``media_file_identities`` row itself is written by the ingest writer
+        in the same batch as the media record.
+
+        Args:
+            key: Telegram file identity
+            media_id: ID of the Media row
+            media_hash: SHA256 hash of the media
+        """
+        self._cache.set(key, KnownMedia(media_id=media_id, media_hash=media_hash))
+
+    def stats(self) -> dict:
+        """Get LRU statistics for the identity cache."""
+        return self._cache.stats()
@@ -0,0 +1,136 @@
+"""
+Tel-Insights Media Download Pipeline
+
+Streams Telegram media through an incremental SHA256 hasher into a spool file,
+so that large videos and documents never have to be held in memory in full.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Telethon requires download chunk sizes to be multiples of 4 KB, up to 512 KB.
+_CHUNK_ALIGNMENT = 4096
+_MAX_CHUNK_SIZE = 512 * 1024
+
+
+@dataclass
+class MediaDownload:
+    """Result of streaming a media file through the pipeline."""
+
+    media_hash: str
+    file_size: int
+    spool_path: str
+
+    def cleanup(self) -> None:
+        """Remove the spool file from disk."""
+        try:
+            os.remove(self.spool_path)
+        except FileNotFoundError:
+            pass
+
+
+class MediaDownloadPipeline(LoggingMixin):
+    """
+    Chunked media downloader built on Telethon's ``iter_download``.
+
+    Each chunk updates a running SHA256 digest and is appended to a spool file.
+    A semaphore caps the number of in-flight downloads, so peak memory stays
+    bounded by ``chunk_size * max_concurrent_downloads``.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        chunk_size_kb: Optional[int] = None,
+        max_concurrent_downloads: Optional[int] = None,
+        spool_dir: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the media download pipeline.
+
+        Args:
+            client: Connected Telethon client
+            chunk_size_kb: Download chunk size in KB (defaults to settings)
+            max_concurrent_downloads: In-flight download cap (defaults to settings)
+            spool_dir: Directory for spool files (defaults to settings / system temp dir)
+        """
+        self.client = client
+        chunk_size = (chunk_size_kb or settings.media.download_chunk_size_kb) * 1024
+        # Round down to Telethon's alignment and clamp to its maximum request size
+        self.chunk_size = max(_CHUNK_ALIGNMENT, min(_MAX_CHUNK_SIZE, chunk_size - chunk_size % _CHUNK_ALIGNMENT))
+        self.max_concurrent_downloads = max(1, max_concurrent_downloads or settings.media.max_concurrent_downloads)
+        self.spool_dir = spool_dir or settings.media.spool_dir or None
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_downloads)
+
+        self.logger.info(
+            "MediaDownloadPipeline initialized.",
+            chunk_size=self.chunk_size,
+            max_concurrent_downloads=self.max_concurrent_downloads,
+            spool_dir=self.spool_dir or tempfile.gettempdir()
+        )
+
+    async def download(self, message: Any) -> Optional[MediaDownload]:
+        """
+        Stream the media of a message into a spool file while hashing it.
+
+        Args:
+            message: Telegram message with media
+
+        Returns:
+            Optional[MediaDownload]: Hash, size and spool path, or None if the download was empty.
+            The caller owns the spool file and must call ``cleanup()`` when done.
+        """
+        async with self._semaphore:
+            hasher = hashlib.sha256()
+            file_size = 0
+            fd, spool_path = tempfile.mkstemp(prefix="tel_media_", dir=self.spool_dir)
+
+            self.logger.debug(
+                "Streaming media download started.",
+                message_id=getattr(message, 'id', None),
+                spool_path=spool_path,
+                chunk_size=self.chunk_size
+            )
+            try:
+                with os.fdopen(fd, "wb") as spool_file:
+                    async for chunk in self.client.iter_download(
+                        message.media,
+                        chunk_size=self.chunk_size,
+                        request_size=self.chunk_size
+                    ):
+                        hasher.update(chunk)
+                        spool_file.write(chunk)
+                        file_size += len(chunk)
+            except BaseException:
+                # Includes cancellation: never leave partial spool files behind
+                MediaDownload(media_hash="", file_size=file_size, spool_path=spool_path).cleanup()
+                raise
+
+        download = MediaDownload(
+            media_hash=hasher.hexdigest(),
+            file_size=file_size,
+            spool_path=spool_path
+        )
+
+        if file_size == 0:
+            self.logger.warning("Streaming media download returned no data.", message_id=getattr(message, 'id', None))
+            download.cleanup()
+            return None
+
+        self.logger.debug(
+            "Streaming media download completed.",
+            message_id=getattr(message, 'id', None),
+            media_hash_prefix=download.media_hash[:8],
+            file_size=file_size
+        )
+        return download
@@ -6,9 +6,7 @@ Connects as a user to monitor channels and process incoming messages.
 """
 
 import asyncio
-import hashlib
 import time
-from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
 from telethon import TelegramClient, events
@@ -23,10 +21,14 @@ from telethon.tl.types import (
 )
 
 from shared.config import get_settings
-from shared.database import get_sync_db
+from shared.database import get_async_db, get_sync_db
 from shared.logging import LoggingMixin, get_logger, log_database_operation, log_message_processing
-from shared.messaging import MessageProducer, create_new_message_event
-from shared.models import Channel as ChannelModel, Media, Message as MessageModel
+from shared.messaging import AsyncMessageProducer, create_new_message_event
+from shared.models import Channel as ChannelModel, Message as MessageModel
+
+from .ingest_writer import IngestMedia, IngestWriter
+from .media_dedup import MediaIdentityIndex, get_file_key
+from .media_pipeline import MediaDownloadPipeline
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -46,7 +48,10 @@ class TelegramAggregator(LoggingMixin):
     
     def __init__(self) -> None:
         self.client: Optional[TelegramClient] = None
-        self.message_producer: Optional[MessageProducer] = None
+        self.message_producer: Optional[AsyncMessageProducer] = None
+        self.media_pipeline: Optional[MediaDownloadPipeline] = None
+        self.media_index = MediaIdentityIndex()
+        self.ingest_writer: Optional[IngestWriter] = None
         self.monitored_channels: List[str] = []
         self.running = False
         # LoggingMixin provides self.logger, so we can use it directly.
@@ -65,8 +70,16 @@ class TelegramAggregator(LoggingMixin):
                 settings.telegram.api_hash
             )
             
-            # Initialize message producer
-            self.message_producer = MessageProducer()
+            # Initialize streaming media pipeline
+            self.media_pipeline = MediaDownloadPipeline(self.client)
+            
+            # Initialize non-blocking message producer
+            self.message_producer = AsyncMessageProducer()
+            await self.message_producer.start()
+            
+            # Initialize batched ingest writer; it publishes provisional analyzed events through the producer
+            self.ingest_writer = IngestWriter(media_index=self.media_index, event_producer=self.message_producer)
+            await self.ingest_writer.start()
             
             # Parse monitored channels from settings
             if settings.app.monitored_channels:
@@ -235,14 +248,16 @@ class TelegramAggregator(LoggingMixin):
             }
             
             # Process media if present
+            media = None
             media_hash = None
             if message.media:
                 self.logger.debug("Message contains media, processing.", message_id=message_id_str, channel_id=channel_id_str)
-                media_hash = await self._process_media(message) # _process_media has its own logging
+                media = await self._process_media(message) # _process_media has its own logging
+                media_hash = media.media_hash if media else None
                 message_data['media_hash'] = media_hash
             
-            # Store message in database
-            await self._store_message(message_data, media_hash) # _store_message has its own logging
+            # Store message in database; waits for the batch to commit before publishing
+            await self._store_message(message_data, media) # _store_message has its own logging
             
             # Create and publish message event
             event_data = create_new_message_event(**message_data)
@@ -253,7 +268,7 @@ class TelegramAggregator(LoggingMixin):
                 channel_id=channel_id_str,
                 event_type=event_data["event_type"]
             )
-            success = self.message_producer.publish_new_message_event(event_data)
+            success = await self.message_producer.publish_new_message_event(event_data)
             
             if success:
                 self.logger.info(
@@ -273,7 +288,7 @@ class TelegramAggregator(LoggingMixin):
                         message_id_str,
                         channel_id_str,
                         "failed_to_publish",
-                        error="MessageProducer.publish_new_message_event returned False"
+                        error="AsyncMessageProducer.publish_new_message_event returned False"
                     )
                 )
         
@@ -288,7 +303,7 @@ class TelegramAggregator(LoggingMixin):
                 )
             )
     
-    async def _process_media(self, message: Message) -> Optional[str]:
+    async def _process_media(self, message: Message) -> Optional[IngestMedia]:
         """
         Process media attached to a message.
         
@@ -296,7 +311,7 @@ class TelegramAggregator(LoggingMixin):
             message: Telegram message with media
             
         Returns:
-            Optional[str]: SHA256 hash of the media file, or None if processing failed
+            Optional[IngestMedia]: Media details for the ingest writer, or None if processing failed
         """
         message_id = str(message.id)
         channel_id = str(message.peer_id.channel_id) if hasattr(message.peer_id, 'channel_id') else "unknown"
@@ -306,22 +321,36 @@ class TelegramAggregator(LoggingMixin):
             channel_id=channel_id
         )
 
+        download = None
         try:
             media = message.media
             
+            # Pre-dedup on Telegram's file identity: reposted media skips the download entirely
+            file_key = get_file_key(media)
+            if file_key:
+                async with get_async_db() as session:
+                    known_media = await self.media_index.lookup(session, file_key)
+                if known_media:
+                    self.logger.info(
+                        "Media already exists in database (pre-dedup by file identity, download skipped).",
+                        media_hash=known_media.media_hash[:8],
+                        existing_media_id=known_media.media_id,
+                        file_kind=file_key.file_kind,
+                        message_id=message_id
+                    )
+                    return IngestMedia(media_hash=known_media.media_hash)
+            
             self.logger.debug("Downloading media.", message_id=message_id, media_type=type(media).__name__)
-            # Download media to calculate hash
-            media_bytes = await self.client.download_media(message, file=bytes)
+            # Stream media through the hashing pipeline; the file is spooled to disk, not held in memory
+            download = await self.media_pipeline.download(message)
             
-            if media_bytes:
-                # Calculate SHA256 hash
-                media_hash = hashlib.sha256(media_bytes).hexdigest()
+            if download:
+                media_hash = download.media_hash
                 self.logger.debug("Media downloaded and hash calculated.", media_hash_prefix=media_hash[:8], message_id=message_id)
                 
                 # Determine media type and filename
                 media_type = "unknown"
                 filename = f"{media_hash}" # Default filename
-                file_size = len(media_bytes)
                 
                 if isinstance(media, MessageMediaPhoto):
                     media_type = "photo"
@@ -346,56 +375,16 @@ class TelegramAggregator(LoggingMixin):
                         message_id=message_id
                     )
                 
-                # Check if media already exists in database
-                db = next(get_sync_db())
-                try:
-                    self.logger.debug(
-                        log_database_operation(
-                            "query",
-                            Media.__tablename__,
-                            media_hash=media_hash
-                        )
-                    )
-                    existing_media = db.query(Media).filter(
-                        Media.media_hash == media_hash
-                    ).first()
-                    
-                    if not existing_media:
-                        # TODO: Upload to Google Cloud Storage
-                        # For now, we'll just store the metadata
-                        storage_url = f"gs://{settings.gcs.bucket_name}/{filename}"
-                        
-                        # Create media record
-                        media_record = Media(
-                            media_hash=media_hash,
-                            storage_url=storage_url,
-                            media_type=media_type,
-                            file_size_bytes=file_size
-                        )
-                        db.add(media_record)
-                        db.commit()
-                        self.logger.info(
-                            log_database_operation(
-                                "insert",
-                                Media.__tablename__,
-                                media_hash=media_hash[:8], # Log prefix for brevity
-                                media_type=media_type,
-                                file_size=file_size,
-                                storage_url=storage_url
-                            )
-                        )
-                    else:
-                        self.logger.info(
-                            "Media already exists in database (deduplicated).",
-                            media_hash=media_hash[:8],
-                            media_type=existing_media.media_type, # Use existing type
-                            existing_media_id=existing_media.id
-                        )
-                
-                finally:
-                    db.close()
-                
-                return media_hash
+                # TODO: Upload download.spool_path to Google Cloud Storage
+                # For now, we'll just store the metadata. The media row is inserted
+                # (or deduplicated on media_hash) by the ingest writer's batch.
+                return IngestMedia(
+                    media_hash=media_hash,
+                    storage_url=f"gs://{settings.gcs.bucket_name}/{filename}",
+                    media_type=media_type,
+                    file_size_bytes=download.file_size,
+                    file_key=file_key
+                )
             else:
                 self.logger.warning("Media download returned empty bytes.", message_id=message_id)
                 return None
@@ -409,14 +398,20 @@ class TelegramAggregator(LoggingMixin):
                 exc_info=True
             )
             return None
+        finally:
+            if download:
+                download.cleanup()
     
-    async def _store_message(self, message_data: Dict, media_hash: Optional[str] = None) -> None:
+    async def _store_message(self, message_data: Dict, media: Optional[IngestMedia] = None) -> None:
         """
-        Store message in the database.
+        Store message (and any new media) in the database via the batched ingest writer.
         
         Args:
             message_data: Message information
-            media_hash: SHA256 hash of media if present
+            media: Media attached to the message, if any
+            
+        Raises:
+            Exception: If the batch containing the message failed to commit
         """
         message_id = message_data.get('message_id', 'unknown_id')
         channel_id = message_data.get('channel_id', 'unknown_channel')
@@ -424,75 +419,17 @@ class TelegramAggregator(LoggingMixin):
             log_database_operation("attempt_store", MessageModel.__tablename__),
             message_id=message_id,
             channel_id=channel_id,
-            has_media=bool(media_hash)
+            has_media=bool(media)
         )
-        db = next(get_sync_db())
         
-        try:
-            # Get media ID if media exists
-            media_id_fk = None # Renamed to avoid confusion with message_id variable
-            if media_hash:
-                self.logger.debug(
-                    log_database_operation("query", Media.__tablename__, media_hash=media_hash),
-                    message_id=message_id
-                )
-                media_record = db.query(Media).filter(
-                    Media.media_hash == media_hash
-                ).first()
-                if media_record:
-                    media_id_fk = media_record.id
-                    self.logger.debug("Found media in DB for message.", media_id_fk=media_id_fk, message_id=message_id)
-                else:
-                    # This case should ideally not happen if _process_media ran correctly and media was present
-                    self.logger.warning(
-                        "Media hash provided, but media record not found in DB.",
-                        media_hash=media_hash,
-                        message_id=message_id
-                    )
-            
-            # Create message record
-            message_to_store = MessageModel(
-                telegram_message_id=int(message_data['message_id']),
-                channel_id=int(message_data['channel_id']),
-                message_text=message_data.get('message_text'),
-                media_id=media_id_fk,
-                message_timestamp=datetime.fromtimestamp(
-                    float(message_data['message_timestamp']), # Ensure it's float
-                    tz=timezone.utc
-                )
-            )
-            
-            db.add(message_to_store)
-            db.commit()
-            db.refresh(message_to_store) # To get the auto-generated primary key if needed elsewhere
-
+        inserted = await self.ingest_writer.submit(message_data, media)
+        
+        if not inserted:
             self.logger.info(
-                log_database_operation(
-                    "insert",
-                    MessageModel.__tablename__,
-                    message_id=message_to_store.telegram_message_id,
-                    channel_id=message_to_store.channel_id,
-                    db_message_id=message_to_store.id # internal DB id
-                )
-            )
-            
-        except Exception as e:
-            self.logger.error(
-                log_database_operation(
-                    "insert_failed",
-                    MessageModel.__tablename__,
-                    message_id=message_id,
-                    error=str(e)
-                ),
-                exc_info=True
+                "Message already stored in database (duplicate delivery).",
+                message_id=message_id,
+                channel_id=channel_id
             )
-            try:
-                db.rollback()
-                self.logger.info("Database rollback successful after error.", message_id=message_id)
-            except Exception as re:
-                self.logger.error("Failed to rollback database transaction.", original_error=str(e), rollback_error=str(re))
-        finally:
-            db.close()
     
     async def start_aggregation(self) -> None:
         """
@@ -548,10 +485,17 @@ class TelegramAggregator(LoggingMixin):
         else:
             self.logger.info("Telegram client was not connected or already disconnected.")
 
+        if self.ingest_writer:
+            self.logger.info("Flushing ingest writer...")
+            try:
+                await self.ingest_writer.stop()
+            except Exception as e:
+                self.logger.error("Error flushing ingest writer.", error=str(e))
+        
         if self.message_producer:
             self.logger.info("Closing message producer...")
             try:
-                self.message_producer.close()
+                await self.message_producer.close()
                 self.logger.info("Message producer closed successfully.")
             except Exception as e: # Catch potential errors during producer close
                 self.logger.error("Error closing message producer.", error=str(e))
@@ -1,18 +1,28 @@
 """
 Tel-Insights LLM Client
 
-LLM client implementation for Google Gemini with retry logic and error handling.
+LLM client implementations (Google Gemini, OpenAI, Anthropic and a deterministic
+local fake) sharing retry logic, error classification and rate governance.
 """
 
+import asyncio
+import hashlib
 import json
+import random
+import re
+import threading
 import time
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Protocol, runtime_checkable
 from dataclasses import dataclass
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 
 from shared.config import get_settings
-from shared.logging import LoggingMixin, get_logger
+from shared.logging import LoggingMixin, get_logger, log_llm_request
+
+from .rate_governor import LLMRateGovernor, get_rate_governor
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -21,7 +31,7 @@ logger = get_logger(__name__)
 @dataclass
 class LLMResponse:
     """Structured response from LLM API calls."""
-    
+
     content: str
     model: str
     prompt_tokens: Optional[int] = None
@@ -34,127 +44,638 @@ class LLMError(Exception):
     pass
 
 
-class GeminiClient(LoggingMixin):
+class LLMFatalError(LLMError):
+    """LLM error that retrying cannot fix (invalid key, exhausted quota, safety block)."""
+    pass
+
+
+class LLMQuotaExhaustedError(LLMFatalError):
+    """The provider's daily or billing quota is exhausted (HTTP 429 that retrying cannot fix)."""
+    pass
+
+
+class LLMRateLimitError(LLMError):
+    """The provider rejected the call for exceeding its rate limit (HTTP 429)."""
+    pass
+
+
+@runtime_checkable
+class LLMClient(Protocol):
+    """Interface shared by all LLM backends and the router."""
+
+    provider: str
+    model_name: str
+
+    def generate_content(self, prompt: str, **kwargs) -> LLMResponse:
+        """Generate content, blocking the calling thread."""
+        ...
+
+    async def generate_content_async(self, prompt: str, deadline_seconds: Optional[float] = None, **kwargs) -> LLMResponse:
+        """Generate content without blocking the event loop."""
+        ...
+
+
+# API errors that retrying cannot fix
+_FATAL_API_ERRORS = (
+    google_exceptions.Unauthenticated,
+    google_exceptions.PermissionDenied,
+    google_exceptions.InvalidArgument,
+    google_exceptions.NotFound,
+    google_exceptions.FailedPrecondition,
+)
+
+# HTTP statuses (OpenAI / Anthropic SDK errors) that retrying cannot fix
+_FATAL_HTTP_STATUSES = {400, 401, 403, 404, 422}
+
+# Markers of an exhausted (daily / billing) quota, as opposed to a per-minute rate limit
+_QUOTA_EXHAUSTED_MARKERS = ("perday", "per day", "billing", "insufficientquota")
+
+
+def classify_error(error: Exception) -> LLMError:
+    """
+    Map an exception from an LLM call to a retryable LLMError or an LLMFatalError.
+
+    Args:
+        error: Exception raised by the SDK or the client
+
+    Returns:
+        LLMError: Error to retry or raise (LLMFatalError if not retryable)
+    """
+    if isinstance(error, LLMError):
+        return error
+
+    message = str(error).lower().replace("_", "")
+    status_code = getattr(error, 'status_code', None)
+
+    if isinstance(error, _FATAL_API_ERRORS) or status_code in _FATAL_HTTP_STATUSES:
+        return LLMFatalError(f"{type(error).__name__}: {error}")
+    if isinstance(error, google_exceptions.ResourceExhausted) or status_code == 429:
+        if any(marker in message for marker in _QUOTA_EXHAUSTED_MARKERS):
+            return LLMQuotaExhaustedError(f"Quota exhausted: {error}")
+        return LLMRateLimitError(f"Rate limited: {error}")
+    if isinstance(error, (genai.types.BlockedPromptException, genai.types.StopCandidateException)):
+        return LLMFatalError(f"Blocked by safety filters: {error}")
+    if isinstance(error, asyncio.TimeoutError):
+        return LLMError("LLM request timed out")
+    return LLMError(f"{type(error).__name__}: {error}")
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff: a uniform delay up to ``base * 2 ** attempt``, capped.
+
+    Randomizing the whole interval keeps concurrent workers from retrying in lockstep.
+
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+
+    Returns:
+        float: Seconds to wait before the next attempt
+    """
+    ceiling = min(settings.llm.retry_max_delay_seconds, settings.llm.retry_base_delay_seconds * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+_sync_request_executor: Optional[ThreadPoolExecutor] = None
+_sync_request_executor_lock = threading.Lock()
+
+
+def call_with_timeout(func: Callable[[], Any], timeout: float) -> Any:
+    """
+    Run a blocking SDK call on a worker thread and stop waiting for it after a timeout.
+
+    The abandoned call keeps its pool thread until the SDK returns, but the
+    caller's thread and its rate governor slot are released at once.
+
+    Args:
+        func: Blocking call to run
+        timeout: Seconds to wait for the result
+
+    Returns:
+        Any: Result of the call
+
+    Raises:
+        LLMError: If the call did not finish within the timeout
+    """
+    global _sync_request_executor
+    with _sync_request_executor_lock:
+        if _sync_request_executor is None:
+            _sync_request_executor = ThreadPoolExecutor(
+                max_workers=max(4, settings.llm.max_concurrent_requests * 2),
+                thread_name_prefix="llm-sync-request"
+            )
+    future = _sync_request_executor.submit(func)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise LLMError(f"LLM request timed out after {timeout}s")
+
+
+class BaseLLMClient(LoggingMixin):
+    """
+    Retry, backoff and rate-governance loop shared by all LLM backends.
+
+    Subclasses implement one provider request in ``_request`` and ``_request_async``.
+    """
+
+    provider = "base"
+    # Approximate USD per 1K prompt tokens, used by the router's cost term
+    cost_per_1k_tokens = 0.0
+
+    def __init__(self, model_name: str, governor: Optional[LLMRateGovernor] = None, max_retries: Optional[int] = None):
+        """
+        Initialize the shared client state.
+
+        Args:
+            model_name: Provider model name
+            governor: Rate governor (defaults to the process-wide governor of this provider)
+            max_retries: Retries per call (defaults to LLM_MAX_RETRIES)
+        """
+        self.model_name = model_name
+        self.max_retries = settings.llm.max_retries if max_retries is None else max_retries
+        self.governor = governor or get_rate_governor(self.provider)
+
+    def _request(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        """Make one provider request, blocking."""
+        raise NotImplementedError
+
+    async def _request_async(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        """Make one provider request without blocking the event loop."""
+        raise NotImplementedError
+
+    def _log_success(self, prompt: str, response: LLMResponse, attempt: int, start_time: float) -> None:
+        """Log a successful request."""
+        self.logger.info(
+            log_llm_request(
+                model=self.model_name,
+                prompt_tokens=response.prompt_tokens,
+                completion_tokens=response.completion_tokens,
+                response_time_ms=round((time.time() - start_time) * 1000),
+                attempt=attempt + 1,
+                prompt_length=len(prompt),
+                response_length=len(response.content),
+                finish_reason=response.finish_reason or "unknown"
+            )
+        )
+
+    def _log_attempt_failure(self, error: LLMError, prompt: str, attempt: int, start_time: float) -> None:
+        """Log a failed attempt with its classification."""
+        self.logger.warning(
+            log_llm_request(
+                model=self.model_name,
+                error=str(error),
+                retryable=not isinstance(error, LLMFatalError),
+                attempt=attempt + 1,
+                max_attempts=self.max_retries + 1,
+                response_time_ms=round((time.time() - start_time) * 1000),
+                prompt_length=len(prompt)
+            ),
+            exc_info=True # Add stack trace for warnings too, can be helpful
+        )
+
+    def _give_up(self, error: LLMError, attempts: int) -> None:
+        """Log the final failure and raise it."""
+        self.logger.error(
+            log_llm_request(
+                model=self.model_name,
+                error=f"Failed after {attempts} attempts: {error}",
+                final_attempt_failed=True,
+                total_attempts=attempts
+            )
+        )
+        if isinstance(error, LLMFatalError):
+            raise error
+        raise LLMError(f"Failed after {attempts} attempts: {error}") from error
+
+    def generate_content(self, prompt: str, **kwargs) -> LLMResponse:
+        """Generate content with retry logic."""
+        prompt_preview = prompt[:100] + "..." if len(prompt) > 100 else prompt
+
+        self.logger.debug(
+            "Attempting to generate content with LLM",
+            model=self.model_name,
+            prompt_preview=prompt_preview,
+            generation_kwargs=kwargs
+        )
+
+        for attempt in range(self.max_retries + 1):
+            start_time = time.time()
+            try:
+                with self.governor.limit(prompt):
+                    start_time = time.time()
+                    response = self._request(prompt, settings.llm.timeout_seconds, attempt, **kwargs)
+                self._log_success(prompt, response, attempt, start_time)
+                self.governor.on_success()
+                return response
+
+            except Exception as e:
+                error = classify_error(e)
+                if isinstance(error, LLMRateLimitError):
+                    self.governor.on_rate_limited()
+                self._log_attempt_failure(error, prompt, attempt, start_time)
+                if isinstance(error, LLMFatalError) or attempt >= self.max_retries:
+                    self._give_up(error, attempt + 1)
+
+                wait_time = backoff_delay(attempt)
+                self.logger.info("Retrying LLM request after backoff.", wait_seconds=round(wait_time, 2))
+                time.sleep(wait_time)
+
+    async def generate_content_async(self, prompt: str, deadline_seconds: Optional[float] = None, **kwargs) -> LLMResponse:
+        """
+        Generate content without blocking the event loop.
+
+        Retries retryable errors with full-jitter exponential backoff until
+        ``max_retries`` is exhausted or the call deadline would be exceeded.
+        Fatal errors (invalid key, quota exhausted, safety block) are raised at
+        once. Cancelling the awaiting task cancels the in-flight request or backoff.
+
+        Args:
+            prompt: Prompt text
+            deadline_seconds: Total time budget for all attempts (defaults to LLM_CALL_DEADLINE_SECONDS)
+            **kwargs: Generation options (temperature, max_tokens)
+
+        Returns:
+            LLMResponse: Generated content
+
+        Raises:
+            LLMFatalError: On a non-retryable error
+            LLMError: When retries or the deadline are exhausted
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (deadline_seconds or settings.llm.call_deadline_seconds)
+
+        for attempt in range(self.max_retries + 1):
+            start_time = time.time()
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                async with self.governor.limit_async(prompt) as waited:
+                    start_time = time.time()
+                    attempt_timeout = min(settings.llm.timeout_seconds, remaining - waited)
+                    if attempt_timeout <= 0:
+                        raise asyncio.TimeoutError()
+                    response = await asyncio.wait_for(
+                        self._request_async(prompt, attempt_timeout, attempt, **kwargs),
+                        timeout=attempt_timeout
+                    )
+                self._log_success(prompt, response, attempt, start_time)
+                self.governor.on_success()
+                return response
+
+            except Exception as e:
+                error = classify_error(e)
+                if isinstance(error, LLMRateLimitError):
+                    self.governor.on_rate_limited()
+                self._log_attempt_failure(error, prompt, attempt, start_time)
+                if isinstance(error, LLMFatalError) or attempt >= self.max_retries:
+                    self._give_up(error, attempt + 1)
+
+                wait_time = backoff_delay(attempt)
+                if loop.time() + wait_time >= deadline:
+                    self._give_up(LLMError(f"Call deadline exceeded: {error}"), attempt + 1)
+                self.logger.info("Retrying LLM request after backoff.", wait_seconds=round(wait_time, 2))
+                await asyncio.sleep(wait_time)
+
+
+class GeminiClient(BaseLLMClient):
     """Google Gemini LLM client implementation."""
-    
-    def __init__(self, api_key: str = None, model_name: str = "gemini-1.5-pro"):
+
+    provider = "gemini"
+    cost_per_1k_tokens = 0.00125
+
+    def __init__(
+        self,
+        api_key: str = None,
+        model_name: str = "gemini-1.5-pro",
+        governor: Optional[LLMRateGovernor] = None,
+        max_retries: Optional[int] = None
+    ):
         """Initialize Gemini client."""
+        super().__init__(model_name, governor, max_retries)
         self.api_key = api_key or settings.llm.google_api_key
-        self.model_name = model_name
-        self.max_retries = settings.llm.max_retries
-        
+
         if not self.api_key:
             # This error is raised, but logging it provides context if error isn't caught upstream.
             self.logger.error("Google API key is missing. Cannot initialize GeminiClient.")
             raise LLMError("Google API key is required for Gemini client")
-        
+
         # Configure the API
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(model_name=self.model_name)
-        
+
         self.logger.info(
             "Gemini client initialized",
             model_name=self.model_name,
             max_retries=self.max_retries
         )
-    
-    def generate_content(self, prompt: str, **kwargs) -> LLMResponse:
-        """Generate content using Gemini with retry logic."""
-        last_error = None
-        prompt_preview = prompt[:100] + "..." if len(prompt) > 100 else prompt
-        
-        self.logger.debug(
-            "Attempting to generate content with LLM",
+
+    def _generation_config(self, **kwargs) -> Any:
+        """Build the Gemini generation config from call kwargs."""
+        return genai.types.GenerationConfig(
+            temperature=kwargs.get('temperature', 0.1),
+            max_output_tokens=kwargs.get('max_tokens', 2048),
+        )
+
+    def _build_response(self, response: Any) -> LLMResponse:
+        """
+        Validate a Gemini response and convert it to an LLMResponse.
+
+        Raises:
+            LLMFatalError: If the prompt or response was blocked by safety filters
+            LLMError: If the response is empty
+        """
+        block_reason = getattr(getattr(response, 'prompt_feedback', None), 'block_reason', None)
+        if block_reason:
+            raise LLMFatalError(f"Prompt blocked by Gemini: {block_reason}")
+
+        finish_reason = str(response.candidates[0].finish_reason) if response.candidates else "unknown"
+        try:
+            text = response.text
+        except ValueError as e:
+            # Raised by the SDK when the candidate has no parts, e.g. a SAFETY stop
+            raise LLMFatalError(f"Gemini returned no content (finish_reason={finish_reason}): {e}")
+
+        if not text:
+            raise LLMError("Empty response from Gemini")
+
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            content=text,
             model=self.model_name,
-            prompt_preview=prompt_preview,
-            generation_kwargs=kwargs
+            prompt_tokens=getattr(usage, 'prompt_token_count', None),
+            completion_tokens=getattr(usage, 'candidates_token_count', None),
+            finish_reason=finish_reason
         )
 
-        for attempt in range(self.max_retries + 1):
-            try:
-                start_time = time.time()
-                
-                # Note: The google.generativeai library might have its own ways to get token counts
-                # via response.usage_metadata but it's not directly available on response.text
-                # For now, we log what is readily available.
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=kwargs.get('temperature', 0.1),
-                        max_output_tokens=kwargs.get('max_tokens', 2048),
-                    )
-                )
-                
-                response_time_ms = round((time.time() - start_time) * 1000)
-
-                if not response.text:
-                    # This is an LLMError, but log_llm_request is good for consistency
-                    self.logger.error(
-                        log_llm_request(
-                            model=self.model_name,
-                            error="Empty response from Gemini",
-                            attempt=attempt + 1,
-                            response_time_ms=response_time_ms,
-                            prompt_length=len(prompt)
-                        )
-                    )
-                    raise LLMError("Empty response from Gemini")
-                
-                # Assuming prompt_tokens and completion_tokens are not directly available
-                # in this simplified setup. If they were, they'd be passed to log_llm_request.
-                self.logger.info(
-                    log_llm_request(
-                        model=self.model_name,
-                        # prompt_tokens= N/A,
-                        # completion_tokens= N/A,
-                        response_time_ms=response_time_ms,
-                        attempt=attempt + 1,
-                        prompt_length=len(prompt),
-                        response_length=len(response.text),
-                        finish_reason=str(response.candidates[0].finish_reason) if response.candidates else "unknown"
-                    )
-                )
-                
-                return LLMResponse(
-                    content=response.text,
-                    model=self.model_name,
-                    # finish_reason=str(response.candidates[0].finish_reason) if response.candidates else None
-                    # Token counts would be set here if available
-                )
-                
-            except Exception as e:
-                last_error = e
-                response_time_ms = round((time.time() - start_time) * 1000) if 'start_time' in locals() else -1
-
-                self.logger.warning(
-                    log_llm_request(
-                        model=self.model_name,
-                        error=str(e),
-                        attempt=attempt + 1,
-                        max_attempts=self.max_retries + 1,
-                        response_time_ms=response_time_ms,
-                        prompt_length=len(prompt)
-                    ),
-                    exc_info=True # Add stack trace for warnings too, can be helpful
-                )
-                
-                if attempt < self.max_retries:
-                    wait_time = (2 ** attempt) + 1 # Exponential backoff with jitter could be better
-                    self.logger.info(f"Retrying LLM request in {wait_time} seconds...")
-                    time.sleep(wait_time)
-        
-        self.logger.error(
-            log_llm_request(
-                model=self.model_name,
-                error=f"Failed after {self.max_retries + 1} attempts: {last_error}",
-                final_attempt_failed=True,
-                total_attempts=self.max_retries + 1
-            ),
-            exc_info=True # Include stack trace for the final error
+    def _request(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        # google-generativeai 0.3.x forwards extra kwargs into GenerateContentRequest,
+        # which has no timeout field, so the blocking call is bounded from outside
+        response = call_with_timeout(
+            lambda: self.model.generate_content(prompt, generation_config=self._generation_config(**kwargs)),
+            timeout
         )
-        raise LLMError(f"Failed after {self.max_retries + 1} attempts: {last_error}")
+        return self._build_response(response)
+
+    async def _request_async(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=self._generation_config(**kwargs)
+        )
+        return self._build_response(response)
+
+
+class OpenAIClient(BaseLLMClient):
+    """OpenAI chat completions client implementation."""
+
+    provider = "openai"
+    cost_per_1k_tokens = 0.00015
+
+    def __init__(
+        self,
+        api_key: str = None,
+        model_name: Optional[str] = None,
+        governor: Optional[LLMRateGovernor] = None,
+        max_retries: Optional[int] = None
+    ):
+        """Initialize OpenAI client."""
+        super().__init__(model_name or settings.llm.openai_model, governor, max_retries)
+        self.api_key = api_key or settings.llm.openai_api_key
+        if not self.api_key:
+            self.logger.error("OpenAI API key is missing. Cannot initialize OpenAIClient.")
+            raise LLMError("OpenAI API key is required for OpenAI client")
+
+        import openai  # Optional backend: only required when the provider is enabled
+
+        # Retries are handled by BaseLLMClient
+        self.client = openai.OpenAI(api_key=self.api_key, max_retries=0)
+        self.async_client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        self.logger.info("OpenAI client initialized", model_name=self.model_name, max_retries=self.max_retries)
+
+    def _completion_args(self, prompt: str, timeout: float, **kwargs) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": kwargs.get('temperature', 0.1),
+            "max_tokens": kwargs.get('max_tokens', 2048),
+            "timeout": timeout,
+        }
+
+    def _build_response(self, completion: Any) -> LLMResponse:
+        choice = completion.choices[0]
+        if not choice.message.content:
+            raise LLMError("Empty response from OpenAI")
+        if choice.finish_reason == "content_filter":
+            raise LLMFatalError("OpenAI response blocked by content filter")
+        usage = completion.usage
+        return LLMResponse(
+            content=choice.message.content,
+            model=self.model_name,
+            prompt_tokens=getattr(usage, 'prompt_tokens', None),
+            completion_tokens=getattr(usage, 'completion_tokens', None),
+            finish_reason=choice.finish_reason
+        )
+
+    def _request(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        return self._build_response(self.client.chat.completions.create(**self._completion_args(prompt, timeout, **kwargs)))
+
+    async def _request_async(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        completion = await self.async_client.chat.completions.create(**self._completion_args(prompt, timeout, **kwargs))
+        return self._build_response(completion)
+
+
+class AnthropicClient(BaseLLMClient):
+    """Anthropic messages API client implementation."""
+
+    provider = "anthropic"
+    cost_per_1k_tokens = 0.0008
+
+    def __init__(
+        self,
+        api_key: str = None,
+        model_name: Optional[str] = None,
+        governor: Optional[LLMRateGovernor] = None,
+        max_retries: Optional[int] = None
+    ):
+        """Initialize Anthropic client."""
+        super().__init__(model_name or settings.llm.anthropic_model, governor, max_retries)
+        self.api_key = api_key or settings.llm.anthropic_api_key
+        if not self.api_key:
+            self.logger.error("Anthropic API key is missing. Cannot initialize AnthropicClient.")
+            raise LLMError("Anthropic API key is required for Anthropic client")
+
+        import anthropic  # Optional backend: only required when the provider is enabled
+
+        # Retries are handled by BaseLLMClient
+        self.client = anthropic.Anthropic(api_key=self.api_key, max_retries=0)
+        self.async_client = anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=0)
+        # The pinned SDK (0.8.x) only exposes the messages API under client.beta
+        self.messages = getattr(self.client, 'messages', None) or self.client.beta.messages
+        self.async_messages = getattr(self.async_client, 'messages', None) or self.async_client.beta.messages
+        self.logger.info("Anthropic client initialized", model_name=self.model_name, max_retries=self.max_retries)
+
+    def _message_args(self, prompt: str, timeout: float, **kwargs) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": kwargs.get('temperature', 0.1),
+            "max_tokens": kwargs.get('max_tokens', 2048),
+            "timeout": timeout,
+        }
+
+    def _build_response(self, message: Any) -> LLMResponse:
+        text = "".join(block.text for block in message.content if getattr(block, 'type', None) == "text")
+        if not text:
+            raise LLMError("Empty response from Anthropic")
+        usage = getattr(message, 'usage', None)  # Not reported by the 0.8.x beta messages API
+        return LLMResponse(
+            content=text,
+            model=self.model_name,
+            prompt_tokens=getattr(usage, 'input_tokens', None),
+            completion_tokens=getattr(usage, 'output_tokens', None),
+            finish_reason=message.stop_reason
+        )
+
+    def _request(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        return self._build_response(self.messages.create(**self._message_args(prompt, timeout, **kwargs)))
+
+    async def _request_async(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        return self._build_response(await self.async_messages.create(**self._message_args(prompt, timeout, **kwargs)))
+
+
+_BATCH_INPUT_PATTERN = re.compile(r'\[\s*\{\s*"id".*?\}\s*\]', re.DOTALL)
+_MESSAGE_TEXT_PATTERN = re.compile(r'Message: "(.*)"', re.DOTALL)
+
+
+class FakeLLMClient(BaseLLMClient):
+    """
+    Deterministic local backend for tests and offline load tests of the router.
+
+    Latency and failures are drawn from a seeded generator, so a run is
+    reproducible. Responses are valid analysis JSON derived from the prompt:
+    a JSON array for batched prompts, a single object otherwise.
+    """
+
+    provider = "fake"
+
+    def __init__(
+        self,
+        name: str = "fake",
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        responder: Optional[Callable[[str], str]] = None,
+        cost_per_1k_tokens: float = 0.0,
+        governor: Optional[LLMRateGovernor] = None,
+        max_retries: Optional[int] = None
+    ):
+        """
+        Initialize the fake backend.
+
+        Args:
+            name: Provider name reported to the router
+            latency_seconds: Base latency of each request
+            latency_jitter_seconds: Maximum extra latency, drawn uniformly
+            failure_rate: Probability that a request fails with a retryable error
+            seed: Seed of the latency / failure generator
+            responder: Function producing the response text from the prompt
+            cost_per_1k_tokens: Cost reported to the router
+            governor: Rate governor (defaults to an unlimited one)
+            max_retries: Retries per call (defaults to LLM_MAX_RETRIES)
+        """
+        self.provider = name
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        super().__init__(
+            f"{name}-model",
+            governor or LLMRateGovernor(requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12, max_in_flight=10 ** 6),
+            max_retries
+        )
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.failure_rate = failure_rate
+        self.responder = responder or fake_analysis_response
+        self._random = random.Random(seed)
+        self.requests = 0
+
+    def _next_outcome(self) -> float:
+        """Draw the latency of the next request, raising if it is chosen to fail."""
+        self.requests += 1
+        latency = self.latency_seconds + self._random.uniform(0, self.latency_jitter_seconds)
+        if self._random.random() < self.failure_rate:
+            raise LLMError(f"Injected failure from fake backend '{self.provider}'")
+        return latency
+
+    def _request(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        latency = self._next_outcome()
+        time.sleep(latency)
+        return LLMResponse(content=self.responder(prompt), model=self.model_name, finish_reason="STOP")
+
+    async def _request_async(self, prompt: str, timeout: float, attempt: int, **kwargs) -> LLMResponse:
+        latency = self._next_outcome()
+        await asyncio.sleep(latency)
+        return LLMResponse(content=self.responder(prompt), model=self.model_name, finish_reason="STOP")
+
+
+def _fake_analysis(text: str) -> Dict[str, Any]:
+    """Deterministic analysis metadata for a message text."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    words = [word.strip(".,:;!?\"'()").lower() for word in text.split()]
+    keywords = list(dict.fromkeys(word for word in words if len(word) > 3))[:5]
+    return {
+        "summary": text[:200],
+        "topics": keywords[:3] or ["general"],
+        "sentiment": ("positive", "negative", "neutral")[digest[0] % 3],
+        "entities": {"people": [], "organizations": [], "locations": [], "dates": [], "other": []},
+        "keywords": keywords,
+        "source_type": "news",
+        "confidence_score": round(0.5 + digest[1] / 510, 2),
+        "language": "en",
+    }
+
+
+def fake_analysis_response(prompt: str) -> str:
+    """
+    Build a valid analysis response for a text or batch analysis prompt.
+
+    Args:
+        prompt: Formatted ``text_analysis`` or ``batch_text_analysis`` prompt
+
+    Returns:
+        str: JSON analysis (array for batched prompts)
+    """
+    batch = _BATCH_INPUT_PATTERN.search(prompt)
+    if batch:
+        try:
+            items: List[Dict[str, Any]] = json.loads(batch.group(0))
+            return json.dumps([{"id": item["id"], **_fake_analysis(str(item.get("text", "")))} for item in items])
+        except (ValueError, KeyError, TypeError):
+            pass
+    message = _MESSAGE_TEXT_PATTERN.search(prompt)
+    return json.dumps(_fake_analysis(message.group(1) if message else prompt))
+
+
+# Backends selectable through LLM_PROVIDERS
+LLM_BACKENDS = {
+    "gemini": GeminiClient,
+    "openai": OpenAIClient,
+    "anthropic": AnthropicClient,
+    "fake": FakeLLMClient,
+}
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Get configured LLM client.
+
+    A single configured provider is returned directly; several providers are
+    wrapped in an ``LLMRouter`` that picks one per request.
+    """
+    providers = [name.strip() for name in settings.llm.providers.split(",") if name.strip()]
+    if len(providers) <= 1:
+        return LLM_BACKENDS[providers[0] if providers else "gemini"]()
 
+    from .llm_router import LLMRouter  # Router depends on the backends defined here
 
-def get_llm_client() -> GeminiClient:
-    """Get configured LLM client."""
-    return GeminiClient() 
\ No newline at end of file
+    return LLMRouter.from_settings(providers)
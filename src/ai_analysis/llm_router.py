@@ -0,0 +1,311 @@
+"""
+Tel-Insights LLM Router
+
+Per-request routing across several LLM providers. Each provider is scored on
+its observed p95 latency, error rate and cost over a sliding window; requests
+go to the best-scoring healthy provider and fail over to the next one when a
+call fails, so one slow or degraded vendor does not stall analysis.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+
+from .llm_client import (
+    LLM_BACKENDS,
+    BaseLLMClient,
+    LLMError,
+    LLMFatalError,
+    LLMQuotaExhaustedError,
+    LLMRateLimitError,
+    LLMResponse,
+    backoff_delay,
+    classify_error,
+)
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Error-rate penalty: a provider failing every call scores as (1 + weight) times slower
+_ERROR_RATE_WEIGHT = 5.0
+# Consecutive failures before a provider is put in cooldown
+_FAILURES_BEFORE_COOLDOWN = 3
+# Latency assumed for a provider that has no observations yet, so it gets tried
+_UNOBSERVED_LATENCY_SECONDS = 0.0
+
+
+def _counts_against_provider(error: LLMError) -> bool:
+    """
+    Whether a failure reflects the provider's health rather than the request.
+
+    Transport errors, timeouts, 5xx and 429s count; fatal errors caused by the
+    request itself (safety blocks, 400s such as a prompt that is too long) do
+    not, so one bad message cannot take a healthy provider out of rotation.
+    """
+    return not isinstance(error, LLMFatalError) or isinstance(error, LLMQuotaExhaustedError)
+
+
+class ProviderStats:
+    """Sliding-window latency and error observations of one provider."""
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def _expire(self, now: float) -> None:
+        horizon = now - self.window_seconds
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def record(self, now: float, latency: Optional[float], ok: bool) -> None:
+        """Record one call outcome (latency only for successful calls)."""
+        self._expire(now)
+        self.requests += 1
+        self._outcomes.append((now, ok))
+        if ok:
+            self._latencies.append((now, latency or 0.0))
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def p95_latency(self, now: float) -> float:
+        """95th percentile latency of successful calls in the window."""
+        self._expire(now)
+        if not self._latencies:
+            return _UNOBSERVED_LATENCY_SECONDS
+        ordered = sorted(latency for _, latency in self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def error_rate(self, now: float) -> float:
+        """Fraction of failed calls in the window."""
+        self._expire(now)
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+
+class LLMRouter(LoggingMixin):
+    """
+    LLM client that routes each request to one of several backends.
+
+    Score (lower is better) = p95 latency * (1 + 5 * error rate) + cost weight
+    * cost per 1K tokens. Providers in cooldown are tried only after all
+    healthy ones. Backends should be built with ``max_retries=0``: the router
+    itself retries by failing over, with backoff between full rounds.
+    """
+
+    provider = "router"
+
+    def __init__(
+        self,
+        backends: Sequence[BaseLLMClient],
+        window_seconds: Optional[float] = None,
+        cooldown_seconds: Optional[float] = None,
+        cost_weight: Optional[float] = None,
+        max_rounds: int = 1
+    ) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            backends: Provider clients, in order of preference for ties
+            window_seconds: Observation window (defaults to LLM_ROUTER_WINDOW_SECONDS)
+            cooldown_seconds: Cooldown after repeated failures (defaults to LLM_ROUTER_COOLDOWN_SECONDS)
+            cost_weight: Weight of the cost term (defaults to LLM_ROUTER_COST_WEIGHT)
+            max_rounds: Passes over all providers before giving up
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = list(backends)
+        self.window_seconds = window_seconds or settings.llm.router_window_seconds
+        self.cooldown_seconds = settings.llm.router_cooldown_seconds if cooldown_seconds is None else cooldown_seconds
+        self.cost_weight = settings.llm.router_cost_weight if cost_weight is None else cost_weight
+        self.max_rounds = max(1, max_rounds)
+        self.model_name = "+".join(backend.provider for backend in self.backends)
+        self._stats = {backend.provider: ProviderStats(self.window_seconds) for backend in self.backends}
+        self._lock = threading.Lock()
+        self.logger.info(
+            "LLMRouter initialized.",
+            providers=self.model_name,
+            window_seconds=self.window_seconds,
+            cost_weight=self.cost_weight
+        )
+
+    @classmethod
+    def from_settings(cls, providers: Sequence[str]) -> "LLMRouter":
+        """
+        Build a router over configured providers.
+
+        Args:
+            providers: Provider names from LLM_PROVIDERS
+
+        Returns:
+            LLMRouter: Router over one client per provider
+        """
+        return cls([LLM_BACKENDS[name](max_retries=0) for name in providers], max_rounds=settings.llm.max_retries + 1)
+
+    def score(self, backend: BaseLLMClient, now: Optional[float] = None) -> float:
+        """
+        Score a provider from its recent observations (lower is better).
+
+        Args:
+            backend: Provider client
+            now: Monotonic time (defaults to now)
+
+        Returns:
+            float: Provider score
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stats = self._stats[backend.provider]
+            latency = stats.p95_latency(now)
+            error_rate = stats.error_rate(now)
+        return latency * (1 + _ERROR_RATE_WEIGHT * error_rate) + self.cost_weight * backend.cost_per_1k_tokens
+
+    def ranked_backends(self) -> List[BaseLLMClient]:
+        """Backends in routing order: healthy providers by score, then those in cooldown."""
+        now = time.monotonic()
+        with self._lock:
+            cooling = {name for name, stats in self._stats.items() if stats.cooldown_until > now}
+        return sorted(
+            self.backends,
+            key=lambda backend: (backend.provider in cooling, self.score(backend, now))
+        )
+
+    def _record(self, backend: BaseLLMClient, started: float, error: Optional[LLMError]) -> None:
+        """Record a call outcome, putting the provider in cooldown if it keeps failing."""
+        if error is not None and not _counts_against_provider(error):
+            return
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats[backend.provider]
+            stats.record(now, now - started, error is None)
+            if error is not None and (
+                isinstance(error, (LLMQuotaExhaustedError, LLMRateLimitError))
+                or stats.consecutive_failures >= _FAILURES_BEFORE_COOLDOWN
+            ):
+                stats.cooldown_until = now + self.cooldown_seconds
+                self.logger.warning(
+                    "LLM provider put in cooldown.",
+                    provider=backend.provider,
+                    error=str(error),
+                    cooldown_seconds=self.cooldown_seconds
+                )
+
+    def _failover(self, backend: BaseLLMClient, error: Exception, started: float) -> LLMError:
+        error = classify_error(error)
+        if isinstance(error.__cause__, LLMError):
+            # Backends wrap the last attempt's error; classify the provider's actual failure
+            error = error.__cause__
+        self._record(backend, started, error)
+        self.logger.warning("LLM provider failed; failing over.", provider=backend.provider, error=str(error))
+        return error
+
+    def _raise_exhausted(self, last_error: Optional[LLMError]) -> None:
+        message = f"All LLM providers failed ({self.model_name}): {last_error}"
+        self.logger.error(message)
+        raise LLMError(message) from last_error
+
+    def generate_content(self, prompt: str, **kwargs) -> LLMResponse:
+        """
+        Generate content on the best available provider, failing over on errors.
+
+        Args:
+            prompt: Prompt text
+            **kwargs: Generation options (temperature, max_tokens)
+
+        Returns:
+            LLMResponse: Generated content
+
+        Raises:
+            LLMError: When every provider failed in every round
+        """
+        last_error: Optional[LLMError] = None
+        for round_index in range(self.max_rounds):
+            for backend in self.ranked_backends():
+                started = time.monotonic()
+                try:
+                    response = backend.generate_content(prompt, **kwargs)
+                except Exception as e:
+                    last_error = self._failover(backend, e, started)
+                    continue
+                self._record(backend, started, None)
+                return response
+            if round_index + 1 < self.max_rounds:
+                time.sleep(backoff_delay(round_index))
+        self._raise_exhausted(last_error)
+
+    async def generate_content_async(self, prompt: str, deadline_seconds: Optional[float] = None, **kwargs) -> LLMResponse:
+        """
+        Generate content on the best available provider without blocking the event loop.
+
+        Args:
+            prompt: Prompt text
+            deadline_seconds: Total time budget across providers (defaults to LLM_CALL_DEADLINE_SECONDS)
+            **kwargs: Generation options (temperature, max_tokens)
+
+        Returns:
+            LLMResponse: Generated content
+
+        Raises:
+            LLMError: When every provider failed or the deadline was exceeded
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (deadline_seconds or settings.llm.call_deadline_seconds)
+        last_error: Optional[LLMError] = None
+
+        for round_index in range(self.max_rounds):
+            for backend in self.ranked_backends():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self._raise_exhausted(LLMError(f"Call deadline exceeded: {last_error}"))
+                started = time.monotonic()
+                try:
+                    response = await backend.generate_content_async(prompt, deadline_seconds=remaining, **kwargs)
+                except Exception as e:
+                    last_error = self._failover(backend, e, started)
+                    continue
+                self._record(backend, started, None)
+                return response
+            if round_index + 1 < self.max_rounds:
+                wait_time = backoff_delay(round_index)
+                if loop.time() + wait_time >= deadline:
+                    break
+                await asyncio.sleep(wait_time)
+        self._raise_exhausted(last_error)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-provider routing metrics.
+
+        Returns:
+            Dict[str, Any]: Score, p95 latency, error rate, request counts and cooldown per provider
+        """
+        now = time.monotonic()
+        result: Dict[str, Any] = {}
+        for backend in self.backends:
+            score = self.score(backend, now)
+            with self._lock:
+                stats = self._stats[backend.provider]
+                result[backend.provider] = {
+                    "score": round(score, 4),
+                    "p95_latency_seconds": round(stats.p95_latency(now), 4),
+                    "error_rate": round(stats.error_rate(now), 4),
+                    "requests": stats.requests,
+                    "failures": stats.failures,
+                    "in_cooldown": stats.cooldown_until > now,
+                }
+        return result
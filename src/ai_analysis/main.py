@@ -6,12 +6,15 @@ import signal
 import sys
 from typing import Optional
 
+from prometheus_client import start_http_server
+
 from shared.config import get_settings
-from shared.database import init_db
+from shared.database import get_db_session, init_db
 from shared.logging import configure_logging, get_logger
 
 from .message_processor import AIAnalysisConsumer
 from .prompt_manager import initialize_default_prompts
+from .result_cache import purge_expired_results
 
 # Configure logging
 configure_logging("ai_analysis")
@@ -31,9 +34,20 @@ class AIAnalysisService:
         try:
             logger.info("Initializing AI Analysis Service...")
             
+            if self.settings.monitoring.metrics_enabled:
+                # Exposes the LLM result cache, triage and rate governor metrics
+                start_http_server(self.settings.monitoring.prometheus_port)
+                logger.info(f"Prometheus metrics served on port {self.settings.monitoring.prometheus_port}")
+            
             init_db()
             initialize_default_prompts()
             
+            db = get_db_session()
+            try:
+                purge_expired_results(db)
+            finally:
+                db.close()
+            
             self.consumer = AIAnalysisConsumer()
             
             logger.info("AI Analysis Service initialized successfully")
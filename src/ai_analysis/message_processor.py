@@ -5,32 +5,92 @@ Processes messages from the queue using LLM analysis and stores enriched metadat
 """
 
 import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 
 from shared.config import get_settings
 from shared.database import get_sync_db
-from shared.logging import LoggingMixin, get_logger
-from shared.messaging import MessageConsumer, create_consumer
+from shared.logging import (
+    LoggingMixin,
+    get_logger,
+    log_database_operation,
+    log_function_call,
+    log_message_processing,
+)
+from shared.messaging import MessageConsumer, MessageProducer, create_consumer, create_message_analyzed_event
 from shared.models import Message
+from shared.rollups import get_metadata_rollups
 
 from .llm_client import get_llm_client, LLMError
 from .prompt_manager import get_prompt_manager
+from .rate_governor import estimate_tokens
+from .result_cache import LLMResultCache, make_cache_key
+from .triage import TRIAGE_MODEL, MessageTriage, TriageDecision, get_message_triage, message_key, triage_metadata
 
 settings = get_settings()
 logger = get_logger(__name__)
 
+# Output tokens requested from the LLM per message in a batched analysis
+BATCH_OUTPUT_TOKENS_PER_MESSAGE = 400
+
+T = TypeVar("T")
+
+
+def plan_batches(items: List[T], cost: Callable[[T], int], token_budget: int, max_items: int) -> List[List[T]]:
+    """
+    Greedily pack items into batches that fit a token budget.
+    
+    An item larger than the whole budget gets a batch of its own.
+    
+    Args:
+        items: Items to pack, in order
+        cost: Function estimating the tokens of an item
+        token_budget: Maximum estimated tokens per batch
+        max_items: Maximum items per batch
+        
+    Returns:
+        List[List[T]]: Batches in input order
+    """
+    batches: List[List[T]] = []
+    current: List[T] = []
+    used = 0
+    for item in items:
+        item_cost = cost(item)
+        if current and (used + item_cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += item_cost
+    if current:
+        batches.append(current)
+    return batches
+
 
 class MessageProcessor(LoggingMixin):
     """
     Processes messages using AI analysis and stores metadata.
     """
     
-    def __init__(self):
-        """Initialize the message processor."""
+    def __init__(self, result_cache: Optional[LLMResultCache] = None, triage: Optional[MessageTriage] = None):
+        """
+        Initialize the message processor.
+        
+        Args:
+            result_cache: Cache of analysis results (defaults to a new cache if LLM_RESULT_CACHE_ENABLED)
+            triage: Pre-LLM triage stage (defaults to the shared stage if TRIAGE_ENABLED)
+        """
         self.logger.info("Initializing MessageProcessor...")
         self.llm_client = get_llm_client() # LLMClient has its own init logging
         self.prompt_manager = get_prompt_manager() # PromptManager has its own init logging
+        self.result_cache = result_cache or (LLMResultCache() if settings.llm.result_cache_enabled else None)
+        self.triage = triage or (get_message_triage() if settings.triage.enabled else None)
+        # BlockingConnection channels are not thread-safe; consumer workers share one under a lock
+        self._event_producer: Optional[MessageProducer] = None
+        self._event_lock = threading.Lock()
         self.logger.info(
             "MessageProcessor initialized successfully with LLM client and Prompt manager."
         )
@@ -70,14 +130,34 @@ class MessageProcessor(LoggingMixin):
                 )
                 return True # Considered success as no processing needed
             
+            # Short-circuit low-value messages (too short, emoji/link only, filtered language)
+            decision = self.triage.classify(message_text) if self.triage else None
+            if decision:
+                return self._complete_triage(message_data, decision)
+            
             # Get analysis prompt
             self.logger.debug(log_function_call("get_prompt", parent_logger=self.logger.name, prompt_name="text_analysis"))
-            prompt_template = self.prompt_manager.get_prompt("text_analysis") # PromptManager logs details
-            if not prompt_template:
+            prompt = self.prompt_manager.get_prompt_with_version("text_analysis") # PromptManager logs details
+            if not prompt:
                 self.logger.error(
                     log_message_processing(message_id, channel_id, "ai_analysis_failed", error="Text analysis prompt not found")
                 )
                 return False
+            prompt_template, prompt_version = prompt
+            
+            # Reuse the analysis of an identical (normalized) text, e.g. a forwarded post
+            cache_key = make_cache_key(message_text, "text_analysis", prompt_template, self._model_name())
+            cached = self._cached_analysis(cache_key, message_id, channel_id)
+            if cached:
+                return self._complete_analysis(
+                    message_id, channel_id, cached, self._model_name(),
+                    message_timestamp=message_data.get('message_timestamp')
+                )
+            
+            # Exact copy of a recently analyzed message (e.g. analyzed without caching)
+            decision = self.triage.check_duplicate(message_text, message_key(message_data)) if self.triage else None
+            if decision:
+                return self._complete_triage(message_data, decision)
             
             # Format prompt
             self.logger.debug(log_function_call("format_prompt", parent_logger=self.logger.name, prompt_name="text_analysis"))
@@ -98,34 +178,9 @@ class MessageProcessor(LoggingMixin):
                 )
                 return False
             
-            # Add processing metadata
-            ai_metadata.update({
-                "analysis_model": response.model, # Model used for this analysis
-                "analysis_timestamp": datetime.now(timezone.utc).isoformat(),
-                "processing_version": "1.0" # Version of this processing logic
-            })
-            
-            # Store metadata in database
-            # _store_ai_metadata has its own logging including log_database_operation
-            success = self._store_ai_metadata(message_id, channel_id, ai_metadata)
-            
-            if success:
-                self.logger.info(
-                    log_message_processing(
-                        message_id,
-                        channel_id,
-                        "ai_analysis_completed",
-                        summary_length=len(ai_metadata.get('summary', '')),
-                        topics_count=len(ai_metadata.get('topics', [])),
-                        sentiment=ai_metadata.get('sentiment'),
-                        confidence=ai_metadata.get('confidence_score'),
-                        model_used=response.model
-                    )
-                )
-            # If not success, _store_ai_metadata would have logged the error.
-            # No need to log "ai_analysis_failed" again here unless for a different reason.
-            
-            return success
+            if self.result_cache:
+                self.result_cache.set(cache_key, ai_metadata, "text_analysis", prompt_version, response.model)
+            return self._complete_llm_analysis(message_data, ai_metadata, response.model)
             
         except LLMError as e: # Specific exception from LLM client
             self.logger.error(
@@ -141,6 +196,341 @@ class MessageProcessor(LoggingMixin):
             )
             return False
     
+    def _model_name(self) -> str:
+        """Name of the model the LLM client analyzes with."""
+        return getattr(self.llm_client, 'model_name', 'unknown')
+    
+    def _cached_analysis(self, cache_key: str, message_id: str, channel_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis result.
+        
+        Args:
+            cache_key: Result cache key
+            message_id: Telegram message ID for logging context
+            channel_id: Channel ID for logging context
+            
+        Returns:
+            Optional[Dict[str, Any]]: Cached metadata, or None on a miss or with caching disabled
+        """
+        if not self.result_cache:
+            return None
+        cached = self.result_cache.get(cache_key)
+        if cached:
+            self.logger.info(log_message_processing(message_id, channel_id, "ai_analysis_cache_hit"))
+        return cached
+    
+    def _complete_triage(self, message_data: Dict[str, Any], decision: TriageDecision) -> bool:
+        """
+        Store minimal metadata for a message triage short-circuited.
+        
+        Args:
+            message_data: Message data from the queue
+            decision: Triage decision
+            
+        Returns:
+            bool: True if stored successfully
+        """
+        message_id = message_data.get('message_id', 'unknown_id')
+        channel_id = message_data.get('channel_id', 'unknown_channel')
+        self.logger.info(
+            log_message_processing(message_id, channel_id, "ai_analysis_skipped_by_triage", reason=decision.reason)
+        )
+        return self._complete_analysis(
+            message_id,
+            channel_id,
+            triage_metadata(message_data['message_text'], decision),
+            TRIAGE_MODEL,
+            message_timestamp=message_data.get('message_timestamp')
+        )
+    
+    def _complete_analysis(
+        self,
+        message_id: str,
+        channel_id: str,
+        ai_metadata: Dict[str, Any],
+        model: str,
+        message_timestamp: Optional[float] = None
+    ) -> bool:
+        """
+        Stamp parsed metadata with processing details and store it.
+        
+        Args:
+            message_id: Telegram message ID
+            channel_id: Channel ID
+            ai_metadata: Parsed and validated metadata
+            model: Model that produced the analysis
+            message_timestamp: Original message timestamp from the queue, if known
+            
+        Returns:
+            bool: True if stored successfully
+        """
+        # Add processing metadata
+        ai_metadata.update({
+            "analysis_model": model, # Model used for this analysis
+            "analysis_timestamp": datetime.now(timezone.utc).isoformat(),
+            "processing_version": "1.0" # Version of this processing logic
+        })
+        
+        # Store metadata in database
+        # _store_ai_metadata has its own logging including log_database_operation
+        success = self._store_ai_metadata(message_id, channel_id, ai_metadata, message_timestamp=message_timestamp)
+        
+        if success:
+            self.logger.info(
+                log_message_processing(
+                    message_id,
+                    channel_id,
+                    "ai_analysis_completed",
+                    summary_length=len(ai_metadata.get('summary', '')),
+                    topics_count=len(ai_metadata.get('topics', [])),
+                    sentiment=ai_metadata.get('sentiment'),
+                    confidence=ai_metadata.get('confidence_score'),
+                    model_used=model
+                )
+            )
+        # If not success, _store_ai_metadata would have logged the error.
+        
+        return success
+    
+    def _complete_llm_analysis(self, message_data: Dict[str, Any], ai_metadata: Dict[str, Any], model: str) -> bool:
+        """
+        Store an LLM analysis and, once stored, let triage skip later copies of the message.
+        
+        Args:
+            message_data: Message data from the queue
+            ai_metadata: Parsed and validated metadata
+            model: Model that produced the analysis
+            
+        Returns:
+            bool: True if stored successfully
+        """
+        success = self._complete_analysis(
+            message_data.get('message_id', 'unknown_id'),
+            message_data.get('channel_id', 'unknown_channel'),
+            ai_metadata,
+            model,
+            message_timestamp=message_data.get('message_timestamp')
+        )
+        if success and self.triage:
+            self.triage.remember(message_data['message_text'], message_key(message_data))
+        return success
+    
+    def process_batch(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Analyze several messages with as few LLM requests as the token budget allows.
+        
+        Messages are packed into ``batch_text_analysis`` prompts; the JSON array
+        response is split back into per-message metadata. Messages missing from
+        or unparseable in a batch response fall back to ``process_message``.
+        
+        Args:
+            messages: Message data from the queue
+            
+        Returns:
+            List[bool]: Processing success for each message, in input order
+        """
+        results = [True] * len(messages) # Messages without text need no processing
+        pending = []
+        for index, message_data in enumerate(messages):
+            if not message_data.get('message_text') or not message_data['message_text'].strip():
+                continue
+            decision = self.triage.classify(message_data['message_text']) if self.triage else None
+            if decision:
+                results[index] = self._complete_triage(message_data, decision)
+            else:
+                pending.append(index)
+        
+        prompt = self.prompt_manager.get_prompt_with_version("batch_text_analysis") if len(pending) > 1 else None
+        if not prompt:
+            for index in pending:
+                results[index] = self.process_message(messages[index])
+            return results
+        prompt_template, prompt_version = prompt
+        
+        cache_keys = {}
+        for index in list(pending):
+            message_data = messages[index]
+            cache_keys[index] = make_cache_key(
+                message_data['message_text'], "batch_text_analysis", prompt_template, self._model_name()
+            )
+            message_id = message_data.get('message_id', 'unknown_id')
+            channel_id = message_data.get('channel_id', 'unknown_channel')
+            cached = self._cached_analysis(cache_keys[index], message_id, channel_id)
+            if cached:
+                results[index] = self._complete_analysis(
+                    message_id, channel_id, cached, self._model_name(),
+                    message_timestamp=messages[index].get('message_timestamp')
+                )
+                pending.remove(index)
+        
+        # Copies of the same text within the batch are analyzed once and served from the cache
+        first_by_key: Dict[str, int] = {}
+        duplicates = []
+        if self.result_cache:
+            for index in list(pending):
+                if cache_keys[index] in first_by_key:
+                    duplicates.append(index)
+                    pending.remove(index)
+                else:
+                    first_by_key[cache_keys[index]] = index
+        
+        if self.triage:
+            for index in list(pending):
+                decision = self.triage.check_duplicate(messages[index]['message_text'], message_key(messages[index]))
+                if decision:
+                    results[index] = self._complete_triage(messages[index], decision)
+                    pending.remove(index)
+        
+        overhead = estimate_tokens(prompt_template)
+        chunks = plan_batches(
+            pending,
+            lambda index: estimate_tokens(messages[index]['message_text']),
+            settings.llm.batch_token_budget - overhead,
+            settings.llm.batch_max_messages
+        )
+        for chunk in chunks:
+            chunk_messages = [messages[index] for index in chunk]
+            if len(chunk) == 1:
+                chunk_results = [self.process_message(chunk_messages[0])]
+            else:
+                chunk_results = self._process_chunk(
+                    prompt_template,
+                    chunk_messages,
+                    [cache_keys[index] for index in chunk],
+                    prompt_version
+                )
+            for index, success in zip(chunk, chunk_results):
+                results[index] = success
+        
+        for index in duplicates:
+            message_id = messages[index].get('message_id', 'unknown_id')
+            channel_id = messages[index].get('channel_id', 'unknown_channel')
+            cached = self._cached_analysis(cache_keys[index], message_id, channel_id)
+            if cached:
+                results[index] = self._complete_analysis(
+                    message_id, channel_id, cached, self._model_name(),
+                    message_timestamp=messages[index].get('message_timestamp')
+                )
+            else:
+                results[index] = self.process_message(messages[index])
+        return results
+    
+    def _process_chunk(
+        self,
+        prompt_template: str,
+        chunk: List[Dict[str, Any]],
+        cache_keys: List[str],
+        prompt_version: int
+    ) -> List[bool]:
+        """
+        Analyze one packed batch, falling back to single-message analysis per failed item.
+        
+        Items are identified by their position in the batch, since Telegram
+        message IDs are only unique within a channel.
+        
+        Args:
+            prompt_template: ``batch_text_analysis`` template
+            chunk: Messages with text, within the token budget
+            cache_keys: Result cache key of each message
+            prompt_version: Version of the batch prompt template
+            
+        Returns:
+            List[bool]: Processing success for each message, in chunk order
+        """
+        parsed: Dict[int, Dict[str, Any]] = {}
+        model = None
+        try:
+            formatted_prompt = self.prompt_manager.format_prompt(
+                prompt_template,
+                messages_json=json.dumps(
+                    [{"id": index, "text": message_data['message_text']} for index, message_data in enumerate(chunk)],
+                    ensure_ascii=False
+                )
+            )
+            self.logger.debug("Requesting batched AI analysis from LLM client.", batch_size=len(chunk))
+            response = self.llm_client.generate_content(
+                formatted_prompt,
+                max_tokens=BATCH_OUTPUT_TOKENS_PER_MESSAGE * len(chunk)
+            )
+            model = response.model
+            parsed = self._parse_batch_response(response.content, len(chunk))
+        except Exception as e:
+            self.logger.error(
+                "Batched AI analysis request failed, falling back to single-message analysis.",
+                batch_size=len(chunk),
+                error=str(e),
+                error_type=type(e).__name__,
+                exc_info=True
+            )
+        
+        results = []
+        for index, message_data in enumerate(chunk):
+            if index in parsed:
+                if self.result_cache:
+                    self.result_cache.set(cache_keys[index], parsed[index], "batch_text_analysis", prompt_version, model)
+                results.append(self._complete_llm_analysis(message_data, parsed[index], model))
+            else:
+                results.append(self.process_message(message_data))
+        
+        self.logger.info(
+            "Batched AI analysis finished.",
+            batch_size=len(chunk),
+            parsed=len(parsed),
+            fallbacks=len(chunk) - len(parsed)
+        )
+        return results
+    
+    def _parse_batch_response(self, response_text: str, batch_size: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Split a batched JSON array response into per-message metadata.
+        
+        Args:
+            response_text: Raw response from LLM
+            batch_size: Number of messages in the batch
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: Validated metadata keyed by batch position (failed items omitted)
+        """
+        try:
+            items = json.loads(self._strip_code_fence(response_text))
+        except json.JSONDecodeError as e:
+            self.logger.warning(
+                "Failed to parse JSON array from batched AI response.",
+                json_error=str(e),
+                response_preview=response_text[:500]
+            )
+            return {}
+        if not isinstance(items, list):
+            self.logger.warning("Batched AI response is not a JSON array.", response_type=type(items).__name__)
+            return {}
+        
+        parsed = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.pop('id'))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < batch_size or index in parsed:
+                continue
+            metadata = self._validate_metadata(item, str(index))
+            if metadata:
+                parsed[index] = metadata
+        return parsed
+    
+    def _strip_code_fence(self, response_text: str, message_id: str = "unknown") -> str:
+        """Remove a markdown code block wrapped around an LLM response."""
+        # Clean response text (remove markdown code blocks if present)
+        cleaned_text = response_text.strip()
+        if cleaned_text.startswith('```json'):
+            cleaned_text = cleaned_text[7:]
+            self.logger.debug("Removed ```json prefix from response.", message_id=message_id)
+        if cleaned_text.endswith('```'):
+            cleaned_text = cleaned_text[:-3]
+            self.logger.debug("Removed ``` suffix from response.", message_id=message_id)
+        return cleaned_text.strip()
+    
     def _parse_ai_response(self, response_text: str, message_id: str = "unknown") -> Optional[Dict[str, Any]]:
         """
         Parse AI response and validate structure.
@@ -154,20 +544,38 @@ class MessageProcessor(LoggingMixin):
         """
         self.logger.debug("Starting to parse AI response.", message_id=message_id, response_length=len(response_text))
         try:
-            # Clean response text (remove markdown code blocks if present)
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-                self.logger.debug("Removed ```json prefix from response.", message_id=message_id)
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3]
-                self.logger.debug("Removed ``` suffix from response.", message_id=message_id)
-            cleaned_text = cleaned_text.strip()
-            
             # Parse JSON
-            metadata = json.loads(cleaned_text)
+            metadata = json.loads(self._strip_code_fence(response_text, message_id))
             self.logger.debug("Successfully parsed JSON from AI response.", message_id=message_id)
             
+        except json.JSONDecodeError as e:
+            self.logger.error(
+                "Failed to parse JSON from AI response.",
+                message_id=message_id,
+                json_error=str(e),
+                response_preview=response_text[:500] + "..." if len(response_text) > 500 else response_text,
+                exc_info=True
+            )
+            return None
+        
+        return self._validate_metadata(metadata, message_id)
+    
+    def _validate_metadata(self, metadata: Any, message_id: str = "unknown") -> Optional[Dict[str, Any]]:
+        """
+        Validate and sanitize parsed AI metadata.
+        
+        Args:
+            metadata: Parsed JSON object for one message
+            message_id: Message ID for logging context
+            
+        Returns:
+            Optional[Dict[str, Any]]: Sanitized metadata or None if invalid
+        """
+        try:
+            if not isinstance(metadata, dict):
+                self.logger.error("AI response is not a JSON object.", message_id=message_id)
+                return None
+            
             # Validate required fields
             required_fields = ['summary', 'topics', 'sentiment', 'keywords'] # Consider entities, source_type, language as well
             for field in required_fields:
@@ -175,7 +583,7 @@ class MessageProcessor(LoggingMixin):
                     self.logger.warning(
                         f"Missing required field '{field}' in AI response.",
                         message_id=message_id,
-                        ai_response_preview=cleaned_text[:200]
+                        ai_response_preview=json.dumps(metadata)[:200]
                     )
                     # Depending on strictness, might return None here or fill with default.
                     # For now, just warning. If critical, return None.
@@ -211,15 +619,6 @@ class MessageProcessor(LoggingMixin):
             self.logger.info("Successfully parsed and validated AI response.", message_id=message_id)
             return metadata
             
-        except json.JSONDecodeError as e:
-            self.logger.error(
-                "Failed to parse JSON from AI response.",
-                message_id=message_id,
-                json_error=str(e),
-                response_preview=response_text[:500] + "..." if len(response_text) > 500 else response_text,
-                exc_info=True
-            )
-            return None
         except Exception as e:
             self.logger.error(
                 "Unexpected error parsing AI response.",
@@ -229,14 +628,25 @@ class MessageProcessor(LoggingMixin):
             )
             return None
     
-    def _store_ai_metadata(self, message_id: str, channel_id: str, ai_metadata: Dict[str, Any]) -> bool:
+    def _store_ai_metadata(
+        self,
+        message_id: str,
+        channel_id: str,
+        ai_metadata: Dict[str, Any],
+        message_timestamp: Optional[float] = None
+    ) -> bool:
         """
         Store AI metadata in the database.
         
+        Telegram message IDs are only unique within a channel, so the message
+        is looked up by both; the timestamp, when known, also lets PostgreSQL
+        prune the lookup to a single partition.
+        
         Args:
             message_id: Telegram message ID
-            channel_id: Channel ID for logging context
+            channel_id: Channel ID
             ai_metadata: Processed AI metadata
+            message_timestamp: Original message timestamp (Unix seconds), if known
             
         Returns:
             bool: True if stored successfully
@@ -251,9 +661,15 @@ class MessageProcessor(LoggingMixin):
         try:
             # Find the message in the database
             self.logger.debug(log_database_operation("query_message", Message.__tablename__, telegram_message_id=message_id))
-            message_record = db.query(Message).filter( # Renamed to avoid conflict
-                Message.telegram_message_id == int(message_id)
-            ).first()
+            lookup_filters = [
+                Message.telegram_message_id == int(message_id),
+                Message.channel_id == int(channel_id)
+            ]
+            if message_timestamp is not None:
+                lookup_filters.append(
+                    Message.message_timestamp == datetime.fromtimestamp(float(message_timestamp), tz=timezone.utc)
+                )
+            message_record = db.query(Message).filter(*lookup_filters).first() # Renamed to avoid conflict
             
             if not message_record:
                 self.logger.error(
@@ -263,8 +679,18 @@ class MessageProcessor(LoggingMixin):
                 )
                 return False
             
-            # Update with AI metadata
+            # Triaged messages keep what the local extractor found at ingest
+            existing = message_record.ai_metadata or {}
+            if existing.get('provisional') and ai_metadata.get('triage'):
+                for field in ('topics', 'keywords', 'entities'):
+                    ai_metadata[field] = existing.get(field) or ai_metadata[field]
+            
+            # Update with AI metadata, replacing provisional metadata from ingest
             message_record.ai_metadata = ai_metadata
+            if settings.rollups.enabled:
+                get_metadata_rollups().record(
+                    db, message_record.channel_id, message_record.message_timestamp, ai_metadata, previous=existing
+                )
             db.commit()
             
             self.logger.info(
@@ -273,6 +699,14 @@ class MessageProcessor(LoggingMixin):
                 db_message_id=message_record.id, # Internal DB ID
                 channel_id=channel_id
             )
+            # Built from the stored row, so the event's IDs, text and timestamp belong to one message
+            self._publish_analyzed_event(create_message_analyzed_event(
+                str(message_record.telegram_message_id),
+                str(message_record.channel_id),
+                message_record.message_text,
+                message_record.message_timestamp.timestamp() if message_record.message_timestamp else None,
+                ai_metadata
+            ))
             return True
             
         except Exception as e:
@@ -290,6 +724,152 @@ class MessageProcessor(LoggingMixin):
             return False
         finally:
             db.close()
+    
+    def _publish_analyzed_event(self, event: Dict[str, Any]) -> None:
+        """
+        Publish a message analyzed event for streaming alert evaluation.
+        
+        Failures are logged, not raised: the metadata is already stored and the
+        streaming evaluator rebuilds its windows from the database on restart.
+        
+        Args:
+            event: Event from ``create_message_analyzed_event``
+        """
+        if not settings.alerts.streaming_enabled:
+            return
+        with self._event_lock:
+            try:
+                if self._event_producer is None:
+                    self._event_producer = MessageProducer()
+                if not self._event_producer.publish_message_analyzed_event(event):
+                    self.logger.warning("Message analyzed event was not confirmed.", message_id=event['message_id'])
+            except Exception as e:
+                self.logger.warning(
+                    "Failed to publish message analyzed event.",
+                    message_id=event['message_id'],
+                    error=str(e)
+                )
+                self._event_producer = None # Reconnect on the next event
+    
+    def close(self) -> None:
+        """Close the analyzed event producer connection."""
+        with self._event_lock:
+            if self._event_producer:
+                self._event_producer.close()
+                self._event_producer = None
+
+
+class AnalysisBatcher(LoggingMixin):
+    """
+    Groups messages arriving on concurrent consumer threads into analysis batches.
+    
+    Each ``submit`` call blocks its consumer thread until the batch containing
+    the message has been analyzed. A collector thread closes a batch when it
+    reaches ``max_messages``, exhausts the token budget or its oldest message
+    has waited ``max_wait_ms``; batches are analyzed on a pool of
+    ``max_concurrent_batches`` threads.
+    """
+    
+    def __init__(
+        self,
+        processor: MessageProcessor,
+        max_messages: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        max_wait_ms: Optional[int] = None,
+        max_concurrent_batches: Optional[int] = None
+    ):
+        """
+        Initialize the batcher and start its collector thread.
+        
+        Args:
+            processor: Processor used to analyze each batch
+            max_messages: Maximum messages per batch (defaults to LLM_BATCH_MAX_MESSAGES)
+            token_budget: Estimated message tokens per batch (defaults to LLM_BATCH_TOKEN_BUDGET)
+            max_wait_ms: Maximum batching delay (defaults to LLM_BATCH_MAX_WAIT_MS)
+            max_concurrent_batches: Batches analyzed at once (defaults to LLM_MAX_CONCURRENT_REQUESTS)
+        """
+        self.processor = processor
+        self.max_messages = max(1, max_messages or settings.llm.batch_max_messages)
+        self.token_budget = token_budget or settings.llm.batch_token_budget
+        self.max_wait = (max_wait_ms or settings.llm.batch_max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent_batches or settings.llm.max_concurrent_requests),
+            thread_name_prefix="analysis-batch"
+        )
+        self._stopped = threading.Event()
+        self._submit_lock = threading.Lock()  # Orders submits against close, so none is queued after the drain
+        self._collector = threading.Thread(target=self._collect, name="analysis-batcher", daemon=True)
+        self._collector.start()
+        self.logger.info(
+            "AnalysisBatcher initialized.",
+            max_messages=self.max_messages,
+            token_budget=self.token_budget,
+            max_wait_ms=round(self.max_wait * 1000)
+        )
+    
+    def submit(self, message_data: Dict[str, Any]) -> bool:
+        """
+        Queue a message for batched analysis and wait for its result.
+        
+        Args:
+            message_data: Message data from the queue
+            
+        Returns:
+            bool: True if processed successfully, False if the batcher is closed
+        """
+        future: Future = Future()
+        with self._submit_lock:
+            if self._stopped.is_set():
+                self.logger.warning(
+                    "AnalysisBatcher is closed; rejecting message.",
+                    message_id=message_data.get('message_id', 'unknown_id')
+                )
+                return False
+            self._queue.put((message_data, future))
+        return future.result()
+    
+    def close(self) -> None:
+        """Analyze everything still queued, then stop the collector and batch threads."""
+        with self._submit_lock:
+            self._stopped.set()
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+        self.logger.info("AnalysisBatcher stopped.")
+    
+    def _collect(self) -> None:
+        """Collect queued messages into batches and hand them to the batch pool."""
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            batch = [first]
+            used = estimate_tokens(first[0].get('message_text') or '')
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_messages and used < self.token_budget:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                used += estimate_tokens(item[0].get('message_text') or '')
+            
+            self._executor.submit(self._analyze, batch)
+    
+    def _analyze(self, batch: List[tuple]) -> None:
+        """Analyze one batch and resolve the waiting consumer threads."""
+        try:
+            results = self.processor.process_batch([message_data for message_data, _ in batch])
+        except Exception as e:
+            self.logger.error("Unexpected error in batched AI analysis.", batch_size=len(batch), error=str(e), exc_info=True)
+            results = [False] * len(batch)
+        for (_, future), success in zip(batch, results):
+            future.set_result(success)
 
 
 class AIAnalysisConsumer(LoggingMixin):
@@ -301,6 +881,9 @@ class AIAnalysisConsumer(LoggingMixin):
         """Initialize the AI analysis consumer."""
         self.logger.info("Initializing AIAnalysisConsumer...")
         self.processor = MessageProcessor() # MessageProcessor has its own init logging
+        self.batcher: Optional[AnalysisBatcher] = None
+        if settings.llm.batch_max_messages > 1:
+            self.batcher = AnalysisBatcher(self.processor)
         self.consumer = None # To be initialized in start_consuming
         self.logger.info("AIAnalysisConsumer initialized successfully.")
     
@@ -324,8 +907,11 @@ class AIAnalysisConsumer(LoggingMixin):
         )
 
         try:
-            # Process the message - process_message has detailed logging
-            success = self.processor.process_message(message_data)
+            # Process the message - process_message / process_batch have detailed logging
+            if self.batcher:
+                success = self.batcher.submit(message_data)
+            else:
+                success = self.processor.process_message(message_data)
             self.logger.info(
                 "Message processing in callback finished.",
                 message_id=message_id,
@@ -357,12 +943,20 @@ class AIAnalysisConsumer(LoggingMixin):
         try:
             self.consumer = create_consumer(
                 queue_name=settings.rabbitmq.queue_new_message,
-                callback=self.message_callback
+                callback=self.message_callback,
+                prefetch_count=settings.rabbitmq.consumer_prefetch_count,
+                # In batch mode every prefetched delivery needs a thread waiting on its batch
+                workers=(
+                    max(settings.rabbitmq.consumer_prefetch_count, self.batcher.max_messages)
+                    if self.batcher else settings.llm.max_concurrent_requests
+                )
             )
             
             self.logger.info(
                 "AI analysis message consumer started successfully. Waiting for messages...",
-                queue_name=settings.rabbitmq.queue_new_message
+                queue_name=settings.rabbitmq.queue_new_message,
+                workers=self.consumer.workers,
+                prefetch_count=self.consumer.prefetch_count
             )
             self.consumer.start_consuming() # This is a blocking call
             
@@ -380,7 +974,11 @@ class AIAnalysisConsumer(LoggingMixin):
         finally:
             self.logger.info("AI Analysis consumer loop exited.")
             if self.consumer: # Ensure cleanup if consumer was initialized
+                if self.batcher:
+                    # Release consumer threads still waiting on a batch before draining them
+                    self.batcher.close()
                 self.consumer.close()
+                self.processor.close()
                 self.logger.info("RabbitMQ consumer connection closed.")
     
     def stop_consuming(self) -> None:
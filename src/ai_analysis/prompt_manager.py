@@ -6,23 +6,103 @@ Provides structured prompts for different analysis tasks.
 """
 
 import json
-from typing import Any, Dict, List, Optional
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from shared.config import get_settings
 from shared.database import get_sync_db
-from shared.logging import LoggingMixin, get_logger
+from shared.logging import LoggingMixin, get_logger, log_database_operation, log_function_call
 from shared.models import Prompt
 
+settings = get_settings()
 logger = get_logger(__name__)
 
 
+@dataclass
+class CompiledPrompt:
+    """
+    Active prompt template pre-parsed for repeated formatting.
+    
+    Templates that only use plain ``{name}`` fields are rendered by joining
+    the pre-split literal parts; anything fancier falls back to ``str.format``.
+    """
+    
+    name: str
+    version: int
+    template: str
+    fields: Tuple[str, ...] = ()
+    _parts: Optional[List[Tuple[str, Optional[str]]]] = field(default=None, repr=False)
+    
+    @classmethod
+    def compile(cls, name: str, version: int, template: str) -> "CompiledPrompt":
+        """
+        Parse a template once.
+        
+        Args:
+            name: Prompt template name
+            version: Prompt version
+            template: Prompt template text
+            
+        Returns:
+            CompiledPrompt: Compiled template
+        """
+        parts: Optional[List[Tuple[str, Optional[str]]]] = []
+        fields = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            if field_name is not None:
+                fields.append(field_name)
+                if format_spec or conversion or not field_name.isidentifier():
+                    parts = None
+            if parts is not None:
+                parts.append((literal, field_name))
+        return cls(name=name, version=version, template=template, fields=tuple(dict.fromkeys(fields)), _parts=parts)
+    
+    def render(self, **kwargs: Any) -> str:
+        """
+        Format the template; raises KeyError for a missing variable, like ``str.format``.
+        
+        Args:
+            **kwargs: Variables to substitute in the template
+            
+        Returns:
+            str: Formatted prompt
+        """
+        if self._parts is None:
+            return self.template.format(**kwargs)
+        return "".join(
+            literal if field_name is None else literal + str(kwargs[field_name])
+            for literal, field_name in self._parts
+        )
+
+
 class PromptManager(LoggingMixin):
     """
     Manages prompt templates for LLM analysis tasks.
+    
+    Active prompts are kept compiled in memory. Every ``refresh_seconds`` a
+    single query compares the cached versions with the active ones in the
+    database, so activating a new version propagates without a restart.
+    Prompts without an active version are remembered as absent until then.
     """
     
-    def __init__(self):
-        """Initialize the prompt manager."""
-        self.logger.info("PromptManager initialized.") # Added a period for consistency.
+    def __init__(self, refresh_seconds: Optional[float] = None):
+        """
+        Initialize the prompt manager.
+        
+        Args:
+            refresh_seconds: Interval between active-version checks (defaults to LLM_PROMPT_REFRESH_SECONDS)
+        """
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.llm.prompt_refresh_seconds
+        self._active: Dict[str, CompiledPrompt] = {}
+        self._by_template: Dict[str, CompiledPrompt] = {}
+        self._missing: Set[str] = set()  # Names without an active version, rechecked on refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self.logger.info("PromptManager initialized.", refresh_seconds=self.refresh_seconds) # Added a period for consistency.
     
     def get_prompt(self, name: str, version: int = None) -> Optional[str]:
         """
@@ -35,6 +115,110 @@ class PromptManager(LoggingMixin):
         Returns:
             Optional[str]: Prompt template or None if not found
         """
+        prompt = self.get_prompt_with_version(name, version)
+        return prompt[0] if prompt else None
+    
+    def get_prompt_with_version(self, name: str, version: int = None) -> Optional[Tuple[str, int]]:
+        """
+        Get a prompt template together with its version number.
+        
+        Args:
+            name: Prompt template name
+            version: Specific version (if None, gets the active version)
+            
+        Returns:
+            Optional[Tuple[str, int]]: Prompt template and version, or None if not found
+        """
+        if version is not None:
+            return self._load_prompt(name, version)
+        
+        self._refresh_if_stale()
+        with self._lock:
+            compiled = self._active.get(name)
+            missing = name in self._missing
+        if compiled:
+            return compiled.template, compiled.version
+        if missing:
+            return None
+        
+        prompt = self._load_prompt(name)
+        if prompt:
+            self._cache_active(CompiledPrompt.compile(name, prompt[1], prompt[0]))
+        return prompt
+    
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drop cached active prompts so the next lookup reloads them.
+        
+        Args:
+            name: Prompt to drop (None drops all)
+        """
+        with self._lock:
+            if name is None:
+                self._missing.clear()
+            else:
+                self._missing.discard(name)
+            names = [name] if name is not None else list(self._active)
+            for prompt_name in names:
+                compiled = self._active.pop(prompt_name, None)
+                if compiled:
+                    self._by_template.pop(compiled.template, None)
+    
+    def _cache_active(self, compiled: CompiledPrompt) -> None:
+        """Store a compiled active prompt, replacing any older version."""
+        with self._lock:
+            previous = self._active.get(compiled.name)
+            if previous:
+                self._by_template.pop(previous.template, None)
+            self._active[compiled.name] = compiled
+            self._by_template[compiled.template] = compiled
+    
+    def _refresh_if_stale(self) -> None:
+        """Reload cached prompts whose active version changed, at most once per refresh interval."""
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # Another thread is already checking; keep serving the cached versions
+        try:
+            self._checked_at = time.monotonic()
+            with self._lock:
+                cached_versions = {name: compiled.version for name, compiled in self._active.items()}
+                cached_versions.update((name, None) for name in self._missing)
+            if not cached_versions:
+                return
+            
+            db = next(get_sync_db())
+            try:
+                self.logger.debug(log_database_operation("query_active_versions", Prompt.__tablename__, prompts=len(cached_versions)))
+                active_versions = dict(
+                    db.query(Prompt.name, Prompt.version).filter(
+                        Prompt.name.in_(list(cached_versions)),
+                        Prompt.is_active == True
+                    ).all()
+                )
+            except Exception as e:
+                self.logger.error(
+                    log_database_operation("query_active_versions_failed", Prompt.__tablename__, error=str(e)),
+                    exc_info=True
+                )
+                return
+            finally:
+                db.close()
+            
+            for name, cached_version in cached_versions.items():
+                if active_versions.get(name) != cached_version:
+                    self.logger.info(
+                        "Active prompt version changed, reloading.",
+                        prompt_name=name,
+                        cached_version=cached_version,
+                        active_version=active_versions.get(name)
+                    )
+                    self.invalidate(name)
+        finally:
+            self._refresh_lock.release()
+    
+    def _load_prompt(self, name: str, version: int = None) -> Optional[Tuple[str, int]]:
+        """Query a prompt template and its version from the database."""
         self.logger.debug(
             log_function_call("get_prompt", prompt_name=name, requested_version=version)
         )
@@ -66,13 +250,17 @@ class PromptManager(LoggingMixin):
                     prompt_version=prompt_obj.version,
                     is_active=prompt_obj.is_active
                 )
-                return prompt_obj.template
+                return prompt_obj.template, prompt_obj.version
             else:
                 self.logger.warning(
                     "Prompt not found in database",
                     prompt_name=name,
                     requested_version=version
                 )
+                if version is None:
+                    # Remember the absence until a refresh finds an active version
+                    with self._lock:
+                        self._missing.add(name)
                 return None
                 
         except Exception as e:
@@ -109,7 +297,12 @@ class PromptManager(LoggingMixin):
             )
         )
         try:
-            formatted_prompt = template.format(**kwargs)
+            with self._lock:
+                compiled = self._by_template.get(template)
+            if compiled:
+                formatted_prompt = compiled.render(**kwargs)
+            else:
+                formatted_prompt = template.format(**kwargs)
             self.logger.debug("Prompt formatted successfully.")
             return formatted_prompt
         except KeyError as e:
@@ -135,7 +328,8 @@ class PromptManager(LoggingMixin):
         name: str, 
         template: str, 
         parameters: Dict[str, Any] = None,
-        version: int = None # Explicitly allow setting a version
+        version: int = None, # Explicitly allow setting a version
+        skip_unchanged: bool = False
     ) -> bool:
         """
         Save a prompt template to the database.
@@ -145,9 +339,10 @@ class PromptManager(LoggingMixin):
             template: Prompt template string
             parameters: Additional parameters/metadata for the prompt
             version: Version number (if None, auto-increments from max existing)
+            skip_unchanged: Keep the active version if its template and parameters are identical
             
         Returns:
-            bool: True if saved successfully
+            bool: True if saved successfully (or kept as unchanged)
         """
         self.logger.debug(
             log_function_call(
@@ -160,6 +355,12 @@ class PromptManager(LoggingMixin):
         db = next(get_sync_db())
         
         try:
+            if skip_unchanged:
+                active = db.query(Prompt).filter(Prompt.name == name, Prompt.is_active == True).first()
+                if active and active.template == template and (active.parameters or {}) == (parameters or {}):
+                    self.logger.info("Active prompt is unchanged, keeping its version.", prompt_name=name, version=active.version)
+                    return True
+            
             target_version = version
             if target_version is None:
                 self.logger.debug(log_database_operation("query_max_version", Prompt.__tablename__, name=name))
@@ -193,6 +394,7 @@ class PromptManager(LoggingMixin):
             
             db.add(new_prompt)
             db.commit()
+            self.invalidate(name)
             
             self.logger.info(
                 log_database_operation(
@@ -274,8 +476,54 @@ Instructions:
             "description": "Analyzes text messages and extracts structured metadata",
             "input_variables": ["message_text"],
             "output_format": "json"
-        }
+        },
         # version=1 # Optionally set initial version
+        skip_unchanged=True # Restarts keep the active version instead of adding one
+    )
+    
+    # Batched Text Analysis Prompt
+    batch_text_analysis_prompt = """
+Analyze each of the following news messages independently and extract structured information. Respond ONLY with a valid JSON array containing exactly one object per input message.
+
+Messages (JSON array of {{"id": ..., "text": ...}}):
+{messages_json}
+
+Required format for each array element:
+{{
+    "id": "the id of the message exactly as given",
+    "summary": "Brief 1-2 sentence summary of the main news",
+    "topics": ["topic1", "topic2", "topic3"],
+    "sentiment": "positive|negative|neutral",
+    "entities": {{
+        "people": ["person1", "person2"],
+        "organizations": ["org1", "org2"],
+        "locations": ["location1", "location2"],
+        "dates": ["date1", "date2"],
+        "other": ["entity1", "entity2"]
+    }},
+    "keywords": ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"],
+    "source_type": "news|technology|politics|business|sports|entertainment|other",
+    "confidence_score": 0.85,
+    "language": "en|es|fr|de|ru|ar|other"
+}}
+
+Instructions:
+- Analyze every message on its own; do not merge information across messages
+- Extract 3-5 main topics, 5-8 relevant keywords and all named entities per message
+- Identify sentiment as positive, negative, or neutral
+- Provide confidence score between 0.0 and 1.0 and detect the language
+- Ensure the response is a valid JSON array only
+"""
+    
+    prompt_manager.save_prompt(
+        name="batch_text_analysis",
+        template=batch_text_analysis_prompt,
+        parameters={
+            "description": "Analyzes several text messages in one request, keyed by message id",
+            "input_variables": ["messages_json"],
+            "output_format": "json_array"
+        },
+        skip_unchanged=True
     )
     
     # Summarization Prompt
@@ -303,13 +551,20 @@ Summary:
             "description": "Summarizes multiple news messages into a concise overview",
             "input_variables": ["messages", "time_range"],
             "output_format": "text"
-        }
+        },
         # version=1 # Optionally set initial version
+        skip_unchanged=True
     )
     
     logger.info("Default prompts initialization process completed.")
 
 
+_prompt_manager: Optional[PromptManager] = None
+
+
 def get_prompt_manager() -> PromptManager:
-    """Get a prompt manager instance."""
-    return PromptManager() 
\ No newline at end of file
+    """Get the shared prompt manager instance, so all processors share its prompt cache."""
+    global _prompt_manager
+    if _prompt_manager is None:
+        _prompt_manager = PromptManager()
+    return _prompt_manager 
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Tel-Insights LLM Rate Governor
+
+Client-side admission control for LLM calls: requests-per-minute and
+tokens-per-minute budgets, an in-flight concurrency cap and additive-increase /
+multiplicative-decrease adjustment when the provider answers with 429s.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from prometheus_client import Histogram
+
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+from shared.rate_limit import FILE_BUCKETS_SUPPORTED, FileTokenBucket, TokenBucket
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Rate multiplier bounds and steps for the AIMD adjustment
+_MIN_RATE_FACTOR = 0.1
+_DECREASE_FACTOR = 0.5
+_INCREASE_STEP = 0.05
+
+LLM_QUEUE_DELAY = Histogram(
+    "llm_rate_governor_queue_delay_seconds",
+    "Time LLM calls wait for a concurrency slot and rate budget",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the LLM token count of a text (about 4 characters per token).
+
+    Args:
+        text: Prompt or message text
+
+    Returns:
+        int: Estimated token count
+    """
+    return len(text) // 4 + 1
+
+
+class LLMRateGovernor(LoggingMixin):
+    """
+    Shared admission gate in front of every LLM call.
+
+    Each call takes one in-flight slot, one request from the RPM bucket and
+    its estimated prompt tokens from the TPM bucket. With ``lock_dir`` set,
+    the two buckets are file-backed so all processes on the host share them.
+    A 429 halves the effective rates; each success restores them gradually.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        lock_dir: Optional[str] = None,
+        name: str = "llm"
+    ) -> None:
+        """
+        Initialize the governor.
+
+        Args:
+            requests_per_minute: Request budget (defaults to LLM_REQUESTS_PER_MINUTE)
+            tokens_per_minute: Prompt token budget (defaults to LLM_TOKENS_PER_MINUTE)
+            max_in_flight: Concurrent calls allowed (defaults to LLM_MAX_CONCURRENT_REQUESTS)
+            lock_dir: Directory for cross-process bucket state (defaults to LLM_RATE_LIMIT_LOCK_DIR)
+            name: Budget name, used for the bucket state files and logs
+        """
+        self.name = name
+        self.requests_per_minute = requests_per_minute or settings.llm.requests_per_minute
+        self.tokens_per_minute = tokens_per_minute or settings.llm.tokens_per_minute
+        self.max_in_flight = max(1, max_in_flight or settings.llm.max_concurrent_requests)
+        lock_dir = lock_dir or settings.llm.rate_limit_lock_dir
+        if lock_dir and not FILE_BUCKETS_SUPPORTED:
+            logger.warning("File-shared rate limits are not supported on this platform; using per-process budgets.")
+            lock_dir = None
+
+        request_rate = self.requests_per_minute / 60.0
+        token_rate = self.tokens_per_minute / 60.0
+        if lock_dir:
+            self._requests: TokenBucket = FileTokenBucket(os.path.join(lock_dir, f"{name}_requests.bucket"), request_rate)
+            self._tokens: TokenBucket = FileTokenBucket(
+                os.path.join(lock_dir, f"{name}_tokens.bucket"), token_rate, capacity=token_rate * 60
+            )
+        else:
+            self._requests = TokenBucket(request_rate)
+            self._tokens = TokenBucket(token_rate, capacity=token_rate * 60)
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        # Async callers queue per event loop before taking one of the shared slots
+        self._async_waiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.rate_factor = 1.0
+        self.calls = 0
+        self.rate_limited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.logger.info(
+            "LLMRateGovernor initialized.",
+            name=name,
+            requests_per_minute=self.requests_per_minute,
+            tokens_per_minute=self.tokens_per_minute,
+            max_in_flight=self.max_in_flight,
+            shared_across_processes=bool(lock_dir)
+        )
+
+    def _token_cost(self, prompt: str) -> float:
+        """Estimated prompt tokens, capped so a huge prompt cannot wait forever."""
+        return min(float(estimate_tokens(prompt)), self._tokens.capacity)
+
+    @contextmanager
+    def limit(self, prompt: str) -> Iterator[float]:
+        """
+        Hold an in-flight slot and rate budget for one synchronous LLM call.
+
+        Args:
+            prompt: Prompt text, used to estimate the token cost
+
+        Yields:
+            float: Seconds spent waiting for admission
+        """
+        start = time.monotonic()
+        self._slots.acquire()
+        try:
+            self._requests.acquire(1)
+            self._tokens.acquire(self._token_cost(prompt))
+            waited = self._admitted(start)
+            yield waited
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def limit_async(self, prompt: str) -> AsyncIterator[float]:
+        """
+        Hold an in-flight slot and rate budget for one async LLM call, without blocking the loop.
+
+        Args:
+            prompt: Prompt text, used to estimate the token cost
+
+        Yields:
+            float: Seconds spent waiting for admission
+        """
+        start = time.monotonic()
+        async with self._async_queue():
+            await self._acquire_slot_async()
+            try:
+                for bucket, cost in ((self._requests, 1.0), (self._tokens, self._token_cost(prompt))):
+                    while not bucket.try_acquire(cost):
+                        await asyncio.sleep(max(bucket.time_until(cost), 0.01))
+                waited = self._admitted(start)
+                yield waited
+            finally:
+                self._release()
+
+    def _async_queue(self) -> asyncio.Semaphore:
+        """Semaphore queueing the async callers of the running loop, so at most max_in_flight wait on a slot."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queue = self._async_waiters.get(loop)
+            if queue is None:
+                queue = self._async_waiters[loop] = asyncio.Semaphore(self.max_in_flight)
+        return queue
+
+    async def _acquire_slot_async(self) -> None:
+        """Take an in-flight slot shared with synchronous callers, waiting in the executor when none is free."""
+        if self._slots.acquire(blocking=False):
+            return
+        acquired = asyncio.get_running_loop().run_in_executor(None, self._slots.acquire)
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The executor thread still takes the slot; hand it back once it has
+            acquired.add_done_callback(lambda _: self._slots.release())
+            raise
+
+    def _admitted(self, start: float) -> float:
+        """Record the queueing delay of an admitted call."""
+        waited = time.monotonic() - start
+        LLM_QUEUE_DELAY.observe(waited)
+        with self._lock:
+            self._in_flight += 1
+            self.calls += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        if waited >= 1.0:
+            self.logger.info("LLM call delayed by rate governor.", wait_seconds=round(waited, 3))
+        return waited
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+        self._slots.release()
+
+    def on_success(self) -> None:
+        """Additively restore the rates after a successful call."""
+        if self.rate_factor < 1.0:
+            self._set_rate_factor(min(1.0, self.rate_factor + _INCREASE_STEP))
+
+    def on_rate_limited(self) -> None:
+        """Multiplicatively cut the rates after the provider returned a 429."""
+        with self._lock:
+            self.rate_limited += 1
+        self._set_rate_factor(max(_MIN_RATE_FACTOR, self.rate_factor * _DECREASE_FACTOR))
+        self.logger.warning("LLM provider rate limited the client; reducing rates.", rate_factor=self.rate_factor)
+
+    def _set_rate_factor(self, factor: float) -> None:
+        with self._lock:
+            self.rate_factor = factor
+        self._requests.set_rate(self.requests_per_minute * factor / 60.0)
+        self._tokens.set_rate(self.tokens_per_minute * factor / 60.0)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get admission and queueing metrics.
+
+        Returns:
+            Dict[str, Any]: Call counts, 429 count, queueing delay and effective rates
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "in_flight": self._in_flight,
+                "rate_limited": self.rate_limited,
+                "rate_factor": round(self.rate_factor, 3),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.calls, 4) if self.calls else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+                "effective_requests_per_minute": round(self.requests_per_minute * self.rate_factor, 1),
+                "effective_tokens_per_minute": round(self.tokens_per_minute * self.rate_factor),
+            }
+
+
+_governors: Dict[str, LLMRateGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_rate_governor(name: str = "gemini") -> LLMRateGovernor:
+    """
+    Get the process-wide rate governor of a provider, shared by all its clients.
+
+    Args:
+        name: Provider name; each provider has its own budgets
+
+    Returns:
+        LLMRateGovernor: Governor of the provider
+    """
+    with _governors_lock:
+        if name not in _governors:
+            _governors[name] = LLMRateGovernor(name=name)
+        return _governors[name]
@@ -0,0 +1,256 @@
+"""
+Tel-Insights LLM Result Cache
+
+Two-tier cache of LLM analysis results keyed by normalized message text,
+prompt name and template text and model, so syndicated and forwarded posts
+are only analyzed once. The in-process LRU tier absorbs bursts of copies
+within one worker; the ``llm_result_cache`` table shares results across
+workers and restarts. Keys depend on the template text rather than its
+version number, so re-saving an unchanged prompt does not invalidate them.
+Lookups are exported as the ``llm_result_cache_lookups_total`` counter.
+"""
+
+import copy
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from prometheus_client import Counter
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from shared.cache import LRUCache
+from shared.config import get_settings
+from shared.database import get_db_session
+from shared.logging import LoggingMixin, get_logger, log_database_operation
+from shared.models import LLMResultCacheEntry
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+_URL_PATTERN = re.compile(r"(https?://|www\.)\S+", re.IGNORECASE)
+_MENTION_PATTERN = re.compile(r"(?<!\w)@\w+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+LLM_RESULT_CACHE_LOOKUPS = Counter(
+    "llm_result_cache_lookups_total",
+    "LLM result cache lookups by outcome (memory_hit, db_hit or miss)",
+    ["result"],
+)
+_LOOKUP_RESULTS = {"memory_hits": "memory_hit", "db_hits": "db_hit", "misses": "miss"}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize message text so reposts of the same content map to the same key.
+
+    Applies Unicode NFKC folding and case folding, and drops links and
+    @mentions, which forwarding channels commonly rewrite or append.
+
+    Args:
+        text: Raw message text
+
+    Returns:
+        str: Normalized text
+    """
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    normalized = _URL_PATTERN.sub(" ", normalized)
+    normalized = _MENTION_PATTERN.sub(" ", normalized)
+    return _WHITESPACE_PATTERN.sub(" ", normalized).strip()
+
+
+def make_cache_key(text: str, prompt_name: str, prompt_template: str, model: str) -> str:
+    """
+    Build the result cache key for a message analysis.
+
+    Args:
+        text: Raw message text
+        prompt_name: Prompt template name
+        prompt_template: Prompt template text
+        model: LLM model name
+
+    Returns:
+        str: Hex SHA256 cache key
+    """
+    template_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+    material = "\x1f".join([prompt_name, template_hash, model, normalize_text(text)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache(LoggingMixin):
+    """
+    LRU + database cache of validated LLM analysis results.
+
+    Lookups check the LRU first, then the database; database hits are promoted
+    into the LRU. Stored results are copies, so callers may mutate what they get.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = get_db_session,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the result cache.
+
+        Args:
+            session_factory: Callable returning a new synchronous session
+            max_entries: LRU capacity (defaults to LLM_RESULT_CACHE_SIZE)
+            ttl_seconds: Entry lifetime (defaults to LLM_RESULT_CACHE_TTL_SECONDS)
+        """
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds or settings.llm.result_cache_ttl_seconds
+        self._memory: LRUCache[Dict[str, Any]] = LRUCache(
+            max_entries or settings.llm.result_cache_size,
+            ttl_seconds=self.ttl_seconds
+        )
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.logger.info(
+            "LLMResultCache initialized.",
+            max_entries=self._memory.max_entries,
+            ttl_seconds=self.ttl_seconds
+        )
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis result.
+
+        Args:
+            cache_key: Key from ``make_cache_key``
+
+        Returns:
+            Optional[Dict[str, Any]]: Copy of the cached metadata, or None on a miss
+        """
+        result = self._memory.get(cache_key)
+        if result is not None:
+            self._count("memory_hits")
+            return copy.deepcopy(result)
+
+        result = self._get_persistent(cache_key)
+        if result is None:
+            self._count("misses")
+            return None
+
+        self._count("db_hits")
+        self._memory.set(cache_key, result)
+        return copy.deepcopy(result)
+
+    def set(self, cache_key: str, result: Dict[str, Any], prompt_name: str, prompt_version: int, model: str) -> None:
+        """
+        Store an analysis result in both tiers.
+
+        Args:
+            cache_key: Key from ``make_cache_key``
+            result: Validated analysis metadata
+            prompt_name: Prompt template name
+            prompt_version: Prompt template version
+            model: LLM model name
+        """
+        result = copy.deepcopy(result)
+        self._memory.set(cache_key, result)
+
+        db = self.session_factory()
+        try:
+            now = datetime.now(timezone.utc)
+            values = {
+                "cache_key": cache_key,
+                "prompt_name": prompt_name,
+                "prompt_version": prompt_version,
+                "model": model,
+                "result": result,
+                "hit_count": 0,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_seconds),
+            }
+            statement = _DIALECT_INSERTS[db.bind.dialect.name](LLMResultCacheEntry).values(**values)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["cache_key"],
+                set_={key: values[key] for key in ("result", "created_at", "expires_at")}
+            ))
+            db.commit()
+            self.logger.debug(log_database_operation("upsert", LLMResultCacheEntry.__tablename__, prompt_name=prompt_name))
+        except Exception as e:
+            # The cache is an optimization; a failed write must not fail the analysis
+            self.logger.warning(
+                log_database_operation("upsert_failed", LLMResultCacheEntry.__tablename__, error=str(e))
+            )
+            db.rollback()
+        finally:
+            db.close()
+
+    def _get_persistent(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Read a non-expired entry from the database tier and count the hit."""
+        db = self.session_factory()
+        try:
+            entry = db.get(LLMResultCacheEntry, cache_key)
+            if entry is None:
+                return None
+            expires_at = entry.expires_at
+            if expires_at.tzinfo is None:  # SQLite drops the timezone
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at <= datetime.now(timezone.utc):
+                return None
+            entry.hit_count += 1
+            result = entry.result
+            db.commit()
+            return result
+        except Exception as e:
+            self.logger.warning(
+                log_database_operation("query_failed", LLMResultCacheEntry.__tablename__, error=str(e))
+            )
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        LLM_RESULT_CACHE_LOOKUPS.labels(result=_LOOKUP_RESULTS[counter]).inc()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss metrics for both tiers.
+
+        Returns:
+            Dict[str, Any]: Per-tier hits, misses, hit rate and LRU statistics
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+                "memory": self._memory.stats(),
+            }
+
+
+def purge_expired_results(db: Session) -> int:
+    """
+    Delete expired entries from the persistent tier.
+
+    Args:
+        db: Database session
+
+    Returns:
+        int: Number of deleted entries
+    """
+    deleted = db.query(LLMResultCacheEntry).filter(
+        LLMResultCacheEntry.expires_at <= datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    logger.info(log_database_operation("purge_expired", LLMResultCacheEntry.__tablename__, deleted=deleted))
+    return deleted
@@ -0,0 +1,281 @@
+"""
+Tel-Insights Message Triage
+
+Cheap rule-based checks run before the LLM: messages that are too short,
+emoji/punctuation only, mostly links, in an unwanted language or exact
+copies of a recently analyzed message are short-circuited with
+minimal ``ai_metadata`` instead of an LLM call.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import Counter as TallyCounter
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional
+
+from prometheus_client import Counter
+
+from shared.cache import LRUCache
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+
+from .result_cache import normalize_text
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Model name recorded in the metadata of triaged messages
+TRIAGE_MODEL = "triage"
+
+TRIAGE_SKIPPED = Counter(
+    "ai_analysis_triage_skipped_total",
+    "Messages short-circuited by triage instead of being sent to the LLM",
+    ["reason"],
+)
+
+_URL_PATTERN = re.compile(r"(https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+_MENTION_PATTERN = re.compile(r"(?<!\w)[@#]\w+")
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Very common function words of the Latin-script languages the analysis prompt distinguishes
+_STOPWORDS = {
+    "en": frozenset("the and is are of to in that for with on this was it be have".split()),
+    "es": frozenset("el la los las de que y en un una por con para es del se".split()),
+    "fr": frozenset("le la les de des et est un une que en du pour dans pas sur".split()),
+    "de": frozenset("der die das und ist nicht ein eine zu den mit von auf für sich".split()),
+}
+
+
+@dataclass
+class TriageDecision:
+    """Outcome of triaging one message."""
+
+    reason: str
+    language: Optional[str] = None
+    duplicate_of: Optional[str] = None
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Guess the language of a text from its script and common function words.
+
+    Returns one of the analysis prompt's language codes (en, es, fr, de, ru,
+    ar) or "other"; None when the text has too few letters to tell.
+
+    Args:
+        text: Message text with links and mentions removed
+
+    Returns:
+        Optional[str]: Language code
+    """
+    scripts: TallyCounter = TallyCounter()
+    for char in text:
+        if char.isalpha():
+            name = unicodedata.name(char, "")
+            scripts[name.split(" ", 1)[0]] += 1
+    if sum(scripts.values()) < 3:
+        return None
+
+    script = scripts.most_common(1)[0][0]
+    if script == "CYRILLIC":
+        return "ru"
+    if script == "ARABIC":
+        return "ar"
+    if script != "LATIN":
+        return "other"
+
+    words = [word.lower() for word in _WORD_PATTERN.findall(text)]
+    hits = {language: sum(1 for word in words if word in stopwords) for language, stopwords in _STOPWORDS.items()}
+    language, count = max(hits.items(), key=lambda item: item[1])
+    return language if count else "other"
+
+
+def _fingerprint(text: str) -> str:
+    """Duplicate fingerprint of a message text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class MessageTriage(LoggingMixin):
+    """
+    Rule-based pre-LLM filter with a short-lived duplicate fingerprint index.
+
+    ``classify`` applies the content rules; ``check_duplicate`` must be called
+    separately, after the result cache lookup, so copies whose analysis is
+    already cached still get the full analysis, and ``remember`` once an
+    analysis has been stored.
+    """
+
+    def __init__(
+        self,
+        min_chars: Optional[int] = None,
+        min_words: Optional[int] = None,
+        max_link_ratio: Optional[float] = None,
+        languages: Optional[str] = None,
+        dedup_window_seconds: Optional[int] = None,
+        dedup_size: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the triage stage.
+
+        Args:
+            min_chars: Minimum letters/digits outside links and mentions (defaults to TRIAGE_MIN_CHARS)
+            min_words: Minimum words outside links and mentions (defaults to TRIAGE_MIN_WORDS)
+            max_link_ratio: Maximum share of the text taken by links (defaults to TRIAGE_MAX_LINK_RATIO)
+            languages: Comma-separated languages to analyze, empty for all (defaults to TRIAGE_LANGUAGES)
+            dedup_window_seconds: How long a fingerprint is remembered (defaults to TRIAGE_DEDUP_WINDOW_SECONDS)
+            dedup_size: Maximum remembered fingerprints (defaults to TRIAGE_DEDUP_SIZE)
+        """
+        triage_settings = settings.triage
+        self.min_chars = triage_settings.min_chars if min_chars is None else min_chars
+        self.min_words = triage_settings.min_words if min_words is None else min_words
+        self.max_link_ratio = triage_settings.max_link_ratio if max_link_ratio is None else max_link_ratio
+        languages = triage_settings.languages if languages is None else languages
+        self.languages: FrozenSet[str] = frozenset(code.strip() for code in languages.split(",") if code.strip())
+        self._fingerprints: LRUCache[str] = LRUCache(
+            dedup_size or triage_settings.dedup_size,
+            ttl_seconds=dedup_window_seconds or triage_settings.dedup_window_seconds
+        )
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped: TallyCounter = TallyCounter()
+        self.logger.info(
+            "MessageTriage initialized.",
+            min_chars=self.min_chars,
+            min_words=self.min_words,
+            max_link_ratio=self.max_link_ratio,
+            languages=sorted(self.languages) or "all"
+        )
+
+    def classify(self, text: str) -> Optional[TriageDecision]:
+        """
+        Apply the content rules to a message text.
+
+        Args:
+            text: Non-empty message text
+
+        Returns:
+            Optional[TriageDecision]: Reason to skip the LLM, or None if the message should be analyzed
+        """
+        with self._lock:
+            self.checked += 1
+
+        links_length = sum(len(match.group(0)) for match in _URL_PATTERN.finditer(text))
+        content = _MENTION_PATTERN.sub(" ", _URL_PATTERN.sub(" ", text))
+        alnum_chars = sum(1 for char in content if char.isalnum())
+        language = detect_language(content)
+
+        if links_length and not alnum_chars:
+            return self._skip(TriageDecision("link_only", language))
+        if not alnum_chars:
+            return self._skip(TriageDecision("no_text_content", language))
+        if alnum_chars < self.min_chars or len(_WORD_PATTERN.findall(content)) < self.min_words:
+            return self._skip(TriageDecision("too_short", language))
+        if links_length / len(text.strip()) > self.max_link_ratio:
+            return self._skip(TriageDecision("link_heavy", language))
+        if self.languages and language is not None and language not in self.languages:
+            return self._skip(TriageDecision("language_filtered", language))
+        return None
+
+    def check_duplicate(self, text: str, message_key: str) -> Optional[TriageDecision]:
+        """
+        Check whether an identical (normalized) text was recently analyzed under another message.
+
+        Only messages whose analysis was stored are remembered (see ``remember``),
+        so a copy never points at a message whose analysis failed. Checking the
+        remembered message again (e.g. on redelivery) is not a duplicate.
+
+        Args:
+            text: Message text
+            message_key: Unique message identity, e.g. ``"<channel_id>:<message_id>"``
+
+        Returns:
+            Optional[TriageDecision]: Duplicate decision, or None if the text should be analyzed
+        """
+        with self._lock:
+            first = self._fingerprints.get(_fingerprint(text))
+        if first is None or first == message_key:
+            return None
+        return self._skip(TriageDecision("duplicate", duplicate_of=first))
+
+    def remember(self, text: str, message_key: str) -> None:
+        """
+        Record a message whose analysis was stored, so later copies of its text are skipped.
+
+        Args:
+            text: Message text
+            message_key: Unique message identity
+        """
+        fingerprint = _fingerprint(text)
+        with self._lock:
+            if self._fingerprints.get(fingerprint) is None:
+                self._fingerprints.set(fingerprint, message_key)
+
+    def _skip(self, decision: TriageDecision) -> TriageDecision:
+        TRIAGE_SKIPPED.labels(reason=decision.reason).inc()
+        with self._lock:
+            self.skipped[decision.reason] += 1
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get triage counters.
+
+        Returns:
+            Dict[str, Any]: Messages checked, skipped per reason and skip rate
+        """
+        with self._lock:
+            skipped = sum(self.skipped.values())
+            return {
+                "checked": self.checked,
+                "skipped": skipped,
+                "skipped_by_reason": dict(self.skipped),
+                "skip_rate": round(skipped / self.checked, 4) if self.checked else 0.0,
+            }
+
+
+def triage_metadata(text: str, decision: TriageDecision) -> Dict[str, Any]:
+    """
+    Build the minimal ``ai_metadata`` stored for a triaged message.
+
+    Has the same top-level fields as an LLM analysis so downstream readers
+    need no special case, plus a ``triage`` block recording why it was skipped.
+
+    Args:
+        text: Message text
+        decision: Triage decision
+
+    Returns:
+        Dict[str, Any]: Minimal metadata
+    """
+    triage: Dict[str, Any] = {"skipped": True, "reason": decision.reason}
+    if decision.duplicate_of:
+        triage["duplicate_of"] = decision.duplicate_of
+    return {
+        "summary": text.strip()[:200],
+        "topics": [],
+        "sentiment": "neutral",
+        "entities": {"people": [], "organizations": [], "locations": [], "dates": [], "other": []},
+        "keywords": [],
+        "source_type": "other",
+        "confidence_score": 0.0,
+        "language": decision.language or "other",
+        "triage": triage,
+    }
+
+
+def message_key(message_data: Dict[str, Any]) -> str:
+    """Identity of a queued message, unique across channels."""
+    return f"{message_data.get('channel_id')}:{message_data.get('message_id')}"
+
+
+_triage: Optional[MessageTriage] = None
+
+
+def get_message_triage() -> MessageTriage:
+    """Get the process-wide triage stage shared by all message processors."""
+    global _triage
+    if _triage is None:
+        _triage = MessageTriage()
+    return _triage
@@ -5,16 +5,18 @@ Implements bot commands and user interaction handlers for the alerting system.
 """
 
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
 from shared.config import get_settings
 from shared.database import get_sync_db
-from shared.logging import LoggingMixin, get_logger
+from shared.logging import LoggingMixin, get_logger, log_database_operation, log_function_call
 from shared.models import User, AlertConfig
 
+from .smart_analysis_client import SmartAnalysisClient, get_smart_analysis_client
+
 settings = get_settings()
 logger = get_logger(__name__)
 
@@ -27,8 +29,14 @@ class TelegramBotHandlers(LoggingMixin):
     Telegram bot command and callback handlers.
     """
     
-    def __init__(self):
-        """Initialize the bot handlers."""
+    def __init__(self, smart_analysis: Optional[SmartAnalysisClient] = None):
+        """
+        Initialize the bot handlers.
+        
+        Args:
+            smart_analysis: Client of the Smart Analysis service (defaults to the shared client)
+        """
+        self.smart_analysis = smart_analysis or get_smart_analysis_client()
         self.logger.info("TelegramBotHandlers initialized.") # Added period for consistency
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -50,27 +58,27 @@ class TelegramBotHandlers(LoggingMixin):
             # Register or update user in database
             self._register_user(user) # This method will have its own logging
         
-        welcome_message = (
-            f"🎉 Welcome to Tel-Insights, {user.first_name}!\n\n"
-            "I'm your intelligent news alert bot.\n\n"
-            "Commands:\n"
-            "/help - Show help\n"
-            "/summary [hours] - Get news summary\n"
-            "/trends [hours] - Show topic trends\n"
-            "/create_alert - Create new alert\n"
-            "/list_alerts - Show your alerts"
-        )
+            welcome_message = (
+                f"🎉 Welcome to Tel-Insights, {user.first_name}!\n\n"
+                "I'm your intelligent news alert bot.\n\n"
+                "Commands:\n"
+                "/help - Show help\n"
+                "/summary [hours] - Get news summary\n"
+                "/trends [hours] - Show topic trends\n"
+                "/create_alert - Create new alert\n"
+                "/list_alerts - Show your alerts"
+            )
         
-        keyboard = [
-            [InlineKeyboardButton("📊 Latest Summary", callback_data="summary_1h")],
-            [InlineKeyboardButton("🚨 Setup Alert", callback_data="setup_alert")],
-            [InlineKeyboardButton("📈 Topic Trends", callback_data="trends_24h")],
-            [InlineKeyboardButton("❓ Help", callback_data="help")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard = [
+                [InlineKeyboardButton("📊 Latest Summary", callback_data="summary_1h")],
+                [InlineKeyboardButton("🚨 Setup Alert", callback_data="setup_alert")],
+                [InlineKeyboardButton("📈 Topic Trends", callback_data="trends_24h")],
+                [InlineKeyboardButton("❓ Help", callback_data="help")]
+            ]
+            reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await update.message.reply_text(welcome_message, reply_markup=reply_markup)
-        self.logger.debug(f"Welcome message sent to user {user.id}.")
+            await update.message.reply_text(welcome_message, reply_markup=reply_markup)
+            self.logger.debug(f"Welcome message sent to user {user.id}.")
 
         except Exception as e:
             self.logger.error(
@@ -148,8 +156,8 @@ class TelegramBotHandlers(LoggingMixin):
                     hours = 1
             
             # Request summary from Smart Analysis service
-            self.logger.debug(f"Requesting news summary for {hours} hours (mock).", user_id=user.id)
-            summary_data = await self._get_news_summary(hours) # This is a mock
+            self.logger.debug(f"Requesting news summary for {hours} hours.", user_id=user.id)
+            summary_data = await self._get_news_summary(hours)
             
             if summary_data and summary_data.get('message_count', 0) > 0:
                 summary_text = self._format_summary(summary_data) # format_summary has debug log
@@ -198,8 +206,8 @@ class TelegramBotHandlers(LoggingMixin):
                     hours = 24
             
             # Request trends from Smart Analysis service
-            self.logger.debug(f"Requesting topic trends for {hours} hours (mock).", user_id=user.id)
-            trends_data = await self._get_topic_trends(hours) # This is a mock
+            self.logger.debug(f"Requesting topic trends for {hours} hours.", user_id=user.id)
+            trends_data = await self._get_topic_trends(hours)
             
             if trends_data and trends_data.get('trends'):
                 trends_text = self._format_trends(trends_data) # format_trends has debug log
@@ -745,40 +753,13 @@ class TelegramBotHandlers(LoggingMixin):
     
     async def _get_news_summary(self, hours: int) -> Dict[str, Any]:
         """Get news summary from Smart Analysis service."""
-        # TODO: Implement HTTP client to Smart Analysis service
-        self.logger.info(log_function_call("_get_news_summary (mock_placeholder)", requested_hours=hours))
-        # For now, return mock data
-        if hours == 1: # Specific mock for testing
-            return {
-                'message_count': 5,
-                'summary': f'Mock summary for the last {hours} hour(s). Topics include AI and Tech.',
-                'time_range_hours': hours,
-                'top_topics': {"AI": 3, "Tech": 2}
-            }
-        return {
-            'message_count': 0,
-            'summary': f'No recent news available in the last {hours} hour(s). (Mock)',
-            'time_range_hours': hours,
-            'top_topics': {}
-        }
+        self.logger.info(log_function_call("_get_news_summary", requested_hours=hours))
+        return await self.smart_analysis.summarize_news(hours)
     
     async def _get_topic_trends(self, hours: int) -> Dict[str, Any]:
         """Get topic trends from Smart Analysis service."""
-        # TODO: Implement HTTP client to Smart Analysis service
-        self.logger.info(log_function_call("_get_topic_trends (mock_placeholder)", requested_hours=hours))
-        # For now, return mock data
-        if hours == 24: # Specific mock for testing
-             return {
-                'trends': [
-                    {'topic': 'AI Ethics', 'message_count': 15, 'dominant_sentiment': 'neutral'},
-                    {'topic': 'Quantum Computing', 'message_count': 10, 'dominant_sentiment': 'positive'}
-                ],
-                'time_range_hours': hours
-            }
-        return {
-            'trends': [],
-            'time_range_hours': hours
-        }
+        self.logger.info(log_function_call("_get_topic_trends", requested_hours=hours))
+        return await self.smart_analysis.topic_trends(hours)
     
     def _format_summary(self, summary_data: Dict[str, Any]) -> str:
         """Format news summary for display."""
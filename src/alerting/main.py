@@ -131,6 +131,8 @@ class AlertingService:
             await self.application.stop()
             await self.application.shutdown()
         
+        await self.bot_handlers.smart_analysis.aclose()
+        
         logger.info("Alerting Service stopped")
     
     async def deliver_alert(self, alert_data: dict) -> bool:
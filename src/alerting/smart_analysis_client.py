@@ -0,0 +1,288 @@
+"""
+Tel-Insights Smart Analysis Client
+
+Shared async HTTP client the alerting bot uses to ask the Smart Analysis
+service for summaries and trends. One pooled ``httpx.AsyncClient`` keeps
+connections alive between bot interactions, every call has a deadline, and a
+circuit breaker stops calling the service after repeated failures. Responses
+are cached locally: fresh ones are served without a call, and stale ones are
+served immediately while a background call refreshes them, or instead of
+failing while the service is unavailable.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from shared.cache import LRUCache
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+
+class SmartAnalysisUnavailable(Exception):
+    """Raised when the Smart Analysis service cannot answer and no cached response is usable."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``reset_seconds``; then a single trial call is let
+    through, which closes the circuit on success or reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Time the circuit stays open before a trial call
+            clock: Monotonic clock
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        """closed, open or half_open."""
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; in the half-open state only one trial call is allowed."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+
+
+class SmartAnalysisClient(LoggingMixin):
+    """
+    Pooled client of the Smart Analysis MCP tools with deadlines, a circuit breaker
+    and a stale-while-revalidate cache.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+        fresh_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None,
+        cache_size: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            base_url: Smart Analysis service URL (defaults to SMART_ANALYSIS_SERVICE_URL)
+            timeout_seconds: Default deadline of one call (defaults to SMART_ANALYSIS_CLIENT_TIMEOUT_SECONDS)
+            max_connections: Connection pool size (defaults to SMART_ANALYSIS_CLIENT_MAX_CONNECTIONS)
+            max_keepalive_connections: Idle connections kept open (defaults to SMART_ANALYSIS_CLIENT_MAX_KEEPALIVE_CONNECTIONS)
+            failure_threshold: Failures that open the circuit (defaults to SMART_ANALYSIS_CLIENT_FAILURE_THRESHOLD)
+            reset_seconds: Open circuit duration (defaults to SMART_ANALYSIS_CLIENT_RESET_SECONDS)
+            fresh_seconds: Age up to which cached responses are served without a call
+                (defaults to SMART_ANALYSIS_CLIENT_FRESH_SECONDS)
+            stale_seconds: Age up to which cached responses are still served
+                (defaults to SMART_ANALYSIS_CLIENT_STALE_SECONDS)
+            cache_size: Maximum cached responses (defaults to SMART_ANALYSIS_CLIENT_CACHE_SIZE)
+            transport: httpx transport override
+            clock: Monotonic clock used for response ages and the circuit breaker
+        """
+        config = settings.smart_analysis_client
+        self.base_url = base_url or settings.service_urls.smart_analysis_url
+        self.timeout_seconds = timeout_seconds or config.timeout_seconds
+        self.fresh_seconds = config.fresh_seconds if fresh_seconds is None else fresh_seconds
+        self.stale_seconds = config.stale_seconds if stale_seconds is None else stale_seconds
+        self.clock = clock
+        self.breaker = CircuitBreaker(
+            failure_threshold or config.failure_threshold,
+            config.reset_seconds if reset_seconds is None else reset_seconds,
+            clock=clock
+        )
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=max_connections or config.max_connections,
+                max_keepalive_connections=max_keepalive_connections or config.max_keepalive_connections
+            ),
+            transport=transport
+        )
+        self._cache: LRUCache[Tuple[Dict[str, Any], float]] = LRUCache(
+            cache_size or config.cache_size, ttl_seconds=self.stale_seconds
+        )
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task[Dict[str, Any]]"] = {}
+        self.logger.info(
+            "SmartAnalysisClient initialized.",
+            base_url=self.base_url,
+            timeout_seconds=self.timeout_seconds,
+            fresh_seconds=self.fresh_seconds,
+            stale_seconds=self.stale_seconds
+        )
+
+    async def summarize_news(self, hours: int, timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get a news summary.
+
+        Args:
+            hours: Time range in hours
+            timeout_seconds: Deadline of the call (defaults to the client deadline)
+
+        Returns:
+            Dict[str, Any]: Response of the summarize_news tool
+        """
+        return await self._call("/tools/summarize_news", {"time_range_hours": hours}, timeout_seconds)
+
+    async def topic_trends(self, hours: int, timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get topic trends.
+
+        Args:
+            hours: Time range in hours
+            timeout_seconds: Deadline of the call (defaults to the client deadline)
+
+        Returns:
+            Dict[str, Any]: Response of the topic_trends tool
+        """
+        return await self._call("/tools/topic_trends", {"time_range_hours": hours}, timeout_seconds)
+
+    async def _call(self, path: str, payload: Dict[str, Any], timeout_seconds: Optional[float]) -> Dict[str, Any]:
+        """Serve a tool call from the cache, refreshing stale responses in the background."""
+        key = (path, json.dumps(payload, sort_keys=True))
+        cached = self._cache.get(key)
+        if cached is not None:
+            value, fetched_at = cached
+            if self.clock() - fetched_at >= self.fresh_seconds and key not in self._inflight:
+                self.logger.debug("Serving stale Smart Analysis response while refreshing.", path=path)
+                self._start_fetch(key, path, payload, timeout_seconds)
+            return value
+        task = self._inflight.get(key) or self._start_fetch(key, path, payload, timeout_seconds)
+        return await asyncio.shield(task)
+
+    def _start_fetch(
+        self,
+        key: Tuple[str, str],
+        path: str,
+        payload: Dict[str, Any],
+        timeout_seconds: Optional[float]
+    ) -> "asyncio.Task[Dict[str, Any]]":
+        """Start one fetch per key; concurrent callers and background refreshes share it."""
+        task = asyncio.ensure_future(self._fetch(key, path, payload, timeout_seconds or self.timeout_seconds))
+        self._inflight[key] = task
+
+        def done(finished: "asyncio.Task[Dict[str, Any]]") -> None:
+            self._inflight.pop(key, None)
+            if not finished.cancelled():
+                finished.exception()  # Failures are logged in _fetch; background refreshes have no awaiter
+
+        task.add_done_callback(done)
+        return task
+
+    async def _fetch(self, key: Tuple[str, str], path: str, payload: Dict[str, Any], timeout_seconds: float) -> Dict[str, Any]:
+        """Call the service within the deadline and cache the response."""
+        if not self.breaker.allow():
+            self.logger.warning("Smart Analysis circuit is open; not calling the service.", path=path)
+            raise SmartAnalysisUnavailable(f"Smart Analysis circuit is open ({path})")
+
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._client.post(path, json=payload), timeout=timeout_seconds)
+            response.raise_for_status()
+            value = response.json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code < 500:
+                self.breaker.record_success()  # The service answered; the request itself was rejected
+                raise
+            self._record_failure(path, e)
+            raise SmartAnalysisUnavailable(f"Smart Analysis returned {e.response.status_code} ({path})") from e
+        except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as e:
+            self._record_failure(path, e)
+            raise SmartAnalysisUnavailable(f"Smart Analysis call failed ({path})") from e
+        except BaseException as e:
+            # Cancellation or an unexpected error must still end a half-open trial, or the circuit never closes
+            self._record_failure(path, e)
+            raise
+
+        self.breaker.record_success()
+        self._cache.set(key, (value, self.clock()))
+        self.logger.debug(
+            "Smart Analysis call succeeded.",
+            path=path,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+        return value
+
+    def _record_failure(self, path: str, error: Exception) -> None:
+        self.breaker.record_failure()
+        self.logger.warning(
+            "Smart Analysis call failed.",
+            path=path,
+            error=repr(error),
+            consecutive_failures=self.breaker.failures,
+            circuit=self.breaker.state
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get client statistics.
+
+        Returns:
+            Dict[str, Any]: Circuit state, consecutive failures and cache statistics
+        """
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "inflight": len(self._inflight),
+            "cache": self._cache.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self._client.aclose()
+
+
+_smart_analysis_client: Optional[SmartAnalysisClient] = None
+
+
+def get_smart_analysis_client() -> SmartAnalysisClient:
+    """Get the process-wide Smart Analysis client."""
+    global _smart_analysis_client
+    if _smart_analysis_client is None:
+        _smart_analysis_client = SmartAnalysisClient()
+    return _smart_analysis_client
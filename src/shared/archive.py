@@ -0,0 +1,293 @@
+"""
+Tel-Insights Message Archive
+
+Cold-tier storage of old messages. Whole days of messages older than
+ARCHIVE_AFTER_DAYS are written to zstd-compressed Parquet files, one per day
+and channel (``day=YYYY-MM-DD/channel=<id>/...parquet``), recorded in the
+``message_archive_files`` manifest and deleted from ``messages`` in the same
+transaction as the manifest rows. The hot table then only holds recent
+history, while readers that are asked for long windows add the archived rows
+of the overlapping days to what they read from the database.
+
+Besides the message columns, each file stores the sentiment and topics of
+the AI metadata as plain columns, so trend and summary reads do not have to
+parse the JSON document.
+"""
+
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .config import get_settings
+from .database import get_db_session
+from .logging import LoggingMixin, get_logger, log_database_operation
+from .models import ArchivedMessageFile, Message
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+DAY = timedelta(days=1)
+
+# Columns read when only counts by topic and sentiment are needed
+METADATA_COLUMNS = ("message_timestamp", "channel_id", "topics", "sentiment")
+
+# Keeps concurrent replicas from archiving the same day twice
+_ADVISORY_LOCK_KEY = 0x7E1_0002
+
+# Rows deleted per statement, below SQLite's bound parameter limit
+_DELETE_CHUNK = 500
+
+_MESSAGE_COLUMNS = (
+    Message.id,
+    Message.telegram_message_id,
+    Message.channel_id,
+    Message.message_text,
+    Message.media_id,
+    Message.message_timestamp,
+    Message.created_at,
+    Message.ai_metadata,
+)
+
+
+def _utc(value: datetime) -> datetime:
+    """Attach UTC to naive timestamps read back from SQLite."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _day_start(value: datetime) -> datetime:
+    return _utc(value).astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _archived_sentiment(ai_metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Sentiment column: None for unanalyzed (or provisional) messages, neutral when the analysis has none."""
+    if ai_metadata is None or ai_metadata.get('provisional'):
+        return None
+    return ai_metadata.get('sentiment') or 'neutral'
+
+
+def _archived_topics(ai_metadata: Optional[Dict[str, Any]]) -> List[str]:
+    topics = (ai_metadata or {}).get('topics')
+    return [topic for topic in topics if isinstance(topic, str)] if isinstance(topics, list) else []
+
+
+class MessageArchive(LoggingMixin):
+    """
+    Moves old messages to Parquet files and reads them back for long time windows.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = get_db_session,
+        directory: Optional[str] = None,
+        after_days: Optional[int] = None,
+        compression: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the archive.
+
+        Args:
+            session_factory: Callable returning a new synchronous session
+            directory: Archive directory (defaults to ARCHIVE_DIRECTORY)
+            after_days: Age in days after which messages are archived (defaults to ARCHIVE_AFTER_DAYS)
+            compression: Parquet compression codec (defaults to ARCHIVE_COMPRESSION)
+        """
+        self.session_factory = session_factory
+        self.directory = Path(directory or settings.archive.directory)
+        self.after_days = settings.archive.after_days if after_days is None else after_days
+        self.compression = compression or settings.archive.compression
+
+    def archive(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Archive every whole day of messages older than ``after_days``, oldest first.
+
+        Args:
+            now: Current time (defaults to the current time)
+
+        Returns:
+            Dict[str, int]: Days, files and messages archived
+        """
+        cutoff = _day_start(now or datetime.now(timezone.utc)) - timedelta(days=self.after_days)
+        result = {"days": 0, "files": 0, "messages": 0}
+
+        db = self.session_factory()
+        try:
+            oldest = db.query(Message.message_timestamp).filter(
+                Message.message_timestamp < cutoff
+            ).order_by(Message.message_timestamp).limit(1).scalar()
+            day = _day_start(oldest) if oldest else cutoff
+            while day < cutoff:
+                if not self._try_lock(db):
+                    self.logger.info("Message archival is running on another replica; skipping.")
+                    break
+                files, messages = self._archive_day(db, day)
+                if files:
+                    result["days"] += 1
+                    result["files"] += files
+                    result["messages"] += messages
+                day += DAY
+        finally:
+            db.close()
+
+        if result["messages"]:
+            self.logger.info(
+                log_database_operation("archive_messages", Message.__tablename__),
+                cutoff=cutoff.isoformat(),
+                **result
+            )
+        return result
+
+    def _try_lock(self, db: Session) -> bool:
+        """Take the archival lock for the current transaction (PostgreSQL only)."""
+        if db.bind.dialect.name != "postgresql":
+            return True
+        return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}).scalar())
+
+    def _archive_day(self, db: Session, day: datetime) -> Tuple[int, int]:
+        """Write one file per channel for a day, then record them and delete the rows in one transaction."""
+        rows = db.query(*_MESSAGE_COLUMNS).filter(
+            Message.message_timestamp >= day,
+            Message.message_timestamp < day + DAY
+        ).order_by(Message.channel_id, Message.message_timestamp, Message.id).all()
+        if not rows:
+            return 0, 0
+
+        by_channel: Dict[int, List[Any]] = defaultdict(list)
+        for row in rows:
+            by_channel[row.channel_id].append(row)
+
+        written: List[Path] = []
+        try:
+            for channel_id, channel_rows in by_channel.items():
+                relative_path = self._write_file(day, channel_id, channel_rows)
+                written.append(self.directory / relative_path)
+                db.add(ArchivedMessageFile(
+                    day=day,
+                    channel_id=channel_id,
+                    path=str(relative_path),
+                    message_count=len(channel_rows),
+                    first_message_at=channel_rows[0].message_timestamp,
+                    last_message_at=channel_rows[-1].message_timestamp,
+                    size_bytes=(self.directory / relative_path).stat().st_size
+                ))
+            ids = [row.id for row in rows]
+            for offset in range(0, len(ids), _DELETE_CHUNK):
+                db.query(Message).filter(
+                    Message.message_timestamp >= day,  # Lets PostgreSQL prune to the day's partition
+                    Message.message_timestamp < day + DAY,
+                    Message.id.in_(ids[offset:offset + _DELETE_CHUNK])
+                ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            for path in written:
+                path.unlink(missing_ok=True)
+            raise
+        return len(by_channel), len(rows)
+
+    def _write_file(self, day: datetime, channel_id: int, rows: Sequence[Any]) -> Path:
+        """Write the rows of one channel and day to a new Parquet file and return its relative path."""
+        relative_path = (
+            Path(f"day={day:%Y-%m-%d}") / f"channel={channel_id}"
+            / f"messages-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.parquet"
+        )
+        path = self.directory / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        frame = pd.DataFrame({
+            "id": [row.id for row in rows],
+            "telegram_message_id": [row.telegram_message_id for row in rows],
+            "channel_id": [row.channel_id for row in rows],
+            "message_text": [row.message_text for row in rows],
+            "media_id": pd.array([row.media_id for row in rows], dtype="Int64"),
+            "message_timestamp": pd.to_datetime([_utc(row.message_timestamp) for row in rows], utc=True),
+            "created_at": pd.to_datetime([_utc(row.created_at) for row in rows], utc=True),
+            "ai_metadata": [json.dumps(row.ai_metadata) if row.ai_metadata is not None else None for row in rows],
+            "topics": [_archived_topics(row.ai_metadata) for row in rows],
+            "sentiment": [_archived_sentiment(row.ai_metadata) for row in rows],
+        })
+        temporary = path.with_suffix(".parquet.tmp")
+        frame.to_parquet(temporary, engine="pyarrow", compression=self.compression, index=False)
+        os.replace(temporary, path)
+        return relative_path
+
+    def files(self, start: datetime, end: datetime) -> List[ArchivedMessageFile]:
+        """
+        Manifest entries of archived days overlapping a time range.
+
+        Args:
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+
+        Returns:
+            List[ArchivedMessageFile]: Archived files
+        """
+        db = self.session_factory()
+        try:
+            return db.query(ArchivedMessageFile).filter(
+                ArchivedMessageFile.day > _utc(start) - DAY,
+                ArchivedMessageFile.day < _utc(end)
+            ).order_by(ArchivedMessageFile.day, ArchivedMessageFile.channel_id).all()
+        finally:
+            db.close()
+
+    def read(
+        self,
+        start: datetime,
+        end: datetime,
+        columns: Sequence[str] = METADATA_COLUMNS,
+        topics: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read archived messages of a time range.
+
+        Args:
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            columns: Columns to read
+            topics: Keep only messages with any of these topics (matched lowercased, like
+                ``metadata_topics_filter``)
+
+        Returns:
+            pd.DataFrame: Archived messages, empty if no archived day overlaps the range
+        """
+        columns = list(dict.fromkeys([*columns, "message_timestamp", *(["topics"] if topics else [])]))
+        entries = self.files(start, end)
+        if not entries:
+            return pd.DataFrame(columns=columns)
+
+        filters = [("message_timestamp", ">=", _utc(start)), ("message_timestamp", "<", _utc(end))]
+        frame = pd.concat(
+            [
+                pd.read_parquet(self.directory / entry.path, engine="pyarrow", columns=columns, filters=filters)
+                for entry in entries
+            ],
+            ignore_index=True
+        )
+        if topics:
+            wanted = {topic.lower() for topic in topics}
+            frame = frame[frame["topics"].map(lambda row_topics: any(topic in wanted for topic in row_topics))]
+        self.logger.debug(
+            log_database_operation("read_archive", ArchivedMessageFile.__tablename__, files=len(entries)),
+            start=_utc(start).isoformat(),
+            end=_utc(end).isoformat(),
+            rows=len(frame)
+        )
+        return frame
+
+
+_message_archive: Optional[MessageArchive] = None
+
+
+def get_message_archive() -> MessageArchive:
+    """Get the process-wide message archive."""
+    global _message_archive
+    if _message_archive is None:
+        _message_archive = MessageArchive()
+    return _message_archive
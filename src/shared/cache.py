@@ -0,0 +1,139 @@
+"""
+Tel-Insights In-Process Caching
+
+Small thread-safe LRU cache with optional TTL and hit/miss accounting,
+shared by the services for hot lookups that would otherwise hit the database.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[V]):
+    """
+    Least-recently-used cache with an optional per-entry time-to-live.
+
+    All operations take an internal lock, so a single instance can be shared
+    between worker threads.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Entry lifetime in seconds (None for no expiry)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[V, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """
+        Get a cached value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value to return on a miss
+
+        Returns:
+            Optional[V]: Cached value, or default if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Override of the cache-wide TTL for this entry
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """Remove an entry and return its value (or default if absent)."""
+        with self._lock:
+            entry = self._entries.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[0]
+
+    def pop_where(self, predicate: Callable[[Hashable, V], bool]) -> int:
+        """
+        Remove every entry a predicate selects.
+
+        Args:
+            predicate: Called with each key and value
+
+        Returns:
+            int: Number of removed entries
+        """
+        with self._lock:
+            selected = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in selected:
+                del self._entries[key]
+            return len(selected)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and not (entry[1] and entry[1] <= time.monotonic())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict[str, Any]: Size, hit/miss counters and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
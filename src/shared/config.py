@@ -56,6 +56,31 @@ class RabbitMQSettings(BaseSettings):
         env="RABBITMQ_QUEUE_DEAD_LETTER",
         description="Dead letter queue for failed messages"
     )
+    queue_message_analyzed: str = Field(
+        default="message_analyzed",
+        env="RABBITMQ_QUEUE_MESSAGE_ANALYZED",
+        description="Queue for analyzed message events consumed by streaming alert evaluation"
+    )
+    publisher_buffer_size: int = Field(
+        default=10000,
+        env="RABBITMQ_PUBLISHER_BUFFER_SIZE",
+        description="Maximum messages buffered by the async publisher while the broker is slow or down"
+    )
+    reconnect_delay_seconds: float = Field(
+        default=1.0,
+        env="RABBITMQ_RECONNECT_DELAY_SECONDS",
+        description="Initial delay before the async publisher reconnects (doubles up to 30s)"
+    )
+    publish_max_attempts: int = Field(
+        default=3,
+        env="RABBITMQ_PUBLISH_MAX_ATTEMPTS",
+        description="Maximum publish attempts per message when the broker nacks it"
+    )
+    consumer_prefetch_count: int = Field(
+        default=8,
+        env="RABBITMQ_CONSUMER_PREFETCH_COUNT",
+        description="Unacknowledged deliveries per concurrent consumer (raised to at least its worker count)"
+    )
 
     class Config:
         env_prefix = "RABBITMQ_"
@@ -127,6 +152,106 @@ class LLMSettings(BaseSettings):
         env="LLM_TIMEOUT_SECONDS",
         description="LLM API timeout in seconds"
     )
+    call_deadline_seconds: int = Field(
+        default=120,
+        env="LLM_CALL_DEADLINE_SECONDS",
+        description="Total time budget for an async LLM call including retries"
+    )
+    retry_base_delay_seconds: float = Field(
+        default=1.0,
+        env="LLM_RETRY_BASE_DELAY_SECONDS",
+        description="Base delay for full-jitter exponential retry backoff"
+    )
+    retry_max_delay_seconds: float = Field(
+        default=30.0,
+        env="LLM_RETRY_MAX_DELAY_SECONDS",
+        description="Maximum delay between LLM retries"
+    )
+    max_concurrent_requests: int = Field(
+        default=4,
+        env="LLM_MAX_CONCURRENT_REQUESTS",
+        description="In-flight LLM calls per AI analysis process"
+    )
+    requests_per_minute: int = Field(
+        default=60,
+        env="LLM_REQUESTS_PER_MINUTE",
+        description="LLM request rate limit (per process, or per host with LLM_RATE_LIMIT_LOCK_DIR)"
+    )
+    tokens_per_minute: int = Field(
+        default=1000000,
+        env="LLM_TOKENS_PER_MINUTE",
+        description="Estimated prompt tokens per minute allowed by the rate governor"
+    )
+    rate_limit_lock_dir: Optional[str] = Field(
+        default=None,
+        env="LLM_RATE_LIMIT_LOCK_DIR",
+        description="Directory of file-locked rate budgets shared by all processes on the host"
+    )
+    batch_max_messages: int = Field(
+        default=10,
+        env="LLM_BATCH_MAX_MESSAGES",
+        description="Maximum messages analyzed in one LLM request (1 disables batching)"
+    )
+    batch_token_budget: int = Field(
+        default=4000,
+        env="LLM_BATCH_TOKEN_BUDGET",
+        description="Estimated prompt tokens allowed per batched analysis request"
+    )
+    batch_max_wait_ms: int = Field(
+        default=250,
+        env="LLM_BATCH_MAX_WAIT_MS",
+        description="Maximum time a message waits for its analysis batch to fill"
+    )
+    result_cache_enabled: bool = Field(
+        default=True,
+        env="LLM_RESULT_CACHE_ENABLED",
+        description="Reuse analysis results for messages with identical normalized text"
+    )
+    result_cache_size: int = Field(
+        default=10000,
+        env="LLM_RESULT_CACHE_SIZE",
+        description="Entries in the in-process tier of the LLM result cache"
+    )
+    result_cache_ttl_seconds: int = Field(
+        default=86400,
+        env="LLM_RESULT_CACHE_TTL_SECONDS",
+        description="Lifetime of cached LLM analysis results"
+    )
+    prompt_refresh_seconds: int = Field(
+        default=30,
+        env="LLM_PROMPT_REFRESH_SECONDS",
+        description="Interval between checks for newly activated prompt versions"
+    )
+    providers: str = Field(
+        default="gemini",
+        env="LLM_PROVIDERS",
+        description="Comma-separated LLM providers (gemini, openai, anthropic, fake); several enable routing"
+    )
+    openai_model: str = Field(
+        default="gpt-4o-mini",
+        env="OPENAI_MODEL",
+        description="OpenAI model used by the openai provider"
+    )
+    anthropic_model: str = Field(
+        default="claude-3-haiku-20240307",
+        env="ANTHROPIC_MODEL",
+        description="Anthropic model used by the anthropic provider"
+    )
+    router_window_seconds: int = Field(
+        default=300,
+        env="LLM_ROUTER_WINDOW_SECONDS",
+        description="Window of observed latencies and errors used to score providers"
+    )
+    router_cooldown_seconds: int = Field(
+        default=30,
+        env="LLM_ROUTER_COOLDOWN_SECONDS",
+        description="Time a provider is skipped after consecutive failures"
+    )
+    router_cost_weight: float = Field(
+        default=1.0,
+        env="LLM_ROUTER_COST_WEIGHT",
+        description="Seconds of p95 latency one USD per 1K tokens is worth when scoring providers"
+    )
 
 
 class GCSSettings(BaseSettings):
@@ -147,6 +272,313 @@ class GCSSettings(BaseSettings):
         env_prefix = "GCS_"
 
 
+class MediaSettings(BaseSettings):
+    """Media download pipeline configuration settings."""
+    
+    download_chunk_size_kb: int = Field(
+        default=512,
+        env="MEDIA_DOWNLOAD_CHUNK_SIZE_KB",
+        description="Chunk size in KB for streamed media downloads (multiple of 4, max 512)"
+    )
+    max_concurrent_downloads: int = Field(
+        default=4,
+        env="MEDIA_MAX_CONCURRENT_DOWNLOADS",
+        description="Maximum number of media downloads in flight at once"
+    )
+    spool_dir: Optional[str] = Field(
+        default=None,
+        env="MEDIA_SPOOL_DIR",
+        description="Directory for temporary media spool files (system temp dir if unset)"
+    )
+    dedup_cache_size: int = Field(
+        default=10000,
+        env="MEDIA_DEDUP_CACHE_SIZE",
+        description="Entries in the in-process Telegram file identity pre-dedup cache"
+    )
+
+    class Config:
+        env_prefix = "MEDIA_"
+
+
+class IngestSettings(BaseSettings):
+    """Aggregator ingest writer configuration settings."""
+    
+    batch_size: int = Field(
+        default=200,
+        env="INGEST_BATCH_SIZE",
+        description="Maximum messages written to the database in one batch"
+    )
+    flush_interval_ms: int = Field(
+        default=20,
+        env="INGEST_FLUSH_INTERVAL_MS",
+        description="Maximum time a message waits for its batch to fill before flushing"
+    )
+    queue_size: int = Field(
+        default=10000,
+        env="INGEST_QUEUE_SIZE",
+        description="Maximum messages buffered in the ingest queue before handlers wait"
+    )
+
+    class Config:
+        env_prefix = "INGEST_"
+
+
+class TriageSettings(BaseSettings):
+    """Pre-LLM message triage configuration settings."""
+    
+    enabled: bool = Field(
+        default=True,
+        env="TRIAGE_ENABLED",
+        description="Short-circuit low-value messages before the LLM"
+    )
+    min_chars: int = Field(
+        default=15,
+        env="TRIAGE_MIN_CHARS",
+        description="Minimum letters/digits outside links and mentions for LLM analysis"
+    )
+    min_words: int = Field(
+        default=3,
+        env="TRIAGE_MIN_WORDS",
+        description="Minimum words outside links and mentions for LLM analysis"
+    )
+    max_link_ratio: float = Field(
+        default=0.7,
+        env="TRIAGE_MAX_LINK_RATIO",
+        description="Maximum share of the message text taken by links"
+    )
+    languages: str = Field(
+        default="",
+        env="TRIAGE_LANGUAGES",
+        description="Comma-separated languages to analyze (en, es, fr, de, ru, ar, other); empty for all"
+    )
+    dedup_window_seconds: int = Field(
+        default=3600,
+        env="TRIAGE_DEDUP_WINDOW_SECONDS",
+        description="How long exact-duplicate fingerprints are remembered"
+    )
+    dedup_size: int = Field(
+        default=50000,
+        env="TRIAGE_DEDUP_SIZE",
+        description="Maximum remembered duplicate fingerprints"
+    )
+
+    class Config:
+        env_prefix = "TRIAGE_"
+
+
+class ExtractionSettings(BaseSettings):
+    """Local keyword/entity extraction configuration settings."""
+    
+    enabled: bool = Field(
+        default=True,
+        env="EXTRACTION_ENABLED",
+        description="Write provisional ai_metadata from local extraction at ingest time"
+    )
+    max_keywords: int = Field(
+        default=8,
+        env="EXTRACTION_MAX_KEYWORDS",
+        description="Keywords kept per message by the local extractor"
+    )
+    gazetteer_path: Optional[str] = Field(
+        default=None,
+        env="EXTRACTION_GAZETTEER_PATH",
+        description="JSON file mapping entity types (people, organizations, locations, other) to extra names"
+    )
+
+    class Config:
+        env_prefix = "EXTRACTION_"
+
+
+class RollupSettings(BaseSettings):
+    """Time-bucketed metadata rollup configuration settings."""
+    
+    enabled: bool = Field(
+        default=True,
+        env="ROLLUP_ENABLED",
+        description="Maintain per-minute and per-hour topic/keyword/sentiment/channel counts as messages are analyzed"
+    )
+    minute_retention_hours: int = Field(
+        default=48,
+        env="ROLLUP_MINUTE_RETENTION_HOURS",
+        description="How long per-minute buckets are kept before compaction"
+    )
+    hour_retention_days: int = Field(
+        default=90,
+        env="ROLLUP_HOUR_RETENTION_DAYS",
+        description="How long per-hour buckets are kept before they are compacted into per-day buckets"
+    )
+    backfill_hours: int = Field(
+        default=168,
+        env="ROLLUP_BACKFILL_HOURS",
+        description="How far back empty rollups are recounted at startup; at least the longest window readers accept"
+    )
+    compaction_interval_seconds: int = Field(
+        default=3600,
+        env="ROLLUP_COMPACTION_INTERVAL_SECONDS",
+        description="Interval between rollup compaction runs"
+    )
+
+    class Config:
+        env_prefix = "ROLLUP_"
+
+
+class PartitionSettings(BaseSettings):
+    """Time partitioning of the messages table (PostgreSQL only)."""
+    
+    enabled: bool = Field(
+        default=True,
+        env="PARTITION_ENABLED",
+        description="Range-partition messages by message_timestamp and maintain the partitions"
+    )
+    interval: str = Field(
+        default="week",
+        env="PARTITION_INTERVAL",
+        description="Partition size: day or week"
+    )
+    premake: int = Field(
+        default=4,
+        env="PARTITION_PREMAKE",
+        description="Number of future partitions created ahead of time"
+    )
+    retention_days: int = Field(
+        default=0,
+        env="PARTITION_RETENTION_DAYS",
+        description="Detach partitions that end more than this many days ago (0 keeps all partitions attached)"
+    )
+    drop_detached: bool = Field(
+        default=False,
+        env="PARTITION_DROP_DETACHED",
+        description="Drop partitions after detaching them instead of keeping them as standalone tables"
+    )
+    maintenance_interval_seconds: int = Field(
+        default=3600,
+        env="PARTITION_MAINTENANCE_INTERVAL_SECONDS",
+        description="Interval between partition maintenance runs"
+    )
+
+    class Config:
+        env_prefix = "PARTITION_"
+
+
+class ArchiveSettings(BaseSettings):
+    """Cold-tier archival of old messages to Parquet files."""
+    
+    enabled: bool = Field(
+        default=False,
+        env="ARCHIVE_ENABLED",
+        description="Move old messages out of the database into Parquet files"
+    )
+    directory: str = Field(
+        default="data/archive",
+        env="ARCHIVE_DIRECTORY",
+        description="Directory holding the archived Parquet files"
+    )
+    after_days: int = Field(
+        default=30,
+        env="ARCHIVE_AFTER_DAYS",
+        description="Archive whole days of messages older than this many days"
+    )
+    compression: str = Field(
+        default="zstd",
+        env="ARCHIVE_COMPRESSION",
+        description="Parquet compression codec (zstd, snappy, gzip, ...)"
+    )
+    interval_seconds: int = Field(
+        default=86400,
+        env="ARCHIVE_INTERVAL_SECONDS",
+        description="Interval between archival runs"
+    )
+
+    class Config:
+        env_prefix = "ARCHIVE_"
+
+
+class MCPSettings(BaseSettings):
+    """Smart Analysis MCP server configuration settings."""
+    
+    request_timeout_seconds: float = Field(
+        default=30.0,
+        env="MCP_REQUEST_TIMEOUT_SECONDS",
+        description="Maximum time an MCP tool request may run before it fails with 504"
+    )
+    cache_enabled: bool = Field(
+        default=True,
+        env="MCP_CACHE_ENABLED",
+        description="Cache summarize_news and topic_trends responses"
+    )
+    cache_bucket_seconds: int = Field(
+        default=60,
+        env="MCP_CACHE_BUCKET_SECONDS",
+        description="Width of the time buckets cached responses are valid for"
+    )
+    cache_size: int = Field(
+        default=256,
+        env="MCP_CACHE_SIZE",
+        description="Maximum cached MCP responses before the least recently used is evicted"
+    )
+    cache_invalidate_on_analyzed: bool = Field(
+        default=True,
+        env="MCP_CACHE_INVALIDATE_ON_ANALYZED",
+        description="Drop cached responses when an analyzed message event arrives (streaming alert evaluation only)"
+    )
+    cache_invalidate_interval_seconds: float = Field(
+        default=10.0,
+        env="MCP_CACHE_INVALIDATE_INTERVAL_SECONDS",
+        description="Minimum time between applied invalidations; analyzed messages arriving in between are coalesced"
+    )
+
+    class Config:
+        env_prefix = "MCP_"
+
+
+class SmartAnalysisClientSettings(BaseSettings):
+    """Alerting bot client of the Smart Analysis service configuration settings."""
+    
+    timeout_seconds: float = Field(
+        default=5.0,
+        env="SMART_ANALYSIS_CLIENT_TIMEOUT_SECONDS",
+        description="Deadline of one call to the Smart Analysis service"
+    )
+    max_connections: int = Field(
+        default=20,
+        env="SMART_ANALYSIS_CLIENT_MAX_CONNECTIONS",
+        description="Maximum concurrent connections to the Smart Analysis service"
+    )
+    max_keepalive_connections: int = Field(
+        default=10,
+        env="SMART_ANALYSIS_CLIENT_MAX_KEEPALIVE_CONNECTIONS",
+        description="Idle connections kept open for reuse"
+    )
+    failure_threshold: int = Field(
+        default=5,
+        env="SMART_ANALYSIS_CLIENT_FAILURE_THRESHOLD",
+        description="Consecutive failures that open the circuit breaker"
+    )
+    reset_seconds: float = Field(
+        default=30.0,
+        env="SMART_ANALYSIS_CLIENT_RESET_SECONDS",
+        description="Time the circuit stays open before a trial call is let through"
+    )
+    fresh_seconds: float = Field(
+        default=30.0,
+        env="SMART_ANALYSIS_CLIENT_FRESH_SECONDS",
+        description="Age up to which cached responses are served without a call"
+    )
+    stale_seconds: float = Field(
+        default=600.0,
+        env="SMART_ANALYSIS_CLIENT_STALE_SECONDS",
+        description="Age up to which cached responses are served while refreshing or when the service is unavailable"
+    )
+    cache_size: int = Field(
+        default=128,
+        env="SMART_ANALYSIS_CLIENT_CACHE_SIZE",
+        description="Maximum cached Smart Analysis responses"
+    )
+
+    class Config:
+        env_prefix = "SMART_ANALYSIS_CLIENT_"
+
+
 class ServiceURLs(BaseSettings):
     """Microservice URL configuration."""
     
@@ -210,6 +642,36 @@ class AlertSettings(BaseSettings):
         env="ALERT_COOLDOWN_MINUTES",
         description="Alert cooldown period in minutes"
     )
+    streaming_enabled: bool = Field(
+        default=True,
+        env="ALERT_STREAMING_ENABLED",
+        description="Evaluate frequency alerts on analyzed message events instead of polling the database"
+    )
+    check_interval_seconds: int = Field(
+        default=300,
+        env="ALERT_CHECK_INTERVAL_SECONDS",
+        description="Interval between database alert checks when streaming is disabled"
+    )
+    config_refresh_seconds: int = Field(
+        default=60,
+        env="ALERT_CONFIG_REFRESH_SECONDS",
+        description="Interval between reloads of active alert configurations by the streaming evaluator"
+    )
+    replica_id: str = Field(
+        default="",
+        env="ALERT_REPLICA_ID",
+        description="Identity of this smart_analysis replica in alert leases (defaults to hostname and PID)"
+    )
+    partitions: int = Field(
+        default=16,
+        env="ALERT_PARTITIONS",
+        description="Number of alert configuration partitions leased among replicas; must match on all replicas"
+    )
+    lease_seconds: int = Field(
+        default=30,
+        env="ALERT_LEASE_SECONDS",
+        description="Validity of an alert partition lease; leases are renewed every third of this"
+    )
 
 
 class MonitoringSettings(BaseSettings):
@@ -265,6 +727,15 @@ class Settings(BaseSettings):
     telegram: TelegramSettings = Field(default_factory=TelegramSettings)
     llm: LLMSettings = Field(default_factory=LLMSettings)
     gcs: GCSSettings = Field(default_factory=GCSSettings)
+    media: MediaSettings = Field(default_factory=MediaSettings)
+    ingest: IngestSettings = Field(default_factory=IngestSettings)
+    triage: TriageSettings = Field(default_factory=TriageSettings)
+    extraction: ExtractionSettings = Field(default_factory=ExtractionSettings)
+    rollups: RollupSettings = Field(default_factory=RollupSettings)
+    partitions: PartitionSettings = Field(default_factory=PartitionSettings)
+    archive: ArchiveSettings = Field(default_factory=ArchiveSettings)
+    mcp: MCPSettings = Field(default_factory=MCPSettings)
+    smart_analysis_client: SmartAnalysisClientSettings = Field(default_factory=SmartAnalysisClientSettings)
     service_urls: ServiceURLs = Field(default_factory=ServiceURLs)
     security: SecuritySettings = Field(default_factory=SecuritySettings)
     alerts: AlertSettings = Field(default_factory=AlertSettings)
@@ -0,0 +1,328 @@
+"""
+Tel-Insights Local Extraction
+
+Fast rule-based extraction of keywords, topics and named entities used to
+write provisional ``ai_metadata`` at ingest time, so keyword and topic
+alerts can match a message before its LLM analysis. The LLM analysis later
+replaces the provisional metadata.
+"""
+
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Model name recorded in provisional metadata
+LOCAL_EXTRACTION_MODEL = "local-extractor"
+
+ENTITY_TYPES = ("people", "organizations", "locations", "dates", "other")
+
+_URL_PATTERN = re.compile(r"(https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+_HASHTAG_PATTERN = re.compile(r"(?<!\w)#(\w+)")
+_MENTION_PATTERN = re.compile(r"(?<!\w)@\w+")
+_TOKEN_PATTERN = re.compile(r"[^\W\d_](?:[\w'’-]*\w)?")
+_SENTENCE_END_PATTERN = re.compile(r"[.!?…\n]")
+
+_MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december|"
+    "jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+_DATE_PATTERNS = (
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b"),
+    re.compile(r"\b\d{1,2}[./]\d{1,2}[./]\d{2,4}\b"),
+    re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTHS})\.?(?:\s+\d{{4}})?\b", re.IGNORECASE),
+    re.compile(rf"\b(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?\b", re.IGNORECASE),
+    re.compile(r"\b(?:today|tomorrow|yesterday|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b", re.IGNORECASE),
+)
+# Capitalized words already covered by the date patterns
+_DATE_WORDS = frozenset(
+    _MONTHS.split("|") + "today tomorrow yesterday monday tuesday wednesday thursday friday saturday sunday".split()
+)
+_AMOUNT_PATTERN = re.compile(
+    r"(?:[$€£¥₽]\s?\d[\d,.]*\s?(?:k|m|bn|billion|million|thousand)?)"
+    r"|(?:\b\d[\d,.]*\s?(?:%|(?:percent|usd|eur|dollars|euros|rubles|bitcoin|btc)\b))",
+    re.IGNORECASE
+)
+
+# Capitalized words that end organization names
+_ORGANIZATION_SUFFIXES = frozenset(
+    "inc corp corporation ltd llc plc group bank ministry agency party council committee university "
+    "association union commission company foundation institute fund authority court".split()
+)
+
+_STOPWORDS = frozenset(
+    # English
+    "a about above after again against all also am an and any are as at be because been before being below "
+    "between both but by can could did do does doing down during each few for from further had has have having "
+    "he her here hers him his how i if in into is it its itself just me more most my no nor not now of off on "
+    "once only or other our ours out over own same she should so some such than that the their theirs them then "
+    "there these they this those through to too under until up very was we were what when where which while who "
+    "whom why will with would you your yours says said new one two via get got amp".split()
+    # Spanish / French / German / Russian function words
+    + "el la los las de del que y en un una por con para es se al lo como más pero sus le les des et est une du "
+    "dans pas sur au aux ce qui ne der die das und ist nicht ein eine zu den mit von auf für sich im dem des "
+    "и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне было вот от "
+    "меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до вас нибудь опять уж "
+    "вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя их чем была сам чтоб без "
+    "будто чего раз тоже себе под будет ж тогда кто этот того потому этого какой совсем ним здесь этом один "
+    "почти мой тем чтобы нее сейчас были куда зачем всех никогда можно при наконец два об другой хоть после "
+    "над больше тот через эти нас про всего них какая много разве три эту моя впрочем хорошо свою этой перед "
+    "иногда лучше чуть том нельзя такой им более всегда конечно всю между это".split()
+)
+
+# Built-in gazetteer, extended by EXTRACTION_GAZETTEER_PATH
+_DEFAULT_GAZETTEER: Dict[str, Iterable[str]] = {
+    "locations": (
+        "usa", "united states", "america", "uk", "united kingdom", "britain", "england", "london", "washington",
+        "new york", "china", "beijing", "russia", "moscow", "ukraine", "kyiv", "kiev", "germany", "berlin",
+        "france", "paris", "italy", "rome", "spain", "madrid", "india", "delhi", "japan", "tokyo", "israel",
+        "gaza", "iran", "tehran", "turkey", "ankara", "istanbul", "syria", "iraq", "egypt", "saudi arabia",
+        "brazil", "canada", "mexico", "australia", "europe", "asia", "africa", "middle east", "taiwan",
+        "north korea", "south korea", "poland", "belarus", "kazakhstan", "georgia", "armenia", "azerbaijan",
+    ),
+    "organizations": (
+        "un", "united nations", "nato", "eu", "european union", "who", "imf", "world bank", "opec", "fed",
+        "federal reserve", "ecb", "european central bank", "google", "apple", "microsoft", "amazon", "meta",
+        "openai", "tesla", "nvidia", "telegram", "twitter", "x corp", "reuters", "bbc", "cnn", "pentagon",
+        "kremlin", "white house", "congress", "senate", "parliament", "sec", "fbi", "cia", "g7", "g20",
+    ),
+}
+
+# Keyword -> topic lexicon for provisional topics
+_TOPIC_LEXICON: Dict[str, Iterable[str]] = {
+    "politics": ("election", "elections", "vote", "president", "minister", "parliament", "government",
+                 "senate", "congress", "sanctions", "diplomat", "policy", "referendum", "campaign"),
+    "economy": ("inflation", "economy", "gdp", "market", "markets", "stocks", "shares", "bank", "rates",
+                "interest", "oil", "prices", "recession", "trade", "tariffs", "budget", "currency", "dollar"),
+    "technology": ("ai", "software", "startup", "chip", "chips", "semiconductor", "apple", "google", "app",
+                   "crypto", "bitcoin", "blockchain", "cyber", "hack", "hackers", "robot", "smartphone"),
+    "conflict": ("war", "attack", "missile", "missiles", "drone", "drones", "troops", "army", "military",
+                 "strike", "strikes", "ceasefire", "invasion", "shelling", "killed", "explosion"),
+    "health": ("covid", "virus", "vaccine", "hospital", "health", "disease", "outbreak", "pandemic"),
+    "sports": ("football", "soccer", "match", "league", "championship", "olympics", "tournament", "goal"),
+    "weather": ("storm", "hurricane", "flood", "floods", "earthquake", "wildfire", "heatwave", "weather"),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into word tokens, dropping links, mentions and numbers.
+
+    Args:
+        text: Message text
+
+    Returns:
+        List[str]: Tokens in original case
+    """
+    cleaned = _MENTION_PATTERN.sub(" ", _URL_PATTERN.sub(" ", text))
+    return _TOKEN_PATTERN.findall(cleaned)
+
+
+def _dedupe(values: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(value for value in values if value))
+
+
+class LocalExtractor(LoggingMixin):
+    """
+    Keyword, topic and entity extractor using n-gram statistics, regexes and a gazetteer.
+
+    Runs in well under a millisecond per typical message, so it can be
+    applied inline on the ingest path.
+    """
+
+    def __init__(self, max_keywords: Optional[int] = None, gazetteer_path: Optional[str] = None) -> None:
+        """
+        Initialize the extractor.
+
+        Args:
+            max_keywords: Keywords kept per message (defaults to EXTRACTION_MAX_KEYWORDS)
+            gazetteer_path: JSON file mapping entity types to extra names (defaults to EXTRACTION_GAZETTEER_PATH)
+        """
+        self.max_keywords = max_keywords or settings.extraction.max_keywords
+        gazetteer_path = gazetteer_path or settings.extraction.gazetteer_path
+
+        gazetteer: Dict[str, List[str]] = {kind: list(names) for kind, names in _DEFAULT_GAZETTEER.items()}
+        if gazetteer_path:
+            with open(gazetteer_path, encoding="utf-8") as gazetteer_file:
+                for kind, names in json.load(gazetteer_file).items():
+                    if kind not in ENTITY_TYPES:
+                        raise ValueError(f"Unknown gazetteer entity type '{kind}' in {gazetteer_path}")
+                    gazetteer.setdefault(kind, []).extend(names)
+
+        # Lowercased phrase (as a token tuple) -> entity type
+        self._gazetteer: Dict[Tuple[str, ...], str] = {}
+        for kind, names in gazetteer.items():
+            for name in names:
+                self._gazetteer[tuple(name.lower().split())] = kind
+        self._max_phrase_length = max(len(phrase) for phrase in self._gazetteer)
+        self._topics = {word: topic for topic, words in _TOPIC_LEXICON.items() for word in words}
+        self.logger.info(
+            "LocalExtractor initialized.",
+            gazetteer_entries=len(self._gazetteer),
+            max_keywords=self.max_keywords,
+            custom_gazetteer=bool(gazetteer_path)
+        )
+
+    def extract_keywords(self, tokens: List[str], hashtags: List[str]) -> List[str]:
+        """
+        Rank unigram and bigram keywords by frequency, boosting capitalized words and hashtags.
+
+        Args:
+            tokens: Tokens from ``tokenize``
+            hashtags: Lowercased hashtags of the message
+
+        Returns:
+            List[str]: Lowercased keywords, best first
+        """
+        scores: Counter = Counter()
+        lowered = [token.lower() for token in tokens]
+        for index, (token, word) in enumerate(zip(tokens, lowered)):
+            if word in _STOPWORDS or len(word) < 3:
+                continue
+            # Capitalized mid-sentence words are likely names; sentence starts are not
+            scores[word] += 1.5 if token[0].isupper() and index > 0 else 1.0
+            if index + 1 < len(lowered):
+                following = lowered[index + 1]
+                if following not in _STOPWORDS and len(following) >= 3:
+                    scores[f"{word} {following}"] += 0.75
+        for hashtag in hashtags:
+            scores[hashtag] += 2.0
+
+        # A bigram only counts as a keyword when it repeats or joins two names
+        ranked = [
+            keyword for keyword, score in scores.most_common()
+            if " " not in keyword or score >= 1.5
+        ]
+        return ranked[:self.max_keywords]
+
+    def extract_entities(self, text: str, tokens: List[str]) -> Dict[str, List[str]]:
+        """
+        Find dates and amounts by regex and names by gazetteer lookup and capitalization.
+
+        Args:
+            text: Message text
+            tokens: Tokens from ``tokenize``
+
+        Returns:
+            Dict[str, List[str]]: Entities per type (people, organizations, locations, dates, other)
+        """
+        entities: Dict[str, List[str]] = {kind: [] for kind in ENTITY_TYPES}
+        for pattern in _DATE_PATTERNS:
+            entities["dates"].extend(match.group(0) for match in pattern.finditer(text))
+        entities["other"].extend(match.group(0).strip() for match in _AMOUNT_PATTERN.finditer(text))
+
+        lowered = [token.lower() for token in tokens]
+        sentence_starts = self._sentence_start_tokens(text)
+        index = 0
+        while index < len(tokens):
+            # Longest gazetteer phrase first
+            for length in range(min(self._max_phrase_length, len(tokens) - index), 0, -1):
+                kind = self._gazetteer.get(tuple(lowered[index:index + length]))
+                # Short all-lowercase matches ("who", "un", "fed") are usually ordinary words
+                if kind and (length > 1 or len(lowered[index]) > 3 or tokens[index].isupper()):
+                    entities[kind].append(" ".join(tokens[index:index + length]))
+                    index += length
+                    break
+            else:
+                if lowered[index] in _STOPWORDS or lowered[index] in _DATE_WORDS:
+                    index += 1
+                    continue
+                length = self._capitalized_run(tokens, index, sentence_starts)
+                if length >= 2 or (length == 1 and index not in sentence_starts):
+                    name = " ".join(tokens[index:index + length])
+                    if lowered[index + length - 1] in _ORGANIZATION_SUFFIXES:
+                        entities["organizations"].append(name)
+                    elif length >= 2:
+                        entities["people"].append(name)
+                    else:
+                        entities["other"].append(name)
+                index += max(length, 1)
+
+        return {kind: _dedupe(values) for kind, values in entities.items()}
+
+    @staticmethod
+    def _capitalized_run(tokens: List[str], start: int, sentence_starts: set) -> int:
+        """Length of the run of capitalized tokens starting at ``start`` within one sentence (at most 4)."""
+        length = 0
+        while (
+            start + length < len(tokens)
+            and length < 4
+            and tokens[start + length][0].isupper()
+            and (length == 0 or start + length not in sentence_starts)
+        ):
+            length += 1
+        return length
+
+    @staticmethod
+    def _sentence_start_tokens(text: str) -> set:
+        """Token indexes that start a sentence, where capitalization says nothing."""
+        starts = set()
+        count = 0
+        for sentence in _SENTENCE_END_PATTERN.split(text):
+            sentence_tokens = tokenize(sentence)
+            if sentence_tokens:
+                starts.add(count)
+            count += len(sentence_tokens)
+        return starts
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """
+        Extract provisional metadata from a message text.
+
+        Args:
+            text: Message text
+
+        Returns:
+            Dict[str, Any]: Keywords, topics, entities and a short summary
+        """
+        tokens = tokenize(text)
+        hashtags = _dedupe(tag.lower() for tag in _HASHTAG_PATTERN.findall(text))
+        keywords = self.extract_keywords(tokens, hashtags)
+        topics = _dedupe(
+            [self._topics[token.lower()] for token in tokens if token.lower() in self._topics] + hashtags
+        )
+        return {
+            "summary": " ".join(text.split())[:200],
+            "topics": topics,
+            "keywords": keywords,
+            "entities": self.extract_entities(text, tokens),
+        }
+
+    def provisional_metadata(self, text: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Build provisional ``ai_metadata`` for a newly ingested message.
+
+        ``sentiment`` is left out so sentiment alerts only match analyzed
+        messages; ``provisional`` marks metadata the LLM has not refined yet.
+
+        Args:
+            text: Message text
+
+        Returns:
+            Optional[Dict[str, Any]]: Metadata, or None for messages without text
+        """
+        if not text or not text.strip():
+            return None
+        metadata = self.extract(text)
+        metadata.update({
+            "provisional": True,
+            "analysis_model": LOCAL_EXTRACTION_MODEL,
+        })
+        return metadata
+
+
+_extractor: Optional[LocalExtractor] = None
+
+
+def get_local_extractor() -> LocalExtractor:
+    """Get the process-wide local extractor."""
+    global _extractor
+    if _extractor is None:
+        _extractor = LocalExtractor()
+    return _extractor
@@ -5,14 +5,20 @@ RabbitMQ messaging utilities for asynchronous communication between microservice
 Provides producer and consumer classes with error handling and retry logic.
 """
 
+import asyncio
 import json
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Any, Callable, Dict, Generator, Optional
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Generator, List, Optional
 
 import pika
+from pika.adapters.asyncio_connection import AsyncioConnection
 from pika.adapters.blocking_connection import BlockingChannel
-from pika.exceptions import AMQPConnectionError, AMQPChannelError
+from pika.exceptions import AMQPConnectionError, AMQPChannelError, ChannelClosedByBroker, NackError, UnroutableError
 
 from .config import get_settings
 from .logging import get_logger
@@ -26,6 +32,31 @@ class MessageQueueError(Exception):
     pass
 
 
+# Maximum delay between reconnect attempts of the async publisher
+_MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+
+def _queues_to_declare() -> Dict[str, str]:
+    """
+    Get the queues every producer declares, keyed by purpose.
+
+    Analyzed message events are not queued here: every smart_analysis replica
+    binds a private queue to their routing key and receives all of them.
+    """
+    return {
+        "new_message": settings.rabbitmq.queue_new_message,
+        "dead_letter": settings.rabbitmq.queue_dead_letter,
+    }
+
+
+def _queue_arguments() -> Dict[str, Any]:
+    """Get the declare arguments shared by all queues (dead-lettering)."""
+    return {
+        'x-dead-letter-exchange': settings.rabbitmq.exchange, # DLX for all queues
+        'x-dead-letter-routing-key': settings.rabbitmq.queue_dead_letter, # Default DLQ routing key
+    }
+
+
 class MessageProducer:
     """
     RabbitMQ message producer for publishing events to queues.
@@ -56,6 +87,9 @@ class MessageProducer:
             # Declare queues
             self._declare_queues()
             
+            # Publisher confirms: basic_publish raises NackError if the broker rejects a message
+            self.channel.confirm_delivery()
+            
             logger.info(
                 "MessageProducer connected to RabbitMQ and setup complete.",
                 target_url=settings.rabbitmq.url[:settings.rabbitmq.url.find('@')] if '@' in settings.rabbitmq.url else settings.rabbitmq.url,
@@ -72,10 +106,7 @@ class MessageProducer:
     
     def _declare_queues(self) -> None:
         """Declare all required queues."""
-        queues_to_declare = { # Using a dict for more context in logging
-            "new_message": settings.rabbitmq.queue_new_message,
-            "dead_letter": settings.rabbitmq.queue_dead_letter,
-        }
+        queues_to_declare = _queues_to_declare() # Using a dict for more context in logging
         
         logger.debug("Declaring RabbitMQ queues...")
         for queue_key, queue_name in queues_to_declare.items():
@@ -83,10 +114,7 @@ class MessageProducer:
             self.channel.queue_declare(
                 queue=queue_name,
                 durable=True,
-                arguments={
-                    'x-dead-letter-exchange': settings.rabbitmq.exchange, # DLX for all queues
-                    'x-dead-letter-routing-key': settings.rabbitmq.queue_dead_letter, # Default DLQ routing key
-                }
+                arguments=_queue_arguments()
             )
             
             # Bind queue to exchange - routing key is typically the queue name itself for this setup
@@ -109,6 +137,9 @@ class MessageProducer:
         """
         Publish a message to the specified queue.
         
+        The channel is in confirm mode, so this waits for the broker's ack.
+        Use ``AsyncMessageProducer.publish_batch`` to pipeline many publishes.
+        
         Args:
             routing_key: Queue routing key
             message: Message payload as dictionary
@@ -116,7 +147,7 @@ class MessageProducer:
             persistent: Whether to make message persistent
             
         Returns:
-            bool: True if message was published successfully
+            bool: True if the broker confirmed the message, False if it was nacked or unroutable
             
         Raises:
             MessageQueueError: If publishing fails
@@ -153,6 +184,15 @@ class MessageProducer:
             
             return True
             
+        except (NackError, UnroutableError) as e:
+            logger.error(
+                "Broker did not confirm published message.",
+                error=type(e).__name__,
+                exchange=exchange_name,
+                routing_key=routing_key,
+                message_id=message.get('message_id', 'unknown')
+            )
+            return False
         except (AMQPConnectionError, AMQPChannelError) as e:
             logger.error(
                 "RabbitMQ connection/channel error while publishing message. Attempting to reconnect.",
@@ -199,6 +239,18 @@ class MessageProducer:
             }
         )
     
+    def publish_message_analyzed_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Publish a message analyzed event.
+        
+        Args:
+            event: Event from ``create_message_analyzed_event``
+            
+        Returns:
+            bool: True if published successfully
+        """
+        return self.publish_message(routing_key=settings.rabbitmq.queue_message_analyzed, message=event)
+    
     def close(self) -> None:
         """Close the connection to RabbitMQ."""
         if self.connection and not self.connection.is_closed:
@@ -206,12 +258,485 @@ class MessageProducer:
             logger.info("MessageProducer connection closed")
 
 
+@dataclass
+class _OutgoingMessage:
+    """Message waiting in the async publisher's buffer or for its broker confirm."""
+
+    exchange: str
+    routing_key: str
+    body: str
+    properties: pika.BasicProperties
+    message_id: str
+    future: "asyncio.Future[bool]"
+    attempts: int = 0
+
+
+@dataclass
+class PublishResult:
+    """Broker outcome of one event published via ``AsyncMessageProducer.publish_batch``."""
+
+    message_id: str
+    acked: bool
+    attempts: int
+
+
+class AsyncMessageProducer:
+    """
+    Non-blocking RabbitMQ producer for asyncio services.
+    
+    Built on pika's asyncio adapter. Publishes are accepted into a bounded
+    in-memory buffer and sent by a background task, so callers never block
+    the event loop on socket writes or reconnects. The channel runs in
+    publisher-confirm mode; many publishes are kept outstanding at once and
+    confirms are matched to delivery tags asynchronously. Nacked messages are
+    republished up to ``max_attempts`` times, and messages left unconfirmed by
+    a dropped connection are republished after the background reconnect.
+    """
+    
+    def __init__(
+        self,
+        buffer_size: Optional[int] = None,
+        reconnect_delay: Optional[float] = None,
+        max_attempts: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the async producer. Call ``start()`` from the event loop before publishing.
+        
+        Args:
+            buffer_size: Maximum buffered messages (defaults to settings)
+            reconnect_delay: Initial reconnect delay in seconds (defaults to settings)
+            max_attempts: Maximum publish attempts per message on nack (defaults to settings)
+        """
+        self.buffer_size = buffer_size or settings.rabbitmq.publisher_buffer_size
+        self.reconnect_delay = reconnect_delay or settings.rabbitmq.reconnect_delay_seconds
+        self.max_attempts = max(1, max_attempts or settings.rabbitmq.publish_max_attempts)
+        self.connection: Optional[AsyncioConnection] = None
+        self.channel = None
+        self._buffer: Optional["asyncio.Queue[_OutgoingMessage]"] = None
+        self._retry: Deque[_OutgoingMessage] = deque()
+        self._unconfirmed: Dict[int, _OutgoingMessage] = {}
+        self._delivery_tag = 0
+        self._connection_lost: Optional[asyncio.Event] = None
+        self._retry_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """Start the background connect-and-publish task."""
+        if self._task is None or self._task.done():
+            self._buffer = self._buffer or asyncio.Queue(maxsize=self.buffer_size)
+            self._retry_ready = self._retry_ready or asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info("AsyncMessageProducer started.", buffer_size=self.buffer_size)
+    
+    @property
+    def outstanding(self) -> int:
+        """Number of accepted messages not yet confirmed or failed."""
+        buffered = self._buffer.qsize() if self._buffer else 0
+        return buffered + len(self._retry) + len(self._unconfirmed)
+    
+    async def publish_message(
+        self,
+        routing_key: str,
+        message: Dict[str, Any],
+        exchange: str = None,
+        persistent: bool = True,
+        wait_for_confirm: bool = False
+    ) -> bool:
+        """
+        Queue a message for publishing.
+        
+        Waits only when the buffer is full (backpressure), never on the broker,
+        unless ``wait_for_confirm`` is set.
+        
+        Args:
+            routing_key: Queue routing key
+            message: Message payload as dictionary
+            exchange: Exchange name (defaults to configured exchange)
+            persistent: Whether to make message persistent
+            wait_for_confirm: Wait for the broker's ack/nack instead of returning once buffered
+            
+        Returns:
+            bool: True if the message was buffered (or acked, with wait_for_confirm)
+            
+        Raises:
+            MessageQueueError: If the message cannot be serialized
+        """
+        outgoing = await self._enqueue(routing_key, message, exchange, persistent)
+        
+        if wait_for_confirm:
+            return await outgoing.future
+        return True
+    
+    async def publish_batch(
+        self,
+        events: List[Dict[str, Any]],
+        routing_key: Optional[str] = None,
+        exchange: str = None,
+        persistent: bool = True
+    ) -> List[PublishResult]:
+        """
+        Publish many events with all of them outstanding at once, then wait for their confirms.
+        
+        Costs roughly one broker round-trip for the whole batch instead of one per event.
+        
+        Args:
+            events: Message payloads as dictionaries
+            routing_key: Queue routing key (defaults to the new message queue)
+            exchange: Exchange name (defaults to configured exchange)
+            persistent: Whether to make messages persistent
+            
+        Returns:
+            List[PublishResult]: Per-event ack/nack outcome, in input order
+        """
+        routing_key = routing_key or settings.rabbitmq.queue_new_message
+        outgoing = [await self._enqueue(routing_key, event, exchange, persistent) for event in events]
+        acked = await asyncio.gather(*(item.future for item in outgoing))
+        
+        results = [
+            PublishResult(message_id=item.message_id, acked=ok, attempts=item.attempts)
+            for item, ok in zip(outgoing, acked)
+        ]
+        logger.info(
+            "Message batch published.",
+            routing_key=routing_key,
+            batch_size=len(results),
+            acked=sum(1 for result in results if result.acked)
+        )
+        return results
+    
+    async def publish_new_message_event(self, message_data: Dict[str, Any], wait_for_confirm: bool = False) -> bool:
+        """
+        Publish a new message received event.
+        
+        Args:
+            message_data: Message data containing all necessary information
+            wait_for_confirm: Wait for the broker's ack/nack instead of returning once buffered
+            
+        Returns:
+            bool: True if buffered (or acked, with wait_for_confirm)
+        """
+        return await self.publish_message(
+            routing_key=settings.rabbitmq.queue_new_message,
+            message={
+                'event_type': 'new_message_received',
+                'timestamp': time.time(),
+                **message_data
+            },
+            wait_for_confirm=wait_for_confirm
+        )
+    
+    async def publish_message_analyzed_event(self, event: Dict[str, Any], wait_for_confirm: bool = False) -> bool:
+        """
+        Publish a message analyzed event.
+        
+        Args:
+            event: Event from ``create_message_analyzed_event``
+            wait_for_confirm: Wait for the broker's ack/nack instead of returning once buffered
+            
+        Returns:
+            bool: True if buffered (or acked, with wait_for_confirm)
+        """
+        return await self.publish_message(
+            routing_key=settings.rabbitmq.queue_message_analyzed,
+            message=event,
+            wait_for_confirm=wait_for_confirm
+        )
+    
+    async def _enqueue(
+        self,
+        routing_key: str,
+        message: Dict[str, Any],
+        exchange: Optional[str],
+        persistent: bool
+    ) -> _OutgoingMessage:
+        """Serialize a message and put it in the publish buffer, waiting if the buffer is full."""
+        if self._task is None:
+            await self.start()
+        
+        try:
+            message_body = json.dumps(message, default=str)
+        except (TypeError, ValueError) as e:
+            raise MessageQueueError(f"Failed to serialize message: {e}")
+        
+        outgoing = _OutgoingMessage(
+            exchange=exchange or settings.rabbitmq.exchange,
+            routing_key=routing_key,
+            body=message_body,
+            properties=pika.BasicProperties(
+                delivery_mode=2 if persistent else 1,  # Make message persistent
+                content_type='application/json',
+                timestamp=int(time.time()),
+            ),
+            message_id=str(message.get('message_id', 'unknown')),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        await self._buffer.put(outgoing)
+        return outgoing
+    
+    async def close(self, drain_timeout: float = 10.0) -> None:
+        """
+        Wait for buffered messages to be confirmed, then close the connection.
+        
+        Args:
+            drain_timeout: Maximum seconds to wait for outstanding messages
+        """
+        deadline = time.monotonic() + drain_timeout
+        while self.outstanding and self._task and not self._task.done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.outstanding:
+            logger.warning("AsyncMessageProducer closing with unconfirmed messages.", outstanding=self.outstanding)
+        
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        if self.connection and not (self.connection.is_closing or self.connection.is_closed):
+            self.connection.close()
+        logger.info("AsyncMessageProducer connection closed")
+    
+    async def _run(self) -> None:
+        """Connect, publish until the connection drops, then reconnect with backoff."""
+        delay = self.reconnect_delay
+        while True:
+            self._connection_lost = asyncio.Event()
+            try:
+                await self._connect()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "AsyncMessageProducer failed to connect to RabbitMQ, retrying.",
+                    error=str(e),
+                    retry_in_seconds=delay,
+                    outstanding=self.outstanding
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY_SECONDS)
+                continue
+            
+            delay = self.reconnect_delay
+            logger.info(
+                "AsyncMessageProducer connected to RabbitMQ and setup complete.",
+                target_url=settings.rabbitmq.url[:settings.rabbitmq.url.find('@')] if '@' in settings.rabbitmq.url else settings.rabbitmq.url,
+                exchange=settings.rabbitmq.exchange,
+                outstanding=self.outstanding
+            )
+            await self._publish_until_disconnected()
+            self._requeue_unconfirmed()
+    
+    async def _call(self, start: Callable[[Callable[..., None]], Any]) -> Any:
+        """Run a callback-style pika operation and await its completion callback."""
+        future = asyncio.get_running_loop().create_future()
+        
+        def on_done(*args: Any) -> None:
+            if not future.done():
+                future.set_result(args[0] if args else None)
+        
+        start(on_done)
+        lost = asyncio.ensure_future(self._connection_lost.wait())
+        try:
+            await asyncio.wait({future, lost}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost.cancel()
+        if not future.done():
+            future.cancel()
+            raise MessageQueueError("RabbitMQ connection lost during setup")
+        return future.result()
+    
+    async def _connect(self) -> None:
+        """Open the connection and a confirm-mode channel, and declare the topology."""
+        loop = asyncio.get_running_loop()
+        opened = loop.create_future()
+        
+        def on_open(connection: AsyncioConnection) -> None:
+            if not opened.done():
+                opened.set_result(connection)
+        
+        def on_open_error(connection: AsyncioConnection, error: Exception) -> None:
+            if not opened.done():
+                opened.set_exception(MessageQueueError(f"RabbitMQ connection failed: {error}"))
+        
+        def on_close(connection: AsyncioConnection, reason: Exception) -> None:
+            logger.warning("AsyncMessageProducer connection closed by broker or network.", reason=str(reason))
+            self._connection_lost.set()
+            if not opened.done():
+                opened.set_exception(MessageQueueError(f"RabbitMQ connection closed: {reason}"))
+        
+        self.connection = AsyncioConnection(
+            pika.URLParameters(settings.rabbitmq.url),
+            on_open_callback=on_open,
+            on_open_error_callback=on_open_error,
+            on_close_callback=on_close,
+            custom_ioloop=loop,
+        )
+        await opened
+        
+        self.channel = await self._call(lambda cb: self.connection.channel(on_open_callback=cb))
+        self.channel.add_on_close_callback(self._on_channel_closed)
+        
+        await self._call(lambda cb: self.channel.exchange_declare(
+            exchange=settings.rabbitmq.exchange,
+            exchange_type='topic',
+            durable=True,
+            callback=cb
+        ))
+        for queue_name in _queues_to_declare().values():
+            await self._call(lambda cb, q=queue_name: self.channel.queue_declare(
+                queue=q,
+                durable=True,
+                arguments=_queue_arguments(),
+                callback=cb
+            ))
+            await self._call(lambda cb, q=queue_name: self.channel.queue_bind(
+                queue=q,
+                exchange=settings.rabbitmq.exchange,
+                routing_key=q,
+                callback=cb
+            ))
+        
+        await self._call(lambda cb: self.channel.confirm_delivery(
+            ack_nack_callback=self._on_delivery_confirmation,
+            callback=cb
+        ))
+        self._delivery_tag = 0  # Delivery tags restart on every new channel
+    
+    def _on_channel_closed(self, channel: Any, reason: Exception) -> None:
+        """Treat a closed channel like a lost connection: reconnect and republish."""
+        logger.warning("AsyncMessageProducer channel closed.", reason=str(reason))
+        self._connection_lost.set()
+        if self.connection and not (self.connection.is_closing or self.connection.is_closed):
+            self.connection.close()
+    
+    async def _publish_until_disconnected(self) -> None:
+        """Publish buffered messages until the connection is lost."""
+        lost = asyncio.ensure_future(self._connection_lost.wait())
+        try:
+            while not self._connection_lost.is_set():
+                if self._retry:
+                    self._publish(self._retry.popleft())
+                    continue
+                
+                self._retry_ready.clear()
+                getter = asyncio.ensure_future(self._buffer.get())
+                retry = asyncio.ensure_future(self._retry_ready.wait())
+                await asyncio.wait({getter, lost, retry}, return_when=asyncio.FIRST_COMPLETED)
+                retry.cancel()
+                if getter.done():
+                    self._publish(getter.result())
+                    continue
+                getter.cancel()
+        finally:
+            lost.cancel()
+    
+    def _publish(self, outgoing: _OutgoingMessage) -> None:
+        """Send one message on the confirm-mode channel and track its delivery tag."""
+        if self._connection_lost.is_set():
+            self._retry.appendleft(outgoing)
+            return
+        try:
+            self.channel.basic_publish(
+                exchange=outgoing.exchange,
+                routing_key=outgoing.routing_key,
+                body=outgoing.body,
+                properties=outgoing.properties
+            )
+        except Exception as e:
+            logger.warning(
+                "AsyncMessageProducer publish failed, will republish after reconnect.",
+                error=str(e),
+                message_id=outgoing.message_id
+            )
+            self._retry.appendleft(outgoing)
+            self._connection_lost.set()
+            return
+        
+        self._delivery_tag += 1
+        outgoing.attempts += 1
+        self._unconfirmed[self._delivery_tag] = outgoing
+        logger.debug(
+            "Message published, awaiting confirm.",
+            routing_key=outgoing.routing_key,
+            message_id=outgoing.message_id,
+            delivery_tag=self._delivery_tag,
+            message_size=len(outgoing.body)
+        )
+    
+    def _on_delivery_confirmation(self, method_frame: Any) -> None:
+        """
+        Resolve publishes acknowledged or rejected by the broker.
+        
+        Args:
+            method_frame: Basic.Ack or Basic.Nack frame (possibly covering multiple tags)
+        """
+        method = method_frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = sorted(tag for tag in self._unconfirmed if tag <= method.delivery_tag)
+        else:
+            tags = [method.delivery_tag]
+        
+        for tag in tags:
+            outgoing = self._unconfirmed.pop(tag, None)
+            if outgoing is None:
+                continue
+            if acked:
+                if not outgoing.future.done():
+                    outgoing.future.set_result(True)
+            elif outgoing.attempts < self.max_attempts:
+                logger.warning(
+                    "Broker rejected published message (nack), republishing.",
+                    routing_key=outgoing.routing_key,
+                    message_id=outgoing.message_id,
+                    delivery_tag=tag,
+                    attempts=outgoing.attempts
+                )
+                self._retry.append(outgoing)
+                self._retry_ready.set()
+            else:
+                logger.error(
+                    "Broker rejected published message (nack), giving up.",
+                    routing_key=outgoing.routing_key,
+                    message_id=outgoing.message_id,
+                    delivery_tag=tag,
+                    attempts=outgoing.attempts
+                )
+                if not outgoing.future.done():
+                    outgoing.future.set_result(False)
+    
+    def _requeue_unconfirmed(self) -> None:
+        """Move messages left unconfirmed by a dropped channel to the front of the retry queue."""
+        if not self._unconfirmed:
+            return
+        logger.warning(
+            "Republishing messages left unconfirmed by dropped connection.",
+            count=len(self._unconfirmed)
+        )
+        for tag in sorted(self._unconfirmed, reverse=True):
+            self._retry.appendleft(self._unconfirmed.pop(tag))
+
+
 class MessageConsumer:
     """
     RabbitMQ message consumer for processing events from queues.
+    
+    With ``workers`` > 1 the callback runs on a thread pool so that up to
+    ``workers`` messages are processed concurrently. pika connections are not
+    thread-safe, so acks and nacks from worker threads are handed back to the
+    connection thread with ``add_callback_threadsafe``.
     """
     
-    def __init__(self, queue_name: str, callback: Callable[[Dict[str, Any]], bool]) -> None:
+    def __init__(
+        self,
+        queue_name: str,
+        callback: Callable[[Dict[str, Any]], bool],
+        prefetch_count: int = 1,
+        workers: int = 1,
+        routing_key: Optional[str] = None
+    ) -> None:
         """
         Initialize the message consumer.
         
@@ -219,11 +744,25 @@ class MessageConsumer:
             queue_name: Name of the queue to consume from
             callback: Function to call when a message is received.
                      Should return True if message was processed successfully.
+            prefetch_count: Maximum unacknowledged deliveries (raised to at least ``workers``)
+            workers: Number of messages processed concurrently
+            routing_key: If set, the queue is private to this consumer: it is
+                        deleted when the consumer disconnects and bound to the
+                        exchange with this routing key
         """
         self.queue_name = queue_name
+        self.routing_key = routing_key
         self.callback = callback
+        self.workers = max(1, workers)
+        self.prefetch_count = max(prefetch_count, self.workers)
         self.connection: Optional[pika.BlockingConnection] = None
         self.channel: Optional[BlockingChannel] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.workers > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix=f"consumer-{queue_name}"
+            )
         self._setup_connection()
     
     def _setup_connection(self) -> None:
@@ -242,16 +781,26 @@ class MessageConsumer:
             
             self.channel.queue_declare(
                 queue=self.queue_name,
-                durable=True,
+                durable=self.routing_key is None,
+                auto_delete=self.routing_key is not None,
                 arguments={
                     'x-dead-letter-exchange': settings.rabbitmq.exchange,
                     'x-dead-letter-routing-key': settings.rabbitmq.queue_dead_letter,
                 }
             )
+            if self.routing_key is not None:
+                self.channel.queue_bind(
+                    queue=self.queue_name,
+                    exchange=settings.rabbitmq.exchange,
+                    routing_key=self.routing_key
+                )
             
-            # Set QoS to process one message at a time
-            self.channel.basic_qos(prefetch_count=1)
-            logger.debug(f"QoS prefetch_count=1 set for consumer on queue '{self.queue_name}'.")
+            # Bound unacknowledged deliveries; with workers > 1 this keeps the pool fed
+            self.channel.basic_qos(prefetch_count=self.prefetch_count)
+            logger.debug(
+                f"QoS prefetch_count={self.prefetch_count} set for consumer on queue '{self.queue_name}'.",
+                workers=self.workers
+            )
             
             logger.info(
                 f"MessageConsumer connected to RabbitMQ and setup complete for queue: {self.queue_name}",
@@ -269,7 +818,7 @@ class MessageConsumer:
     
     def _message_handler(self, channel: BlockingChannel, method, properties, body: bytes) -> None:
         """
-        Handle incoming messages.
+        Handle incoming messages, inline or on the worker pool.
         
         Args:
             channel: RabbitMQ channel
@@ -277,12 +826,47 @@ class MessageConsumer:
             properties: Message properties
             body: Message body
         """
+        if self._executor is None:
+            self._process_delivery(channel, method, body, channel.basic_ack, channel.basic_nack)
+            return
+        
+        # Runs on a worker thread; settle on the connection thread
+        def threadsafe(settle: Callable[..., None]) -> Callable[..., None]:
+            return lambda **kwargs: self.connection.add_callback_threadsafe(partial(settle, **kwargs))
+        
+        self._executor.submit(
+            self._process_delivery,
+            channel,
+            method,
+            body,
+            threadsafe(channel.basic_ack),
+            threadsafe(channel.basic_nack)
+        )
+    
+    def _process_delivery(
+        self,
+        channel: BlockingChannel,
+        method,
+        body: bytes,
+        ack: Callable[..., None],
+        nack: Callable[..., None]
+    ) -> None:
+        """
+        Run the callback for one delivery and settle it.
+        
+        Args:
+            channel: RabbitMQ channel
+            method: Delivery method
+            body: Message body
+            ack: Function acknowledging a delivery tag
+            nack: Function rejecting a delivery tag
+        """
         try:
             # Parse JSON message
             message_body_str = body.decode('utf-8') # For logging preview
             message = json.loads(message_body_str)
             
-            self.logger.debug( # Changed to debug as it can be very verbose
+            logger.debug( # Changed to debug as it can be very verbose
                 "Message received by consumer.",
                 queue=self.queue_name,
                 message_id=message.get('message_id', 'unknown'),
@@ -298,7 +882,7 @@ class MessageConsumer:
             if success:
                 # Acknowledge message
                 logger.debug(f"Acknowledging message (basic_ack) with delivery_tag: {method.delivery_tag}", queue=self.queue_name)
-                channel.basic_ack(delivery_tag=method.delivery_tag)
+                ack(delivery_tag=method.delivery_tag)
                 logger.info( # Keep info for successful processing confirmation
                     "Message processed successfully and acknowledged.",
                     queue=self.queue_name,
@@ -314,7 +898,7 @@ class MessageConsumer:
                     event_type=message.get('event_type', 'unknown'),
                     delivery_tag=method.delivery_tag
                 )
-                channel.basic_nack(
+                nack(
                     delivery_tag=method.delivery_tag,
                     requeue=False # False means send to DLQ if DLX is configured
                 )
@@ -328,7 +912,7 @@ class MessageConsumer:
                 delivery_tag=method.delivery_tag if method else None,
                 exc_info=True
             )
-            if method: channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            if method: nack(delivery_tag=method.delivery_tag, requeue=False)
         
         except Exception as e:
             logger.error(
@@ -338,7 +922,7 @@ class MessageConsumer:
                 delivery_tag=method.delivery_tag if method else None,
                 exc_info=True
             )
-            if method: channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False) # Ensure nack on unexpected error
+            if method: nack(delivery_tag=method.delivery_tag, requeue=False) # Ensure nack on unexpected error
     
     def start_consuming(self) -> None:
         """
@@ -373,6 +957,31 @@ class MessageConsumer:
             # Close is typically called by the code that created the consumer instance
             # self.close() might be too aggressive here if start_consuming is meant to be restartable
     
+    def delete_queue_if_unused(self, queue_name: str) -> bool:
+        """
+        Delete a queue unless a consumer is attached to it.
+        
+        Runs on a channel of its own, because the broker closes the channel
+        when the queue is still in use.
+        
+        Args:
+            queue_name: Name of the queue to delete
+            
+        Returns:
+            bool: True if the queue was deleted or did not exist
+        """
+        if not self.connection or not self.connection.is_open:
+            self._setup_connection()
+        channel = self.connection.channel()
+        try:
+            result = channel.queue_delete(queue=queue_name, if_unused=True)
+        except ChannelClosedByBroker as e:
+            logger.info(f"Queue '{queue_name}' is still in use and was kept.", reply_text=e.reply_text)
+            return False
+        channel.close()
+        logger.info(f"Queue '{queue_name}' deleted.", dropped_messages=result.method.message_count)
+        return True
+    
     def stop_consuming(self) -> None:
         """Stop consuming messages."""
         if self.channel and self.channel.is_consuming: # Check if it's actually consuming
@@ -390,6 +999,11 @@ class MessageConsumer:
         logger.info(f"Attempting to close MessageConsumer connection for queue '{self.queue_name}'.")
         try:
             self.stop_consuming() # Ensure consuming is stopped first
+            if self._executor:
+                # Let in-flight messages finish, then deliver their queued acks
+                self._executor.shutdown(wait=True)
+                if self.connection and self.connection.is_open:
+                    self.connection.process_data_events(time_limit=0)
             if self.connection and not self.connection.is_closed:
                 self.connection.close()
                 logger.info(f"MessageConsumer connection for queue '{self.queue_name}' closed successfully.")
@@ -414,18 +1028,29 @@ def get_message_producer() -> Generator[MessageProducer, None, None]:
         producer.close()
 
 
-def create_consumer(queue_name: str, callback: Callable[[Dict[str, Any]], bool]) -> MessageConsumer:
+def create_consumer(
+    queue_name: str,
+    callback: Callable[[Dict[str, Any]], bool],
+    prefetch_count: int = 1,
+    workers: int = 1,
+    routing_key: Optional[str] = None
+) -> MessageConsumer:
     """
     Create a message consumer for the specified queue.
     
     Args:
         queue_name: Name of the queue to consume from
         callback: Function to call when a message is received
+        prefetch_count: Maximum unacknowledged deliveries
+        workers: Number of messages processed concurrently
+        routing_key: Bind a private, auto-deleted queue with this routing key
         
     Returns:
         MessageConsumer: Configured message consumer
     """
-    return MessageConsumer(queue_name, callback)
+    return MessageConsumer(
+        queue_name, callback, prefetch_count=prefetch_count, workers=workers, routing_key=routing_key
+    )
 
 
 # Message event schemas for type safety
@@ -457,4 +1082,35 @@ def create_new_message_event(
         'media_hash': media_hash,
         'message_timestamp': message_timestamp or time.time(),
         'processing_timestamp': time.time(),
-    } 
\ No newline at end of file
+    } 
+
+
+def create_message_analyzed_event(
+    message_id: str,
+    channel_id: str,
+    message_text: Optional[str],
+    message_timestamp: Optional[float],
+    ai_metadata: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Create a standardized message analyzed event.
+    
+    Args:
+        message_id: Telegram message ID
+        channel_id: Channel ID
+        message_text: Text content of the message
+        message_timestamp: Original message timestamp
+        ai_metadata: Stored AI metadata
+        
+    Returns:
+        Dict[str, Any]: Standardized message analyzed event
+    """
+    return {
+        'event_type': 'message_analyzed',
+        'message_id': message_id,
+        'channel_id': channel_id,
+        'message_text': message_text,
+        'message_timestamp': message_timestamp or time.time(),
+        'ai_metadata': ai_metadata,
+        'processing_timestamp': time.time(),
+    }
@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Optional
 
 from sqlalchemy import (
     BIGINT,
+    ColumnElement,
     Boolean,
     Column,
     DateTime,
@@ -19,13 +20,23 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    event,
+    and_,
+    literal_column,
+    not_,
+    or_,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB, array
 from sqlalchemy.types import JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from .database import Base
 
+# JSONB on PostgreSQL for containment/existence operators and GIN indexes; plain JSON elsewhere (SQLite in tests)
+JSONDocument = JSONB().with_variant(JSON(), "sqlite")
+
 
 class Channel(Base):
     """
@@ -101,6 +112,57 @@ class Media(Base):
         return f"<Media(id={self.id}, hash='{self.media_hash[:8]}...', type='{self.media_type}')>"
 
 
+class MediaFileIdentity(Base):
+    """
+    Telegram file identities mapped to already-stored media.
+    
+    Lets the aggregator recognize forwarded or reposted media from Telegram's
+    file metadata alone, without downloading and hashing the file again.
+    
+    Attributes:
+        id: Auto-increment primary key
+        file_kind: Telegram object kind ("photo" or "document")
+        telegram_file_id: Telegram photo/document ID
+        access_hash: Telegram access hash of the photo/document
+        file_size_bytes: Size of the file in bytes as reported by Telegram
+        media_id: Foreign key to the deduplicated media record
+        created_at: Timestamp when the identity was first seen
+    """
+    
+    __tablename__ = "media_file_identities"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_kind = Column(String(16), nullable=False, comment="Telegram object kind (photo/document)")
+    telegram_file_id = Column(BIGINT, nullable=False, comment="Telegram photo/document ID")
+    access_hash = Column(BIGINT, nullable=False, comment="Telegram access hash")
+    file_size_bytes = Column(BIGINT, nullable=False, comment="File size in bytes reported by Telegram")
+    media_id = Column(
+        Integer,
+        ForeignKey("media.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the deduplicated media file"
+    )
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Timestamp when the identity was first seen"
+    )
+
+    # Relationship
+    media = relationship("Media")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "file_kind", "telegram_file_id", "access_hash", "file_size_bytes",
+            name="uq_media_file_identity"
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<MediaFileIdentity(kind='{self.file_kind}', file_id={self.telegram_file_id}, media_id={self.media_id})>"
+
+
 class Message(Base):
     """
     Telegram messages with AI-generated metadata.
@@ -113,7 +175,7 @@ class Message(Base):
         media_id: Foreign key to media table (nullable)
         message_timestamp: Original timestamp of the Telegram message
         created_at: Timestamp when message was stored in our system
-        ai_metadata: JSON field containing AI analysis results
+        ai_metadata: JSONB field containing AI analysis results
     """
     
     __tablename__ = "messages"
@@ -149,7 +211,7 @@ class Message(Base):
         comment="Timestamp when stored in our system"
     )
     ai_metadata = Column(
-        JSON,
+        JSONDocument,
         nullable=True,
         comment="AI analysis results in JSON format"
     )
@@ -162,14 +224,50 @@ class Message(Base):
     __table_args__ = (
         Index("idx_messages_channel_id", "channel_id"),
         Index("idx_messages_message_timestamp", "message_timestamp"),
-        Index("idx_messages_ai_metadata", "ai_metadata", postgresql_using="gin"),  # GIN index for JSON fields (PostgreSQL)
-        Index("idx_messages_telegram_id_channel", "telegram_message_id", "channel_id"),
+        # GIN index for containment (@>) filters on topics; see metadata_topics_filter
+        Index(
+            "idx_messages_ai_metadata",
+            "ai_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"ai_metadata": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+        # GIN expression index for keyword existence (?|) filters; see metadata_keywords_filter
+        Index(
+            "idx_messages_ai_keywords",
+            text("(ai_metadata -> 'keywords')"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # Expression index for sentiment filters within a time window; see metadata_sentiment_filter
+        Index(
+            "idx_messages_ai_sentiment_timestamp",
+            text("(ai_metadata ->> 'sentiment')"),
+            "message_timestamp"
+        ).ddl_if(dialect="postgresql"),
+        # Unique so the batched ingest writer can use INSERT ... ON CONFLICT DO NOTHING. Includes the
+        # timestamp because unique indexes of the partitioned PostgreSQL table must include the partition key
+        Index(
+            "idx_messages_telegram_id_channel",
+            "telegram_message_id", "channel_id", "message_timestamp",
+            unique=True
+        ),
     )
 
     def __repr__(self) -> str:
         return f"<Message(id={self.id}, channel_id={self.channel_id}, telegram_id={self.telegram_message_id})>"
 
 
+@event.listens_for(Message.__table__, "after_create")
+def _partition_new_messages_table(target, connection, **kw) -> None:
+    """Range-partition the messages table on PostgreSQL right after create_all creates it."""
+    if connection.dialect.name != "postgresql":
+        return
+    from .config import get_settings
+    from .partitions import get_partition_manager  # Imports this module
+
+    if get_settings().partitions.enabled:
+        get_partition_manager().convert(connection)
+
+
 class User(Base):
     """
     Users who interact with the alerting bot.
@@ -214,7 +312,7 @@ class AlertConfig(Base):
         id: Auto-increment primary key
         user_id: Foreign key to users table
         config_name: User-friendly name for the alert configuration
-        criteria: JSON field containing alert criteria and parameters
+        criteria: JSONB field containing alert criteria and parameters
         is_active: Boolean flag to enable/disable the alert
         created_at: Timestamp when alert config was created
     """
@@ -234,7 +332,7 @@ class AlertConfig(Base):
         comment="User-friendly name for the alert"
     )
     criteria = Column(
-        JSON,
+        JSONDocument,
         nullable=False,
         comment="Alert criteria and parameters in JSON format"
     )
@@ -264,6 +362,87 @@ class AlertConfig(Base):
         return f"<AlertConfig(id={self.id}, user_id={self.user_id}, name='{self.config_name}', active={self.is_active})>"
 
 
+class AlertState(Base):
+    """
+    Durable evaluation state of an alert configuration, shared by all replicas.
+    
+    Attributes:
+        config_id: Foreign key to alert_configs table
+        last_triggered_at: When the alert last fired (drives the cooldown)
+        window_count: Messages in the window when the alert last fired
+        fencing_token: Lease token of the replica that last fired the alert
+        owner: Replica that last fired the alert
+        updated_at: Timestamp of the last state change
+    """
+    
+    __tablename__ = "alert_state"
+
+    config_id = Column(
+        Integer,
+        ForeignKey("alert_configs.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="Reference to the alert configuration"
+    )
+    last_triggered_at = Column(DateTime(timezone=True), nullable=True, comment="Last time the alert fired")
+    window_count = Column(Integer, nullable=False, default=0, comment="Window size when the alert last fired")
+    fencing_token = Column(BIGINT, nullable=False, default=0, comment="Lease token of the last writer")
+    owner = Column(String(255), nullable=True, comment="Replica that last fired the alert")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        comment="Last state change timestamp"
+    )
+
+    def __repr__(self) -> str:
+        return f"<AlertState(config_id={self.config_id}, last_triggered_at={self.last_triggered_at}, token={self.fencing_token})>"
+
+
+class AlertLease(Base):
+    """
+    Lease on one partition of the alert configurations.
+    
+    Configuration ``id % partitions`` belongs to partition ``partition_id``;
+    only the replica holding its lease evaluates it. The fencing token is
+    incremented on every change of owner.
+    
+    Attributes:
+        partition_id: Partition number
+        owner: Replica holding the lease, None if released
+        fencing_token: Monotonic token of the current lease
+        expires_at: Lease expiry timestamp
+    """
+    
+    __tablename__ = "alert_leases"
+
+    partition_id = Column(Integer, primary_key=True, autoincrement=False, comment="Partition number")
+    owner = Column(String(255), nullable=True, comment="Replica holding the lease")
+    fencing_token = Column(BIGINT, nullable=False, default=0, comment="Monotonic lease token")
+    expires_at = Column(DateTime(timezone=True), nullable=True, comment="Lease expiry timestamp")
+
+    def __repr__(self) -> str:
+        return f"<AlertLease(partition_id={self.partition_id}, owner='{self.owner}', token={self.fencing_token})>"
+
+
+class AlertReplica(Base):
+    """
+    Heartbeat of a smart_analysis replica taking part in alert lease balancing.
+    
+    Attributes:
+        replica_id: Replica identity
+        heartbeat_at: Last lease renewal of the replica
+    """
+    
+    __tablename__ = "alert_replicas"
+
+    replica_id = Column(String(255), primary_key=True, comment="Replica identity")
+    heartbeat_at = Column(DateTime(timezone=True), nullable=False, comment="Last heartbeat timestamp")
+
+    def __repr__(self) -> str:
+        return f"<AlertReplica(replica_id='{self.replica_id}', heartbeat_at={self.heartbeat_at})>"
+
+
 class Prompt(Base):
     """
     Prompt templates for LLM analysis with versioning support.
@@ -313,8 +492,199 @@ class Prompt(Base):
         return f"<Prompt(id={self.id}, name='{self.name}', version={self.version}, active={self.is_active})>"
 
 
+class LLMResultCacheEntry(Base):
+    """
+    Persistent tier of the LLM analysis result cache.
+    
+    Attributes:
+        cache_key: SHA256 of normalized message text, prompt name/version and model
+        prompt_name: Prompt template used for the analysis
+        prompt_version: Version of the prompt template
+        model: LLM model that produced the result
+        result: Validated analysis metadata (before per-message processing fields)
+        hit_count: Number of times the entry was reused
+        created_at: Timestamp when the entry was stored
+        expires_at: Timestamp after which the entry is ignored
+    """
+    
+    __tablename__ = "llm_result_cache"
+
+    cache_key = Column(String(64), primary_key=True, comment="SHA256 cache key")
+    prompt_name = Column(String(100), nullable=False, comment="Prompt template name")
+    prompt_version = Column(Integer, nullable=False, comment="Prompt version number")
+    model = Column(String(100), nullable=False, comment="LLM model name")
+    result = Column(JSON, nullable=False, comment="Cached analysis metadata")
+    hit_count = Column(Integer, nullable=False, default=0, comment="Number of cache hits")
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Entry creation timestamp"
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False, comment="Entry expiry timestamp")
+
+    __table_args__ = (
+        Index("idx_llm_result_cache_expires_at", "expires_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LLMResultCacheEntry(key='{self.cache_key[:8]}', prompt='{self.prompt_name}', model='{self.model}')>"
+
+
+class MetadataRollup(Base):
+    """
+    Message count of one metadata value in one time bucket.
+    
+    Each analyzed message increments a minute and an hour bucket for each of
+    its topics and keywords, its channel and the ``total`` dimension, split
+    by the message sentiment. Minute buckets are dropped and hour buckets
+    compacted into day buckets as they age.
+    
+    Attributes:
+        granularity: Bucket size: minute, hour or day
+        bucket_start: Start of the bucket (UTC)
+        dimension: Counted dimension: topic, keyword, channel or total
+        value: Dimension value (lowercased topic or keyword, channel ID, empty for total)
+        sentiment: Sentiment of the counted messages
+        message_count: Number of messages
+    """
+    
+    __tablename__ = "metadata_rollups"
+
+    granularity = Column(String(8), primary_key=True, comment="Bucket size")
+    bucket_start = Column(DateTime(timezone=True), primary_key=True, comment="Bucket start timestamp")
+    dimension = Column(String(16), primary_key=True, comment="Counted dimension")
+    value = Column(String(255), primary_key=True, comment="Dimension value")
+    sentiment = Column(String(16), primary_key=True, comment="Message sentiment")
+    message_count = Column(Integer, nullable=False, default=0, comment="Number of messages")
+
+    __table_args__ = (
+        Index("idx_metadata_rollups_dimension_bucket", "granularity", "dimension", "bucket_start"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<MetadataRollup({self.granularity} {self.bucket_start}, {self.dimension}='{self.value}', "
+            f"{self.sentiment}={self.message_count})>"
+        )
+
+
+class ArchivedMessageFile(Base):
+    """
+    Manifest entry of a Parquet file holding archived messages of one channel on one day.
+    
+    Messages older than the archive horizon are moved out of ``messages`` into
+    these files; the manifest row and the deletion of the archived rows are
+    committed together, so every message is either in the table or in a file.
+    
+    Attributes:
+        id: Auto-increment primary key
+        day: Start of the archived day (UTC)
+        channel_id: Channel of the archived messages
+        path: File path relative to the archive directory
+        message_count: Number of messages in the file
+        first_message_at: Timestamp of the oldest message in the file
+        last_message_at: Timestamp of the newest message in the file
+        size_bytes: File size
+        archived_at: Timestamp when the file was written
+    """
+    
+    __tablename__ = "message_archive_files"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(DateTime(timezone=True), nullable=False, comment="Archived day (UTC)")
+    channel_id = Column(BIGINT, nullable=False, comment="Channel of the archived messages")
+    path = Column(String(1024), nullable=False, unique=True, comment="Path relative to the archive directory")
+    message_count = Column(Integer, nullable=False, comment="Number of archived messages")
+    first_message_at = Column(DateTime(timezone=True), nullable=False, comment="Oldest message timestamp")
+    last_message_at = Column(DateTime(timezone=True), nullable=False, comment="Newest message timestamp")
+    size_bytes = Column(BIGINT, nullable=False, comment="File size in bytes")
+    archived_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Timestamp when the file was written"
+    )
+
+    __table_args__ = (
+        Index("idx_message_archive_files_day", "day"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArchivedMessageFile(day={self.day}, channel_id={self.channel_id}, messages={self.message_count})>"
+
+
 # Additional utility functions for common queries
 
+def metadata_topics_filter(topics: List[str]) -> ColumnElement:
+    """
+    PostgreSQL filter for messages whose ``ai_metadata`` has any of the topics.
+    
+    One ``ai_metadata @> '{"topics": [...]}'`` containment per topic, served
+    by the ``idx_messages_ai_metadata`` GIN index.
+    
+    Args:
+        topics: Topics, matched lowercased
+        
+    Returns:
+        ColumnElement: Filter clause
+    """
+    return or_(*[Message.ai_metadata.contains({"topics": [topic.lower()]}) for topic in topics])
+
+
+def metadata_keywords_filter(keywords: List[str]) -> ColumnElement:
+    """
+    PostgreSQL filter for messages whose ``ai_metadata`` keywords include any of the keywords.
+    
+    ``ai_metadata -> 'keywords' ?| array[...]``, served by the
+    ``idx_messages_ai_keywords`` GIN expression index.
+    
+    Args:
+        keywords: Keywords, matched lowercased
+        
+    Returns:
+        ColumnElement: Filter clause
+    """
+    # Operator and inline key literal spelled exactly like the index expression, so the planner can match it
+    keywords_document = Message.ai_metadata.op("->", return_type=JSONB)(literal_column("'keywords'"))
+    return keywords_document.has_any(array([keyword.lower() for keyword in keywords]))
+
+
+def metadata_sentiment_filter(sentiment: str) -> ColumnElement:
+    """
+    PostgreSQL filter for messages with a sentiment.
+    
+    ``ai_metadata ->> 'sentiment' = ...``, served together with a time window
+    by the ``idx_messages_ai_sentiment_timestamp`` expression index.
+    
+    Args:
+        sentiment: positive, negative or neutral
+        
+    Returns:
+        ColumnElement: Filter clause
+    """
+    return Message.ai_metadata.op("->>", return_type=Text)(literal_column("'sentiment'")) == sentiment
+
+
+def metadata_analyzed_filter(dialect_name: str) -> ColumnElement:
+    """
+    Filter for messages with a stored analysis, excluding provisional ingest metadata.
+    
+    ``NOT (ai_metadata ? 'provisional')`` on PostgreSQL; ``json_extract`` elsewhere (SQLite in tests).
+    
+    Args:
+        dialect_name: Dialect of the session the filter runs on
+        
+    Returns:
+        ColumnElement: Filter clause
+    """
+    if dialect_name == "postgresql":
+        provisional = Message.ai_metadata.has_key('provisional')
+    else:
+        provisional = func.json_extract(Message.ai_metadata, '$.provisional').isnot(None)
+    return and_(Message.ai_metadata.isnot(None), not_(provisional))
+
+
 def get_ai_metadata_schema() -> Dict[str, Any]:
     """
     Get the expected schema for the ai_metadata JSON field.
@@ -0,0 +1,374 @@
+"""
+Tel-Insights Message Partitions
+
+Range partitioning of the ``messages`` table by ``message_timestamp`` on
+PostgreSQL. Recent-window queries filter on the message timestamp, so the
+planner prunes them to the one or two newest partitions instead of scanning
+one ever-growing heap, and old partitions can be detached (or dropped)
+instead of deleting rows.
+
+``PartitionManager.convert`` turns the plain table into a partitioned one
+(when ``init_db`` creates the table; existing databases are converted by
+migration 0003_partition_messages);
+``PartitionManager.maintain`` runs periodically to create upcoming
+partitions and detach partitions past the retention period. Rows outside
+every partition land in ``messages_default`` and are moved into their
+partition when it is created.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from .config import get_settings
+from .database import get_db_session
+from .logging import LoggingMixin, get_logger, log_database_operation
+from .models import Message
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+INTERVALS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+DEFAULT_PARTITION = f"{Message.__tablename__}_default"
+
+# Serializes maintenance runs of concurrent replicas
+_ADVISORY_LOCK_KEY = 0x7E1_0001
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class MessagePartition:
+    """A range partition of the messages table covering [start, end)."""
+
+    name: str
+    start: datetime
+    end: datetime
+
+
+def _utc(value: datetime) -> datetime:
+    """Treat naive timestamps as UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _timestamp_literal(value: datetime) -> str:
+    """Partition bounds are DDL and cannot be bound parameters."""
+    return f"'{_utc(value).isoformat()}'"
+
+
+def _relkind(connection: Connection) -> Optional[str]:
+    """'r' for a plain messages table, 'p' for a partitioned one, None if it does not exist."""
+    return connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": Message.__tablename__}
+    ).scalar()
+
+
+class PartitionManager(LoggingMixin):
+    """
+    Creates, converts and retires range partitions of the messages table.
+
+    Partitions are aligned to UTC days or ISO weeks (starting Monday) and
+    named after their first day, e.g. ``messages_p20261012``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = get_db_session,
+        interval: Optional[str] = None,
+        premake: Optional[int] = None,
+        retention_days: Optional[int] = None,
+        drop_detached: Optional[bool] = None
+    ) -> None:
+        """
+        Initialize the manager.
+
+        Args:
+            session_factory: Callable returning a new synchronous session
+            interval: Partition size, day or week (defaults to PARTITION_INTERVAL)
+            premake: Future partitions to keep created (defaults to PARTITION_PREMAKE)
+            retention_days: Detach partitions ending this many days ago, 0 to keep all
+                (defaults to PARTITION_RETENTION_DAYS)
+            drop_detached: Drop detached partitions (defaults to PARTITION_DROP_DETACHED)
+        """
+        self.session_factory = session_factory
+        self.interval = interval or settings.partitions.interval
+        if self.interval not in INTERVALS:
+            raise ValueError(f"Unsupported partition interval '{self.interval}', expected one of {sorted(INTERVALS)}")
+        self.premake = settings.partitions.premake if premake is None else premake
+        self.retention_days = settings.partitions.retention_days if retention_days is None else retention_days
+        self.drop_detached = settings.partitions.drop_detached if drop_detached is None else drop_detached
+
+    def period_start(self, value: datetime) -> datetime:
+        """Start of the partition period containing a timestamp."""
+        value = _utc(value)
+        start = value.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.interval == "week":
+            start -= timedelta(days=start.weekday())
+        return start
+
+    def partition_name(self, start: datetime) -> str:
+        """Name of the partition starting at a period start."""
+        return f"{Message.__tablename__}_p{start:%Y%m%d}"
+
+    def periods(self, first: datetime, now: datetime) -> List[Tuple[datetime, datetime]]:
+        """
+        Partition periods from the one containing ``first`` to ``premake`` periods after ``now``.
+
+        Args:
+            first: Earliest timestamp to cover
+            now: Current time
+
+        Returns:
+            List[Tuple[datetime, datetime]]: Period bounds, oldest first
+        """
+        size = INTERVALS[self.interval]
+        last = self.period_start(now) + size * self.premake
+        periods = []
+        start = self.period_start(min(_utc(first), _utc(now)))
+        while start <= last:
+            periods.append((start, start + size))
+            start += size
+        return periods
+
+    def plan(
+        self,
+        existing: Sequence[MessagePartition],
+        now: datetime
+    ) -> Tuple[List[Tuple[datetime, datetime]], List[MessagePartition]]:
+        """
+        Decide which partitions to create and which to detach.
+
+        Periods that overlap an existing partition (e.g. after the interval
+        was changed) are skipped; their rows keep going to that partition or
+        to the default partition.
+
+        Args:
+            existing: Attached range partitions
+            now: Current time
+
+        Returns:
+            Tuple[List[Tuple[datetime, datetime]], List[MessagePartition]]: Periods to create,
+            partitions to detach
+        """
+        to_create = [
+            (start, end) for start, end in self.periods(now, now)
+            if not any(partition.start < end and start < partition.end for partition in existing)
+        ]
+        to_detach = []
+        if self.retention_days > 0:
+            cutoff = _utc(now) - timedelta(days=self.retention_days)
+            to_detach = [partition for partition in existing if partition.end <= cutoff]
+        return to_create, to_detach
+
+    def list_partitions(self, connection: Connection) -> List[MessagePartition]:
+        """
+        Range partitions currently attached to the messages table.
+
+        Args:
+            connection: PostgreSQL connection
+
+        Returns:
+            List[MessagePartition]: Partitions ordered by start
+        """
+        connection.execute(text("SET LOCAL TimeZone = 'UTC'"))
+        rows = connection.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits AS i
+            JOIN pg_class AS c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+        """), {"table": Message.__tablename__})
+        partitions = []
+        for name, bound in rows:
+            match = _BOUND_PATTERN.search(bound or "")
+            if match:  # Skips the default partition
+                start, end = (_utc(datetime.fromisoformat(value)) for value in match.groups())
+                partitions.append(MessagePartition(name, start, end))
+        return sorted(partitions, key=lambda partition: partition.start)
+
+    def create_partition(self, connection: Connection, start: datetime, end: datetime) -> str:
+        """
+        Create and attach the partition for a period.
+
+        Rows of the period already in the default partition are moved into
+        it first; attaching creates the parent's indexes and foreign keys on it.
+
+        Args:
+            connection: PostgreSQL connection
+            start: Period start
+            end: Period end
+
+        Returns:
+            str: Partition name
+        """
+        table = Message.__tablename__
+        name = self.partition_name(start)
+        connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING COMMENTS)"))
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar():
+            connection.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE message_timestamp >= :start AND message_timestamp < :end
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+            """), {"start": start, "end": end})
+        connection.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({_timestamp_literal(start)}) TO ({_timestamp_literal(end)})"
+        ))
+        return name
+
+    def convert(self, connection: Connection, now: Optional[datetime] = None) -> bool:
+        """
+        Rebuild a plain messages table as a partitioned one, keeping its rows.
+
+        Runs in the caller's transaction and holds an exclusive lock on the
+        table while rows are copied, so large tables should be converted
+        during a maintenance window.
+
+        Args:
+            connection: Database connection
+            now: Current time, for the partitions created ahead
+
+        Returns:
+            bool: True if the table was converted
+        """
+        if connection.dialect.name != "postgresql" or _relkind(connection) != "r":
+            return False
+        now = now or datetime.now(timezone.utc)
+        table = Message.__tablename__
+        connection.execute(text("SET LOCAL TimeZone = 'UTC'"))
+        first = connection.execute(text(f"SELECT min(message_timestamp) FROM {table}")).scalar()
+
+        def create_partitions() -> None:
+            connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {table} DEFAULT"))
+            for start, end in self.periods(first or now, now):
+                self.create_partition(connection, start, end)
+
+        self._rebuild(connection, "PARTITION BY RANGE (message_timestamp)", ["id", "message_timestamp"], create_partitions)
+        self.logger.info(
+            log_database_operation("partition_table", table, interval=self.interval),
+            first_message=first.isoformat() if first else None
+        )
+        return True
+
+    def revert(self, connection: Connection) -> bool:
+        """
+        Rebuild a partitioned messages table as a plain one, keeping the rows of attached partitions.
+
+        Args:
+            connection: Database connection
+
+        Returns:
+            bool: True if the table was converted
+        """
+        if connection.dialect.name != "postgresql" or _relkind(connection) != "p":
+            return False
+        self._rebuild(connection, "", ["id"])
+        self.logger.info(log_database_operation("unpartition_table", Message.__tablename__))
+        return True
+
+    def _rebuild(
+        self,
+        connection: Connection,
+        partition_clause: str,
+        primary_key: List[str],
+        create_partitions: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Recreate the messages table from the current one and reapply the model's keys and indexes."""
+        table = Message.__tablename__
+        previous = f"{table}_previous"
+        columns = ", ".join(column.name for column in Message.__table__.columns)
+        sequence = connection.execute(text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+
+        connection.execute(text(f"ALTER TABLE {table} RENAME TO {previous}"))
+        connection.execute(text(
+            f"CREATE TABLE {table} (LIKE {previous} INCLUDING DEFAULTS INCLUDING COMMENTS) {partition_clause}"
+        ))
+        if create_partitions:
+            create_partitions()
+        connection.execute(text(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {previous}"))
+
+        # Keep the id sequence alive when the previous table (and its indexes) are dropped
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+        connection.execute(text(f"DROP TABLE {previous}"))
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+        # Unique keys of a partitioned table must include the partition key
+        connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(primary_key)})"))
+        for foreign_key in Message.__table__.foreign_key_constraints:
+            connection.execute(AddConstraint(foreign_key))
+        for index in Message.__table__.indexes:
+            connection.execute(CreateIndex(index))
+
+    def maintain(self, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """
+        Create upcoming partitions and detach (or drop) expired ones.
+
+        Args:
+            now: Current time (defaults to the current time)
+
+        Returns:
+            Dict[str, List[str]]: Names of the created, detached and dropped partitions
+        """
+        now = now or datetime.now(timezone.utc)
+        result: Dict[str, List[str]] = {"created": [], "detached": [], "dropped": []}
+        db = self.session_factory()
+        try:
+            connection = db.connection()
+            if connection.dialect.name != "postgresql":
+                return result
+            if _relkind(connection) != "p":
+                self.logger.warning(
+                    "Messages table is not partitioned; rerun migration 0003_partition_messages "
+                    "with PARTITION_ENABLED=true to convert it."
+                )
+                return result
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+            to_create, to_detach = self.plan(self.list_partitions(connection), now)
+            for start, end in to_create:
+                result["created"].append(self.create_partition(connection, start, end))
+            for partition in to_detach:
+                connection.execute(text(f"ALTER TABLE {Message.__tablename__} DETACH PARTITION {partition.name}"))
+                result["detached"].append(partition.name)
+                if self.drop_detached:
+                    connection.execute(text(f"DROP TABLE {partition.name}"))
+                    result["dropped"].append(partition.name)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if any(result.values()):
+            self.logger.info(
+                log_database_operation("maintain_partitions", Message.__tablename__),
+                **result
+            )
+        return result
+
+
+_partition_manager: Optional[PartitionManager] = None
+
+
+def get_partition_manager() -> PartitionManager:
+    """Get the process-wide partition manager."""
+    global _partition_manager
+    if _partition_manager is None:
+        _partition_manager = PartitionManager()
+    return _partition_manager
@@ -0,0 +1,218 @@
+"""
+Tel-Insights Rate Limiting
+
+Token buckets used to keep a process, or several processes on one host,
+within an external API's request budget while worker threads share it.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from shared.logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so no file-shared buckets
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# Whether FileTokenBucket can be used on this platform
+FILE_BUCKETS_SUPPORTED = fcntl is not None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate`` tokens per second.
+
+    ``capacity`` bounds the burst size. Callers block in ``acquire`` until
+    enough tokens are available, so N worker threads sharing one bucket are
+    collectively held to the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Initialize the token bucket. The bucket starts full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (defaults to one second's worth, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update. Caller holds the lock."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _take(self, tokens: float) -> float:
+        """
+        Take tokens if available.
+
+        Returns:
+            float: 0.0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def set_rate(self, rate: float) -> None:
+        """
+        Change the refill rate, keeping the tokens accrued so far.
+
+        Args:
+            rate: New tokens added per second
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """
+        Seconds until ``tokens`` would be available, without taking them.
+
+        Args:
+            tokens: Number of tokens wanted
+
+        Returns:
+            float: 0.0 if available now
+        """
+        return max(0.0, (tokens - self.available) / self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens without waiting.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            bool: True if the tokens were taken
+        """
+        return self._take(tokens) == 0.0
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens, waiting until they are available.
+
+        Args:
+            tokens: Number of tokens to take (must not exceed capacity)
+            timeout: Maximum seconds to wait (None to wait indefinitely)
+
+        Returns:
+            bool: True if the tokens were taken, False if the timeout expired
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a small file guarded by ``flock``.
+
+    Every process on the host that opens the same path draws from one shared
+    budget. Wall-clock time is used for refills since monotonic clocks are
+    not comparable across processes.
+    """
+
+    def __init__(self, path: str, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Initialize the shared bucket, creating the state file if needed.
+
+        Args:
+            path: State file shared by all participating processes
+            rate: Tokens added per second
+            capacity: Maximum tokens held (defaults to one second's worth, at least 1)
+
+        Raises:
+            NotImplementedError: On platforms without ``fcntl`` (Windows)
+        """
+        if not FILE_BUCKETS_SUPPORTED:
+            raise NotImplementedError("File-shared token buckets need fcntl, which is not available on this platform")
+        super().__init__(rate, capacity)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        logger.info("Using file-shared token bucket.", path=path, rate=rate, capacity=self.capacity)
+
+    def _update(self, tokens: float, take: bool) -> float:
+        """
+        Refill the shared state and optionally take tokens, under the file lock.
+
+        Returns:
+            float: Tokens available after the refill (before taking)
+        """
+        with self._lock, open(self.path, "a+") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                try:
+                    state = json.loads(state_file.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = time.time()
+                available = min(
+                    self.capacity,
+                    state.get("tokens", self.capacity) + max(0.0, now - state.get("updated_at", now)) * self.rate
+                )
+                remaining = available - tokens if take and available >= tokens else available
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(json.dumps({"tokens": remaining, "updated_at": now}))
+                state_file.flush()
+                return available
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def _take(self, tokens: float) -> float:
+        available = self._update(tokens, take=True)
+        if available >= tokens:
+            return 0.0
+        return (tokens - available) / self.rate
+
+    def set_rate(self, rate: float) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._update(0.0, take=False)
+        self.rate = rate
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available in the shared budget."""
+        return self._update(0.0, take=False)
@@ -0,0 +1,493 @@
+"""
+Tel-Insights Metadata Rollups
+
+Time-bucketed counts of the topics, keywords, channels and sentiment of
+analyzed messages, maintained incrementally as analyses are stored. Trend,
+summary and alert queries read a few hundred buckets instead of loading
+every message in their time window: a range is served from hour buckets for
+its whole hours and minute buckets for its edges. As buckets age, minute
+buckets are dropped and hour buckets are compacted into day buckets.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, and_, delete, func, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .config import get_settings
+from .database import get_db_session
+from .logging import LoggingMixin, get_logger, log_database_operation
+from .models import Message, MetadataRollup
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+DIMENSIONS = ("topic", "keyword", "channel", "total")
+
+MINUTE = timedelta(minutes=1)
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+# Granularities written for every analyzed message; day buckets come from compaction
+_LIVE_GRANULARITIES = (("minute", MINUTE), ("hour", HOUR))
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Rows per upsert statement
+_UPSERT_CHUNK = 1000
+
+# pg_advisory_xact_lock key serializing compaction and backfill across replicas
+_ADVISORY_LOCK_KEY = 0x7E1_0002
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _utc(value: datetime) -> datetime:
+    """Attach UTC to naive timestamps (SQLite drops the timezone)."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def floor_time(value: datetime, size: timedelta) -> datetime:
+    """Round a timestamp down to a bucket boundary."""
+    value = _utc(value)
+    return value - (value - _EPOCH) % size
+
+
+def ceil_time(value: datetime, size: timedelta) -> datetime:
+    """Round a timestamp up to a bucket boundary."""
+    floored = floor_time(value, size)
+    return floored if floored == _utc(value) else floored + size
+
+
+def is_final_analysis(ai_metadata: Optional[Dict[str, Any]]) -> bool:
+    """Whether metadata is a stored analysis counted in rollups, i.e. not missing or provisional."""
+    return bool(ai_metadata) and not ai_metadata.get('provisional')
+
+
+def rollup_deltas(
+    channel_id: Any,
+    message_timestamp: datetime,
+    ai_metadata: Dict[str, Any],
+    sign: int = 1
+) -> Counter:
+    """
+    Get the bucket increments for one analyzed message.
+
+    Args:
+        channel_id: Channel of the message
+        message_timestamp: Message timestamp
+        ai_metadata: Analysis metadata
+        sign: 1 to count the message, -1 to uncount it
+
+    Returns:
+        Counter: Increment per rollup key
+    """
+    sentiment = str(ai_metadata.get('sentiment') or 'neutral')[:16]
+    values = {("total", ""), ("channel", str(channel_id))}
+    values.update(
+        ("topic", topic.lower().strip()[:255]) for topic in ai_metadata.get('topics') or []
+        if isinstance(topic, str) and topic.strip()
+    )
+    values.update(
+        ("keyword", keyword.lower().strip()[:255]) for keyword in ai_metadata.get('keywords') or []
+        if isinstance(keyword, str) and keyword.strip()
+    )
+
+    deltas: Counter = Counter()
+    for granularity, size in _LIVE_GRANULARITIES:
+        bucket_start = floor_time(message_timestamp, size)
+        for dimension, value in values:
+            deltas[(granularity, bucket_start, dimension, value, sentiment)] += sign
+    return deltas
+
+
+class MetadataRollups(LoggingMixin):
+    """
+    Maintains and queries the ``metadata_rollups`` buckets.
+
+    ``record`` is called in the transaction that stores an analysis, so the
+    counts commit or roll back with it; a re-analysis subtracts the counts
+    of the analysis it replaces.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = get_db_session,
+        minute_retention_hours: Optional[int] = None,
+        hour_retention_days: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the rollups.
+
+        Args:
+            session_factory: Callable returning a new synchronous session
+            minute_retention_hours: Minute bucket retention (defaults to ROLLUP_MINUTE_RETENTION_HOURS)
+            hour_retention_days: Hour bucket retention (defaults to ROLLUP_HOUR_RETENTION_DAYS)
+        """
+        self.session_factory = session_factory
+        self.minute_retention = timedelta(hours=minute_retention_hours or settings.rollups.minute_retention_hours)
+        self.hour_retention = timedelta(days=hour_retention_days or settings.rollups.hour_retention_days)
+
+    def record(
+        self,
+        db: Session,
+        channel_id: Any,
+        message_timestamp: Optional[datetime],
+        ai_metadata: Dict[str, Any],
+        previous: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Count a stored analysis in the caller's transaction.
+
+        Args:
+            db: Session storing the analysis
+            channel_id: Channel of the message
+            message_timestamp: Message timestamp
+            ai_metadata: New analysis metadata
+            previous: Metadata the analysis replaces, uncounted if it was counted
+        """
+        if message_timestamp is None:
+            return
+        deltas: Counter = Counter()
+        if is_final_analysis(previous):
+            deltas.update(rollup_deltas(channel_id, message_timestamp, previous, sign=-1))
+        if is_final_analysis(ai_metadata):
+            deltas.update(rollup_deltas(channel_id, message_timestamp, ai_metadata))
+        self._apply(db, deltas)
+
+    def _apply(self, db: Session, deltas: Counter) -> None:
+        """Add increments to their buckets, in key order so concurrent writers lock rows consistently."""
+        rows = [
+            {
+                "granularity": granularity,
+                "bucket_start": bucket_start,
+                "dimension": dimension,
+                "value": value,
+                "sentiment": sentiment,
+                "message_count": delta,
+            }
+            for (granularity, bucket_start, dimension, value, sentiment), delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+        dialect_name = db.bind.dialect.name
+        try:
+            insert = _DIALECT_INSERTS[dialect_name]
+        except KeyError:
+            raise NotImplementedError(f"Metadata rollups are not supported on dialect '{dialect_name}'")
+        for start in range(0, len(rows), _UPSERT_CHUNK):
+            statement = insert(MetadataRollup).values(rows[start:start + _UPSERT_CHUNK])
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["granularity", "bucket_start", "dimension", "value", "sentiment"],
+                set_={"message_count": MetadataRollup.message_count + statement.excluded.message_count}
+            ))
+
+    def plan(
+        self,
+        start: datetime,
+        end: datetime,
+        now: Optional[datetime] = None
+    ) -> List[Tuple[str, datetime, datetime]]:
+        """
+        Choose the buckets covering a time range.
+
+        Whole hours are read from hour buckets and the edges from minute
+        buckets. Where finer buckets were already compacted, the range is
+        widened to the enclosing coarser bucket.
+
+        Args:
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            now: Current time for the retention cut-offs (defaults to the current time)
+
+        Returns:
+            List[Tuple[str, datetime, datetime]]: Granularity and bucket start range of each segment
+        """
+        now = _utc(now or datetime.now(timezone.utc))
+        start, end = _utc(start), _utc(end)
+        minutes_since = floor_time(now - self.minute_retention, HOUR)
+        hours_since = floor_time(now - self.hour_retention, DAY)
+        segments: List[Tuple[str, datetime, datetime]] = []
+
+        cursor = start
+        if cursor < hours_since:
+            day_end = min(end, hours_since)
+            segments.append(("day", floor_time(cursor, DAY), day_end))
+            cursor = day_end
+        if cursor >= end:
+            return segments
+
+        hour_start = ceil_time(cursor, HOUR) if cursor >= minutes_since else floor_time(cursor, HOUR)
+        hour_end = floor_time(end, HOUR)
+        if hour_start < hour_end:
+            if cursor < hour_start:
+                segments.append(("minute", floor_time(cursor, MINUTE), hour_start))
+            segments.append(("hour", hour_start, hour_end))
+            cursor = hour_end
+        if cursor < end:
+            if cursor >= minutes_since:
+                segments.append(("minute", floor_time(cursor, MINUTE), end))
+            else:
+                segments.append(("hour", floor_time(cursor, HOUR), end))
+        return segments
+
+    def _counts_query(
+        self,
+        start: datetime,
+        end: datetime,
+        dimensions: List[str],
+        sentiment: Optional[str],
+        values: Optional[Iterable[str]],
+        now: Optional[datetime]
+    ) -> Tuple[Optional[Select], int]:
+        """Build the grouped bucket query of ``counts``; None if the range is empty."""
+        segments = self.plan(start, end, now)
+        if not segments:
+            return None, 0
+
+        filters = [
+            MetadataRollup.dimension.in_(dimensions),
+            or_(*[
+                and_(
+                    MetadataRollup.granularity == granularity,
+                    MetadataRollup.bucket_start >= lo,
+                    MetadataRollup.bucket_start < hi
+                )
+                for granularity, lo, hi in segments
+            ]),
+        ]
+        if sentiment:
+            filters.append(MetadataRollup.sentiment == sentiment)
+        if values is not None:
+            filters.append(MetadataRollup.value.in_([str(value).lower() for value in values]))
+
+        query = select(
+            MetadataRollup.dimension,
+            MetadataRollup.value,
+            MetadataRollup.sentiment,
+            func.sum(MetadataRollup.message_count)
+        ).where(*filters).group_by(
+            MetadataRollup.dimension, MetadataRollup.value, MetadataRollup.sentiment
+        )
+        return query, len(segments)
+
+    def _collect_counts(
+        self,
+        rows: List[Any],
+        dimensions: List[str],
+        segments: int
+    ) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Nest grouped bucket rows as count per sentiment per value per dimension."""
+        result: Dict[str, Dict[str, Dict[str, int]]] = {dimension: {} for dimension in dimensions}
+        for dimension, value, row_sentiment, count in rows:
+            if count:
+                result[dimension].setdefault(value, {})[row_sentiment] = int(count)
+        self.logger.debug(
+            log_database_operation("read_rollups", MetadataRollup.__tablename__, segments=segments),
+            dimensions=dimensions,
+            rows=len(rows)
+        )
+        return result
+
+    def counts(
+        self,
+        start: datetime,
+        end: datetime,
+        dimensions: Iterable[str] = ("topic",),
+        sentiment: Optional[str] = None,
+        values: Optional[Iterable[str]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        Count messages per dimension value and sentiment in a time range.
+
+        Args:
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            dimensions: Dimensions to read
+            sentiment: Only count messages with this sentiment
+            values: Only read these dimension values
+            now: Current time for the retention cut-offs (defaults to the current time)
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, int]]]: Count per sentiment per value per dimension
+        """
+        dimensions = list(dimensions)
+        query, segments = self._counts_query(start, end, dimensions, sentiment, values, now)
+        rows = []
+        if query is not None:
+            db = self.session_factory()
+            try:
+                rows = db.execute(query).all()
+            finally:
+                db.close()
+        return self._collect_counts(rows, dimensions, segments)
+
+    async def counts_async(
+        self,
+        db: AsyncSession,
+        start: datetime,
+        end: datetime,
+        dimensions: Iterable[str] = ("topic",),
+        sentiment: Optional[str] = None,
+        values: Optional[Iterable[str]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        Count messages per dimension value and sentiment in a time range on an async session.
+
+        Args:
+            db: Async database session
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            dimensions: Dimensions to read
+            sentiment: Only count messages with this sentiment
+            values: Only read these dimension values
+            now: Current time for the retention cut-offs (defaults to the current time)
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, int]]]: Count per sentiment per value per dimension
+        """
+        dimensions = list(dimensions)
+        query, segments = self._counts_query(start, end, dimensions, sentiment, values, now)
+        rows = (await db.execute(query)).all() if query is not None else []
+        return self._collect_counts(rows, dimensions, segments)
+
+    @staticmethod
+    def _lock(db: Session) -> None:
+        """Serialize compaction and backfill across replicas for the rest of the transaction (PostgreSQL)."""
+        if db.bind.dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Drop expired minute buckets and fold expired hour buckets into day buckets.
+
+        Args:
+            now: Current time (defaults to the current time)
+
+        Returns:
+            Dict[str, int]: Minute and hour buckets removed
+        """
+        now = _utc(now or datetime.now(timezone.utc))
+        minutes_before = floor_time(now - self.minute_retention, HOUR)
+        hours_before = floor_time(now - self.hour_retention, DAY)
+
+        db = self.session_factory()
+        try:
+            self._lock(db)
+            minutes_removed = db.query(MetadataRollup).filter(
+                MetadataRollup.granularity == "minute",
+                MetadataRollup.bucket_start < minutes_before
+            ).delete(synchronize_session=False)
+
+            # Fold only the rows this transaction deleted, so a concurrent run cannot count them twice
+            expired_hours = db.execute(
+                delete(MetadataRollup).where(
+                    MetadataRollup.granularity == "hour",
+                    MetadataRollup.bucket_start < hours_before
+                ).returning(
+                    MetadataRollup.bucket_start,
+                    MetadataRollup.dimension,
+                    MetadataRollup.value,
+                    MetadataRollup.sentiment,
+                    MetadataRollup.message_count
+                )
+            ).all()
+            days: Counter = Counter()
+            for bucket_start, dimension, value, sentiment, message_count in expired_hours:
+                days[("day", floor_time(bucket_start, DAY), dimension, value, sentiment)] += message_count
+            hours_removed = len(expired_hours)
+            self._apply(db, days)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.logger.info(
+            log_database_operation("compact_rollups", MetadataRollup.__tablename__),
+            minute_buckets_removed=minutes_removed,
+            hour_buckets_compacted=hours_removed,
+            day_buckets_updated=len(days)
+        )
+        return {"minute_buckets_removed": minutes_removed, "hour_buckets_compacted": hours_removed}
+
+    def is_empty(self) -> bool:
+        """Whether no buckets have been written yet, e.g. right after the table was created."""
+        db = self.session_factory()
+        try:
+            return db.query(MetadataRollup.granularity).first() is None
+        finally:
+            db.close()
+
+    def backfill(self, since: datetime) -> int:
+        """
+        Recount minute and hour buckets from the stored analyses of messages since a time.
+
+        Used once after deployment, or to repair the counts.
+
+        Args:
+            since: Start of the recount, rounded down to the hour
+
+        Returns:
+            int: Messages counted
+        """
+        since = floor_time(since, HOUR)
+        db = self.session_factory()
+        try:
+            self._lock(db)
+            db.query(MetadataRollup).filter(
+                MetadataRollup.granularity.in_([granularity for granularity, _ in _LIVE_GRANULARITIES]),
+                MetadataRollup.bucket_start >= since
+            ).delete(synchronize_session=False)
+
+            deltas: Counter = Counter()
+            counted = 0
+            rows = db.query(Message.channel_id, Message.message_timestamp, Message.ai_metadata).filter(
+                Message.message_timestamp >= since,
+                Message.ai_metadata.isnot(None)
+            ).yield_per(_UPSERT_CHUNK)
+            for channel_id, message_timestamp, ai_metadata in rows:
+                if is_final_analysis(ai_metadata):
+                    deltas.update(rollup_deltas(channel_id, message_timestamp, ai_metadata))
+                    counted += 1
+            self._apply(db, deltas)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.logger.info(
+            log_database_operation("backfill_rollups", MetadataRollup.__tablename__, since=since.isoformat()),
+            messages=counted,
+            buckets=len(deltas)
+        )
+        return counted
+
+
+def total_count(counts: Dict[str, Dict[str, int]]) -> int:
+    """Sum the per-sentiment counts of every value of a dimension."""
+    return sum(sum(by_sentiment.values()) for by_sentiment in counts.values())
+
+
+_metadata_rollups: Optional[MetadataRollups] = None
+
+
+def get_metadata_rollups() -> MetadataRollups:
+    """Get the process-wide metadata rollups."""
+    global _metadata_rollups
+    if _metadata_rollups is None:
+        _metadata_rollups = MetadataRollups()
+    return _metadata_rollups
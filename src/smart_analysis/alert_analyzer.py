@@ -9,13 +9,26 @@ import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import and_, func, text
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from shared.config import get_settings
 from shared.database import get_sync_db
-from shared.logging import LoggingMixin, get_logger
-from shared.models import AlertConfig, Message, User
+from shared.logging import LoggingMixin, get_logger, log_alert_triggered, log_database_operation, log_function_call
+from shared.models import (
+    AlertConfig,
+    Message,
+    User,
+    metadata_analyzed_filter,
+    metadata_keywords_filter,
+    metadata_sentiment_filter,
+    metadata_topics_filter,
+)
+from shared.rollups import MetadataRollups, get_metadata_rollups, total_count
+
+from .alert_state import AlertStateStore, get_alert_state_store
+from .trends_engine import TopicAggregate, get_trends_engine
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -26,9 +39,17 @@ class AlertAnalyzer(LoggingMixin):
     Analyzes messages and triggers alerts based on frequency and criteria.
     """
     
-    def __init__(self):
-        """Initialize the alert analyzer."""
-        self.last_check_time = {}  # Track last check per alert config
+    def __init__(self, alert_state: Optional[AlertStateStore] = None, rollups: Optional[MetadataRollups] = None):
+        """
+        Initialize the alert analyzer.
+        
+        Args:
+            alert_state: Durable alert cooldowns (defaults to the process-wide store)
+            rollups: Time-bucketed metadata counts (defaults to the process-wide rollups if enabled)
+        """
+        self.alert_state = alert_state or get_alert_state_store()
+        self.rollups = rollups or (get_metadata_rollups() if settings.rollups.enabled else None)
+        self.trends_engine = get_trends_engine()
         self.logger.info("AlertAnalyzer initialized.") # Added period
     
     def check_frequency_alerts(self) -> List[Dict[str, Any]]:
@@ -157,9 +178,8 @@ class AlertAnalyzer(LoggingMixin):
             window_minutes=window_minutes
         )
         
-        # Check cooldown period
-        config_key = f"freq_{config.id}" # Used for last_check_time
-        last_triggered_time = self.last_check_time.get(config_key) # Renamed for clarity
+        # Check cooldown period, shared with other replicas and kept across restarts
+        last_triggered_time = self.alert_state.last_triggered([config.id]).get(config.id)
         cooldown_minutes = settings.alerts.cooldown_minutes
         
         if last_triggered_time and (now - last_triggered_time).total_seconds() < (cooldown_minutes * 60):
@@ -172,6 +192,23 @@ class AlertAnalyzer(LoggingMixin):
             )
             return []
         
+        # Rollup counts bound the match count from above; skip the message scan when they cannot reach the threshold
+        if self.rollups and (topics or sentiment_filter):
+            if topics:
+                bound = total_count(self.rollups.counts(
+                    window_start, now, ("topic",), sentiment=sentiment_filter, values=topics
+                )["topic"])
+            else:
+                bound = total_count(self.rollups.counts(window_start, now, ("total",), sentiment=sentiment_filter)["total"])
+            if bound < threshold:
+                self.logger.debug(
+                    "Rollup counts below threshold, skipping message count.",
+                    config_id=config.id,
+                    rollup_bound=bound,
+                    threshold=threshold
+                )
+                return []
+        
         # Build query for messages in time window
         query_filters = [
             Message.message_timestamp >= window_start,
@@ -179,29 +216,20 @@ class AlertAnalyzer(LoggingMixin):
             Message.ai_metadata.isnot(None) # Ensure AI metadata exists for filtering
         ]
         
-        # Apply keyword filters
+        # Apply keyword filters: AI metadata keywords (?| on the keywords GIN index) or message text
         if keywords:
-            keyword_conditions = []
+            keyword_conditions = [metadata_keywords_filter(keywords)]
             for keyword in keywords:
-                # Search in AI metadata keywords and message text
-                keyword_conditions.append(Message.ai_metadata['keywords'].astext.contains(f'"{keyword.lower()}"'))
                 keyword_conditions.append(func.lower(Message.message_text).contains(keyword.lower()))
-            
-            from sqlalchemy import or_ # Import locally if not already at top
-            if keyword_conditions: query_filters.append(or_(*keyword_conditions))
+            query_filters.append(or_(*keyword_conditions))
         
-        # Apply topic filters
+        # Apply topic filters (@> containment on the ai_metadata GIN index)
         if topics:
-            topic_conditions = []
-            for topic in topics:
-                topic_conditions.append(Message.ai_metadata['topics'].astext.contains(f'"{topic.lower()}"'))
-            
-            from sqlalchemy import or_ # Import locally
-            if topic_conditions: query_filters.append(or_(*topic_conditions))
+            query_filters.append(metadata_topics_filter(topics))
         
-        # Apply sentiment filter
+        # Apply sentiment filter (sentiment/timestamp expression index)
         if sentiment_filter: # Use the renamed variable
-            query_filters.append(Message.ai_metadata['sentiment'].astext == sentiment_filter)
+            query_filters.append(metadata_sentiment_filter(sentiment_filter))
 
         self.logger.debug(
             log_database_operation("count_messages", Message.__tablename__),
@@ -230,9 +258,10 @@ class AlertAnalyzer(LoggingMixin):
                 f"Threshold exceeded for alert config {config.id} ({config.config_name}). Triggering alert.",
                 message_count=message_count, threshold=threshold
             )
-            # Update last check time to manage cooldown
-            self.last_check_time[config_key] = now
-            self.logger.debug(f"Updated last_check_time for config {config.id} to {now.isoformat()}", config_key=config_key)
+            # Start the cooldown; another replica may have fired the same alert first
+            if not self.alert_state.try_fire(config.id, message_count, cooldown_minutes * 60, fenced=False, now=now):
+                self.logger.info("Alert already fired by another replica, skipping.", config_id=config.id)
+                return []
             
             # Get sample messages for context - use the same filters
             self.logger.debug(log_database_operation("query_sample_messages", Message.__tablename__), config_id=config.id)
@@ -309,66 +338,13 @@ class AlertAnalyzer(LoggingMixin):
             window_start = now - timedelta(hours=hours)
             self.logger.debug(f"Time window for topic trends: {window_start.isoformat()} to {now.isoformat()}")
             
-            # Query messages with AI metadata
-            self.logger.debug(
-                log_database_operation("query_messages_for_trends", Message.__tablename__),
-                time_window_start=window_start.isoformat()
-            )
-            messages = db.query(Message).filter(
-                Message.message_timestamp >= window_start,
-                Message.ai_metadata.isnot(None) # Ensure messages have AI metadata
-            ).all()
-            self.logger.info(f"Retrieved {len(messages)} messages for topic trend analysis.")
+            if self.rollups:
+                counts = self.rollups.counts(window_start, now, ("topic", "total"))
+                return self._topic_trends_from_rollups(counts, hours)
             
-            if not messages:
-                self.logger.info("No messages with AI metadata found for trend analysis in the time window.")
-                return []
-
-            # Count topics
-            topic_counts = {}
-            sentiment_by_topic = {}
-            
-            for message in messages:
-                ai_metadata = message.ai_metadata # Already checked for isnot(None)
-                
-                current_topics = ai_metadata.get('topics', [])
-                sentiment = ai_metadata.get('sentiment', 'neutral')
-                
-                for topic_item in current_topics: # Renamed to avoid conflict
-                    topic_item = topic_item.lower().strip()
-                    if not topic_item:
-                        continue
-                    
-                    topic_counts[topic_item] = topic_counts.get(topic_item, 0) + 1
-                    
-                    if topic_item not in sentiment_by_topic:
-                        sentiment_by_topic[topic_item] = {'positive': 0, 'negative': 0, 'neutral': 0}
-                    
-                    sentiment_by_topic[topic_item][sentiment] = sentiment_by_topic[topic_item].get(sentiment, 0) + 1
-            
-            self.logger.debug(f"Identified {len(topic_counts)} unique topics before sorting/filtering.")
-            # Sort topics by frequency
-            sorted_topics = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)
-            
-            trends_result = [] # Renamed
-            for topic_name, count_val in sorted_topics[:20]:  # Top 20 topics
-                sentiment_data = sentiment_by_topic.get(topic_name, {})
-                
-                trend_item = { # Renamed
-                    'topic': topic_name,
-                    'message_count': count_val,
-                    'sentiment_breakdown': sentiment_data,
-                    'dominant_sentiment': max(sentiment_data.items(), key=lambda x: x[1])[0] if sentiment_data else 'neutral',
-                    'sentiment_score': sentiment_data.get('positive', 0) - sentiment_data.get('negative', 0)
-                }
-                trends_result.append(trend_item)
-            
-            self.logger.info(
-                f"Topic trend analysis completed. Returning {len(trends_result)} trends.",
-                requested_hours=hours,
-                total_messages_analyzed=len(messages)
-            )
-            return trends_result
+            # Without rollups: aggregate topics and sentiment in the database
+            aggregate = self.trends_engine.aggregate(db, window_start, now)
+            return self._topic_trends_from_aggregate(aggregate, hours)
 
         except Exception as e:
             self.logger.error("Error during topic trend analysis.", error=str(e), exc_info=True)
@@ -376,6 +352,94 @@ class AlertAnalyzer(LoggingMixin):
         finally:
             db.close()
     
+    async def check_topic_trends_async(self, db: AsyncSession, hours: int = 24) -> List[Dict[str, Any]]:
+        """
+        Analyze topic trends over the specified time period on an async session.
+        
+        Unlike ``check_topic_trends``, errors are raised to the caller.
+        
+        Args:
+            db: Async database session
+            hours: Number of hours to analyze
+            
+        Returns:
+            List[Dict[str, Any]]: Topic trend analysis
+        """
+        self.logger.info(log_function_call("check_topic_trends_async", requested_hours=hours))
+        now = datetime.now(timezone.utc)
+        window_start = now - timedelta(hours=hours)
+        if self.rollups:
+            counts = await self.rollups.counts_async(db, window_start, now, ("topic", "total"))
+            return self._topic_trends_from_rollups(counts, hours)
+        aggregate = await self.trends_engine.aggregate_async(db, window_start, now)
+        return self._topic_trends_from_aggregate(aggregate, hours)
+    
+    def _topic_trends_from_rollups(self, counts: Dict[str, Dict[str, Dict[str, int]]], hours: int) -> List[Dict[str, Any]]:
+        """Rank topics from rollup counts."""
+        sentiment_by_topic = {
+            topic_name: {'positive': 0, 'negative': 0, 'neutral': 0, **by_sentiment}
+            for topic_name, by_sentiment in counts["topic"].items()
+        }
+        topic_counts = {topic_name: sum(by_sentiment.values()) for topic_name, by_sentiment in counts["topic"].items()}
+        return self._build_topic_trends(topic_counts, sentiment_by_topic, hours, total_count(counts["total"]))
+    
+    def _topic_trends_from_aggregate(self, aggregate: TopicAggregate, hours: int) -> List[Dict[str, Any]]:
+        """Rank topics from aggregated message counts."""
+        self.logger.info(f"Aggregated {aggregate.total_messages} messages for topic trend analysis.")
+        
+        if not aggregate.total_messages:
+            self.logger.info("No messages with AI metadata found for trend analysis in the time window.")
+            return []
+        
+        sentiment_by_topic = {
+            topic_name: {'positive': 0, 'negative': 0, 'neutral': 0, **by_sentiment}
+            for topic_name, by_sentiment in aggregate.topics.items()
+        }
+        return self._build_topic_trends(aggregate.topic_counts(), sentiment_by_topic, hours, aggregate.total_messages)
+    
+    def _build_topic_trends(
+        self,
+        topic_counts: Dict[str, int],
+        sentiment_by_topic: Dict[str, Dict[str, int]],
+        hours: int,
+        total_messages: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank topics by message count.
+        
+        Args:
+            topic_counts: Messages per topic
+            sentiment_by_topic: Messages per sentiment per topic
+            hours: Analyzed time period
+            total_messages: Messages in the time period
+            
+        Returns:
+            List[Dict[str, Any]]: Top 20 topic trends
+        """
+        self.logger.debug(f"Identified {len(topic_counts)} unique topics before sorting/filtering.")
+        # Sort topics by frequency
+        sorted_topics = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)
+        
+        trends_result = [] # Renamed
+        for topic_name, count_val in sorted_topics[:20]:  # Top 20 topics
+            sentiment_data = sentiment_by_topic.get(topic_name, {})
+            
+            trend_item = { # Renamed
+                'topic': topic_name,
+                'message_count': count_val,
+                'sentiment_breakdown': sentiment_data,
+                'dominant_sentiment': max(sentiment_data.items(), key=lambda x: x[1])[0] if sentiment_data else 'neutral',
+                'sentiment_score': sentiment_data.get('positive', 0) - sentiment_data.get('negative', 0)
+            }
+            trends_result.append(trend_item)
+        
+        self.logger.info(
+            f"Topic trend analysis completed. Returning {len(trends_result)} trends.",
+            requested_hours=hours,
+            total_messages_analyzed=total_messages
+        )
+        return trends_result
+    
     def get_recent_summary(self, hours: int = 1, topics: List[str] = None) -> Dict[str, Any]:
         """
         Get a summary of recent news activity.
@@ -396,23 +460,39 @@ class AlertAnalyzer(LoggingMixin):
             window_start = now - timedelta(hours=hours)
             self.logger.debug(f"Time window for summary: {window_start.isoformat()} to {now.isoformat()}")
             
+            # Without a topic filter, counts come from the rollups or are aggregated in the
+            # database; neither can tell which topics co-occur, so a topic filter still scans messages
+            if self.rollups and not topics:
+                counts = self.rollups.counts(window_start, now, ("topic", "total"))
+                return self._build_summary(
+                    hours,
+                    total_count(counts["total"]),
+                    {'positive': 0, 'negative': 0, 'neutral': 0, **counts["total"].get("", {})},
+                    {topic_name: sum(by_sentiment.values()) for topic_name, by_sentiment in counts["topic"].items()},
+                    topics,
+                    now
+                )
+            if not topics:
+                aggregate = self.trends_engine.aggregate(db, window_start, now)
+                return self._build_summary(
+                    hours,
+                    aggregate.total_messages,
+                    {'positive': 0, 'negative': 0, 'neutral': 0, **aggregate.sentiments},
+                    aggregate.topic_counts(),
+                    topics,
+                    now
+                )
+            
             # Build base query
             query_filters_summary = [ # Renamed
                 Message.message_timestamp >= window_start,
-                Message.ai_metadata.isnot(None)
+                metadata_analyzed_filter(db.bind.dialect.name) # Provisional ingest metadata has no sentiment yet
             ]
             
             # Apply topic filter if specified
             if topics:
                 self.logger.debug(f"Applying topic filter for summary: {topics}")
-                topic_conditions_summary = [] # Renamed
-                for topic_filter_item in topics: # Renamed
-                    topic_conditions_summary.append(
-                        Message.ai_metadata['topics'].astext.contains(f'"{topic_filter_item.lower()}"')
-                    )
-                
-                from sqlalchemy import or_ # Import locally
-                if topic_conditions_summary: query_filters_summary.append(or_(*topic_conditions_summary))
+                query_filters_summary.append(metadata_topics_filter(topics))
             
             self.logger.debug(
                 log_database_operation("query_messages_for_summary", Message.__tablename__),
@@ -421,19 +501,6 @@ class AlertAnalyzer(LoggingMixin):
             messages_for_summary = db.query(Message).filter(and_(*query_filters_summary)).all() # Renamed
             self.logger.info(f"Retrieved {len(messages_for_summary)} messages for summary generation.")
             
-            if not messages_for_summary:
-                 self.logger.info("No messages found for summary in the time window with specified filters.")
-                 return { # Return a structured empty-like response
-                    'time_window_hours': hours,
-                    'total_messages': 0,
-                    'sentiment_breakdown': {'positive': 0, 'negative': 0, 'neutral': 0},
-                    'top_topics': {},
-                    'summary_text': "No relevant messages found to generate a summary.",
-                    'generated_at': now.isoformat(),
-                    'filter_topics': topics
-                }
-
-            # Analyze messages
             total_messages_analyzed = len(messages_for_summary) # Renamed
             sentiment_counts_summary = {'positive': 0, 'negative': 0, 'neutral': 0} # Renamed
             top_topics_summary = {} # Renamed
@@ -448,38 +515,84 @@ class AlertAnalyzer(LoggingMixin):
                     topic_name = topic_name.lower().strip()
                     if topic_name: top_topics_summary[topic_name] = top_topics_summary.get(topic_name, 0) + 1
             
-            # Sort topics
-            sorted_top_topics = dict(sorted(top_topics_summary.items(), key=lambda x: x[1], reverse=True)[:10]) # Renamed
-            
-            # Basic summary text (can be improved with LLM later if needed)
-            summary_text_gen = f"Summary of {total_messages_analyzed} messages in the last {hours} hours. "
-            if sorted_top_topics:
-                summary_text_gen += f"Key topics include: {', '.join(list(sorted_top_topics.keys())[:3])}. "
-            dominant_sentiment_gen = max(sentiment_counts_summary, key=sentiment_counts_summary.get)
-            summary_text_gen += f"Overall sentiment appears {dominant_sentiment_gen}."
-
-
-            summary_result = { # Renamed
-                'time_window_hours': hours,
-                'total_messages': total_messages_analyzed,
-                'sentiment_breakdown': sentiment_counts_summary,
-                'top_topics': sorted_top_topics, # Store the dict
-                'summary_text': summary_text_gen, # Added a generated summary text
-                'generated_at': now.isoformat(),
-                'filter_topics': topics
-            }
+            # Messages of archived days in long windows
+            archived = self.trends_engine.aggregate_archive(window_start, now, topics)
+            total_messages_analyzed += archived.total_messages
+            for sentiment, count in archived.sentiments.items():
+                sentiment_counts_summary[sentiment] = sentiment_counts_summary.get(sentiment, 0) + count
+            for topic_name, count in archived.topic_counts().items():
+                top_topics_summary[topic_name] = top_topics_summary.get(topic_name, 0) + count
             
-            self.logger.info(
-                "Recent news summary generated successfully.",
-                requested_hours=hours,
-                messages_analyzed=total_messages_analyzed,
-                topics_found=len(sorted_top_topics),
-                filter_topics=topics
+            return self._build_summary(
+                hours, total_messages_analyzed, sentiment_counts_summary, top_topics_summary, topics, now
             )
-            return summary_result
 
         except Exception as e:
             self.logger.error("Error during recent summary generation.", error=str(e), exc_info=True)
             return {'error': str(e)} # Return error info
         finally:
-            db.close() 
\ No newline at end of file
+            db.close() 
+    
+    def _build_summary(
+        self,
+        hours: int,
+        total_messages_analyzed: int,
+        sentiment_counts_summary: Dict[str, int],
+        top_topics_summary: Dict[str, int],
+        topics: Optional[List[str]],
+        now: datetime
+    ) -> Dict[str, Any]:
+        """
+        Build the recent activity summary from message counts.
+        
+        Args:
+            hours: Summarized time period
+            total_messages_analyzed: Messages in the time period
+            sentiment_counts_summary: Messages per sentiment
+            top_topics_summary: Messages per topic
+            topics: Topic filter applied, if any
+            now: End of the time period
+            
+        Returns:
+            Dict[str, Any]: Summary data
+        """
+        if not total_messages_analyzed:
+            self.logger.info("No messages found for summary in the time window with specified filters.")
+            return { # Return a structured empty-like response
+                'time_window_hours': hours,
+                'total_messages': 0,
+                'sentiment_breakdown': {'positive': 0, 'negative': 0, 'neutral': 0},
+                'top_topics': {},
+                'summary_text': "No relevant messages found to generate a summary.",
+                'generated_at': now.isoformat(),
+                'filter_topics': topics
+            }
+        
+        # Sort topics
+        sorted_top_topics = dict(sorted(top_topics_summary.items(), key=lambda x: x[1], reverse=True)[:10]) # Renamed
+        
+        # Basic summary text (can be improved with LLM later if needed)
+        summary_text_gen = f"Summary of {total_messages_analyzed} messages in the last {hours} hours. "
+        if sorted_top_topics:
+            summary_text_gen += f"Key topics include: {', '.join(list(sorted_top_topics.keys())[:3])}. "
+        dominant_sentiment_gen = max(sentiment_counts_summary, key=sentiment_counts_summary.get)
+        summary_text_gen += f"Overall sentiment appears {dominant_sentiment_gen}."
+        
+        summary_result = { # Renamed
+            'time_window_hours': hours,
+            'total_messages': total_messages_analyzed,
+            'sentiment_breakdown': sentiment_counts_summary,
+            'top_topics': sorted_top_topics, # Store the dict
+            'summary_text': summary_text_gen, # Added a generated summary text
+            'generated_at': now.isoformat(),
+            'filter_topics': topics
+        }
+        
+        self.logger.info(
+            "Recent news summary generated successfully.",
+            requested_hours=hours,
+            messages_analyzed=total_messages_analyzed,
+            topics_found=len(sorted_top_topics),
+            filter_topics=topics
+        )
+        return summary_result
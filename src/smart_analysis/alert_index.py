@@ -0,0 +1,249 @@
+"""
+Tel-Insights Alert Criteria Index
+
+Inverted index from alert criteria (keywords, topics, sentiment, sources) to
+the alert configurations that reference them. Substring keywords are matched
+with an Aho-Corasick automaton, so matching a message costs time linear in
+its text plus the number of configurations it can actually satisfy, however
+many alerts users have configured.
+"""
+
+import threading
+from collections import Counter, defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from shared.logging import LoggingMixin, get_logger
+
+logger = get_logger(__name__)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher.
+
+    ``find`` reports every pattern occurring in a text in one pass over the
+    text, independent of the number of patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Non-empty patterns to search for
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for pattern in set(patterns):
+            if pattern:
+                self._insert(pattern)
+        self._link()
+
+    def _insert(self, pattern: str) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(pattern)
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Set[str]:
+        """
+        Find the patterns occurring in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set[str]: Patterns found
+        """
+        found: Set[str] = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                found.update(self._output[node])
+        return found
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
+
+
+class AlertIndex(LoggingMixin):
+    """
+    Inverted index over alert criteria.
+
+    A configuration constrains some of four dimensions: keywords (an
+    ``ai_metadata`` keyword or a substring of the text), topics, sentiment and
+    sources (channel IDs). Values within a dimension are alternatives;
+    dimensions are combined with AND. Each dimension maps values to the
+    configurations using them; a message matches a configuration when it hits
+    all of the configuration's dimensions. Configurations without any
+    constraint match every message.
+
+    Configurations are added, replaced and removed incrementally; the keyword
+    automaton is rebuilt lazily on the next match after a keyword change.
+    """
+
+    DIMENSIONS = ("keywords", "topics", "sentiment", "sources")
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[str, Set[int]]] = {dimension: defaultdict(set) for dimension in self.DIMENSIONS}
+        self._terms: Dict[int, Dict[str, Set[str]]] = {}
+        self._required: Dict[int, int] = {}
+        self._match_all: Set[int] = set()
+        self._automaton: Optional[AhoCorasick] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def terms_of(criteria: Dict[str, Any]) -> Dict[str, Set[str]]:
+        """
+        Get the normalized index terms of alert criteria.
+
+        Args:
+            criteria: ``AlertConfig.criteria``
+
+        Returns:
+            Dict[str, Set[str]]: Terms per constrained dimension
+        """
+        terms = {
+            "keywords": {str(keyword).lower() for keyword in criteria.get('keywords') or [] if str(keyword)},
+            "topics": {str(topic).lower() for topic in criteria.get('topics') or [] if str(topic)},
+            "sentiment": {criteria['sentiment']} if criteria.get('sentiment') else set(),
+            "sources": {str(source) for source in criteria.get('sources') or []},
+        }
+        return {dimension: values for dimension, values in terms.items() if values}
+
+    def add(self, config_id: int, criteria: Dict[str, Any]) -> None:
+        """
+        Index a configuration, replacing any previous criteria of the same ID.
+
+        Args:
+            config_id: Alert configuration ID
+            criteria: ``AlertConfig.criteria``
+        """
+        terms = self.terms_of(criteria)
+        with self._lock:
+            self._remove(config_id)
+            self._terms[config_id] = terms
+            self._required[config_id] = len(terms)
+            if not terms:
+                self._match_all.add(config_id)
+            for dimension, values in terms.items():
+                for value in values:
+                    self._postings[dimension][value].add(config_id)
+            if "keywords" in terms:
+                self._automaton = None
+
+    def remove(self, config_id: int) -> None:
+        """
+        Remove a configuration from the index.
+
+        Args:
+            config_id: Alert configuration ID
+        """
+        with self._lock:
+            self._remove(config_id)
+
+    def _remove(self, config_id: int) -> None:
+        """Remove a configuration. Caller holds the lock."""
+        terms = self._terms.pop(config_id, None)
+        if terms is None:
+            return
+        self._required.pop(config_id, None)
+        self._match_all.discard(config_id)
+        for dimension, values in terms.items():
+            postings = self._postings[dimension]
+            for value in values:
+                postings[value].discard(config_id)
+                if not postings[value]:
+                    del postings[value]
+        if "keywords" in terms:
+            self._automaton = None
+
+    def match(
+        self,
+        message_text: Optional[str],
+        ai_metadata: Dict[str, Any],
+        source: Optional[str] = None
+    ) -> Set[int]:
+        """
+        Find the configurations a message satisfies.
+
+        Args:
+            message_text: Message text
+            ai_metadata: Message AI metadata
+            source: Channel ID of the message
+
+        Returns:
+            Set[int]: Matching configuration IDs
+        """
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = AhoCorasick(self._postings["keywords"].keys())
+                self.logger.debug(
+                    "Alert keyword automaton rebuilt.",
+                    keywords=len(self._postings["keywords"]),
+                    nodes=len(self._automaton)
+                )
+            keyword_postings = self._postings["keywords"]
+            keywords = self._automaton.find((message_text or "").lower())
+            keywords.update(
+                keyword for keyword in (str(k).lower() for k in ai_metadata.get('keywords') or [])
+                if keyword in keyword_postings
+            )
+            hits = {
+                "keywords": keywords,
+                "topics": {str(topic).lower() for topic in ai_metadata.get('topics') or []},
+                "sentiment": {ai_metadata['sentiment']} if ai_metadata.get('sentiment') else set(),
+                "sources": {str(source)} if source is not None else set(),
+            }
+
+            satisfied: Counter = Counter()
+            for dimension, values in hits.items():
+                postings = self._postings[dimension]
+                configs: Set[int] = set()
+                for value in values:
+                    configs.update(postings.get(value, ()))
+                satisfied.update(configs)  # Each dimension counts once per configuration
+
+            matched = {config_id for config_id, count in satisfied.items() if count == self._required[config_id]}
+            return matched | self._match_all
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index size metrics.
+
+        Returns:
+            Dict[str, Any]: Indexed configurations and distinct terms per dimension
+        """
+        with self._lock:
+            return {
+                "configs": len(self._terms),
+                "match_all_configs": len(self._match_all),
+                **{f"{dimension}_terms": len(self._postings[dimension]) for dimension in self.DIMENSIONS},
+            }
+
+    def __len__(self) -> int:
+        return len(self._terms)
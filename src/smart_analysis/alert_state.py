@@ -0,0 +1,354 @@
+"""
+Tel-Insights Alert State Store
+
+Durable alert cooldowns and lease-based partitioning of alert evaluation
+across smart_analysis replicas. Alert configurations are split into a fixed
+number of partitions; each replica leases a fair share of them and evaluates
+only the configurations it owns. Firing an alert is a conditional update of
+the configuration's ``alert_state`` row that checks the cooldown and the
+fencing token of the lease, so a restarted replica does not re-fire alerts
+and a replica whose lease was taken over cannot fire a duplicate.
+"""
+
+import math
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from shared.config import get_settings
+from shared.database import get_db_session
+from shared.logging import LoggingMixin, get_logger, log_database_operation
+from shared.models import AlertLease, AlertReplica, AlertState
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Replica heartbeats older than this many lease periods are deleted
+_STALE_REPLICA_LEASES = 10
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Attach UTC to naive timestamps read back from SQLite."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def default_replica_id() -> str:
+    """Replica identity used when ALERT_REPLICA_ID is not set."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class AlertStateStore(LoggingMixin):
+    """
+    Alert cooldowns and partition leases stored in the database.
+
+    ``renew_leases`` must be called every third of ``lease_seconds``; it
+    heartbeats the replica, renews its leases and rebalances partitions so
+    each live replica holds at most ``ceil(partitions / replicas)``.
+    Acquiring a lease is a compare-and-set on the partition's fencing token.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = get_db_session,
+        replica_id: Optional[str] = None,
+        partitions: Optional[int] = None,
+        lease_seconds: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            session_factory: Callable returning a new synchronous session
+            replica_id: Identity of this replica (defaults to ALERT_REPLICA_ID, then hostname and PID)
+            partitions: Number of configuration partitions (defaults to ALERT_PARTITIONS)
+            lease_seconds: Lease validity (defaults to ALERT_LEASE_SECONDS)
+        """
+        self.session_factory = session_factory
+        self.replica_id = replica_id or settings.alerts.replica_id or default_replica_id()
+        self.partitions = partitions or settings.alerts.partitions
+        self.lease_seconds = lease_seconds or settings.alerts.lease_seconds
+        self._leases: Dict[int, int] = {}  # Owned partition -> fencing token
+        self._leases_valid_until = 0.0  # Monotonic deadline of the owned leases
+        self._partitions_created = False
+        self._lock = threading.Lock()
+        self.logger.info(
+            "AlertStateStore initialized.",
+            replica_id=self.replica_id,
+            partitions=self.partitions,
+            lease_seconds=self.lease_seconds
+        )
+
+    def partition_of(self, config_id: int) -> int:
+        """Partition of an alert configuration."""
+        return config_id % self.partitions
+
+    def owned_partitions(self) -> Set[int]:
+        """Partitions whose lease this replica currently holds."""
+        with self._lock:
+            if time.monotonic() >= self._leases_valid_until:
+                return set()
+            return set(self._leases)
+
+    def owns(self, config_id: int) -> bool:
+        """Whether this replica currently evaluates an alert configuration."""
+        with self._lock:
+            return time.monotonic() < self._leases_valid_until and self.partition_of(config_id) in self._leases
+
+    def _insert(self, db: Session, model):
+        dialect_name = db.bind.dialect.name
+        try:
+            return _DIALECT_INSERTS[dialect_name](model)
+        except KeyError:
+            raise NotImplementedError(f"Alert leases are not supported on dialect '{dialect_name}'")
+
+    def renew_leases(self) -> Tuple[Set[int], Set[int]]:
+        """
+        Heartbeat, renew owned leases and acquire or release partitions to rebalance.
+
+        Returns:
+            Tuple[Set[int], Set[int]]: Partitions acquired and partitions lost by this call
+        """
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        with self._lock:
+            held = dict(self._leases) if started < self._leases_valid_until else {}
+
+        db = self.session_factory()
+        try:
+            if not self._partitions_created:
+                db.execute(
+                    self._insert(db, AlertLease)
+                    .values([{"partition_id": p, "fencing_token": 0} for p in range(self.partitions)])
+                    .on_conflict_do_nothing(index_elements=["partition_id"])
+                )
+            db.execute(
+                self._insert(db, AlertReplica)
+                .values(replica_id=self.replica_id, heartbeat_at=now)
+                .on_conflict_do_update(index_elements=["replica_id"], set_={"heartbeat_at": now})
+            )
+            db.query(AlertReplica).filter(
+                AlertReplica.heartbeat_at < now - timedelta(seconds=self.lease_seconds * _STALE_REPLICA_LEASES)
+            ).delete(synchronize_session=False)
+
+            live_replicas = db.query(AlertReplica).filter(
+                AlertReplica.heartbeat_at > now - timedelta(seconds=self.lease_seconds)
+            ).count()
+            fair_share = math.ceil(self.partitions / max(live_replicas, 1))
+
+            owned: Dict[int, int] = {}
+            for partition, token in sorted(held.items()):
+                if len(owned) >= fair_share:
+                    break  # Released below
+                renewed = db.execute(
+                    update(AlertLease)
+                    .where(
+                        AlertLease.partition_id == partition,
+                        AlertLease.owner == self.replica_id,
+                        AlertLease.fencing_token == token
+                    )
+                    .values(expires_at=expires_at)
+                ).rowcount
+                if renewed:
+                    owned[partition] = token
+
+            released = set(held) - set(owned)
+            for partition in released:
+                db.execute(
+                    update(AlertLease)
+                    .where(
+                        AlertLease.partition_id == partition,
+                        AlertLease.owner == self.replica_id,
+                        AlertLease.fencing_token == held[partition]
+                    )
+                    .values(owner=None, expires_at=now)
+                )
+
+            if len(owned) < fair_share:
+                free = db.query(AlertLease.partition_id, AlertLease.fencing_token).filter(
+                    AlertLease.partition_id < self.partitions,
+                    or_(AlertLease.owner.is_(None), AlertLease.expires_at <= now)
+                ).order_by(AlertLease.partition_id).all()
+                for partition, token in free:
+                    if len(owned) >= fair_share:
+                        break
+                    acquired = db.execute(
+                        update(AlertLease)
+                        .where(
+                            AlertLease.partition_id == partition,
+                            AlertLease.fencing_token == token,
+                            or_(AlertLease.owner.is_(None), AlertLease.expires_at <= now)
+                        )
+                        .values(owner=self.replica_id, fencing_token=token + 1, expires_at=expires_at)
+                    ).rowcount
+                    if acquired:
+                        owned[partition] = token + 1
+            db.commit()
+            self._partitions_created = True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self._leases = owned
+            self._leases_valid_until = started + self.lease_seconds
+        acquired = set(owned) - set(held)
+        lost = set(held) - set(owned)
+        if acquired or lost:
+            self.logger.info(
+                log_database_operation("rebalance_alert_leases", AlertLease.__tablename__),
+                replica_id=self.replica_id,
+                live_replicas=live_replicas,
+                owned=sorted(owned),
+                acquired=sorted(acquired),
+                lost=sorted(lost)
+            )
+        return acquired, lost
+
+    def release_leases(self) -> None:
+        """Release all leases of this replica so other replicas can take them over immediately."""
+        with self._lock:
+            held, self._leases = self._leases, {}
+            self._leases_valid_until = 0.0
+        db = self.session_factory()
+        try:
+            now = datetime.now(timezone.utc)
+            if held:
+                db.query(AlertLease).filter(
+                    AlertLease.partition_id.in_(held),
+                    AlertLease.owner == self.replica_id
+                ).update({"owner": None, "expires_at": now}, synchronize_session=False)
+            db.query(AlertReplica).filter(AlertReplica.replica_id == self.replica_id).delete(synchronize_session=False)
+            db.commit()
+            self.logger.info("Alert leases released.", replica_id=self.replica_id, partitions=sorted(held))
+        except Exception as e:
+            db.rollback()
+            self.logger.error("Failed to release alert leases.", replica_id=self.replica_id, error=str(e), exc_info=True)
+        finally:
+            db.close()
+
+    def try_fire(
+        self,
+        config_id: int,
+        window_count: int,
+        cooldown_seconds: float,
+        fenced: bool = True,
+        now: Optional[datetime] = None
+    ) -> bool:
+        """
+        Record that an alert fires, unless it is in cooldown or the lease was lost.
+
+        Args:
+            config_id: Alert configuration ID
+            window_count: Messages in the window
+            cooldown_seconds: Minimum time since the alert last fired
+            fenced: Require this replica's lease on the configuration's partition
+            now: Firing time (defaults to the current time)
+
+        Returns:
+            bool: True if this replica may deliver the alert
+        """
+        now = now or datetime.now(timezone.utc)
+        partition = self.partition_of(config_id)
+        token = None
+        if fenced:
+            with self._lock:
+                token = self._leases.get(partition)
+            if token is None:
+                return False
+
+        db = self.session_factory()
+        try:
+            db.execute(
+                self._insert(db, AlertState)
+                .values(config_id=config_id, window_count=0, fencing_token=0, updated_at=now)
+                .on_conflict_do_nothing(index_elements=["config_id"])
+            )
+            conditions = [
+                AlertState.config_id == config_id,
+                or_(
+                    AlertState.last_triggered_at.is_(None),
+                    AlertState.last_triggered_at <= now - timedelta(seconds=cooldown_seconds)
+                ),
+            ]
+            values = {"last_triggered_at": now, "window_count": window_count, "owner": self.replica_id, "updated_at": now}
+            if fenced:
+                lease_held = select(AlertLease.partition_id).where(
+                    AlertLease.partition_id == partition,
+                    AlertLease.owner == self.replica_id,
+                    AlertLease.fencing_token == token,
+                    AlertLease.expires_at > now
+                ).exists()
+                conditions += [AlertState.fencing_token <= token, lease_held]
+                values["fencing_token"] = token
+            fired = db.execute(update(AlertState).where(*conditions).values(**values)).rowcount == 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.logger.debug(
+            log_database_operation("fire_alert", AlertState.__tablename__, config_id=config_id),
+            fired=fired,
+            fencing_token=token
+        )
+        return fired
+
+    def last_triggered(self, config_ids: Optional[Iterable[int]] = None) -> Dict[int, datetime]:
+        """
+        Get the last firing time of alert configurations.
+
+        Args:
+            config_ids: Configurations to read, all if None
+
+        Returns:
+            Dict[int, datetime]: Last firing time per configuration that has fired
+        """
+        db = self.session_factory()
+        try:
+            query = db.query(AlertState.config_id, AlertState.last_triggered_at).filter(
+                AlertState.last_triggered_at.isnot(None)
+            )
+            if config_ids is not None:
+                query = query.filter(AlertState.config_id.in_(list(config_ids)))
+            return {config_id: _utc(triggered_at) for config_id, triggered_at in query}
+        finally:
+            db.close()
+
+    def clear_cooldowns(self) -> None:
+        """Forget when alerts last fired, e.g. for a forced alert check."""
+        db = self.session_factory()
+        try:
+            db.query(AlertState).update({"last_triggered_at": None}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+_alert_state_store: Optional[AlertStateStore] = None
+
+
+def get_alert_state_store() -> AlertStateStore:
+    """Get the process-wide alert state store."""
+    global _alert_state_store
+    if _alert_state_store is None:
+        _alert_state_store = AlertStateStore()
+    return _alert_state_store
@@ -2,21 +2,28 @@
 Tel-Insights Smart Analysis Service Main Entry Point
 
 This module provides the main entry point for the Smart Analysis microservice.
-It runs the MCP server and periodic alert checking.
+It runs the MCP server and frequency alert evaluation, either streaming from
+analyzed message events or by periodic database checks, plus periodic
+rollup compaction, messages partition maintenance and message archival.
 """
 
 import asyncio
 import signal
 import sys
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
 
 import uvicorn
 
+from shared.archive import get_message_archive
 from shared.config import get_settings
 from shared.database import init_db
 from shared.logging import configure_logging, get_logger
+from shared.partitions import get_partition_manager
+from shared.rollups import get_metadata_rollups
 
 from .mcp_server import get_mcp_server
+from .streaming_evaluator import StreamingAlertEvaluator
 
 # Configure logging
 configure_logging("smart_analysis")
@@ -31,6 +38,11 @@ class SmartAnalysisService:
         self.running = False
         self.settings = get_settings()
         self.alert_check_task: Optional[asyncio.Task] = None
+        self.lease_task: Optional[asyncio.Task] = None
+        self.rollup_task: Optional[asyncio.Task] = None
+        self.partition_task: Optional[asyncio.Task] = None
+        self.archive_task: Optional[asyncio.Task] = None
+        self.streaming_evaluator: Optional[StreamingAlertEvaluator] = None
     
     def initialize(self) -> None:
         """Initialize the service."""
@@ -47,7 +59,10 @@ class SmartAnalysisService:
             raise
     
     async def start_alert_checker(self) -> None:
-        """Start periodic alert checking task."""
+        """Start alert evaluation: streaming if enabled, otherwise periodic checks."""
+        if self.settings.alerts.streaming_enabled:
+            await self.start_streaming_evaluator()
+            return
         
         async def alert_check_loop():
             """Periodic alert checking loop."""
@@ -70,8 +85,7 @@ class SmartAnalysisService:
                                 message_count=alert['message_count']
                             )
                     
-                    # Wait 5 minutes before next check
-                    await asyncio.sleep(300)
+                    await asyncio.sleep(self.settings.alerts.check_interval_seconds)
                     
                 except Exception as e:
                     logger.error(f"Error in alert check loop: {e}")
@@ -80,6 +94,95 @@ class SmartAnalysisService:
         if self.running:
             self.alert_check_task = asyncio.create_task(alert_check_loop())
     
+    async def start_streaming_evaluator(self) -> None:
+        """Evaluate analyzed message events as they arrive, on windows rebuilt from the database."""
+        # Analyzed messages change the summaries and trends whose window they fall into
+        response_cache = self.mcp_server.response_cache
+        on_event = None
+        if response_cache and self.settings.mcp.cache_invalidate_on_analyzed:
+            def on_event(event: Dict[str, Any]) -> None:
+                # Provisional ingest metadata is not counted in summaries and trends
+                if not (event.get('ai_metadata') or {}).get('provisional'):
+                    response_cache.invalidate(event.get('message_timestamp'))
+        self.streaming_evaluator = StreamingAlertEvaluator(on_event=on_event)
+        
+        async def streaming_loop():
+            """Run the blocking event consumer on a worker thread, restarting it after failures."""
+            while self.running:
+                try:
+                    await asyncio.to_thread(self.streaming_evaluator.start_consuming)
+                except Exception as e:
+                    logger.error(f"Error in streaming alert evaluation: {e}")
+                    await asyncio.sleep(5)
+        
+        async def lease_loop():
+            """Renew alert partition leases every third of the lease period."""
+            while self.running:
+                await asyncio.sleep(self.settings.alerts.lease_seconds / 3)
+                try:
+                    await asyncio.to_thread(self.streaming_evaluator.renew_leases)
+                except Exception as e:
+                    logger.error(f"Error renewing alert partition leases: {e}")
+        
+        if self.running:
+            self.alert_check_task = asyncio.create_task(streaming_loop())
+            self.lease_task = asyncio.create_task(lease_loop())
+    
+    async def start_rollup_compaction(self) -> None:
+        """Backfill empty metadata rollups once, then compact them periodically."""
+        rollups = get_metadata_rollups()
+        
+        async def rollup_loop():
+            """Periodic rollup compaction loop."""
+            try:
+                if await asyncio.to_thread(rollups.is_empty):
+                    since = datetime.now(timezone.utc) - timedelta(hours=self.settings.rollups.backfill_hours)
+                    logger.info("Backfilling metadata rollups", since=since.isoformat())
+                    await asyncio.to_thread(rollups.backfill, since)
+            except Exception as e:
+                logger.error(f"Error backfilling metadata rollups: {e}")
+            while self.running:
+                try:
+                    await asyncio.to_thread(rollups.compact)
+                except Exception as e:
+                    logger.error(f"Error compacting metadata rollups: {e}")
+                await asyncio.sleep(self.settings.rollups.compaction_interval_seconds)
+        
+        if self.running and self.settings.rollups.enabled:
+            self.rollup_task = asyncio.create_task(rollup_loop())
+    
+    async def start_partition_maintenance(self) -> None:
+        """Create upcoming messages partitions and retire expired ones periodically."""
+        partitions = get_partition_manager()
+        
+        async def partition_loop():
+            """Periodic partition maintenance loop."""
+            while self.running:
+                try:
+                    await asyncio.to_thread(partitions.maintain)
+                except Exception as e:
+                    logger.error(f"Error maintaining messages partitions: {e}")
+                await asyncio.sleep(self.settings.partitions.maintenance_interval_seconds)
+        
+        if self.running and self.settings.partitions.enabled:
+            self.partition_task = asyncio.create_task(partition_loop())
+    
+    async def start_archival(self) -> None:
+        """Move messages older than the archive horizon to Parquet files periodically."""
+        archive = get_message_archive()
+        
+        async def archive_loop():
+            """Periodic message archival loop."""
+            while self.running:
+                try:
+                    await asyncio.to_thread(archive.archive)
+                except Exception as e:
+                    logger.error(f"Error archiving messages: {e}")
+                await asyncio.sleep(self.settings.archive.interval_seconds)
+        
+        if self.running and self.settings.archive.enabled:
+            self.archive_task = asyncio.create_task(archive_loop())
+    
     async def start(self) -> None:
         """Start the service."""
         if not self.mcp_server:
@@ -91,6 +194,9 @@ class SmartAnalysisService:
             
             # Start periodic alert checking
             await self.start_alert_checker()
+            await self.start_rollup_compaction()
+            await self.start_partition_maintenance()
+            await self.start_archival()
             
             # Start the FastAPI server
             config = uvicorn.Config(
@@ -115,12 +221,19 @@ class SmartAnalysisService:
         
         self.running = False
         
-        if self.alert_check_task:
-            self.alert_check_task.cancel()
-            try:
-                await self.alert_check_task
-            except asyncio.CancelledError:
-                pass
+        if self.streaming_evaluator:
+            self.streaming_evaluator.stop_consuming()
+        
+        for task in (self.alert_check_task, self.lease_task, self.rollup_task, self.partition_task, self.archive_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        
+        if self.streaming_evaluator:
+            await asyncio.to_thread(self.streaming_evaluator.alert_state.release_leases)
         
         logger.info("Smart Analysis Service stopped")
 
@@ -2,22 +2,31 @@
 Tel-Insights MCP Server
 
 Model Context Protocol server implementation for Smart Analysis tools.
-Provides tools for news summarization and trend analysis.
+Provides tools for news summarization and trend analysis. Tool reads run on
+async database sessions and every tool request is bounded by
+MCP_REQUEST_TIMEOUT_SECONDS, so a slow query cannot stall the event loop
+serving other requests. Summaries and trends are served from a time-bucketed
+``ResponseCache`` when the same question was asked in the current bucket.
 """
 
+import asyncio
 import json
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
+from sqlalchemy import and_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.config import get_settings
-from shared.database import get_sync_db
-from shared.logging import LoggingMixin, get_logger
-from shared.models import Message
+from shared.database import get_async_db
+from shared.logging import LoggingMixin, get_logger, log_database_operation, log_function_call
+from shared.models import Message, metadata_analyzed_filter, metadata_sentiment_filter, metadata_topics_filter
+from shared.rollups import total_count
 
 from .alert_analyzer import AlertAnalyzer
+from .response_cache import ResponseCache
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -48,10 +57,25 @@ class SmartAnalysisMCP(LoggingMixin):
     MCP server for Smart Analysis tools.
     """
     
-    def __init__(self):
-        """Initialize the MCP server."""
+    def __init__(
+        self,
+        async_session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_async_db,
+        request_timeout_seconds: Optional[float] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        """
+        Initialize the MCP server.
+        
+        Args:
+            async_session_factory: Callable returning an async session context manager
+            request_timeout_seconds: Tool request timeout (defaults to MCP_REQUEST_TIMEOUT_SECONDS)
+            response_cache: Cache of summary and trend responses (defaults to a new cache when MCP_CACHE_ENABLED)
+        """
         self.logger.info("Initializing SmartAnalysisMCP...")
+        self.async_session_factory = async_session_factory
+        self.request_timeout_seconds = request_timeout_seconds or settings.mcp.request_timeout_seconds
         self.alert_analyzer = AlertAnalyzer() # AlertAnalyzer has its own init logging
+        self.response_cache = response_cache or (ResponseCache() if settings.mcp.cache_enabled else None)
         self.app = FastAPI(title="Tel-Insights Smart Analysis MCP")
         self._setup_routes()
         self.logger.info("SmartAnalysisMCP initialized successfully.")
@@ -81,6 +105,8 @@ class SmartAnalysisMCP(LoggingMixin):
             """Health check endpoint."""
             self.logger.info(log_function_call("mcp_health_check_get", endpoint="/health"))
             response_data = {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
+            if self.response_cache:
+                response_data["response_cache"] = self.response_cache.stats()
             self.logger.debug("Health check response generated.", response_data=response_data)
             return response_data
         
@@ -94,9 +120,22 @@ class SmartAnalysisMCP(LoggingMixin):
             )
             try:
                 # _summarize_news_impl will have its own detailed logging
-                result = await self._summarize_news_impl(request)
+                # Topics match lowercased in any order, so equivalent filters share one cache entry
+                if request.topics:
+                    request = request.model_copy(update={"topics": sorted({topic.lower() for topic in request.topics})})
+                result = await asyncio.wait_for(
+                    self._cached("summarize_news", request, self._summarize_news_impl),
+                    timeout=self.request_timeout_seconds
+                )
                 self.logger.info("Summarize news tool executed successfully.", endpoint="/tools/summarize_news")
                 return result
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    "summarize_news request timed out.",
+                    endpoint="/tools/summarize_news",
+                    timeout_seconds=self.request_timeout_seconds
+                )
+                raise HTTPException(status_code=504, detail="Request timed out")
             except Exception as e:
                 self.logger.error(
                     "Error processing summarize_news request.",
@@ -117,9 +156,19 @@ class SmartAnalysisMCP(LoggingMixin):
             )
             try:
                 # _topic_trends_impl will have its own detailed logging
-                result = await self._topic_trends_impl(request)
+                result = await asyncio.wait_for(
+                    self._cached("topic_trends", request, self._topic_trends_impl),
+                    timeout=self.request_timeout_seconds
+                )
                 self.logger.info("Topic trends tool executed successfully.", endpoint="/tools/topic_trends")
                 return result
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    "topic_trends request timed out.",
+                    endpoint="/tools/topic_trends",
+                    timeout_seconds=self.request_timeout_seconds
+                )
+                raise HTTPException(status_code=504, detail="Request timed out")
             except Exception as e:
                 self.logger.error(
                     "Error processing topic_trends request.",
@@ -140,9 +189,16 @@ class SmartAnalysisMCP(LoggingMixin):
             )
             try:
                 # _check_alerts_impl will have its own detailed logging
-                result = await self._check_alerts_impl(request)
+                result = await asyncio.wait_for(self._check_alerts_impl(request), timeout=self.request_timeout_seconds)
                 self.logger.info("Check alerts tool executed successfully.", endpoint="/tools/check_alerts")
                 return result
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    "check_alerts request timed out.",
+                    endpoint="/tools/check_alerts",
+                    timeout_seconds=self.request_timeout_seconds
+                )
+                raise HTTPException(status_code=504, detail="Request timed out")
             except Exception as e:
                 self.logger.error(
                     "Error processing check_alerts request.",
@@ -154,6 +210,32 @@ class SmartAnalysisMCP(LoggingMixin):
                 raise HTTPException(status_code=500, detail=str(e))
         self.logger.info("MCP server FastAPI routes configured.")
     
+    async def _cached(
+        self,
+        tool: str,
+        request: BaseModel,
+        impl: Callable[[Any], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Serve a tool request from the response cache, computing it once per time bucket.
+        
+        Args:
+            tool: Tool name
+            request: Normalized request parameters
+            impl: Tool implementation
+            
+        Returns:
+            Dict[str, Any]: Tool response
+        """
+        if self.response_cache is None:
+            return await impl(request)
+        return await self.response_cache.get_or_compute(
+            tool,
+            request.model_dump(),
+            lambda: impl(request),
+            window_seconds=request.time_range_hours * 3600
+        )
+    
     async def _summarize_news_impl(self, request: SummarizeNewsRequest) -> Dict[str, Any]:
         """
         Implementation of news summarization tool.
@@ -165,141 +247,154 @@ class SmartAnalysisMCP(LoggingMixin):
             Dict[str, Any]: Summarization results
         """
         self.logger.info(log_function_call("_summarize_news_impl", request_params=request.model_dump()))
-        db = next(get_sync_db())
-        
-        try:
-            # Calculate time window
-            now = datetime.now(timezone.utc)
-            window_start = now - timedelta(hours=request.time_range_hours)
-            self.logger.debug(
-                f"Time window for news summary: {window_start.isoformat()} to {now.isoformat()}",
-                hours=request.time_range_hours
-            )
-            
-            # Build query
-            query_filters = [
-                Message.message_timestamp >= window_start,
-                Message.message_timestamp <= now, # Ensure we don't get future messages if any clock skew
-                Message.ai_metadata.isnot(None)
-            ]
-            
-            # Apply topic filter
-            if request.topics:
-                self.logger.debug(f"Applying topic filter: {request.topics}")
-                topic_conditions = []
-                for topic_filter_item in request.topics: # Renamed
-                    topic_conditions.append(
-                        Message.ai_metadata['topics'].astext.contains(f'"{topic_filter_item.lower()}"')
-                    )
-                from sqlalchemy import or_ # Import locally
-                if topic_conditions: query_filters.append(or_(*topic_conditions))
-            
-            # Apply sentiment filter
-            if request.sentiment:
-                self.logger.debug(f"Applying sentiment filter: {request.sentiment}")
-                query_filters.append(Message.ai_metadata['sentiment'].astext == request.sentiment)
-            
-            self.logger.debug(
-                log_database_operation("query_messages_for_summary", Message.__tablename__),
-                filters_applied_count=len(query_filters) - 3, # Baseline filters for time and metadata
-                limit=request.max_messages
-            )
-            # Get messages ordered by timestamp
-            messages = db.query(Message).filter(and_(*query_filters)).order_by(Message.message_timestamp.desc()).limit(request.max_messages).all()
-            self.logger.info(f"Retrieved {len(messages)} messages for summarization.", request_hours=request.time_range_hours)
-            
-            # Analyze and summarize
-            if not messages:
-                self.logger.info("No messages found for summarization matching criteria.")
-                return { # Return structured empty response
-                    "summary": "No messages found for the specified criteria.",
-                    "message_count": 0,
+        async with self.async_session_factory() as db:
+            try:
+                # Calculate time window
+                now = datetime.now(timezone.utc)
+                window_start = now - timedelta(hours=request.time_range_hours)
+                self.logger.debug(
+                    f"Time window for news summary: {window_start.isoformat()} to {now.isoformat()}",
+                    hours=request.time_range_hours
+                )
+                
+                # Build query
+                query_filters = [
+                    Message.message_timestamp >= window_start,
+                    Message.message_timestamp <= now, # Ensure we don't get future messages if any clock skew
+                    metadata_analyzed_filter(db.bind.dialect.name) # Stored analyses, not provisional ingest metadata
+                ]
+                
+                # Apply topic filter
+                if request.topics:
+                    self.logger.debug(f"Applying topic filter: {request.topics}")
+                    query_filters.append(metadata_topics_filter(request.topics))
+                
+                # Apply sentiment filter
+                if request.sentiment:
+                    self.logger.debug(f"Applying sentiment filter: {request.sentiment}")
+                    query_filters.append(metadata_sentiment_filter(request.sentiment))
+                
+                # Without a topic filter, counts come from the rollups and only the key summaries from messages
+                rollups = self.alert_analyzer.rollups if not request.topics else None
+                limit = 10 if rollups else request.max_messages
+                
+                self.logger.debug(
+                    log_database_operation("query_messages_for_summary", Message.__tablename__),
+                    filters_applied_count=len(query_filters) - 3, # Baseline filters for time and metadata
+                    limit=limit
+                )
+                # Get messages ordered by timestamp
+                await self._apply_statement_timeout(db)
+                messages = (await db.execute(
+                    select(Message.message_timestamp, Message.ai_metadata)
+                    .where(and_(*query_filters))
+                    .order_by(Message.message_timestamp.desc())
+                    .limit(limit)
+                )).all()
+                self.logger.info(f"Retrieved {len(messages)} messages for summarization.", request_hours=request.time_range_hours)
+                
+                # Analyze and summarize
+                if not messages:
+                    self.logger.info("No messages found for summarization matching criteria.")
+                    return { # Return structured empty response
+                        "summary": "No messages found for the specified criteria.",
+                        "message_count": 0,
+                        "time_range_hours": request.time_range_hours,
+                        "topics_filter": request.topics, # Explicitly show filters used
+                        "sentiment_filter": request.sentiment,
+                        "generated_at": now.isoformat()
+                    }
+                
+                # Extract key information
+                self.logger.debug("Analyzing retrieved messages for summary content.", message_count=len(messages))
+                topic_counts_summary = {} # Renamed
+                sentiment_counts_summary = {'positive': 0, 'negative': 0, 'neutral': 0} # Renamed
+                key_summaries_list = [] # Renamed
+                
+                for msg_item in messages: # Renamed
+                    ai_metadata = msg_item.ai_metadata # Already checked for not None
+                    
+                    for topic_name in ai_metadata.get('topics', []): # Renamed
+                        topic_name = topic_name.lower().strip()
+                        if topic_name: topic_counts_summary[topic_name] = topic_counts_summary.get(topic_name, 0) + 1
+                    
+                    sentiment_val = ai_metadata.get('sentiment', 'neutral') # Renamed
+                    sentiment_counts_summary[sentiment_val] = sentiment_counts_summary.get(sentiment_val, 0) + 1
+                    
+                    msg_summary_text = ai_metadata.get('summary', '') # Renamed
+                    if msg_summary_text and len(key_summaries_list) < 10:  # Top 10 summaries
+                        key_summaries_list.append({
+                            'summary': msg_summary_text,
+                            'timestamp': msg_item.message_timestamp.isoformat(),
+                            'topics': ai_metadata.get('topics', []),
+                            'sentiment': sentiment_val
+                        })
+                
+                total_messages_analyzed = len(messages) # Renamed
+                if rollups:
+                    counts = await rollups.counts_async(db, window_start, now, ("topic", "total"), sentiment=request.sentiment)
+                    topic_counts_summary = {topic_name: sum(by_sentiment.values()) for topic_name, by_sentiment in counts["topic"].items()}
+                    sentiment_counts_summary = {'positive': 0, 'negative': 0, 'neutral': 0, **counts["total"].get("", {})}
+                    total_messages_analyzed = max(total_count(counts["total"]), total_messages_analyzed)
+                
+                # Sort topics by frequency
+                top_topics_summary = dict(sorted(topic_counts_summary.items(), key=lambda x: x[1], reverse=True)[:10]) # Renamed
+                
+                # Generate overall summary text
+                dominant_sentiment_overall = max(sentiment_counts_summary.items(), key=lambda x: x[1])[0] if total_messages_analyzed > 0 else "neutral" # Renamed
+                
+                generated_summary_text = f"Analysis of {total_messages_analyzed} messages from the last {request.time_range_hours} hours. " # Renamed
+                
+                if top_topics_summary:
+                    first_top_topic = list(top_topics_summary.keys())[0] # Renamed
+                    generated_summary_text += f"Most discussed topic: '{first_top_topic}' ({top_topics_summary[first_top_topic]} mentions). "
+                
+                generated_summary_text += f"Overall sentiment: {dominant_sentiment_overall} ({sentiment_counts_summary[dominant_sentiment_overall]} messages). "
+                
+                if request.topics:
+                    generated_summary_text += f"Filtered by topics: {', '.join(request.topics)}. "
+                
+                if request.sentiment:
+                    generated_summary_text += f"Filtered by sentiment: {request.sentiment}. "
+                
+                self.logger.debug("Summary analysis complete.", top_topics_count=len(top_topics_summary), dominant_sentiment=dominant_sentiment_overall)
+                result = {
+                    "summary": generated_summary_text,
+                    "message_count": total_messages_analyzed,
                     "time_range_hours": request.time_range_hours,
-                    "topics_filter": request.topics, # Explicitly show filters used
-                    "sentiment_filter": request.sentiment,
+                    "sentiment_breakdown": sentiment_counts_summary,
+                    "top_topics": top_topics_summary,
+                    "key_summaries": key_summaries_list,
+                    "filters": {
+                        "topics": request.topics,
+                        "sentiment": request.sentiment
+                    },
                     "generated_at": now.isoformat()
                 }
-            
-            # Extract key information
-            self.logger.debug("Analyzing retrieved messages for summary content.", message_count=len(messages))
-            topic_counts_summary = {} # Renamed
-            sentiment_counts_summary = {'positive': 0, 'negative': 0, 'neutral': 0} # Renamed
-            key_summaries_list = [] # Renamed
-            
-            for msg_item in messages: # Renamed
-                ai_metadata = msg_item.ai_metadata # Already checked for not None
                 
-                for topic_name in ai_metadata.get('topics', []): # Renamed
-                    topic_name = topic_name.lower().strip()
-                    if topic_name: topic_counts_summary[topic_name] = topic_counts_summary.get(topic_name, 0) + 1
-                
-                sentiment_val = ai_metadata.get('sentiment', 'neutral') # Renamed
-                sentiment_counts_summary[sentiment_val] = sentiment_counts_summary.get(sentiment_val, 0) + 1
+                # This log message was already present and seems good.
+                self.logger.info(
+                    "News summary generated",
+                    message_count=total_messages_analyzed,
+                    time_range_hours=request.time_range_hours,
+                    top_topics_count=len(top_topics_summary)
+                )
                 
-                msg_summary_text = ai_metadata.get('summary', '') # Renamed
-                if msg_summary_text and len(key_summaries_list) < 10:  # Top 10 summaries
-                    key_summaries_list.append({
-                        'summary': msg_summary_text,
-                        'timestamp': msg_item.message_timestamp.isoformat(),
-                        'topics': ai_metadata.get('topics', []),
-                        'sentiment': sentiment_val
-                    })
-            
-            # Sort topics by frequency
-            top_topics_summary = dict(sorted(topic_counts_summary.items(), key=lambda x: x[1], reverse=True)[:10]) # Renamed
-            
-            # Generate overall summary text
-            total_messages_analyzed = len(messages) # Renamed
-            dominant_sentiment_overall = max(sentiment_counts_summary.items(), key=lambda x: x[1])[0] if total_messages_analyzed > 0 else "neutral" # Renamed
-            
-            generated_summary_text = f"Analysis of {total_messages_analyzed} messages from the last {request.time_range_hours} hours. " # Renamed
-            
-            if top_topics_summary:
-                first_top_topic = list(top_topics_summary.keys())[0] # Renamed
-                generated_summary_text += f"Most discussed topic: '{first_top_topic}' ({top_topics_summary[first_top_topic]} mentions). "
-            
-            generated_summary_text += f"Overall sentiment: {dominant_sentiment_overall} ({sentiment_counts_summary[dominant_sentiment_overall]} messages). "
-            
-            if request.topics:
-                generated_summary_text += f"Filtered by topics: {', '.join(request.topics)}. "
-            
-            if request.sentiment:
-                generated_summary_text += f"Filtered by sentiment: {request.sentiment}. "
-            
-            self.logger.debug("Summary analysis complete.", top_topics_count=len(top_topics_summary), dominant_sentiment=dominant_sentiment_overall)
-            result = {
-                "summary": generated_summary_text,
-                "message_count": total_messages_analyzed,
-                "time_range_hours": request.time_range_hours,
-                "sentiment_breakdown": sentiment_counts_summary,
-                "top_topics": top_topics_summary,
-                "key_summaries": key_summaries_list,
-                "filters": {
-                    "topics": request.topics,
-                    "sentiment": request.sentiment
-                },
-                "generated_at": now.isoformat()
-            }
-            
-            # This log message was already present and seems good.
-            self.logger.info(
-                "News summary generated",
-                message_count=total_messages_analyzed,
-                time_range_hours=request.time_range_hours,
-                top_topics_count=len(top_topics_summary)
-            )
-            
-            return result
-        except Exception as e: # Catch exceptions within this impl to log before re-raising
-            self.logger.error(
-                "Error during _summarize_news_impl execution.",
-                request_params=request.model_dump(),
-                error=str(e),
-                exc_info=True
-            )
-            raise # Re-raise for the main endpoint handler to catch and return HTTP 500
-        finally:
-            db.close()
+                return result
+            except Exception as e: # Catch exceptions within this impl to log before re-raising
+                self.logger.error(
+                    "Error during _summarize_news_impl execution.",
+                    request_params=request.model_dump(),
+                    error=str(e),
+                    exc_info=True
+                )
+                raise # Re-raise for the main endpoint handler to catch and return HTTP 500
+    
+    async def _apply_statement_timeout(self, db: AsyncSession) -> None:
+        """Let PostgreSQL cancel the request's queries once the request timeout has passed."""
+        if db.bind.dialect.name == "postgresql":
+            timeout_ms = int(self.request_timeout_seconds * 1000)
+            await db.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
     
     async def _topic_trends_impl(self, request: TopicTrendsRequest) -> Dict[str, Any]:
         """
@@ -313,8 +408,10 @@ class SmartAnalysisMCP(LoggingMixin):
         """
         self.logger.info(log_function_call("_topic_trends_impl", request_params=request.model_dump()))
         try:
-            # AlertAnalyzer.check_topic_trends already has good logging
-            trends = self.alert_analyzer.check_topic_trends(hours=request.time_range_hours)
+            # AlertAnalyzer.check_topic_trends_async already has good logging
+            async with self.async_session_factory() as db:
+                await self._apply_statement_timeout(db)
+                trends = await self.alert_analyzer.check_topic_trends_async(db, hours=request.time_range_hours)
 
             self.logger.debug(f"Retrieved {len(trends)} raw trends before min_count filter.", min_count_filter=request.min_count)
             # Filter by minimum count
@@ -364,10 +461,11 @@ class SmartAnalysisMCP(LoggingMixin):
             if request.force_check:
                 self.logger.info("Forcing alert check: Clearing alert cooldown timers.", user_request=request.force_check)
                 # Clear cooldown timers for forced check
-                self.alert_analyzer.last_check_time.clear()
+                await asyncio.to_thread(self.alert_analyzer.alert_state.clear_cooldowns)
 
+            # Alert checks write alert state through synchronous sessions, so they run on a worker thread.
             # AlertAnalyzer.check_frequency_alerts already has good logging
-            triggered_alerts = self.alert_analyzer.check_frequency_alerts()
+            triggered_alerts = await asyncio.to_thread(self.alert_analyzer.check_frequency_alerts)
 
             result = {
                 "alerts_triggered_count": len(triggered_alerts), # Clarified name
@@ -0,0 +1,198 @@
+"""
+Tel-Insights MCP Response Cache
+
+Caches summarize_news and topic_trends responses, which the bot buttons and
+MCP clients request over and over with the same parameters. Keys combine the
+tool name, the normalized request parameters and the current time bucket, so
+a response is reused until the bucket ends. Concurrent identical requests
+share one computation, and the least recently used entries are evicted.
+
+Newly analyzed messages are reported with ``invalidate``. Invalidations are
+coalesced: they are applied at most once per ``invalidate_interval_seconds``,
+and then only drop responses whose time window contains one of the messages.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from shared.cache import LRUCache
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Applied invalidations remembered for computations still running
+_INVALIDATION_HISTORY = 256
+
+
+class ResponseCache(LoggingMixin):
+    """
+    Time-bucketed LRU cache of tool responses with single-flight computation.
+
+    Lookups, single-flight bookkeeping and applying invalidations happen on
+    the event loop; ``invalidate`` only records the message and may be
+    called from any thread.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        invalidate_interval_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            bucket_seconds: Width of the time buckets responses are valid for (defaults to MCP_CACHE_BUCKET_SECONDS)
+            max_entries: Maximum cached responses (defaults to MCP_CACHE_SIZE)
+            invalidate_interval_seconds: Minimum time between applied invalidations
+                (defaults to MCP_CACHE_INVALIDATE_INTERVAL_SECONDS)
+            clock: Wall clock used to find the current bucket and response windows
+        """
+        self.bucket_seconds = bucket_seconds or settings.mcp.cache_bucket_seconds
+        self.invalidate_interval = (
+            settings.mcp.cache_invalidate_interval_seconds
+            if invalidate_interval_seconds is None else invalidate_interval_seconds
+        )
+        self.clock = clock
+        # Values are (response, start of its time window)
+        self._entries: LRUCache[Tuple[Any, float]] = LRUCache(
+            max_entries or settings.mcp.cache_size,
+            ttl_seconds=self.bucket_seconds
+        )
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[float] = None  # Earliest timestamp of messages not yet applied
+        self._applied_at = float("-inf")
+        self._sequence = 0
+        self._applied: Deque[Tuple[int, float]] = deque(maxlen=_INVALIDATION_HISTORY)
+        self.joined = 0
+        self.invalidations = 0
+        self.invalidated_entries = 0
+        self.logger.info(
+            "ResponseCache initialized.",
+            bucket_seconds=self.bucket_seconds,
+            max_entries=self._entries.max_entries,
+            invalidate_interval_seconds=self.invalidate_interval
+        )
+
+    def key(self, tool: str, params: Dict[str, Any]) -> Tuple[str, str, int]:
+        """
+        Build the cache key of a request in the current time bucket.
+
+        Args:
+            tool: Tool name
+            params: Request parameters
+
+        Returns:
+            Tuple[str, str, int]: Tool, canonical parameters and bucket
+        """
+        bucket = int(self.clock() // self.bucket_seconds)
+        return tool, json.dumps(params, sort_keys=True, default=str), bucket
+
+    async def get_or_compute(
+        self,
+        tool: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        window_seconds: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached response of a request, computing it at most once per key.
+
+        The computation runs as its own task, so a caller that gives up (for
+        example on a request timeout) does not cancel it for the others
+        waiting on the same key.
+
+        Args:
+            tool: Tool name
+            params: Normalized request parameters
+            compute: Coroutine function producing the response
+            window_seconds: Length of the time window the response covers, ending now
+                (None if any newly analyzed message may change it)
+
+        Returns:
+            Any: Cached or freshly computed response
+        """
+        self._apply_invalidations()
+        key = self.key(tool, params)
+        cached = self._entries.get(key)
+        if cached is not None:
+            return cached[0]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.joined += 1
+            return await asyncio.shield(future)
+
+        window_start = self.clock() - window_seconds if window_seconds is not None else float("-inf")
+        started_after = self._sequence
+        future = asyncio.ensure_future(compute())
+        self._inflight[key] = future
+
+        def store(done: "asyncio.Future[Any]") -> None:
+            self._inflight.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                return
+            if self._invalidated_since(started_after, window_start):
+                return
+            self._entries.set(key, (done.result(), window_start))
+
+        future.add_done_callback(store)
+        return await asyncio.shield(future)
+
+    def invalidate(self, message_timestamp: Optional[float] = None) -> None:
+        """
+        Report a newly analyzed message; responses whose window contains it are dropped on a later lookup.
+
+        Args:
+            message_timestamp: Timestamp of the message (None invalidates every response)
+        """
+        timestamp = float("-inf") if message_timestamp is None else float(message_timestamp)
+        with self._lock:
+            self._pending = timestamp if self._pending is None else min(self._pending, timestamp)
+
+    def _apply_invalidations(self) -> None:
+        """Drop responses covering the reported messages, at most once per invalidation interval."""
+        now = self.clock()
+        with self._lock:
+            if self._pending is None or now - self._applied_at < self.invalidate_interval:
+                return
+            earliest, self._pending = self._pending, None
+            self._applied_at = now
+            self._sequence += 1
+            self._applied.append((self._sequence, earliest))
+            self.invalidations += 1
+        # Windows end now, so a window contains a message unless it starts after it
+        self.invalidated_entries += self._entries.pop_where(lambda key, entry: earliest >= entry[1])
+
+    def _invalidated_since(self, sequence: int, window_start: float) -> bool:
+        """Whether an invalidation applied after ``sequence`` covers a window starting at ``window_start``."""
+        if self._sequence == sequence:
+            return False
+        if not self._applied or self._applied[0][0] > sequence + 1:
+            return True  # History no longer reaches back to the start of the computation
+        return any(applied > sequence and earliest >= window_start for applied, earliest in self._applied)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict[str, Any]: LRU statistics plus single-flight joins and invalidations
+        """
+        return {
+            **self._entries.stats(),
+            "inflight": len(self._inflight),
+            "joined": self.joined,
+            "invalidations": self.invalidations,
+            "invalidated_entries": self.invalidated_entries,
+            "bucket_seconds": self.bucket_seconds,
+        }
@@ -0,0 +1,486 @@
+"""
+Tel-Insights Streaming Alert Evaluator
+
+Evaluates frequency alerts incrementally from analyzed message events instead
+of polling the database. Each active alert configuration keeps an in-memory
+sliding window of matching messages; an alert fires as soon as a window
+reaches its threshold. Windows are rebuilt from the database on startup and
+whenever this replica takes over a partition of the alert configurations.
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from shared.config import get_settings
+from shared.database import get_db_session
+from shared.logging import LoggingMixin, get_logger, log_alert_triggered, log_database_operation
+from shared.messaging import MessageConsumer, create_consumer
+from shared.models import AlertConfig, Message
+
+from .alert_index import AlertIndex
+from .alert_state import AlertStateStore
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Newest matching messages attached to a triggered alert
+_SAMPLE_SIZE = 5
+
+
+@dataclass
+class FrequencyCriteria:
+    """
+    Compiled criteria of one frequency alert configuration.
+
+    Matching follows the database check in ``AlertAnalyzer``: a keyword
+    matches an ``ai_metadata`` keyword or a substring of the message text, a
+    topic matches an ``ai_metadata`` topic, a source matches the channel ID,
+    and the keyword, topic, sentiment and source filters are combined with AND.
+    ``AlertIndex`` implements the same rules for all configurations at once.
+    """
+
+    config_id: int
+    config_name: str
+    user_id: int
+    criteria: Dict[str, Any]
+    keywords: List[str]
+    topics: List[str]
+    sentiment: Optional[str]
+    sources: List[str]
+    threshold: int
+    window_seconds: float
+
+    @classmethod
+    def from_config(cls, config: AlertConfig) -> "FrequencyCriteria":
+        """
+        Compile an alert configuration.
+
+        Args:
+            config: Active frequency alert configuration
+
+        Returns:
+            FrequencyCriteria: Compiled criteria
+        """
+        criteria = config.criteria or {}
+        return cls(
+            config_id=config.id,
+            config_name=config.config_name,
+            user_id=config.user_id,
+            criteria=criteria,
+            keywords=[keyword.lower() for keyword in criteria.get('keywords', [])],
+            topics=[topic.lower() for topic in criteria.get('topics', [])],
+            sentiment=criteria.get('sentiment'),
+            sources=[str(source) for source in criteria.get('sources') or []],
+            threshold=criteria.get('threshold', settings.alerts.default_threshold),
+            window_seconds=criteria.get('window_minutes', settings.alerts.default_window_minutes) * 60.0,
+        )
+
+    def matches(self, message_text: Optional[str], ai_metadata: Dict[str, Any], source: Optional[str] = None) -> bool:
+        """
+        Check whether a message matches the criteria.
+
+        Args:
+            message_text: Message text
+            ai_metadata: Message AI metadata
+            source: Channel ID of the message
+
+        Returns:
+            bool: True if the message counts towards this alert
+        """
+        if self.keywords:
+            metadata_keywords = {str(keyword).lower() for keyword in ai_metadata.get('keywords') or []}
+            text = (message_text or "").lower()
+            if not any(keyword in metadata_keywords or keyword in text for keyword in self.keywords):
+                return False
+        if self.topics:
+            metadata_topics = {str(topic).lower() for topic in ai_metadata.get('topics') or []}
+            if not any(topic in metadata_topics for topic in self.topics):
+                return False
+        if self.sentiment and ai_metadata.get('sentiment') != self.sentiment:
+            return False
+        if self.sources and str(source) not in self.sources:
+            return False
+        return True
+
+
+@dataclass
+class SlidingWindow:
+    """Matching messages of one alert configuration, ordered by message timestamp."""
+
+    window_seconds: float
+    entries: List[Tuple[float, str]] = field(default_factory=list)
+    samples: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def add(self, timestamp: float, key: str, sample: Dict[str, Any], now: float) -> bool:
+        """
+        Add a message unless it is outside the window or already counted.
+
+        Returns:
+            bool: True if the message was added
+        """
+        self.expire(now)
+        if timestamp < now - self.window_seconds or key in self.samples:
+            return False
+        bisect.insort(self.entries, (timestamp, key))
+        self.samples[key] = sample
+        return True
+
+    def expire(self, now: float) -> None:
+        """Drop messages older than the window."""
+        cutoff = bisect.bisect_left(self.entries, (now - self.window_seconds, ""))
+        for _, key in self.entries[:cutoff]:
+            self.samples.pop(key, None)
+        del self.entries[:cutoff]
+
+    def newest_samples(self, limit: int = _SAMPLE_SIZE) -> List[Dict[str, Any]]:
+        return [self.samples[key] for _, key in reversed(self.entries[-limit:])]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def _sample(db_id: Optional[int], text: Optional[str], timestamp: float, ai_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Sample message entry in the alert payload format used by ``AlertAnalyzer``."""
+    return {
+        'id': db_id,
+        'text': text[:200] + "..." if text and len(text) > 200 else text,
+        'timestamp': datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(),
+        'summary': ai_metadata.get('summary', ''),
+        'topics': ai_metadata.get('topics', []),
+        'sentiment': ai_metadata.get('sentiment', ''),
+    }
+
+
+class StreamingAlertEvaluator(LoggingMixin):
+    """
+    Matches each analyzed message against all active frequency alerts.
+
+    An ``AlertIndex`` over the criteria limits each message to the
+    configurations it satisfies, so the cost per message does not grow with
+    the number of configured alerts. Events are handled on the consumer
+    thread; all state is guarded by one lock. Alert configurations are
+    reloaded every ``config_refresh_seconds``, keeping the windows of
+    configurations whose criteria did not change.
+
+    Only configurations in partitions leased by this replica are evaluated,
+    and cooldowns live in the ``AlertStateStore``, so several replicas can
+    share the load without firing an alert twice.
+    """
+
+    def __init__(
+        self,
+        on_alert: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        session_factory: Callable[[], Session] = get_db_session,
+        config_refresh_seconds: Optional[int] = None,
+        cooldown_minutes: Optional[int] = None,
+        alert_state: Optional[AlertStateStore] = None
+    ) -> None:
+        """
+        Initialize the evaluator.
+
+        Args:
+            on_alert: Called with the payload of each triggered alert
+            on_event: Called with each analyzed message event before it is evaluated
+            session_factory: Callable returning a new synchronous session
+            config_refresh_seconds: Alert configuration reload interval (defaults to ALERT_CONFIG_REFRESH_SECONDS)
+            cooldown_minutes: Minimum time between alerts of one configuration (defaults to ALERT_COOLDOWN_MINUTES)
+            alert_state: Durable cooldowns and partition leases (defaults to a store on ``session_factory``)
+        """
+        self.on_alert = on_alert
+        self.on_event = on_event
+        self.session_factory = session_factory
+        self.config_refresh_seconds = config_refresh_seconds or settings.alerts.config_refresh_seconds
+        self.cooldown_seconds = (cooldown_minutes or settings.alerts.cooldown_minutes) * 60.0
+        self._criteria: Dict[int, FrequencyCriteria] = {}
+        self._windows: Dict[int, SlidingWindow] = {}
+        self._index = AlertIndex()
+        self.alert_state = alert_state or AlertStateStore(session_factory=session_factory)
+        self._last_triggered: Dict[int, float] = {}  # Local copy of the durable cooldowns
+        self._configs_loaded_at = 0.0
+        self._lock = threading.RLock()
+        self.consumer: Optional[MessageConsumer] = None
+        self.events = 0
+        self.alerts_triggered = 0
+        self.logger.info("StreamingAlertEvaluator initialized.", config_refresh_seconds=self.config_refresh_seconds)
+
+    def load_configs(self, db: Session) -> None:
+        """
+        Load active frequency alert configurations, keeping windows of unchanged ones.
+
+        Args:
+            db: Database session
+        """
+        configs = db.query(AlertConfig).filter(AlertConfig.is_active == True).all()  # noqa: E712
+        criteria = {
+            config.id: FrequencyCriteria.from_config(config)
+            for config in configs
+            if (config.criteria or {}).get('type') == 'frequency'
+        }
+        with self._lock:
+            for config_id, compiled in criteria.items():
+                previous = self._criteria.get(config_id)
+                if previous is None or previous.criteria != compiled.criteria:
+                    self._windows[config_id] = SlidingWindow(compiled.window_seconds)
+                    self._index.add(config_id, compiled.criteria)
+            for config_id in set(self._windows) - set(criteria):
+                del self._windows[config_id]
+                self._index.remove(config_id)
+            self._criteria = criteria
+            self._configs_loaded_at = time.monotonic()
+        last_triggered = self.alert_state.last_triggered(criteria)
+        with self._lock:
+            self._last_triggered = {config_id: value.timestamp() for config_id, value in last_triggered.items()}
+        self.logger.info(log_database_operation("load_alert_configs", AlertConfig.__tablename__, count=len(criteria)))
+
+    def rebuild(self, partitions: Optional[Set[int]] = None) -> None:
+        """
+        Refill windows from messages already in the database.
+
+        Without ``partitions`` (on startup) this acquires leases, loads the
+        configurations and their durable cooldowns and refills the windows
+        of all owned configurations; otherwise only the windows of the given
+        partitions are refilled. Does not fire alerts; a window already at
+        its threshold fires on its next matching message.
+
+        Args:
+            partitions: Newly acquired partitions to refill
+        """
+        if partitions is None:
+            self.alert_state.renew_leases()
+            partitions = self.alert_state.owned_partitions()
+        db = self.session_factory()
+        try:
+            if not self._configs_loaded_at:
+                self.load_configs(db)
+            with self._lock:
+                config_ids = {
+                    config_id for config_id in self._criteria
+                    if self.alert_state.partition_of(config_id) in partitions
+                }
+                for config_id in config_ids:
+                    self._windows[config_id] = SlidingWindow(self._criteria[config_id].window_seconds)
+                longest_window = max((self._criteria[c].window_seconds for c in config_ids), default=0.0)
+            if not longest_window:
+                return
+
+            window_start = datetime.now(timezone.utc) - timedelta(seconds=longest_window)
+            rows = db.query(
+                Message.id,
+                Message.telegram_message_id,
+                Message.channel_id,
+                Message.message_text,
+                Message.message_timestamp,
+                Message.ai_metadata
+            ).filter(
+                Message.message_timestamp >= window_start,
+                Message.ai_metadata.isnot(None)
+            ).yield_per(1000)
+
+            count = 0
+            now = time.time()
+            with self._lock:
+                for db_id, message_id, channel_id, text, timestamp, ai_metadata in rows:
+                    if timestamp.tzinfo is None:  # SQLite drops the timezone
+                        timestamp = timestamp.replace(tzinfo=timezone.utc)
+                    self._add(
+                        str(channel_id), str(message_id), db_id, text, timestamp.timestamp(), ai_metadata, now, config_ids
+                    )
+                    count += 1
+                window_sizes = {config_id: len(window) for config_id, window in self._windows.items()}
+            self.logger.info(
+                log_database_operation("rebuild_alert_windows", Message.__tablename__, messages=count),
+                partitions=sorted(partitions),
+                window_sizes=window_sizes
+            )
+        finally:
+            db.close()
+
+    def _add(
+        self,
+        channel_id: str,
+        message_id: str,
+        db_id: Optional[int],
+        text: Optional[str],
+        timestamp: float,
+        ai_metadata: Dict[str, Any],
+        now: float,
+        config_ids: Optional[Set[int]] = None
+    ) -> List[int]:
+        """
+        Add a message to the window of every matching owned configuration. Caller holds the lock.
+
+        Returns:
+            List[int]: IDs of configurations whose window grew
+        """
+        key = f"{channel_id}:{message_id}"
+        grown = []
+        for config_id in self._index.match(text, ai_metadata, channel_id):
+            if config_ids is None and not self.alert_state.owns(config_id):
+                continue
+            if config_ids is not None and config_id not in config_ids:
+                continue
+            if self._windows[config_id].add(timestamp, key, _sample(db_id, text, timestamp, ai_metadata), now):
+                grown.append(config_id)
+        return grown
+
+    def handle_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Evaluate one analyzed message event, firing alerts whose threshold is reached.
+
+        Args:
+            event: Event from ``create_message_analyzed_event``
+
+        Returns:
+            bool: True once the event has been evaluated (for ACK)
+        """
+        if time.monotonic() - self._configs_loaded_at >= self.config_refresh_seconds:
+            db = self.session_factory()
+            try:
+                self.load_configs(db)
+            finally:
+                db.close()
+
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                self.logger.error("Event callback failed.", message_id=event.get('message_id'), error=str(e), exc_info=True)
+
+        ai_metadata = event.get('ai_metadata') or {}
+        now = time.time()
+        candidates = []
+        with self._lock:
+            self.events += 1
+            grown = self._add(
+                str(event.get('channel_id')),
+                str(event.get('message_id')),
+                None,
+                event.get('message_text'),
+                float(event.get('message_timestamp') or now),
+                ai_metadata,
+                now
+            )
+            for config_id in grown:
+                window = self._windows[config_id]
+                criteria = self._criteria[config_id]
+                last = self._last_triggered.get(config_id)
+                if len(window) >= criteria.threshold and (last is None or now - last >= self.cooldown_seconds):
+                    self._last_triggered[config_id] = now
+                    candidates.append(self._alert_payload(criteria, window, now))
+
+        for payload in candidates:
+            fired = self.alert_state.try_fire(
+                payload['config_id'],
+                payload['actual_message_count'],
+                self.cooldown_seconds,
+                now=datetime.fromtimestamp(now, tz=timezone.utc)
+            )
+            if fired:
+                with self._lock:
+                    self.alerts_triggered += 1
+                self._fire(payload)
+            else:
+                # Fired elsewhere before this replica took over, or the lease was lost meanwhile
+                stored = self.alert_state.last_triggered([payload['config_id']]).get(payload['config_id'])
+                if stored is not None:
+                    with self._lock:
+                        self._last_triggered[payload['config_id']] = stored.timestamp()
+        return True
+
+    def renew_leases(self) -> None:
+        """Renew partition leases, refilling the windows of acquired partitions and dropping those of lost ones."""
+        acquired, lost = self.alert_state.renew_leases()
+        with self._lock:
+            for config_id in self._criteria:
+                if self.alert_state.partition_of(config_id) in lost:
+                    self._windows[config_id] = SlidingWindow(self._criteria[config_id].window_seconds)
+        if acquired and self._configs_loaded_at:
+            self.rebuild(acquired)
+
+    def _alert_payload(self, criteria: FrequencyCriteria, window: SlidingWindow, now: float) -> Dict[str, Any]:
+        """Build the alert payload in the format of ``AlertAnalyzer`` frequency alerts."""
+        return {
+            'alert_id': f"freq_{criteria.config_id}_{int(now)}",
+            'config_id': criteria.config_id,
+            'user_id': criteria.user_id,
+            'config_name': criteria.config_name,
+            'alert_type': 'frequency',
+            'criteria': criteria.criteria,
+            'triggered_at': datetime.fromtimestamp(now, tz=timezone.utc).isoformat(),
+            'actual_message_count': len(window),
+            'threshold': criteria.threshold,
+            'time_window_minutes': criteria.window_seconds / 60,
+            'sample_messages': window.newest_samples(),
+        }
+
+    def _fire(self, payload: Dict[str, Any]) -> None:
+        self.logger.info(
+            log_alert_triggered(
+                alert_type='frequency',
+                criteria=payload['criteria'],
+                alert_id=payload['alert_id'],
+                config_name=payload['config_name'],
+                user_id=payload['user_id'],
+                actual_message_count=payload['actual_message_count'],
+                evaluation="streaming"
+            )
+        )
+        if self.on_alert:
+            try:
+                self.on_alert(payload)
+            except Exception as e:
+                self.logger.error("Alert callback failed.", alert_id=payload['alert_id'], error=str(e), exc_info=True)
+
+    def start_consuming(self) -> None:
+        """
+        Consume analyzed message events until stopped, rebuilding the windows first. Blocking.
+
+        Each replica consumes every event from a private queue bound to the
+        event routing key; a queue shared by replicas would split the events
+        between them and leave each replica's windows short. The windows are
+        rebuilt once the queue exists, so events published while this replica
+        was disconnected are read from the database instead.
+        """
+        queue_name = settings.rabbitmq.queue_message_analyzed
+        self.consumer = create_consumer(
+            f"{queue_name}.{self.alert_state.replica_id}",
+            self.handle_event,
+            routing_key=queue_name
+        )
+        try:
+            # Shared queue of earlier releases: bound to the exchange but no longer consumed
+            self.consumer.delete_queue_if_unused(queue_name)
+            self.rebuild()
+            self.consumer.start_consuming()
+        finally:
+            self.consumer.close()
+
+    def stop_consuming(self) -> None:
+        """Stop consuming; safe to call from another thread."""
+        if self.consumer and self.consumer.connection and self.consumer.connection.is_open:
+            self.consumer.connection.add_callback_threadsafe(self.consumer.stop_consuming)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get evaluator metrics.
+
+        Returns:
+            Dict[str, Any]: Events handled, alerts triggered and current window sizes
+        """
+        with self._lock:
+            return {
+                "events": self.events,
+                "alerts_triggered": self.alerts_triggered,
+                "active_configs": len(self._criteria),
+                "replica_id": self.alert_state.replica_id,
+                "owned_partitions": sorted(self.alert_state.owned_partitions()),
+                "index": self._index.stats(),
+                "window_sizes": {config_id: len(window) for config_id, window in self._windows.items()},
+            }
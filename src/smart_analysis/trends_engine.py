@@ -0,0 +1,229 @@
+"""
+Tel-Insights Trends Engine
+
+Aggregates topic and sentiment counts of analyzed messages inside the
+database instead of loading ``Message`` rows. On PostgreSQL the topics array
+is unnested with ``jsonb_array_elements_text`` and grouped by topic and
+sentiment, so only one row per (topic, sentiment) is returned. Other
+dialects (SQLite in tests) fall back to a batched scan of just the topics
+and sentiment JSON fields. Memory grows with the number of distinct topics,
+not with the number of messages. When the message archive is enabled, the
+archived days of long windows are counted from their Parquet files.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shared.archive import MessageArchive, get_message_archive
+from shared.config import get_settings
+from shared.logging import LoggingMixin, get_logger, log_database_operation
+from shared.models import Message, metadata_analyzed_filter
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+_TOPIC_SENTIMENT_SQL = text("""
+    SELECT lower(btrim(topic.value)) AS topic,
+           coalesce(m.ai_metadata ->> 'sentiment', 'neutral') AS sentiment,
+           count(*) AS message_count
+    FROM messages AS m
+    CROSS JOIN LATERAL jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(m.ai_metadata -> 'topics') = 'array'
+             THEN m.ai_metadata -> 'topics'
+             ELSE '[]'::jsonb END
+    ) AS topic(value)
+    WHERE m.message_timestamp >= :start
+      AND m.message_timestamp < :end
+      AND m.ai_metadata IS NOT NULL
+      AND NOT (m.ai_metadata ? 'provisional')
+      AND btrim(topic.value) <> ''
+    GROUP BY 1, 2
+""")
+
+_SENTIMENT_SQL = text("""
+    SELECT coalesce(m.ai_metadata ->> 'sentiment', 'neutral') AS sentiment,
+           count(*) AS message_count
+    FROM messages AS m
+    WHERE m.message_timestamp >= :start
+      AND m.message_timestamp < :end
+      AND m.ai_metadata IS NOT NULL
+      AND NOT (m.ai_metadata ? 'provisional')
+    GROUP BY 1
+""")
+
+
+@dataclass
+class TopicAggregate:
+    """Topic and sentiment counts of the analyzed messages in a time range."""
+
+    topics: Dict[str, Dict[str, int]] = field(default_factory=dict)  # Messages per sentiment per topic
+    sentiments: Dict[str, int] = field(default_factory=dict)  # Messages per sentiment
+    total_messages: int = 0
+
+    def topic_counts(self) -> Dict[str, int]:
+        """Messages per topic."""
+        return {topic: sum(by_sentiment.values()) for topic, by_sentiment in self.topics.items()}
+
+    def add_message(self, topics: Any, sentiment: Optional[str]) -> None:
+        """Count one message from its raw topics list and sentiment."""
+        sentiment = sentiment or 'neutral'
+        self.sentiments[sentiment] = self.sentiments.get(sentiment, 0) + 1
+        self.total_messages += 1
+        for topic in topics if isinstance(topics, (list, tuple)) else []:
+            topic = topic.lower().strip() if isinstance(topic, str) else ""
+            if topic:
+                by_sentiment = self.topics.setdefault(topic, {})
+                by_sentiment[sentiment] = by_sentiment.get(sentiment, 0) + 1
+
+    def merge(self, other: "TopicAggregate") -> "TopicAggregate":
+        """Add the counts of another aggregate to this one."""
+        for topic, by_sentiment in other.topics.items():
+            merged = self.topics.setdefault(topic, {})
+            for sentiment, count in by_sentiment.items():
+                merged[sentiment] = merged.get(sentiment, 0) + count
+        for sentiment, count in other.sentiments.items():
+            self.sentiments[sentiment] = self.sentiments.get(sentiment, 0) + count
+        self.total_messages += other.total_messages
+        return self
+
+
+class TrendsEngine(LoggingMixin):
+    """
+    Database-side topic/sentiment aggregation with a streaming fallback.
+    """
+
+    def __init__(self, batch_size: int = 1000, archive: Optional[MessageArchive] = None) -> None:
+        """
+        Initialize the engine.
+
+        Args:
+            batch_size: Rows fetched per batch by the fallback scan
+            archive: Archived messages to include (defaults to the process-wide archive if enabled)
+        """
+        self.batch_size = batch_size
+        self.archive = archive or (get_message_archive() if settings.archive.enabled else None)
+
+    def aggregate(self, db: Session, start: datetime, end: datetime) -> TopicAggregate:
+        """
+        Count messages per topic and sentiment in a time range.
+
+        Topics are lowercased and stripped; messages without a sentiment count as neutral.
+        Provisional ingest metadata is not an analysis and is not counted.
+
+        Args:
+            db: Database session
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+
+        Returns:
+            TopicAggregate: Counts
+        """
+        dialect_name = db.bind.dialect.name
+        self.logger.debug(
+            log_database_operation("aggregate_topics", Message.__tablename__, dialect=dialect_name),
+            start=start.isoformat(),
+            end=end.isoformat()
+        )
+        if dialect_name == "postgresql":
+            result = self._aggregate_in_database(db, start, end)
+        else:
+            result = self._aggregate_by_scan(db, start, end)
+        return result.merge(self.aggregate_archive(start, end))
+
+    async def aggregate_async(self, db: AsyncSession, start: datetime, end: datetime) -> TopicAggregate:
+        """
+        Count messages per topic and sentiment in a time range on an async session.
+
+        Archived days are read on a worker thread so the event loop is not blocked.
+
+        Args:
+            db: Async database session
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+
+        Returns:
+            TopicAggregate: Counts
+        """
+        dialect_name = db.bind.dialect.name
+        self.logger.debug(
+            log_database_operation("aggregate_topics", Message.__tablename__, dialect=dialect_name),
+            start=start.isoformat(),
+            end=end.isoformat()
+        )
+        result = TopicAggregate()
+        if dialect_name == "postgresql":
+            params = {"start": start, "end": end}
+            for topic, sentiment, count in await db.execute(_TOPIC_SENTIMENT_SQL, params):
+                result.topics.setdefault(topic, {})[sentiment] = count
+            for sentiment, count in await db.execute(_SENTIMENT_SQL, params):
+                result.sentiments[sentiment] = count
+                result.total_messages += count
+        else:
+            rows = await db.stream(self._scan_query(dialect_name, start, end).execution_options(yield_per=self.batch_size))
+            async for topics, sentiment in rows:
+                result.add_message(topics, sentiment)
+        if self.archive:
+            result.merge(await asyncio.to_thread(self.aggregate_archive, start, end))
+        return result
+
+    def aggregate_archive(self, start: datetime, end: datetime, topics: Optional[List[str]] = None) -> TopicAggregate:
+        """
+        Count archived messages per topic and sentiment in a time range.
+
+        Args:
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            topics: Count only messages with any of these topics
+
+        Returns:
+            TopicAggregate: Counts, empty without an archive or archived days in the range
+        """
+        result = TopicAggregate()
+        if not self.archive:
+            return result
+        frame = self.archive.read(start, end, topics=topics)
+        for row_topics, sentiment in zip(frame["topics"], frame["sentiment"]):
+            if sentiment is not None:  # None marks unanalyzed messages
+                result.add_message(list(row_topics), sentiment)
+        return result
+
+    def _aggregate_in_database(self, db: Session, start: datetime, end: datetime) -> TopicAggregate:
+        result = TopicAggregate()
+        params = {"start": start, "end": end}
+        for topic, sentiment, count in db.execute(_TOPIC_SENTIMENT_SQL, params):
+            result.topics.setdefault(topic, {})[sentiment] = count
+        for sentiment, count in db.execute(_SENTIMENT_SQL, params):
+            result.sentiments[sentiment] = count
+            result.total_messages += count
+        return result
+
+    def _scan_query(self, dialect_name: str, start: datetime, end: datetime) -> Select:
+        return select(Message.ai_metadata['topics'], Message.ai_metadata['sentiment']).where(
+            Message.message_timestamp >= start,
+            Message.message_timestamp < end,
+            metadata_analyzed_filter(dialect_name)
+        )
+
+    def _aggregate_by_scan(self, db: Session, start: datetime, end: datetime) -> TopicAggregate:
+        result = TopicAggregate()
+        rows = db.execute(self._scan_query(db.bind.dialect.name, start, end).execution_options(yield_per=self.batch_size))
+        for topics, sentiment in rows:
+            result.add_message(topics, sentiment)
+        return result
+
+
+_trends_engine: Optional[TrendsEngine] = None
+
+
+def get_trends_engine() -> TrendsEngine:
+    """Get the process-wide trends engine."""
+    global _trends_engine
+    if _trends_engine is None:
+        _trends_engine = TrendsEngine()
+    return _trends_engine
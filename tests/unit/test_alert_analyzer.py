@@ -0,0 +1,53 @@
+"""
+Unit tests for the database-backed alert analyzer.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import func, or_
+
+from shared.models import Message
+from smart_analysis.alert_analyzer import AlertAnalyzer
+
+
+@pytest.mark.unit
+def test_topic_summary_ignores_provisional_metadata(test_database, sample_channel):
+    """Test that messages awaiting LLM analysis are not counted as neutral in a topic-filtered summary."""
+    db = test_database()
+    now = datetime.now(timezone.utc)
+    db.add(sample_channel)
+    db.add_all([
+        Message(
+            telegram_message_id=1,
+            channel_id=sample_channel.id,
+            message_text="Chip exports rise",
+            message_timestamp=now - timedelta(minutes=10),
+            ai_metadata={"topics": ["technology"], "sentiment": "positive"}
+        ),
+        Message(
+            telegram_message_id=2,
+            channel_id=sample_channel.id,
+            message_text="New chip fab announced",
+            message_timestamp=now - timedelta(minutes=5),
+            ai_metadata={"topics": ["technology"], "keywords": ["chip"], "provisional": True}
+        ),
+    ])
+    db.commit()
+    db.close()
+
+    def get_sync_db():
+        yield test_database()
+
+    def sqlite_topics_filter(topics):
+        # The production filter is a JSONB containment, which SQLite cannot run
+        return or_(*[func.json_extract(Message.ai_metadata, "$.topics").like(f'%"{topic}"%') for topic in topics])
+
+    with patch("smart_analysis.alert_analyzer.get_sync_db", get_sync_db), \
+            patch("smart_analysis.alert_analyzer.metadata_topics_filter", sqlite_topics_filter):
+        analyzer = AlertAnalyzer(alert_state=Mock(), rollups=Mock())
+        summary = analyzer.get_recent_summary(hours=1, topics=["technology"])
+
+    assert summary["total_messages"] == 1
+    assert summary["sentiment_breakdown"] == {"positive": 1, "negative": 0, "neutral": 0}
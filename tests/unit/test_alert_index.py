@@ -0,0 +1,54 @@
+"""
+Unit tests for the inverted alert criteria index.
+"""
+
+import pytest
+
+from shared.models import AlertConfig
+from smart_analysis.alert_index import AhoCorasick, AlertIndex
+from smart_analysis.streaming_evaluator import FrequencyCriteria
+
+
+@pytest.mark.unit
+def test_aho_corasick_finds_overlapping_patterns():
+    """Test that the automaton reports every pattern, including overlapping ones."""
+    automaton = AhoCorasick(["he", "she", "hers", "rate cut", ""])
+    assert automaton.find("ushers said a rate cut") == {"he", "she", "hers", "rate cut"}
+    assert automaton.find("nothing here?") == {"he"}
+
+
+@pytest.mark.unit
+def test_alert_index_matches_like_criteria_and_updates_incrementally():
+    """Test that index matches agree with per-config matching across add, replace and remove."""
+    configs = {
+        1: {"keywords": ["AI", "Robotics"]},
+        2: {"keywords": ["rate cut"], "sentiment": "positive"},
+        3: {"topics": ["Finance"], "sources": [-1001]},
+        4: {},
+    }
+    index = AlertIndex()
+    for config_id, criteria in configs.items():
+        index.add(config_id, criteria)
+
+    messages = [
+        ("Fresh AI chips announced", {"sentiment": "neutral"}, "-1002"),
+        ("Markets cheer the rate cut", {"sentiment": "positive", "topics": ["finance"]}, "-1001"),
+        ("Quiet day", {"keywords": ["robotics"], "topics": ["Finance"]}, "-1002"),
+        (None, {}, None),
+    ]
+    for text, metadata, source in messages:
+        expected = {
+            config_id for config_id, criteria in configs.items()
+            if FrequencyCriteria.from_config(
+                AlertConfig(id=config_id, config_name="", user_id=1, criteria=criteria)
+            ).matches(text, metadata, source)
+        }
+        assert index.match(text, metadata, source) == expected
+
+    index.add(1, {"keywords": ["bitcoin"]})
+    index.remove(4)
+    assert index.match("Fresh AI chips announced", {}) == set()
+    assert index.match("Bitcoin rallies", {}) == {1}
+    assert index.stats()["configs"] == 3
+    assert index.stats()["match_all_configs"] == 0
+
@@ -0,0 +1,46 @@
+"""
+Unit tests for durable alert cooldowns and partition leases shared by replicas.
+"""
+
+import pytest
+
+from shared.models import AlertConfig
+from smart_analysis.alert_state import AlertStateStore
+
+
+@pytest.mark.unit
+def test_replicas_rebalance_partitions_and_fence_alerts(test_database, sample_user):
+    """Test that two replicas split partitions and an alert fires once across replicas and restarts."""
+    db = test_database()
+    db.add(sample_user)
+    db.add_all([
+        AlertConfig(id=config_id, user_id=sample_user.telegram_user_id, config_name=f"c{config_id}", criteria={})
+        for config_id in (1, 2)
+    ])
+    db.commit()
+    db.close()
+
+    first = AlertStateStore(test_database, replica_id="a", partitions=4, lease_seconds=30)
+    second = AlertStateStore(test_database, replica_id="b", partitions=4, lease_seconds=30)
+
+    assert first.renew_leases() == ({0, 1, 2, 3}, set())
+    assert second.renew_leases() == (set(), set())  # Everything is leased; joins the heartbeat
+    assert first.renew_leases() == (set(), {2, 3})  # Fair share is now two partitions
+    assert second.renew_leases() == ({2, 3}, set())
+    assert first.owns(1) and not first.owns(2) and second.owns(2)
+
+    assert first.try_fire(1, 5, cooldown_seconds=600)
+    assert not first.try_fire(1, 6, cooldown_seconds=600)  # Cooldown
+    assert not first.try_fire(2, 5, cooldown_seconds=600)  # Not owned
+    restarted = AlertStateStore(test_database, replica_id="a", partitions=4, lease_seconds=30)
+    assert not restarted.try_fire(1, 7, cooldown_seconds=600, fenced=False)  # Cooldown survives the restart
+    assert restarted.try_fire(1, 7, cooldown_seconds=0, fenced=False)
+
+    # A replica holding a stale token cannot fire after its partition moved
+    second.release_leases()
+    first.renew_leases()
+    assert first.owns(2)
+    second._leases, second._leases_valid_until = {2: 1}, float("inf")
+    assert not second.try_fire(2, 5, cooldown_seconds=600)
+    assert first.try_fire(2, 5, cooldown_seconds=600)
+    assert set(first.last_triggered()) == {1, 2}
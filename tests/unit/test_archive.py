@@ -0,0 +1,63 @@
+"""
+Unit tests for archiving old messages to Parquet files.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from shared.archive import MessageArchive
+from shared.models import ArchivedMessageFile, Channel, Message
+from smart_analysis.trends_engine import TrendsEngine
+
+
+@pytest.mark.unit
+def test_archive_moves_old_days_to_parquet_and_reads_them_back(test_database, sample_channel, tmp_path):
+    """Test that whole old days move to per-channel files and long-window reads include them."""
+    now = datetime(2026, 10, 16, 12, tzinfo=timezone.utc)
+    channel_id = sample_channel.id
+    db = test_database()
+    db.add_all([sample_channel, Channel(id=-100, name="Other")])
+    rows = [
+        (sample_channel.id, now - timedelta(days=40), {"topics": ["Tech", "AI"], "sentiment": "positive"}),
+        (sample_channel.id, now - timedelta(days=40, hours=1), {"topics": ["tech"]}),
+        (-100, now - timedelta(days=40), None),
+        (-100, now - timedelta(days=35), {"topics": ["finance"], "sentiment": "negative"}),
+        (sample_channel.id, now - timedelta(days=29), {"topics": ["tech"], "sentiment": "neutral"}),
+    ]
+    db.add_all([
+        Message(
+            telegram_message_id=index,
+            channel_id=channel_id,
+            message_text=f"message {index}",
+            message_timestamp=timestamp,
+            ai_metadata=ai_metadata
+        )
+        for index, (channel_id, timestamp, ai_metadata) in enumerate(rows)
+    ])
+    db.commit()
+    db.close()
+
+    archive = MessageArchive(test_database, directory=str(tmp_path), after_days=30)
+    assert archive.archive(now=now) == {"days": 2, "files": 3, "messages": 4}
+    assert archive.archive(now=now)["messages"] == 0
+
+    db = test_database()
+    assert db.query(Message).count() == 1
+    manifest = db.query(ArchivedMessageFile).order_by(ArchivedMessageFile.id).all()
+    assert [(entry.path.split("/")[0], entry.channel_id, entry.message_count) for entry in manifest] == [
+        ("day=2026-09-06", -100, 1), ("day=2026-09-06", channel_id, 2), ("day=2026-09-11", -100, 1)
+    ]
+    assert all((tmp_path / entry.path).exists() for entry in manifest)
+
+    frame = archive.read(now - timedelta(days=41), now, columns=("message_text", "ai_metadata"), topics=["TECH"])
+    assert list(frame["message_text"]) == ["message 1"]  # Like @> containment, "Tech" is not "tech"
+
+    engine = TrendsEngine(archive=archive)
+    aggregate = engine.aggregate(db, now - timedelta(days=60), now)
+    assert aggregate.total_messages == 4  # The unanalyzed archived message is skipped
+    assert aggregate.topics == {
+        "tech": {"positive": 1, "neutral": 2}, "ai": {"positive": 1}, "finance": {"negative": 1}
+    }
+    assert engine.aggregate(db, now - timedelta(days=30), now).total_messages == 1
+    db.close()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the non-blocking RabbitMQ producer's confirm tracking.
+"""
+
+import asyncio
+
+import pika
+import pytest
+from unittest.mock import Mock
+
+from shared.messaging import AsyncMessageProducer
+
+
+def _frame(method_class, delivery_tag, multiple=False):
+    return Mock(method=method_class(delivery_tag=delivery_tag, multiple=multiple))
+
+
+@pytest.mark.unit
+def test_confirms_resolve_and_unconfirmed_are_requeued():
+    """Test ack/nack resolution (including multiple) and requeue after a lost connection."""
+
+    async def scenario():
+        producer = AsyncMessageProducer(buffer_size=10, max_attempts=1)
+        producer._buffer = asyncio.Queue(maxsize=10)
+        producer._retry_ready = asyncio.Event()
+        producer._connection_lost = asyncio.Event()
+        producer.channel = Mock()
+        producer._task = Mock()  # Skip the background connect loop
+
+        for i in range(4):
+            await producer.publish_message("new_message", {"message_id": i})
+        while not producer._buffer.empty():
+            producer._publish(producer._buffer.get_nowait())
+        futures = {tag: outgoing.future for tag, outgoing in producer._unconfirmed.items()}
+
+        producer._on_delivery_confirmation(_frame(pika.spec.Basic.Ack, 2, multiple=True))
+        producer._on_delivery_confirmation(_frame(pika.spec.Basic.Nack, 3))
+        producer._requeue_unconfirmed()
+
+        return producer, futures
+
+    producer, futures = asyncio.run(scenario())
+
+    assert futures[1].result() is True and futures[2].result() is True
+    assert futures[3].result() is False
+    assert not futures[4].done()
+    assert [outgoing.message_id for outgoing in producer._retry] == ["3"]
+    assert producer._unconfirmed == {}
+
+
+@pytest.mark.unit
+def test_publish_batch_pipelines_and_bounds_nack_retries():
+    """Test that a batch is published before any confirm and nacks are retried up to max_attempts."""
+
+    async def scenario():
+        producer = AsyncMessageProducer(buffer_size=10, max_attempts=2)
+        producer._buffer = asyncio.Queue(maxsize=10)
+        producer._retry_ready = asyncio.Event()
+        producer._connection_lost = asyncio.Event()
+        producer.channel = Mock()
+        producer._task = Mock()
+        loop_task = asyncio.create_task(producer._publish_until_disconnected())
+
+        batch = asyncio.create_task(producer.publish_batch([{"message_id": i} for i in range(3)]))
+        await asyncio.sleep(0.01)
+        published_before_confirm = producer.channel.basic_publish.call_count
+
+        producer._on_delivery_confirmation(_frame(pika.spec.Basic.Ack, 1))
+        producer._on_delivery_confirmation(_frame(pika.spec.Basic.Nack, 3, multiple=True))
+        await asyncio.sleep(0.01)  # Messages 1 and 2 are republished as tags 4 and 5
+        producer._on_delivery_confirmation(_frame(pika.spec.Basic.Ack, 4))
+        producer._on_delivery_confirmation(_frame(pika.spec.Basic.Nack, 5))
+        results = await asyncio.wait_for(batch, 1)
+
+        producer._connection_lost.set()
+        await loop_task
+        return published_before_confirm, results
+
+    published_before_confirm, results = asyncio.run(scenario())
+
+    assert published_before_confirm == 3
+    assert [(r.message_id, r.acked, r.attempts) for r in results] == [
+        ("0", True, 1),
+        ("1", True, 2),
+        ("2", False, 2),
+    ]
@@ -0,0 +1,73 @@
+"""
+Unit tests for batched LLM message analysis.
+"""
+
+import json
+
+import pytest
+from unittest.mock import Mock
+
+from ai_analysis.llm_client import LLMResponse
+from ai_analysis.message_processor import AnalysisBatcher, MessageProcessor, plan_batches
+
+
+def _processor(response_content):
+    processor = MessageProcessor.__new__(MessageProcessor)
+    processor.prompt_manager = Mock()
+    processor.prompt_manager.get_prompt_with_version.return_value = ("Analyze: {messages_json}", 1)
+    processor.prompt_manager.format_prompt.side_effect = lambda template, **kwargs: template.format(**kwargs)
+    processor.llm_client = Mock(model_name="fake")
+    processor.llm_client.generate_content.return_value = LLMResponse(content=response_content, model="fake")
+    processor.result_cache = None
+    processor.triage = None
+    processor._store_ai_metadata = Mock(return_value=True)
+    processor.process_message = Mock(return_value=True)
+    return processor
+
+
+@pytest.mark.unit
+def test_plan_batches_respects_budget_and_count():
+    """Test greedy packing by token cost and item cap."""
+    assert plan_batches([5, 5, 5, 20, 1, 1, 1], lambda cost: cost, token_budget=12, max_items=2) == [
+        [5, 5], [5], [20], [1, 1], [1]
+    ]
+
+
+@pytest.mark.unit
+def test_process_batch_splits_response_and_falls_back_per_item():
+    """Test one LLM call per batch, per-message metadata and fallback for bad items."""
+    response = "```json\n" + json.dumps([
+        {"id": 0, "summary": "a", "topics": ["x"], "sentiment": "neutral", "keywords": []},
+        {"id": 2, "summary": "c", "topics": "y", "sentiment": "positive", "keywords": [], "confidence_score": 3},
+        "garbage",
+    ]) + "\n```"
+    processor = _processor(response)
+    messages = [
+        {"message_id": "10", "channel_id": "1", "message_text": "first"},
+        {"message_id": "11", "channel_id": "1", "message_text": "second"},
+        {"message_id": "10", "channel_id": "2", "message_text": "third"},
+        {"message_id": "12", "channel_id": "1", "message_text": "  "},
+    ]
+
+    assert processor.process_batch(messages) == [True, True, True, True]
+
+    processor.llm_client.generate_content.assert_called_once()
+    processor.process_message.assert_called_once_with(messages[1])
+    stored = {(call.args[0], call.args[1]): call.args[2] for call in processor._store_ai_metadata.call_args_list}
+    assert stored[("10", "1")]["summary"] == "a"
+    assert stored[("10", "2")]["topics"] == ["y"]
+    assert stored[("10", "2")]["confidence_score"] == 1.0
+    assert stored[("10", "2")]["analysis_model"] == "fake"
+
+
+@pytest.mark.unit
+def test_batcher_rejects_submits_after_close():
+    """Test that a submit racing with close fails at once instead of waiting on a stopped collector."""
+    processor = _processor("[]")
+    processor.process_batch = Mock(side_effect=lambda messages: [True] * len(messages))
+    batcher = AnalysisBatcher(processor, max_messages=4, token_budget=1000, max_wait_ms=10, max_concurrent_batches=1)
+
+    assert batcher.submit({"message_id": "1", "channel_id": "1", "message_text": "before close"}) is True
+    batcher.close()
+    assert batcher.submit({"message_id": "2", "channel_id": "1", "message_text": "after close"}) is False
+    assert processor.process_batch.call_count == 1
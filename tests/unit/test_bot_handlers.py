@@ -0,0 +1,74 @@
+"""
+Unit tests for the alerting bot's command handlers.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from alerting import bot_handlers
+from alerting.bot_handlers import TelegramBotHandlers
+from shared.models import AlertConfig, User
+
+
+def make_telegram_user(user_id: int = 4242) -> SimpleNamespace:
+    return SimpleNamespace(id=user_id, username="reader", first_name="Ada", last_name="L")
+
+
+@pytest.fixture
+def handlers(test_database):
+    def sessions():
+        yield test_database()
+
+    with patch.object(bot_handlers, "get_sync_db", side_effect=lambda: sessions()):
+        yield TelegramBotHandlers(smart_analysis=Mock())
+
+
+@pytest.mark.unit
+def test_start_registers_the_user_and_sends_the_welcome_message(handlers, test_database):
+    """Test that /start stores the user and replies with the welcome message, not the error reply."""
+    telegram_user = make_telegram_user()
+    update = SimpleNamespace(
+        effective_user=telegram_user,
+        effective_chat=SimpleNamespace(id=1),
+        message=SimpleNamespace(text="/start", reply_text=AsyncMock()),
+    )
+
+    asyncio.run(handlers.start_command(update, Mock()))
+
+    reply = update.message.reply_text.await_args.args[0]
+    assert reply.startswith("🎉 Welcome to Tel-Insights, Ada!")
+
+    session = test_database()
+    try:
+        assert session.query(User).filter(User.telegram_user_id == telegram_user.id).count() == 1
+    finally:
+        session.close()
+
+
+@pytest.mark.unit
+def test_alerts_can_be_created_listed_and_deleted(handlers, test_database):
+    """Test the alert create, list and delete paths against the database."""
+    telegram_user = make_telegram_user()
+    handlers._register_user(telegram_user)
+    user_id = telegram_user.id
+
+    created = handlers._create_user_alert(
+        user_id,
+        {"name": "Floods", "keywords": ["flood"], "threshold": 3, "window_minutes": 30},
+    )
+    assert created is True
+
+    alerts = handlers._get_user_alerts(user_id)
+    assert [alert.config_name for alert in alerts] == ["Floods"]
+
+    assert handlers._delete_user_alert(user_id, alerts[0].id) is True
+    assert handlers._get_user_alerts(user_id) == []
+
+    session = test_database()
+    try:
+        assert session.query(AlertConfig).one().is_active is False
+    finally:
+        session.close()
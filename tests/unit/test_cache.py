@@ -0,0 +1,39 @@
+"""
+Unit tests for the shared in-process LRU cache.
+"""
+
+import time
+
+import pytest
+
+from shared.cache import LRUCache
+
+
+@pytest.mark.unit
+def test_lru_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted first."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.unit
+def test_lru_ttl_expiry_and_stats():
+    """Test TTL expiry and hit/miss accounting."""
+    cache = LRUCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.02)
+    assert cache.get("key") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,87 @@
+"""
+Unit tests for local keyword/entity extraction and provisional ingest metadata.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from shared.extraction import LocalExtractor, tokenize
+
+
+@pytest.mark.unit
+def test_extracts_keywords_topics_and_entities(tmp_path):
+    """Test n-gram keywords, lexicon topics, regex and gazetteer entities."""
+    gazetteer = tmp_path / "gazetteer.json"
+    gazetteer.write_text(json.dumps({"people": ["elvira nabiullina"]}))
+    extractor = LocalExtractor(max_keywords=6, gazetteer_path=str(gazetteer))
+
+    text = (
+        "The Federal Reserve raised interest rates by 0.5% on March 12, 2024, says Jerome Powell. "
+        "Markets in New York fell $2bn; Elvira Nabiullina declined to comment. #economy https://t.me/news/1"
+    )
+    result = extractor.extract(text)
+
+    assert "t" not in tokenize(text) and "news" not in tokenize(text)
+    assert result["keywords"][0] == "economy" and len(result["keywords"]) == 6
+    assert result["topics"] == ["economy"]
+    entities = result["entities"]
+    assert entities["organizations"] == ["Federal Reserve"]
+    assert entities["locations"] == ["New York"]
+    assert entities["people"] == ["Jerome Powell", "Elvira Nabiullina"]
+    assert entities["dates"] == ["March 12, 2024"]
+    assert {"0.5%", "$2bn"} <= set(entities["other"])
+
+    metadata = extractor.provisional_metadata(text)
+    assert metadata["provisional"] is True and "sentiment" not in metadata
+    assert extractor.provisional_metadata("   ") is None
+
+
+@pytest.mark.unit
+def test_ingest_writer_stores_provisional_metadata():
+    """Test that ingested messages carry provisional metadata before LLM analysis."""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import select
+
+    from aggregator.ingest_writer import IngestWriter
+    from shared.models import Message
+    from test_ingest_writer import _make_session_factory
+
+    class RecordingProducer:
+        def __init__(self):
+            self.events = []
+
+        async def publish_message_analyzed_event(self, event):
+            self.events.append(event)
+            return True
+
+    producer = RecordingProducer()
+    message = {
+        'message_id': "1",
+        'channel_id': "100",
+        'message_text': "Missile strikes hit Kyiv as NATO meets in Brussels",
+        'message_timestamp': 1700000000.0,
+    }
+
+    async def scenario():
+        session_factory = await _make_session_factory()
+        writer = IngestWriter(
+            session_factory, batch_size=10, flush_interval_ms=5, extractor=LocalExtractor(), event_producer=producer
+        )
+        assert await writer.submit(message) is True
+        assert await writer.submit(message) is False  # Duplicate delivery publishes nothing
+        await writer.stop()
+        async with session_factory() as session:
+            return await session.scalar(select(Message.ai_metadata))
+
+    metadata = asyncio.run(scenario())
+    assert metadata["provisional"] is True
+    assert len(producer.events) == 1
+    event = producer.events[0]
+    assert event["event_type"] == "message_analyzed"
+    assert (event["message_id"], event["channel_id"], event["message_timestamp"]) == ("1", "100", 1700000000.0)
+    assert event["ai_metadata"] == metadata
+    assert "conflict" in metadata["topics"]
+    assert "Kyiv" in metadata["entities"]["locations"] and "NATO" in metadata["entities"]["organizations"]
+    assert "missile" in metadata["keywords"]
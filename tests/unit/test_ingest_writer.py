@@ -0,0 +1,138 @@
+"""
+Unit tests for the batched aggregator ingest writer.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from aggregator.ingest_writer import IngestMedia, IngestWriter
+from aggregator.media_dedup import MediaIdentityIndex, TelegramFileKey
+from shared.database import Base
+from shared.models import Channel, Media, MediaFileIdentity, Message
+
+
+async def _make_session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def enable_foreign_keys(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        async with session_maker() as session:
+            yield session
+
+    async with session_factory() as session:
+        session.add(Channel(id=100, name="Test Channel", username="test"))
+        await session.commit()
+    return session_factory
+
+
+def _message(message_id: int) -> dict:
+    return {
+        'message_id': str(message_id),
+        'channel_id': "100",
+        'message_text': f"message {message_id}",
+        'message_timestamp': 1700000000.0 + message_id,
+    }
+
+
+@pytest.mark.unit
+def test_concurrent_submits_are_flushed_in_one_batch():
+    """Test that concurrent messages share a batch and duplicates are ignored."""
+    async def scenario():
+        session_factory = await _make_session_factory()
+        index = MediaIdentityIndex(max_entries=16)
+        writer = IngestWriter(session_factory, media_index=index, batch_size=50, flush_interval_ms=20)
+        flushed_batch_sizes = []
+        original_flush = writer._flush
+
+        async def recording_flush(batch):
+            flushed_batch_sizes.append(len(batch))
+            await original_flush(batch)
+
+        writer._flush = recording_flush
+        await writer.start()
+
+        file_key = TelegramFileKey("document", 7, 8, 9)
+        media = IngestMedia("f" * 64, "gs://bucket/file", "document", 9, file_key)
+        results = await asyncio.gather(
+            writer.submit(_message(1), media),
+            writer.submit(_message(2), media),
+            *(writer.submit(_message(i)) for i in range(3, 11))
+        )
+        duplicate = await writer.submit(_message(1))
+        await writer.stop()
+
+        async with session_factory() as session:
+            message_count = await session.scalar(select(func.count()).select_from(Message))
+            media_count = await session.scalar(select(func.count()).select_from(Media))
+            identity_count = await session.scalar(select(func.count()).select_from(MediaFileIdentity))
+            known = await MediaIdentityIndex(max_entries=16).lookup(session, file_key)
+        return results, duplicate, flushed_batch_sizes, message_count, media_count, identity_count, known, index
+
+    results, duplicate, batch_sizes, message_count, media_count, identity_count, known, index = asyncio.run(scenario())
+
+    assert all(results)
+    assert duplicate is False
+    assert batch_sizes[0] == 10
+    assert message_count == 10
+    assert media_count == 1
+    assert identity_count == 1
+    assert known.media_hash == "f" * 64
+    assert index.stats()["size"] == 1
+
+
+@pytest.mark.unit
+def test_bad_messages_fail_alone_and_flush_errors_do_not_stop_the_writer():
+    """Test that malformed or rejected messages fail individually and a crashing flush keeps the task alive."""
+    async def scenario():
+        session_factory = await _make_session_factory()
+        writer = IngestWriter(session_factory, batch_size=50, flush_interval_ms=20)
+
+        with pytest.raises(ValueError):
+            await writer.submit({**_message(1), 'channel_id': "unknown"})
+
+        orphan = {**_message(2), 'channel_id': "999"}  # Violates the channel foreign key
+        results = await asyncio.gather(
+            writer.submit(_message(3)), writer.submit(orphan), writer.submit(_message(4)),
+            return_exceptions=True
+        )
+
+        async def crashing_flush(batch):
+            raise RuntimeError("rollback failed")
+
+        writer._flush = crashing_flush
+        with pytest.raises(RuntimeError):
+            await writer.submit(_message(5))
+        del writer._flush
+        after_crash = await writer.submit(_message(6))
+        await asyncio.wait_for(writer.stop(), 1)
+
+        async with session_factory() as session:
+            stored = await session.scalar(select(func.count()).select_from(Message))
+        return results, after_crash, stored
+
+    results, after_crash, stored = asyncio.run(scenario())
+
+    assert results[0] is True and results[2] is True
+    assert isinstance(results[1], Exception)
+    assert after_crash is True
+    assert stored == 3
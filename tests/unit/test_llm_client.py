@@ -0,0 +1,131 @@
+"""
+Unit tests for the LLM client retry path and error classification.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+from unittest.mock import Mock, patch
+
+from ai_analysis.llm_client import (
+    GeminiClient,
+    LLMError,
+    LLMFatalError,
+    LLMRateLimitError,
+    backoff_delay,
+    classify_error,
+)
+from ai_analysis.rate_governor import LLMRateGovernor
+
+
+def _client(*outcomes):
+    client = GeminiClient.__new__(GeminiClient)
+    client.model_name = "fake"
+    client.max_retries = 3
+    client.governor = LLMRateGovernor(requests_per_minute=6000, tokens_per_minute=10 ** 7, max_in_flight=2)
+    calls = iter(outcomes)
+
+    async def generate_content_async(prompt, **kwargs):
+        outcome = next(calls)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Mock(text=outcome, candidates=[], prompt_feedback=None)
+
+    client.model = Mock(generate_content_async=generate_content_async)
+    return client
+
+
+@pytest.mark.unit
+def test_error_classification_and_jitter():
+    """Test fatal vs retryable mapping and that backoff stays within its ceiling."""
+    assert isinstance(classify_error(google_exceptions.PermissionDenied("bad key")), LLMFatalError)
+    assert isinstance(classify_error(google_exceptions.ResourceExhausted("GenerateRequestsPerDay quota")), LLMFatalError)
+    assert isinstance(classify_error(google_exceptions.ResourceExhausted("Resource has been exhausted")), LLMRateLimitError)
+    assert not isinstance(classify_error(google_exceptions.ServiceUnavailable("down")), LLMFatalError)
+    assert all(0 <= backoff_delay(10) <= 30.0 for _ in range(100))
+
+
+@pytest.mark.unit
+def test_async_retries_retryable_and_stops_on_fatal():
+    """Test that transient errors are retried without blocking and fatal ones are raised at once."""
+    with patch("ai_analysis.llm_client.backoff_delay", return_value=0):
+        client = _client(google_exceptions.ServiceUnavailable("down"), "ok")
+        assert asyncio.run(client.generate_content_async("p")).content == "ok"
+
+        client = _client(google_exceptions.Unauthenticated("invalid key"), "never")
+        with pytest.raises(LLMFatalError):
+            asyncio.run(client.generate_content_async("p"))
+
+    with patch("ai_analysis.llm_client.backoff_delay", return_value=5):
+        client = _client(google_exceptions.ServiceUnavailable("down"), "ok")
+        with pytest.raises(LLMError, match="deadline"):
+            asyncio.run(client.generate_content_async("p", deadline_seconds=1))
+
+
+@pytest.mark.unit
+def test_async_rate_limit_backs_off_governor():
+    """Test that a 429 cuts the governor's rates and a success restores them gradually."""
+    with patch("ai_analysis.llm_client.backoff_delay", return_value=0):
+        client = _client(google_exceptions.ResourceExhausted("Resource has been exhausted"), "ok")
+        asyncio.run(client.generate_content_async("p"))
+
+    stats = client.governor.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["rate_factor"] == 0.55
+    assert stats["calls"] == 2
+
+
+@pytest.mark.unit
+def test_gemini_requests_are_accepted_by_the_sdk_request_type():
+    """Test that the kwargs passed to the real GenerativeModel build a valid GenerateContentRequest."""
+    import google.ai.generativelanguage as glm
+    import google.generativeai as genai
+
+    reply = glm.GenerateContentResponse(candidates=[
+        glm.Candidate(content=glm.Content(parts=[glm.Part(text="ok")], role="model"), finish_reason=1)
+    ])
+    sent = []
+
+    async def generate_async(request):
+        sent.append(request)
+        return reply
+
+    client = GeminiClient.__new__(GeminiClient)
+    client.model_name = "gemini-test"
+    client.model = genai.GenerativeModel(model_name="gemini-test")
+    client.model._client = Mock(generate_content=lambda request: sent.append(request) or reply)
+    client.model._async_client = Mock(generate_content=generate_async)
+
+    assert client._request("p", 5.0, 0, max_tokens=16).content == "ok"
+    assert asyncio.run(client._request_async("p", 5.0, 0, temperature=0.3)).content == "ok"
+    assert all(isinstance(request, glm.GenerateContentRequest) for request in sent)
+    assert sent[0].generation_config.max_output_tokens == 16
+
+
+@pytest.mark.unit
+def test_sync_gemini_request_is_bounded_by_the_timeout():
+    """Test that a hung blocking Gemini call times out and frees its governor slot for a retry."""
+    release = threading.Event()
+    replies = iter([None, "ok"])
+
+    def generate_content(prompt, **kwargs):
+        text = next(replies)
+        if text is None:
+            release.wait(5)
+        return Mock(text=text or "late", candidates=[], prompt_feedback=None)
+
+    client = _client()
+    client.model = Mock(generate_content=generate_content)
+    try:
+        with patch("ai_analysis.llm_client.backoff_delay", return_value=0), \
+                patch("ai_analysis.llm_client.settings.llm.timeout_seconds", 0.2):
+            started = time.monotonic()
+            response = client.generate_content("p")
+        assert response.content == "ok"
+        assert time.monotonic() - started < 2
+        assert client.governor.stats()["in_flight"] == 0
+    finally:
+        release.set()
@@ -0,0 +1,115 @@
+"""
+Unit tests for latency-based LLM routing over the deterministic fake backend.
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import patch
+
+from ai_analysis.llm_client import (
+    FakeLLMClient,
+    LLMClient,
+    LLMError,
+    LLMFatalError,
+    LLMQuotaExhaustedError,
+    fake_analysis_response,
+)
+from ai_analysis.llm_router import LLMRouter
+
+
+@pytest.mark.unit
+def test_router_prefers_faster_provider_and_fails_over():
+    """Test that traffic shifts to the faster provider and failures fail over to another one."""
+    slow = FakeLLMClient("slow", latency_seconds=0.02, max_retries=0)
+    fast = FakeLLMClient("fast", latency_seconds=0.001, max_retries=0)
+    router = LLMRouter([slow, fast], window_seconds=60, cooldown_seconds=60, cost_weight=0)
+    assert isinstance(router, LLMClient)
+
+    for _ in range(10):
+        router.generate_content('Message: "Markets rally after rate cut"')
+    assert fast.requests > slow.requests
+    assert router.ranked_backends()[0] is fast
+
+    fast.failure_rate = 1.0
+    response = router.generate_content('Message: "Markets rally after rate cut"')
+    assert response.model == "slow-model"
+    assert json.loads(response.content)["topics"]
+
+    stats = router.stats()
+    assert stats["fast"]["failures"] == 1
+    assert stats["fast"]["error_rate"] > 0 and not stats["fast"]["in_cooldown"]
+
+
+@pytest.mark.unit
+def test_router_async_cooldown_and_exhaustion():
+    """Test that repeated failures put a provider in cooldown and total failure raises LLMError."""
+    flaky = FakeLLMClient("flaky", failure_rate=1.0, max_retries=0)
+    steady = FakeLLMClient("steady", latency_seconds=0.005, cost_per_1k_tokens=1.0, max_retries=0)
+    router = LLMRouter([flaky, steady], window_seconds=60, cooldown_seconds=60, cost_weight=1.0)
+
+    async def scenario():
+        batch_prompt = 'Messages:\n[{"id": 0, "text": "a"}, {"id": 1, "text": "b"}]'
+        return [await router.generate_content_async(batch_prompt) for _ in range(4)]
+
+    responses = asyncio.run(scenario())
+    assert all(len(json.loads(r.content)) == 2 for r in responses)
+    assert router.stats()["flaky"]["in_cooldown"] is True
+    assert flaky.requests == 3  # Skipped while cooling down
+    assert router.ranked_backends()[-1] is flaky
+
+    steady.failure_rate = 1.0
+    with pytest.raises(LLMError):
+        router.generate_content('Message: "x"')
+
+
+@pytest.mark.unit
+def test_request_specific_fatal_errors_do_not_cool_down_provider():
+    """Test that a per-prompt rejection fails over without counting against the provider."""
+    def reject_long_prompts(prompt):
+        if "too long" in prompt:
+            raise LLMFatalError("Blocked by safety filters: prompt rejected")
+        return fake_analysis_response(prompt)
+
+    picky = FakeLLMClient("picky", responder=reject_long_prompts, max_retries=0)
+    backup = FakeLLMClient("backup", latency_seconds=0.005, cost_per_1k_tokens=1.0, max_retries=0)
+    router = LLMRouter([picky, backup], window_seconds=60, cooldown_seconds=60, cost_weight=1.0)
+
+    for _ in range(3):
+        assert router.generate_content('Message: "too long"').model == "backup-model"
+    stats = router.stats()
+    assert stats["picky"]["failures"] == 0 and not stats["picky"]["in_cooldown"]
+    assert router.generate_content('Message: "fine"').model == "picky-model"
+
+    picky.responder = lambda prompt: (_ for _ in ()).throw(LLMQuotaExhaustedError("Quota exhausted"))
+    router.generate_content('Message: "fine"')
+    assert router.stats()["picky"]["in_cooldown"] is True
+
+
+@pytest.mark.unit
+def test_anthropic_client_calls_the_pinned_sdk_messages_api():
+    """Test that AnthropicClient reaches the messages endpoint through the installed SDK."""
+    import anthropic
+    import httpx
+
+    from ai_analysis.llm_client import AnthropicClient
+
+    def handler(request):
+        assert request.url.path == "/v1/messages"
+        assert json.loads(request.content)["max_tokens"] == 64
+        return httpx.Response(200, json={
+            "id": "msg_1", "type": "message", "role": "assistant", "model": "claude-test",
+            "content": [{"type": "text", "text": "ok"}], "stop_reason": "end_turn", "stop_sequence": None,
+            "usage": {"input_tokens": 3, "output_tokens": 1},
+        })
+
+    sync_http = httpx.Client(transport=httpx.MockTransport(handler))
+    async_http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    sync_cls, async_cls = anthropic.Anthropic, anthropic.AsyncAnthropic
+    with patch("anthropic.Anthropic", lambda **kwargs: sync_cls(http_client=sync_http, **kwargs)), \
+            patch("anthropic.AsyncAnthropic", lambda **kwargs: async_cls(http_client=async_http, **kwargs)):
+        client = AnthropicClient(api_key="test-key", model_name="claude-test", max_retries=0)
+
+    assert client.generate_content("p", max_tokens=64).content == "ok"
+    assert asyncio.run(client.generate_content_async("p", max_tokens=64)).content == "ok"
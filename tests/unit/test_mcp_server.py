@@ -0,0 +1,100 @@
+"""
+Unit tests for the async read path of the Smart Analysis MCP server.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from shared.database import Base
+from shared.models import Channel, Message
+from smart_analysis.mcp_server import SmartAnalysisMCP, SummarizeNewsRequest, TopicTrendsRequest
+
+
+async def _make_session_factory(messages):
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        async with session_maker() as session:
+            yield session
+
+    async with session_factory() as session:
+        session.add(Channel(id=100, name="Test Channel", username="test"))
+        session.add_all(messages)
+        await session.commit()
+    return session_factory
+
+
+@pytest.mark.unit
+def test_summary_and_trends_read_through_async_sessions():
+    """Test that summaries and trends are computed from async session queries."""
+    now = datetime.now(timezone.utc)
+    metadata = [
+        {"topics": ["tech"], "sentiment": "positive", "summary": "Chips"},
+        {"topics": ["tech", "ai"], "sentiment": "negative", "summary": "Models"},
+        {"topics": ["finance"], "sentiment": "positive"},
+        {"topics": ["tech"], "summary": "Not analyzed yet", "provisional": True},
+    ]
+    messages = [
+        Message(
+            telegram_message_id=index,
+            channel_id=100,
+            message_text="text",
+            message_timestamp=now - timedelta(minutes=10 + index),
+            ai_metadata=ai_metadata
+        )
+        for index, ai_metadata in enumerate(metadata)
+    ]
+
+    async def scenario():
+        mcp = SmartAnalysisMCP(async_session_factory=await _make_session_factory(messages))
+        mcp.alert_analyzer.rollups = None
+        summary = await mcp._summarize_news_impl(SummarizeNewsRequest(time_range_hours=1))
+        trends = await mcp._topic_trends_impl(TopicTrendsRequest(time_range_hours=1, min_count=2))
+        return summary, trends
+
+    summary, trends = asyncio.run(scenario())
+    assert summary["message_count"] == 3
+    assert summary["top_topics"] == {"tech": 2, "ai": 1, "finance": 1}
+    assert [item["summary"] for item in summary["key_summaries"]] == ["Chips", "Models"]
+    assert [(trend["topic"], trend["message_count"]) for trend in trends["trends"]] == [("tech", 2)]
+
+
+@pytest.mark.unit
+def test_slow_tool_request_times_out_without_blocking_health():
+    """Test that a slow tool request does not hold up other requests and fails with 504 at its timeout."""
+
+    async def scenario():
+        mcp = SmartAnalysisMCP(async_session_factory=await _make_session_factory([]), request_timeout_seconds=0.5)
+        started = asyncio.Event()
+
+        async def slow_trends(request):
+            started.set()
+            await asyncio.sleep(5)
+
+        mcp._topic_trends_impl = slow_trends
+        transport = httpx.ASGITransport(app=mcp.get_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+            trends = asyncio.create_task(client.post("/tools/topic_trends", json={}))
+            await started.wait()
+            health = await client.get("/health")
+            health_served_while_pending = not trends.done()
+            return health.status_code, health_served_while_pending, (await trends).status_code
+
+    assert asyncio.run(scenario()) == (200, True, 504)
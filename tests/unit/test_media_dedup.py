@@ -0,0 +1,38 @@
+"""
+Unit tests for Telegram file identity pre-deduplication.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import Mock
+
+from aggregator.media_dedup import MediaIdentityIndex, TelegramFileKey, get_file_key
+
+
+@pytest.mark.unit
+def test_get_file_key_for_document_and_photo():
+    """Test file identity extraction for documents and photos."""
+    document_media = Mock(document=Mock(id=11, access_hash=22, size=3333))
+    assert get_file_key(document_media) == TelegramFileKey("document", 11, 22, 3333)
+
+    largest_size = Mock(spec=["size"], size=4444)
+    photo_media = Mock(spec=["photo"], photo=Mock(id=55, access_hash=66, sizes=[Mock(size=1), largest_size]))
+    assert get_file_key(photo_media) == TelegramFileKey("photo", 55, 66, 4444)
+
+    assert get_file_key(Mock(spec=[])) is None
+
+
+@pytest.mark.unit
+def test_identity_index_serves_remembered_keys_from_cache():
+    """Test that remembered identities are resolved without a database query."""
+    key = TelegramFileKey("document", 11, 22, 3333)
+    index = MediaIdentityIndex(max_entries=16)
+    index.remember(key, 5, "a" * 64)
+
+    session = Mock()  # Any database access would fail on a plain Mock
+    known = asyncio.run(index.lookup(session, key))
+
+    assert known.media_id == 5
+    assert known.media_hash == "a" * 64
+    assert index.stats()["hits"] == 1
@@ -0,0 +1,80 @@
+"""
+Unit tests for the streaming media download pipeline.
+"""
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+from unittest.mock import Mock
+
+from aggregator.media_pipeline import MediaDownloadPipeline
+
+
+class FakeDownloadClient:
+    """Telethon stand-in that yields a payload in fixed-size chunks."""
+
+    def __init__(self, payload: bytes, delay: float = 0.0):
+        self.payload = payload
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chunk_sizes = []
+
+    async def iter_download(self, media, chunk_size=None, request_size=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for start in range(0, len(self.payload), chunk_size):
+                await asyncio.sleep(self.delay)
+                chunk = self.payload[start:start + chunk_size]
+                self.chunk_sizes.append(len(chunk))
+                yield chunk
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.unit
+def test_download_hashes_and_spools_in_chunks(tmp_path):
+    """Test that the digest matches the full payload and chunks stay bounded."""
+    payload = os.urandom(20 * 1024 + 123)
+    client = FakeDownloadClient(payload)
+    pipeline = MediaDownloadPipeline(client, chunk_size_kb=8, max_concurrent_downloads=2, spool_dir=str(tmp_path))
+
+    download = asyncio.run(pipeline.download(Mock(id=1, media=object())))
+
+    assert download.media_hash == hashlib.sha256(payload).hexdigest()
+    assert download.file_size == len(payload)
+    assert max(client.chunk_sizes) <= 8 * 1024
+    with open(download.spool_path, "rb") as spooled:
+        assert spooled.read() == payload
+
+    download.cleanup()
+    assert not os.path.exists(download.spool_path)
+
+
+@pytest.mark.unit
+def test_download_respects_concurrency_cap(tmp_path):
+    """Test that no more than max_concurrent_downloads run at once."""
+    client = FakeDownloadClient(b"x" * 4096 * 3, delay=0.001)
+    pipeline = MediaDownloadPipeline(client, chunk_size_kb=4, max_concurrent_downloads=2, spool_dir=str(tmp_path))
+
+    async def run_all():
+        return await asyncio.gather(*(pipeline.download(Mock(id=i, media=object())) for i in range(6)))
+
+    downloads = asyncio.run(run_all())
+
+    assert client.max_in_flight == 2
+    for download in downloads:
+        download.cleanup()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.unit
+def test_empty_download_returns_none_and_cleans_up(tmp_path):
+    """Test that an empty download yields None without leaving spool files."""
+    pipeline = MediaDownloadPipeline(FakeDownloadClient(b""), spool_dir=str(tmp_path))
+
+    assert asyncio.run(pipeline.download(Mock(id=1, media=object()))) is None
+    assert os.listdir(tmp_path) == []
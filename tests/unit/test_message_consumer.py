@@ -0,0 +1,49 @@
+"""
+Unit tests for concurrent message consumption.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock, patch
+
+from shared.messaging import MessageConsumer
+
+
+@pytest.mark.unit
+def test_worker_pool_runs_concurrently_and_settles_on_connection_thread():
+    """Test that callbacks overlap and acks/nacks go through add_callback_threadsafe."""
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max_in_flight": 0}
+
+    def callback(message):
+        with lock:
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        return message["ok"]
+
+    with patch.object(MessageConsumer, "_setup_connection"):
+        consumer = MessageConsumer("queue", callback, prefetch_count=1, workers=3)
+    consumer.connection = Mock()
+    channel = Mock()
+
+    for tag in range(1, 4):
+        body = json.dumps({"message_id": tag, "ok": tag != 2}).encode()
+        consumer._message_handler(channel, Mock(delivery_tag=tag), None, body)
+
+    # No settlement may happen on the worker threads themselves
+    channel.basic_ack.assert_not_called()
+    consumer._executor.shutdown(wait=True)
+
+    for call in consumer.connection.add_callback_threadsafe.call_args_list:
+        call.args[0]()
+
+    assert consumer.prefetch_count == 3
+    assert state["max_in_flight"] == 3
+    assert sorted(c.kwargs["delivery_tag"] for c in channel.basic_ack.call_args_list) == [1, 3]
+    channel.basic_nack.assert_called_once_with(delivery_tag=2, requeue=False)
@@ -0,0 +1,69 @@
+"""
+Unit tests for storing AI analysis results.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ai_analysis import message_processor
+from ai_analysis.message_processor import MessageProcessor
+from shared.models import Channel, Message
+
+
+@pytest.mark.unit
+def test_metadata_is_stored_on_the_message_of_the_requested_channel(test_database):
+    """Test that equal Telegram message IDs in different channels are not confused."""
+    db = test_database()
+    first_channel = Channel(id=1001, name="First", username="first")
+    second_channel = Channel(id=1002, name="Second", username="second")
+    posted_at = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+    db.add_all([first_channel, second_channel])
+    db.add_all([
+        Message(
+            telegram_message_id=7,
+            channel_id=first_channel.id,
+            message_text="First channel post",
+            message_timestamp=posted_at - timedelta(hours=1),
+            ai_metadata={"keywords": ["first"], "provisional": True}
+        ),
+        Message(
+            telegram_message_id=7,
+            channel_id=second_channel.id,
+            message_text="Second channel post",
+            message_timestamp=posted_at,
+            ai_metadata={"keywords": ["second"], "provisional": True}
+        ),
+    ])
+    db.commit()
+    db.close()
+
+    def get_sync_db():
+        yield test_database()
+
+    processor = MessageProcessor.__new__(MessageProcessor)
+    processor._publish_analyzed_event = Mock()
+    rollups = Mock()
+    analysis = {"summary": "s", "topics": ["news"], "sentiment": "neutral"}
+    with patch.object(message_processor, "get_sync_db", get_sync_db), \
+            patch.object(message_processor, "get_metadata_rollups", return_value=rollups), \
+            patch.object(message_processor.settings.rollups, "enabled", True):
+        assert processor._store_ai_metadata("7", "1002", dict(analysis), message_timestamp=posted_at.timestamp())
+        assert not processor._store_ai_metadata("7", "1002", dict(analysis), message_timestamp=posted_at.timestamp() + 60)
+
+    db = test_database()
+    try:
+        stored = {row.channel_id: row.ai_metadata for row in db.query(Message)}
+    finally:
+        db.close()
+    assert stored[1001] == {"keywords": ["first"], "provisional": True}
+    assert stored[1002] == analysis
+
+    record_args = rollups.record.call_args
+    assert record_args.args[1] == 1002
+    assert record_args.kwargs["previous"] == {"keywords": ["second"], "provisional": True}
+
+    event = processor._publish_analyzed_event.call_args.args[0]
+    assert (event["message_id"], event["channel_id"], event["message_text"]) == ("7", "1002", "Second channel post")
+    assert event["message_timestamp"] == posted_at.timestamp()
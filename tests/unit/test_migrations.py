@@ -0,0 +1,104 @@
+"""
+Unit tests for Alembic revisions that must run against existing databases.
+"""
+
+import importlib.util
+import os
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+VERSIONS = os.path.join(os.path.dirname(__file__), "..", "..", "migrations", "versions")
+
+
+def load_revision(filename: str):
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(VERSIONS, filename))
+    revision = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(revision)
+    return revision
+
+
+def run_revision(connection, filename: str, direction: str = "upgrade") -> None:
+    revision = load_revision(filename)
+    with Operations.context(MigrationContext.configure(connection)):
+        getattr(revision, direction)()
+
+
+@pytest.mark.unit
+def test_unique_message_index_deduplicates_an_existing_table():
+    """Test that the ON CONFLICT index is created on a messages table from before the ingest writer."""
+    engine = sa.create_engine("sqlite:///:memory:")
+    with engine.begin() as connection:
+        connection.execute(sa.text(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY, telegram_message_id BIGINT, channel_id BIGINT, "
+            "message_text TEXT, message_timestamp DATETIME)"
+        ))
+        connection.execute(sa.text(
+            "CREATE INDEX idx_messages_telegram_id_channel ON messages (telegram_message_id, channel_id)"
+        ))
+        connection.execute(sa.text(
+            "INSERT INTO messages VALUES "
+            "(1, 10, 100, 'first', '2026-10-01 10:00:00'), "
+            "(2, 10, 100, 'redelivered', '2026-10-01 10:00:00'), "
+            "(3, 10, 200, 'other channel', '2026-10-01 10:00:00')"
+        ))
+
+        run_revision(connection, "0002_unique_message_index.py")
+        run_revision(connection, "0002_unique_message_index.py")  # Idempotent
+
+        rows = connection.execute(sa.text("SELECT id, message_text FROM messages ORDER BY id")).all()
+        assert rows == [(1, "first"), (3, "other channel")]
+        index = {i["name"]: i for i in sa.inspect(connection).get_indexes("messages")}["idx_messages_telegram_id_channel"]
+        assert index["unique"] and index["column_names"] == ["telegram_message_id", "channel_id", "message_timestamp"]
+
+        connection.execute(sa.text(
+            "INSERT INTO messages VALUES (4, 10, 100, 'again', '2026-10-01 10:00:00') "
+            "ON CONFLICT (telegram_message_id, channel_id, message_timestamp) DO NOTHING"
+        ))
+        assert connection.execute(sa.text("SELECT count(*) FROM messages")).scalar() == 2
+
+        run_revision(connection, "0002_unique_message_index.py", "downgrade")
+        index = {i["name"]: i for i in sa.inspect(connection).get_indexes("messages")}["idx_messages_telegram_id_channel"]
+        assert not index["unique"]
+
+
+def postgresql_op(relkind, first_message=None) -> Mock:
+    """Alembic op stub on a PostgreSQL bind whose scalar queries return relkind, then the oldest message."""
+    bind = Mock()
+    bind.dialect.name = "postgresql"
+    bind.execute.return_value.scalar.side_effect = [relkind, first_message, "messages_id_seq"]
+    return Mock(get_bind=Mock(return_value=bind))
+
+
+@pytest.mark.unit
+def test_partition_revision_respects_partition_enabled():
+    """Test that the partition revision leaves the table alone when PARTITION_ENABLED is false."""
+    revision = load_revision("0003_partition_messages.py")
+    op = postgresql_op("r")
+    disabled = SimpleNamespace(partitions=SimpleNamespace(enabled=False, interval="week", premake=4))
+    with patch.object(revision, "op", op), patch.object(revision, "get_settings", return_value=disabled):
+        revision.upgrade()
+
+    op.execute.assert_not_called()
+    op.get_bind.return_value.execute.assert_not_called()
+
+
+@pytest.mark.unit
+def test_partition_revision_builds_its_own_frozen_schema():
+    """Test that the conversion DDL comes from the revision itself rather than the live models."""
+    revision = load_revision("0003_partition_messages.py")
+    op = postgresql_op("r")
+    enabled = SimpleNamespace(partitions=SimpleNamespace(enabled=True, interval="week", premake=1))
+    with patch.object(revision, "op", op), patch.object(revision, "get_settings", return_value=enabled):
+        revision.upgrade()
+
+    statements = [call.args[0] for call in op.execute.call_args_list]
+    assert "CREATE TABLE messages_default PARTITION OF messages DEFAULT" in statements
+    assert sum("PARTITION OF messages FOR VALUES" in statement for statement in statements) == 2
+    assert "ALTER TABLE messages ADD PRIMARY KEY (id, message_timestamp)" in statements
+    assert statements[-len(revision.INDEXES):] == list(revision.INDEXES)
+    assert not hasattr(revision, "PartitionManager")
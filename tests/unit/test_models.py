@@ -4,7 +4,12 @@ Unit tests for Tel-Insights database models.
 
 import pytest
 from datetime import datetime, timezone
-from shared.models import Channel, Message, Media, User, AlertConfig, Prompt
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+from shared.models import (
+    Channel, Message, Media, User, AlertConfig, Prompt,
+    metadata_keywords_filter, metadata_sentiment_filter, metadata_topics_filter,
+)
 
 
 @pytest.mark.unit
@@ -145,4 +150,23 @@ def test_message_media_relationship(db_session, sample_channel, sample_media):
     
     assert queried_message.media is not None
     assert queried_message.media.media_type == "photo"
-    assert queried_message.media.media_hash == sample_media.media_hash 
\ No newline at end of file
+    assert queried_message.media.media_hash == sample_media.media_hash 
+
+
+@pytest.mark.unit
+def test_metadata_filters_match_postgresql_index_expressions():
+    """Test that metadata filters compile to the operators and expressions the JSONB indexes cover."""
+    def compile_pg(clause):
+        return " ".join(str(clause.compile(dialect=postgresql.dialect())).split())
+
+    # Containment on the bare column with a JSONB operand; whether the bind is rendered
+    # with an explicit ::JSONB cast depends on the SQLAlchemy version and does not affect the index
+    topics = metadata_topics_filter(["AI"])
+    assert compile_pg(topics).startswith("messages.ai_metadata @> %(ai_metadata_1)s")
+    assert isinstance(topics.right.type, JSONB) and topics.right.value == {"topics": ["ai"]}
+    assert compile_pg(metadata_keywords_filter(["Rate Cut", "fed"])) == (
+        "(messages.ai_metadata -> 'keywords') ?| ARRAY[%(param_1)s, %(param_2)s]"
+    )
+    assert compile_pg(metadata_sentiment_filter("negative")) == (
+        "(messages.ai_metadata ->> 'sentiment') = %(param_1)s"
+    )
@@ -0,0 +1,77 @@
+"""
+Unit tests for range partitioning of the messages table.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.partitions import MessagePartition, PartitionManager
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class RecordingConnection:
+    """Stands in for a PostgreSQL connection and records the SQL it is given."""
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, relkind, first_message):
+        self.answers = {"relkind": relkind, "min(message_timestamp)": first_message, "pg_get_serial_sequence":
+                        "public.messages_id_seq", "to_regclass(:name)": "messages_default"}
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement.compile(dialect=self.dialect)).split())
+        self.statements.append(sql)
+        answer = next((value for key, value in self.answers.items() if key in sql), None)
+        return type("Result", (), {"scalar": lambda _self: answer})()
+
+
+@pytest.mark.unit
+def test_plan_premakes_partitions_and_detaches_expired_ones():
+    """Test that planning skips existing periods, aligns weeks to Monday and detaches past retention."""
+    manager = PartitionManager(interval="week", premake=2, retention_days=30)
+    now = utc(2026, 10, 16, 21)  # Friday
+    existing = [
+        MessagePartition("messages_p20260831", utc(2026, 8, 31), utc(2026, 9, 7)),
+        MessagePartition("messages_p20261012", utc(2026, 10, 12), utc(2026, 10, 19)),
+    ]
+
+    to_create, to_detach = manager.plan(existing, now)
+
+    assert to_create == [(utc(2026, 10, 19), utc(2026, 10, 26)), (utc(2026, 10, 26), utc(2026, 11, 2))]
+    assert to_detach == [existing[0]]
+    assert manager.partition_name(to_create[0][0]) == "messages_p20261019"
+    assert PartitionManager(interval="day", premake=0).periods(utc(2026, 10, 15, 5), now) == [
+        (utc(2026, 10, 15), utc(2026, 10, 16)), (utc(2026, 10, 16), utc(2026, 10, 17))
+    ]
+
+
+@pytest.mark.unit
+def test_convert_rebuilds_plain_table_as_partitioned():
+    """Test that conversion copies rows into partitions before recreating keys and indexes."""
+    manager = PartitionManager(interval="week", premake=1)
+    connection = RecordingConnection("r", utc(2026, 10, 8))
+
+    assert manager.convert(connection, now=utc(2026, 10, 16))
+    sql = connection.statements
+
+    def position(fragment):
+        return next(i for i, statement in enumerate(sql) if fragment in statement)
+
+    assert "PARTITION BY RANGE (message_timestamp)" in sql[position("CREATE TABLE messages (LIKE messages_previous")]
+    attached = [statement for statement in sql if "ATTACH PARTITION" in statement]
+    assert [statement.split()[5] for statement in attached] == [
+        "messages_p20261005", "messages_p20261012", "messages_p20261019"
+    ]
+    assert position("ATTACH PARTITION") < position("INSERT INTO messages (") < position("DROP TABLE messages_previous")
+    assert position("DROP TABLE messages_previous") < position("ADD PRIMARY KEY (id, message_timestamp)")
+    assert position("OWNED BY NONE") < position("DROP TABLE messages_previous") < position("OWNED BY messages.id")
+    assert "(telegram_message_id, channel_id, message_timestamp)" in sql[position("idx_messages_telegram_id_channel")]
+    assert position("ADD PRIMARY KEY") < position("CREATE INDEX idx_messages_ai_keywords")
+
+    assert not manager.convert(RecordingConnection("p", None))
@@ -0,0 +1,95 @@
+"""
+Unit tests for the in-memory prompt cache.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from ai_analysis.prompt_manager import CompiledPrompt, PromptManager, initialize_default_prompts
+from shared.models import Prompt
+
+
+@pytest.mark.unit
+def test_compiled_prompt_matches_str_format():
+    """Test that pre-split rendering equals str.format, including escaped braces and fallbacks."""
+    template = 'Message: "{message_text}"\n{{"summary": "..."}} {message_text}'
+    compiled = CompiledPrompt.compile("p", 1, template)
+
+    assert compiled.fields == ("message_text",)
+    assert compiled.render(message_text="hi") == template.format(message_text="hi")
+    assert CompiledPrompt.compile("p", 1, "{value:.2f}").render(value=1) == "1.00"
+    with pytest.raises(KeyError):
+        compiled.render()
+
+
+@pytest.mark.unit
+def test_active_prompt_cached_and_refreshed_on_version_change(test_database):
+    """Test that lookups skip the database until a new active version is detected."""
+    sessions = []
+
+    def get_sync_db():
+        session = test_database()
+        sessions.append(session)
+        yield session
+
+    with patch("ai_analysis.prompt_manager.get_sync_db", get_sync_db):
+        manager = PromptManager(refresh_seconds=60)
+        other_process = PromptManager(refresh_seconds=60)
+        other_process.save_prompt("text_analysis", "v1 {message_text}")
+
+        assert manager.get_prompt_with_version("text_analysis") == ("v1 {message_text}", 1)
+        queries = len(sessions)
+        assert manager.get_prompt("text_analysis") == "v1 {message_text}"
+        assert manager.format_prompt("v1 {message_text}", message_text="x") == "v1 x"
+        assert len(sessions) == queries
+
+        other_process.save_prompt("text_analysis", "v2 {message_text}")
+        assert manager.get_prompt_with_version("text_analysis")[1] == 1
+
+        manager._checked_at -= 61
+        assert manager.get_prompt_with_version("text_analysis") == ("v2 {message_text}", 2)
+
+
+@pytest.mark.unit
+def test_missing_prompt_cached_as_absent_until_refresh(test_database):
+    """Test that a prompt without an active version is not queried again until it is activated."""
+    sessions = []
+
+    def get_sync_db():
+        session = test_database()
+        sessions.append(session)
+        yield session
+
+    with patch("ai_analysis.prompt_manager.get_sync_db", get_sync_db):
+        manager = PromptManager(refresh_seconds=60)
+        assert manager.get_prompt_with_version("batch_text_analysis") is None
+        queries = len(sessions)
+        for _ in range(5):
+            assert manager.get_prompt_with_version("batch_text_analysis") is None
+        assert len(sessions) == queries
+
+        PromptManager(refresh_seconds=60).save_prompt("batch_text_analysis", "batch {messages_json}")
+        manager._checked_at -= 61
+        assert manager.get_prompt_with_version("batch_text_analysis") == ("batch {messages_json}", 1)
+
+
+@pytest.mark.unit
+def test_default_prompts_keep_their_version_across_restarts(test_database):
+    """Test that re-initializing unchanged default prompts does not add versions."""
+    def get_sync_db():
+        yield test_database()
+
+    with patch("ai_analysis.prompt_manager.get_sync_db", get_sync_db):
+        initialize_default_prompts()
+        initialize_default_prompts()
+        manager = PromptManager(refresh_seconds=60)
+        assert manager.get_prompt_with_version("text_analysis")[1] == 1
+
+        manager.save_prompt("text_analysis", "edited {message_text}", skip_unchanged=True)
+        assert manager.get_prompt_with_version("text_analysis") == ("edited {message_text}", 2)
+
+    db = test_database()
+    try:
+        assert db.query(Prompt).filter(Prompt.name == "text_analysis").count() == 2
+    finally:
+        db.close()
@@ -0,0 +1,115 @@
+"""
+Unit tests for the token bucket rate limiter.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+from shared.rate_limit import FileTokenBucket, TokenBucket
+
+
+@pytest.mark.unit
+def test_token_bucket_bursts_then_waits_for_refill():
+    """Test that the bucket allows a burst up to capacity and then paces acquisitions."""
+    bucket = TokenBucket(rate=50.0, capacity=2)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    start = time.monotonic()
+    assert bucket.acquire()
+    assert time.monotonic() - start >= 0.015
+
+    assert not bucket.acquire(timeout=0.0)
+    with pytest.raises(ValueError):
+        bucket.acquire(tokens=3)
+
+
+@pytest.mark.unit
+def test_file_token_bucket_shares_budget(tmp_path):
+    """Test that two buckets on the same state file draw from one budget."""
+    path = str(tmp_path / "bucket")
+    first = FileTokenBucket(path, rate=0.001, capacity=3)
+    second = FileTokenBucket(path, rate=0.001, capacity=3)
+
+    assert first.try_acquire(2)
+    assert not second.try_acquire(2)
+    assert second.try_acquire(1)
+    assert first.available < 1
+
+
+@pytest.mark.unit
+def test_governor_falls_back_to_process_buckets_without_fcntl(tmp_path):
+    """Test that the module imports without fcntl (Windows) and the governor uses in-process buckets."""
+    import importlib.util
+    import sys
+
+    import shared.rate_limit
+    from ai_analysis.rate_governor import LLMRateGovernor
+
+    spec = importlib.util.spec_from_file_location("rate_limit_without_fcntl", shared.rate_limit.__file__)
+    module = importlib.util.module_from_spec(spec)
+    with patch.dict(sys.modules, {"fcntl": None}):
+        spec.loader.exec_module(module)
+    assert module.FILE_BUCKETS_SUPPORTED is False
+    with pytest.raises(NotImplementedError):
+        module.FileTokenBucket(str(tmp_path / "bucket"), rate=1.0)
+
+    with patch("ai_analysis.rate_governor.FILE_BUCKETS_SUPPORTED", False):
+        governor = LLMRateGovernor(requests_per_minute=60, tokens_per_minute=6000, lock_dir=str(tmp_path))
+    assert not isinstance(governor._requests, FileTokenBucket)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.unit
+def test_async_callers_wait_for_slots_held_by_sync_callers_without_polling():
+    """Test that async admission shares the in-flight cap with sync callers and does not spin on the loop."""
+    from ai_analysis.rate_governor import LLMRateGovernor
+
+    governor = LLMRateGovernor(requests_per_minute=6000, tokens_per_minute=10 ** 7, max_in_flight=1)
+    held, release = threading.Event(), threading.Event()
+
+    def sync_call():
+        with governor.limit("p"):
+            held.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=sync_call)
+    worker.start()
+    held.wait(5)
+
+    async def scenario():
+        sleeps = []
+        real_sleep = asyncio.sleep
+
+        async def counting_sleep(delay, *args):
+            sleeps.append(delay)
+            return await real_sleep(delay, *args)
+
+        with patch("ai_analysis.rate_governor.asyncio.sleep", counting_sleep):
+            # A caller cancelled while waiting must not leak the slot it is still queued for
+            cancelled = asyncio.ensure_future(governor.limit_async("p").__aenter__())
+            await real_sleep(0.05)
+            cancelled.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await cancelled
+
+            waiter = asyncio.ensure_future(governor.limit_async("p").__aenter__())
+            await real_sleep(0.2)
+            assert not waiter.done()
+            release.set()
+            waited = await asyncio.wait_for(waiter, timeout=5)
+        return waited, sleeps
+
+    waited, sleeps = asyncio.run(scenario())
+    worker.join(5)
+    assert waited >= 0.2
+    assert sleeps == []
+    # The admitted caller was released when its context closed with the loop, and nothing leaked
+    assert governor.stats()["in_flight"] == 0
+    assert governor._slots.acquire(blocking=False)
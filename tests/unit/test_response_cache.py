@@ -0,0 +1,128 @@
+"""
+Unit tests for the MCP response cache.
+"""
+
+import asyncio
+
+import pytest
+
+from smart_analysis.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+def test_identical_requests_share_one_computation_per_bucket():
+    """Test single-flight de-duplication, bucket expiry and invalidation."""
+    clock = FakeClock()
+    cache = ResponseCache(bucket_seconds=60, max_entries=8, clock=clock)
+    calls = []
+
+    async def compute():
+        calls.append(clock.now)
+        await asyncio.sleep(0.01)
+        return {"call": len(calls)}
+
+    async def scenario():
+        params = {"time_range_hours": 1, "topics": None}
+        concurrent = await asyncio.gather(*[cache.get_or_compute("summarize_news", params, compute) for _ in range(5)])
+        repeated = await cache.get_or_compute("summarize_news", {"topics": None, "time_range_hours": 1}, compute)
+        clock.now += 60
+        next_bucket = await cache.get_or_compute("summarize_news", params, compute)
+
+        pending = asyncio.ensure_future(cache.get_or_compute("summarize_news", params | {"time_range_hours": 2}, compute))
+        await asyncio.sleep(0)
+        cache.invalidate()  # Arrives while the computation is running
+        stale = await pending
+        fresh = await cache.get_or_compute("summarize_news", params | {"time_range_hours": 2}, compute)
+        return concurrent, repeated, next_bucket, stale, fresh
+
+    concurrent, repeated, next_bucket, stale, fresh = asyncio.run(scenario())
+    assert concurrent == [{"call": 1}] * 5
+    assert repeated == {"call": 1}
+    assert next_bucket == {"call": 2}
+    assert (stale, fresh) == ({"call": 3}, {"call": 4})
+    assert cache.stats()["joined"] == 4
+
+
+@pytest.mark.unit
+def test_failures_are_not_cached_and_old_entries_are_evicted():
+    """Test that errors reach every waiter without being cached, and LRU eviction."""
+    cache = ResponseCache(bucket_seconds=60, max_entries=2, clock=FakeClock())
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database unavailable")
+
+    async def value(result):
+        return result
+
+    async def scenario():
+        outcomes = await asyncio.gather(
+            cache.get_or_compute("topic_trends", {}, failing),
+            cache.get_or_compute("topic_trends", {}, failing),
+            return_exceptions=True
+        )
+        recovered = await cache.get_or_compute("topic_trends", {}, lambda: value("ok"))
+        for hours in (1, 2, 3):
+            await cache.get_or_compute("topic_trends", {"hours": hours}, lambda: value(hours))
+        return outcomes, recovered
+
+    outcomes, recovered = asyncio.run(scenario())
+    assert [type(outcome) for outcome in outcomes] == [RuntimeError, RuntimeError]
+    assert len(attempts) == 1
+    assert recovered == "ok"
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 2
+
+
+@pytest.mark.unit
+def test_invalidations_are_coalesced_and_only_drop_windows_containing_the_message():
+    """Test that a stream of analyzed messages costs one eviction per interval, limited to affected windows."""
+    clock = FakeClock()
+    cache = ResponseCache(bucket_seconds=600, max_entries=8, invalidate_interval_seconds=10, clock=clock)
+    calls = []
+
+    def compute(hours):
+        async def run():
+            calls.append(hours)
+            return {"hours": hours, "call": len(calls)}
+        return run
+
+    async def lookup(hours):
+        return await cache.get_or_compute("topic_trends", {"hours": hours}, compute(hours), window_seconds=hours * 3600)
+
+    async def scenario():
+        await lookup(1)
+        await lookup(24)
+
+        # Late analysis of a message from 5 hours ago only affects the 24 hour window
+        cache.invalidate(clock.now - 5 * 3600)
+        hour_after_old = await lookup(1)
+        day_after_old = await lookup(24)
+
+        # A burst of new messages within the interval is applied once, when the interval has passed
+        for offset in range(20):
+            cache.invalidate(clock.now - offset)
+        clock.now += 5
+        hour_within_interval = await lookup(1)
+        clock.now += 5
+        hour_after_interval = await lookup(1)
+        day_after_interval = await lookup(24)
+        return hour_after_old, day_after_old, hour_within_interval, hour_after_interval, day_after_interval
+
+    hour_after_old, day_after_old, hour_within_interval, hour_after_interval, day_after_interval = asyncio.run(scenario())
+    assert hour_after_old == {"hours": 1, "call": 1}
+    assert day_after_old == {"hours": 24, "call": 3}
+    assert hour_within_interval == {"hours": 1, "call": 1}
+    assert (hour_after_interval["call"], day_after_interval["call"]) == (4, 5)
+    stats = cache.stats()
+    assert stats["invalidations"] == 2 and stats["invalidated_entries"] == 3
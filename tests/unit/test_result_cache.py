@@ -0,0 +1,59 @@
+"""
+Unit tests for the LLM result cache.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from prometheus_client import REGISTRY
+
+from ai_analysis.result_cache import LLMResultCache, make_cache_key, normalize_text, purge_expired_results
+from shared.models import LLMResultCacheEntry
+
+
+def _lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("llm_result_cache_lookups_total", {"result": result}) or 0.0
+
+
+@pytest.mark.unit
+def test_cache_key_ignores_formatting_but_not_prompt_or_model():
+    """Test that reposts normalize to one key while the prompt template and model stay significant."""
+    original = "BREAKING: Central bank raises rates https://t.me/a/1 @newsbot"
+    repost = "breaking:  central bank raises rates\nhttps://example.com/x"
+
+    assert normalize_text(original) == normalize_text(repost) == "breaking: central bank raises rates"
+    template = "Analyze: {message_text}"
+    key = make_cache_key(original, "text_analysis", template, "gemini")
+    assert make_cache_key(repost, "text_analysis", template, "gemini") == key
+    assert make_cache_key(original, "text_analysis", "Summarize: {message_text}", "gemini") != key
+    assert make_cache_key(original, "text_analysis", template, "other") != key
+
+
+@pytest.mark.unit
+def test_cache_tiers_and_expiry(test_database):
+    """Test LRU hits, database hits after a restart, copies on read and TTL expiry."""
+    cache = LLMResultCache(session_factory=test_database, max_entries=10, ttl_seconds=60)
+    key = make_cache_key("text", "text_analysis", "Analyze: {message_text}", "gemini")
+    before = {result: _lookups(result) for result in ("memory_hit", "db_hit", "miss")}
+
+    assert cache.get(key) is None
+    cache.set(key, {"summary": "s", "topics": ["a"]}, "text_analysis", 1, "gemini")
+    cache.get(key)["topics"].append("mutated")
+    assert cache.get(key) == {"summary": "s", "topics": ["a"]}
+
+    restarted = LLMResultCache(session_factory=test_database, max_entries=10, ttl_seconds=60)
+    assert restarted.get(key) == {"summary": "s", "topics": ["a"]}
+    assert restarted.get(key) is not None
+    assert restarted.stats()["db_hits"] == 1 and restarted.stats()["memory_hits"] == 1
+    assert cache.stats()["hit_rate"] == round(2 / 3, 4)
+    assert {result: _lookups(result) - count for result, count in before.items()} == {
+        "memory_hit": 3, "db_hit": 1, "miss": 1
+    }
+
+    db = test_database()
+    db.get(LLMResultCacheEntry, key).expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    assert LLMResultCache(session_factory=test_database).get(key) is None
+    assert purge_expired_results(db) == 1
+    db.close()
@@ -0,0 +1,63 @@
+"""
+Unit tests for time-bucketed metadata rollups.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from shared.rollups import MetadataRollups, total_count
+
+NOW = datetime(2024, 3, 10, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+def test_plan_uses_hours_for_whole_hours_and_coarser_buckets_when_compacted():
+    """Test that a range is split into minute edges, whole hours and compacted days."""
+    rollups = MetadataRollups(minute_retention_hours=2, hour_retention_days=1)
+    assert rollups.plan(NOW - timedelta(minutes=100), NOW, now=NOW) == [
+        ("minute", datetime(2024, 3, 10, 10, 50, tzinfo=timezone.utc), datetime(2024, 3, 10, 11, tzinfo=timezone.utc)),
+        ("hour", datetime(2024, 3, 10, 11, tzinfo=timezone.utc), datetime(2024, 3, 10, 12, tzinfo=timezone.utc)),
+        ("minute", datetime(2024, 3, 10, 12, tzinfo=timezone.utc), NOW),
+    ]
+    segments = rollups.plan(NOW - timedelta(days=3), NOW, now=NOW)
+    assert [granularity for granularity, _, _ in segments] == ["day", "hour", "minute"]
+    assert segments[0][1] == datetime(2024, 3, 7, tzinfo=timezone.utc)
+    assert segments[1][1] == datetime(2024, 3, 9, tzinfo=timezone.utc)  # Minutes before 10:00 were dropped
+
+
+@pytest.mark.unit
+def test_record_reanalysis_and_compaction_keep_counts(test_database):
+    """Test that counts follow re-analysis and survive compaction into coarser buckets."""
+    rollups = MetadataRollups(test_database, minute_retention_hours=2, hour_retention_days=1)
+    db = test_database()
+    analyses = [
+        (NOW - timedelta(minutes=5), {"topics": ["Tech"], "keywords": ["ai"], "sentiment": "positive"}),
+        (NOW - timedelta(minutes=20), {"topics": ["tech", "Finance"], "keywords": [], "sentiment": "negative"}),
+        (NOW - timedelta(days=2), {"topics": ["tech"], "keywords": [], "sentiment": "neutral"}),
+    ]
+    for timestamp, metadata in analyses:
+        rollups.record(db, 1001, timestamp, metadata)
+    rollups.record(db, 1001, NOW, {"topics": ["tech"], "provisional": True})  # Not counted
+    rollups.record(  # Re-analysis replaces the counts of the first analysis
+        db, 1001, analyses[0][0], {"topics": ["science"], "sentiment": "positive"}, previous=analyses[0][1]
+    )
+    db.commit()
+    db.close()
+
+    counts = rollups.counts(NOW - timedelta(hours=1), NOW + timedelta(minutes=1), ("topic", "keyword", "total"), now=NOW)
+    assert counts["topic"] == {"tech": {"negative": 1}, "finance": {"negative": 1}, "science": {"positive": 1}}
+    assert counts["keyword"] == {}
+    assert total_count(counts["total"]) == 2
+
+    removed = rollups.compact(now=NOW)
+    assert removed["hour_buckets_compacted"] > 0 and removed["minute_buckets_removed"] > 0
+    week = rollups.counts(NOW - timedelta(days=7), NOW + timedelta(minutes=1), ("topic", "channel"), now=NOW)
+    assert week["topic"]["tech"] == {"negative": 1, "neutral": 1}
+    assert total_count(week["channel"]) == 3
+
+    # A second (e.g. concurrent replica's) run folds nothing it did not delete itself
+    assert rollups.compact(now=NOW) == {"minute_buckets_removed": 0, "hour_buckets_compacted": 0}
+    assert rollups.counts(NOW - timedelta(days=7), NOW + timedelta(minutes=1), ("topic",), now=NOW) == {
+        "topic": week["topic"]
+    }
@@ -0,0 +1,146 @@
+"""
+Unit tests for the alerting bot's Smart Analysis client.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from alerting.smart_analysis_client import SmartAnalysisClient, SmartAnalysisUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_client(handler, clock, **kwargs) -> SmartAnalysisClient:
+    return SmartAnalysisClient(
+        base_url="http://smart-analysis",
+        transport=httpx.MockTransport(handler),
+        clock=clock,
+        fresh_seconds=30,
+        stale_seconds=600,
+        **kwargs
+    )
+
+
+@pytest.mark.unit
+def test_cached_responses_are_served_fresh_then_stale_while_revalidating():
+    """Test that concurrent misses share one call and stale responses are refreshed in the background."""
+    clock = FakeClock()
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"message_count": len(calls)})
+
+    async def scenario():
+        client = make_client(handler, clock)
+        first = await asyncio.gather(*[client.summarize_news(1) for _ in range(3)])
+        fresh = await client.summarize_news(1)
+        clock.now += 31
+        stale = await client.summarize_news(1)
+        await asyncio.sleep(0.05)  # Let the background refresh finish
+        refreshed = await client.summarize_news(1)
+        await client.aclose()
+        return first, fresh, stale, refreshed
+
+    first, fresh, stale, refreshed = asyncio.run(scenario())
+    assert [response["message_count"] for response in first] == [1, 1, 1]
+    assert (fresh["message_count"], stale["message_count"], refreshed["message_count"]) == (1, 1, 2)
+    assert calls == ["/tools/summarize_news"] * 2
+
+
+@pytest.mark.unit
+def test_circuit_opens_after_failures_and_recovers_after_reset():
+    """Test that failures open the circuit, stale responses cover the outage and a trial call closes it."""
+    clock = FakeClock()
+    healthy = {"value": True}
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        if not healthy["value"]:
+            return httpx.Response(504, json={"detail": "Request timed out"})
+        return httpx.Response(200, json={"trends": [{"topic": "tech", "message_count": 3}]})
+
+    async def scenario():
+        client = make_client(handler, clock, failure_threshold=2, reset_seconds=60)
+        await client.topic_trends(24)
+        healthy["value"] = False
+
+        errors = []
+        for hours in (1, 2, 3):
+            try:
+                await client.topic_trends(hours)
+            except SmartAnalysisUnavailable as e:
+                errors.append(str(e))
+        circuit_after_failures = client.breaker.state
+
+        clock.now += 31
+        stale = await client.topic_trends(24)  # Served from the cache; the refresh is refused by the open circuit
+        await asyncio.sleep(0)
+        calls_while_open = len(calls)
+
+        clock.now += 30
+        healthy["value"] = True
+        recovered = await client.topic_trends(5)
+        await client.aclose()
+        return errors, circuit_after_failures, stale, calls_while_open, recovered, client.breaker.state
+
+    errors, circuit_after_failures, stale, calls_while_open, recovered, final_state = asyncio.run(scenario())
+    assert len(errors) == 3 and "circuit is open" in errors[2]
+    assert circuit_after_failures == "open"
+    assert stale["trends"][0]["topic"] == "tech"
+    assert calls_while_open == 3
+    assert recovered["trends"] and final_state == "closed"
+
+
+@pytest.mark.unit
+def test_cancelled_or_crashed_trial_call_does_not_wedge_the_circuit():
+    """Test that a half-open trial that is cancelled or raises unexpectedly still lets a later trial through."""
+    clock = FakeClock()
+    mode = {"value": "down"}
+
+    async def handler(request):
+        if mode["value"] == "down":
+            return httpx.Response(503)
+        if mode["value"] == "hang":
+            await asyncio.sleep(10)
+        if mode["value"] == "crash":
+            raise RuntimeError("unexpected transport bug")
+        return httpx.Response(200, json={"trends": []})
+
+    async def scenario():
+        client = make_client(handler, clock, failure_threshold=1, reset_seconds=60)
+        with pytest.raises(SmartAnalysisUnavailable):
+            await client.topic_trends(1)
+
+        clock.now += 60
+        mode["value"] = "hang"
+        trial = asyncio.ensure_future(client._fetch(("t", "1"), "/tools/topic_trends", {}, 5))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        clock.now += 60
+        mode["value"] = "crash"
+        with pytest.raises(RuntimeError):
+            await client.topic_trends(2)
+
+        clock.now += 60
+        mode["value"] = "up"
+        recovered = await client.topic_trends(3)
+        await client.aclose()
+        return recovered, client.breaker.state
+
+    recovered, state = asyncio.run(scenario())
+    assert recovered == {"trends": []}
+    assert state == "closed"
@@ -0,0 +1,118 @@
+"""
+Unit tests for streaming frequency alert evaluation.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pika.exceptions import ChannelClosedByBroker
+from unittest.mock import Mock, patch
+
+from shared.messaging import MessageConsumer, _queues_to_declare, create_message_analyzed_event
+from shared.models import Message
+from smart_analysis.streaming_evaluator import StreamingAlertEvaluator
+
+
+def _event(message_id, text, keywords=(), topics=(), sentiment="neutral", age_seconds=0):
+    return create_message_analyzed_event(
+        str(message_id),
+        "1001234567890",
+        text,
+        time.time() - age_seconds,
+        {"summary": text, "keywords": list(keywords), "topics": list(topics), "sentiment": sentiment}
+    )
+
+
+@pytest.mark.unit
+def test_rebuild_then_fire_on_threshold_crossing(
+    test_database, sample_channel, sample_user, sample_alert_config, sample_message
+):
+    """Test that windows are rebuilt from the database and the alert fires on the crossing event only."""
+    db = test_database()
+    sample_message.message_timestamp = datetime.now(timezone.utc) - timedelta(minutes=5)
+    old = Message(
+        telegram_message_id=1,
+        channel_id=sample_channel.id,
+        message_text="AI news from yesterday",
+        message_timestamp=datetime.now(timezone.utc) - timedelta(hours=3),
+        ai_metadata={"keywords": ["ai"]}
+    )
+    db.add_all([sample_channel, sample_user, sample_alert_config, sample_message, old])
+    db.commit()
+    db.close()
+
+    fired = []
+    evaluator = StreamingAlertEvaluator(on_alert=fired.append, session_factory=test_database, config_refresh_seconds=3600)
+    evaluator.rebuild()
+    assert list(evaluator.stats()["window_sizes"].values()) == [1]  # Old message is outside the window
+
+    assert evaluator.handle_event(_event(2, "Markets are calm", keywords=["markets"]))
+    for message_id in range(3, 6):
+        evaluator.handle_event(_event(message_id, f"New AI model number {message_id}"))
+    evaluator.handle_event(_event(5, "New AI model number 5"))  # Redelivery is not counted twice
+    assert fired == []
+
+    evaluator.handle_event(_event(6, "Old post", keywords=["technology"], age_seconds=7200))  # Outside window
+    evaluator.handle_event(_event(7, "Chips", keywords=["technology"]))
+    evaluator.handle_event(_event(8, "More AI"))  # In cooldown
+
+    assert len(fired) == 1
+    alert = fired[0]
+    assert alert["actual_message_count"] == 5 and alert["threshold"] == 5
+    assert alert["config_name"] == "Tech News Alert"
+    assert alert["sample_messages"][0]["text"] == "Chips"
+    assert evaluator.stats()["alerts_triggered"] == 1
+
+
+@pytest.mark.unit
+def test_each_replica_consumes_a_private_queue_and_rebuilds_before_consuming(test_database):
+    """Test that analyzed events are consumed per replica and the unconsumed shared queue is removed."""
+    calls = []
+
+    class FakeConsumer:
+        def delete_queue_if_unused(self, queue_name):
+            calls.append(("delete", queue_name))
+            return True
+
+        def start_consuming(self):
+            calls.append(("consume",))
+
+        def close(self):
+            calls.append(("close",))
+
+    def fake_create_consumer(queue_name, callback, routing_key=None):
+        calls.append(("declare", queue_name, routing_key))
+        return FakeConsumer()
+
+    evaluator = StreamingAlertEvaluator(session_factory=test_database, config_refresh_seconds=3600)
+    evaluator.alert_state.replica_id = "replica-a"
+    with patch("smart_analysis.streaming_evaluator.create_consumer", fake_create_consumer), \
+            patch.object(evaluator, "rebuild", side_effect=lambda: calls.append(("rebuild",))):
+        evaluator.start_consuming()
+
+    assert calls == [
+        ("declare", "message_analyzed.replica-a", "message_analyzed"),
+        ("delete", "message_analyzed"),
+        ("rebuild",),
+        ("consume",),
+        ("close",),
+    ]
+    assert "message_analyzed" not in _queues_to_declare().values()
+
+
+@pytest.mark.unit
+def test_shared_queue_is_kept_while_a_consumer_is_attached():
+    """Test that deleting the legacy shared queue leaves it alone when it is still in use."""
+    channel = Mock()
+    channel.queue_delete.side_effect = ChannelClosedByBroker(406, "PRECONDITION_FAILED - queue in use")
+    consumer = MessageConsumer.__new__(MessageConsumer)
+    consumer.connection = Mock(is_open=True)
+    consumer.connection.channel.return_value = channel
+
+    assert consumer.delete_queue_if_unused("message_analyzed") is False
+    channel.queue_delete.assert_called_once_with(queue="message_analyzed", if_unused=True)
+
+    channel.queue_delete.side_effect = None
+    channel.queue_delete.return_value.method.message_count = 12
+    assert consumer.delete_queue_if_unused("message_analyzed") is True
@@ -0,0 +1,48 @@
+"""
+Unit tests for database-side topic trend aggregation.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from shared.models import Message
+from smart_analysis.trends_engine import TrendsEngine
+
+
+@pytest.mark.unit
+def test_scan_aggregates_topics_and_sentiment(db_session, sample_channel):
+    """Test that the fallback scan counts normalized topics per sentiment within the range."""
+    now = datetime.now(timezone.utc)
+    metadata = [
+        {"topics": ["Tech", " AI "], "sentiment": "positive"},
+        {"topics": ["tech", ""], "sentiment": "negative"},
+        {"topics": "not-a-list"},
+        {"summary": "no topics"},
+        {"topics": ["tech"], "keywords": ["tech"], "provisional": True},  # Ingested, not analyzed yet
+    ]
+    db_session.add(sample_channel)
+    db_session.add_all([
+        Message(
+            telegram_message_id=index,
+            channel_id=sample_channel.id,
+            message_text="text",
+            message_timestamp=now - timedelta(minutes=index),
+            ai_metadata=ai_metadata
+        )
+        for index, ai_metadata in enumerate(metadata)
+    ])
+    db_session.add(Message(
+        telegram_message_id=99,
+        channel_id=sample_channel.id,
+        message_text="old",
+        message_timestamp=now - timedelta(days=2),
+        ai_metadata={"topics": ["tech"], "sentiment": "neutral"}
+    ))
+    db_session.commit()
+
+    aggregate = TrendsEngine(batch_size=2).aggregate(db_session, now - timedelta(hours=1), now + timedelta(seconds=1))
+    assert aggregate.topics == {"tech": {"positive": 1, "negative": 1}, "ai": {"positive": 1}}
+    assert aggregate.topic_counts() == {"tech": 2, "ai": 1}
+    assert aggregate.sentiments == {"positive": 1, "negative": 1, "neutral": 2}
+    assert aggregate.total_messages == 4
@@ -0,0 +1,89 @@
+"""
+Unit tests for the pre-LLM message triage stage.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from ai_analysis.llm_client import LLMError
+from ai_analysis.message_processor import MessageProcessor
+from ai_analysis.triage import MessageTriage, detect_language, triage_metadata
+
+
+def _triage(**kwargs):
+    options = dict(min_chars=15, min_words=3, max_link_ratio=0.7, languages="", dedup_window_seconds=60, dedup_size=100)
+    options.update(kwargs)
+    return MessageTriage(**options)
+
+
+@pytest.mark.unit
+def test_rules_skip_low_value_messages_and_count_them():
+    """Test each content rule and the per-reason counters."""
+    triage = _triage(languages="en,ru")
+
+    assert triage.classify("Ok").reason == "too_short"
+    assert triage.classify("🔥🔥🔥 !!!").reason == "no_text_content"
+    assert triage.classify("https://example.com/article @channel").reason == "link_only"
+    assert triage.classify("Read this great story https://example.com/a/very/long/path/to/the/article?id=1234567890&ref=channel").reason == "link_heavy"
+    assert triage.classify("Der Bundestag hat heute das neue Gesetz mit großer Mehrheit beschlossen").reason == (
+        "language_filtered"
+    )
+    assert triage.classify("The central bank raised interest rates by half a point today") is None
+    assert triage.classify("Центральный банк повысил ключевую ставку на половину пункта") is None
+
+    stats = triage.stats()
+    assert stats["checked"] == 7 and stats["skipped"] == 5
+    assert stats["skipped_by_reason"]["too_short"] == 1
+
+    assert detect_language("El gobierno anunció que la reforma de las pensiones") == "es"
+    metadata = triage_metadata("Ok", triage.classify("Ok"))
+    assert metadata["triage"] == {"skipped": True, "reason": "too_short"} and metadata["topics"] == []
+
+
+@pytest.mark.unit
+def test_duplicates_short_circuit_without_llm_call():
+    """Test that a copy is skipped with a back-reference while redelivery of the first is not."""
+    triage = _triage()
+    text = "Breaking: the central bank raised interest rates by half a point"
+    assert triage.check_duplicate(text, "1:10") is None
+    triage.remember(text, "1:10")
+    assert triage.check_duplicate(text, "1:10") is None
+    assert triage.check_duplicate("  " + text.upper() + " https://t.me/x", "2:7").duplicate_of == "1:10"
+
+    processor = MessageProcessor.__new__(MessageProcessor)
+    processor.triage = _triage()
+    processor.llm_client = Mock(model_name="fake")
+    processor.prompt_manager = Mock()
+    processor.prompt_manager.get_prompt_with_version.return_value = ("{message_text}", 1)
+    processor.result_cache = None
+    processor._store_ai_metadata = Mock(return_value=True)
+
+    assert processor.process_message({"message_id": "5", "channel_id": "1", "message_text": "👍"}) is True
+    processor.llm_client.generate_content.assert_not_called()
+    stored = processor._store_ai_metadata.call_args.args[2]
+    assert stored["analysis_model"] == "triage" and stored["triage"]["reason"] == "no_text_content"
+
+
+@pytest.mark.unit
+def test_copies_of_a_failed_analysis_are_analyzed_again():
+    """Test that only a stored analysis makes later copies duplicates."""
+    processor = MessageProcessor.__new__(MessageProcessor)
+    processor.triage = _triage()
+    processor.llm_client = Mock(model_name="fake")
+    processor.llm_client.generate_content.side_effect = [
+        LLMError("provider down"),
+        Mock(content='{"summary": "s", "topics": ["finance"], "sentiment": "neutral"}', model="fake"),
+    ]
+    processor.prompt_manager = Mock()
+    processor.prompt_manager.get_prompt_with_version.return_value = ("{message_text}", 1)
+    processor.prompt_manager.format_prompt.side_effect = lambda template, **kwargs: template.format(**kwargs)
+    processor.result_cache = None
+    processor._store_ai_metadata = Mock(return_value=True)
+    text = "Breaking: the central bank raised interest rates by half a point"
+
+    with patch.object(MessageProcessor, "logger", Mock()):
+        assert processor.process_message({"message_id": "1", "channel_id": "1", "message_text": text}) is False
+        assert processor.process_message({"message_id": "2", "channel_id": "1", "message_text": text}) is True
+        assert processor._store_ai_metadata.call_args.args[2]["topics"] == ["finance"]
+        assert processor.process_message({"message_id": "3", "channel_id": "1", "message_text": text}) is True
+    assert processor._store_ai_metadata.call_args.args[2]["triage"]["duplicate_of"] == "1:2"